@@ -14,6 +14,99 @@ long displacementRefMm();
 long displacementMmToward(long dRef, long dNow);
 extern const float TARGET_OFFSET_MM;
 
+// Quadro binario de resultado (comando 'b 1'), decodificado por protocolo_binario.py:
+// A5 5A | versao | tipo | tamanho (u16) | payload | CRC-16/CCITT-FALSE (u16), little-endian.
+// O CRC cobre versao, tipo, tamanho e payload. Os campos seguem a ordem do CSV.
+const byte FRAME_SYNC_0 = 0xA5;
+const byte FRAME_SYNC_1 = 0x5A;
+const byte FRAME_VERSION = 1;
+const byte FRAME_TYPE_RESULT = 1;
+const byte FRAME_TYPE_TRACE = 2;
+
+struct __attribute__((packed)) ResultFrame {
+  float massG;
+  int16_t lbc;
+  int16_t lbt;
+  float angleDeg;
+  float heightM;
+  float muS;
+  float muD;
+  float accelMps2;
+  float velMps;
+  float timeS;
+  uint32_t tStartMs;
+  uint32_t tEndMs;
+  uint32_t samples;
+  float wEnergyJ;
+  float wFrictionJ;
+  uint8_t mpuOk;
+  uint8_t mpuOkAtSlip;
+  uint8_t sonarOk;
+  uint32_t sonarAgeMs;
+  float filterAlpha;
+  float pitchRawDeg;
+  float pitchFiltDeg;
+  float pitchZeroDeg;
+  int32_t sonarRawMm;
+  int32_t sonarFiltMm;
+  int32_t dist0Mm;
+  int32_t distRefMm;
+  float distTargetMm;
+  float offsetMm;
+  int32_t sAbsMm;
+  int32_t sRelMm;
+  int32_t distEndMm;
+  uint8_t sOk;
+  float calibPitchStdDeg;
+  float calibDistStdMm;
+  int16_t calibPitchN;
+  int16_t calibDistN;
+  float tempC;
+};
+static_assert(sizeof(ResultFrame) == 132, "ResultFrame deve ter 132 bytes (ver protocolo_binario.py)");
+static_assert(sizeof(TraceSample) == 6, "TraceSample deve ter 6 bytes (ver protocolo_binario.py)");
+
+uint16_t crc16Update(uint16_t crc, byte b) {
+  crc ^= (uint16_t)b << 8;
+  for (byte i = 0; i < 8; i++) crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : (crc << 1);
+  return crc;
+}
+
+void writeFrame(byte type, const byte *payload, uint16_t len) {
+  byte header[4] = { FRAME_VERSION, type, (byte)(len & 0xFF), (byte)(len >> 8) };
+  uint16_t crc = 0xFFFF;
+  for (byte i = 0; i < 4; i++) crc = crc16Update(crc, header[i]);
+  for (uint16_t i = 0; i < len; i++) crc = crc16Update(crc, payload[i]);
+  Serial.write(FRAME_SYNC_0);
+  Serial.write(FRAME_SYNC_1);
+  Serial.write(header, 4);
+  Serial.write(payload, len);
+  Serial.write((byte)(crc & 0xFF));
+  Serial.write((byte)(crc >> 8));
+}
+
+void traceReset() {
+  trace.tStartMs = motionStartMs;
+  trace.count = 0;
+  trace.stride = 1;
+  traceSeen = 0;
+}
+
+void traceAdd(unsigned long tMs, long sRelMm, float pitchDeg) {
+  if (!traceEnabled) return;
+  if (traceSeen++ % trace.stride != 0) return;
+  if (trace.count == TRACE_MAX_SAMPLES) {
+    // Fica com as amostras pares; a atual cai no novo passo.
+    for (byte i = 0; i < TRACE_MAX_SAMPLES / 2; i++) trace.samples[i] = trace.samples[2 * i];
+    trace.count = TRACE_MAX_SAMPLES / 2;
+    trace.stride *= 2;
+  }
+  TraceSample &a = trace.samples[trace.count++];
+  a.tMs = (uint16_t)tMs;
+  a.sMm = (int16_t)constrain(sRelMm, -32768L, 32767L);
+  a.pitchCdeg = (int16_t)constrain(lroundf(pitchDeg * 100.0f), -32768L, 32767L);
+}
+
 void printCSVHeader() {
   Serial.println(F("massa_g;LBC;LBT;angulo_deg;altura_m;mu_s;mu_d;aceleracao_mps2;velocidade_mps;tempo_s;t_inicio_ms;t_fim_ms;amostras_validas;trabalho_energia_J;trabalho_atrito_J;mpu_ok;mpu_ok_no_escorregamento;sonar_ok;sonar_stale_ms;filtro_alpha;pitch_bruto_deg;pitch_filtrado_deg;pitch_zero_deg;sonar_bruto_mm;sonar_filtrado_mm;dist0_mm;dist_ref_mm;dist_alvo_mm;offset_mm;s_abs_mm;s_rel_mm;dist_fim_mm;s_ok;calib_pitch_std_deg;calib_dist_std_mm;calib_pitch_n;calib_dist_n;temp_mpu_c"));
 }
@@ -65,7 +158,30 @@ void finishAndPrintResults() {
   if (!mpuValid) {
     mu_d = NAN;
   }
+  long s_ok_ref = s_mm;
+  int s_ok = (dUse >= 0) ? ((labs((long)d_target_mm - s_ok_ref) <= 20) ? 1 : 0) : 0;
   if (!headerPrinted) { printCSVHeader(); headerPrinted = true; }
+  if (traceEnabled) {
+    writeFrame(FRAME_TYPE_TRACE, (const byte *)&trace, 8 + trace.count * sizeof(TraceSample));
+  }
+  if (binaryResults) {
+    ResultFrame f;
+    f.massG = mass_g; f.lbc = LBC; f.lbt = LBT;
+    f.angleDeg = thetaDynDeg; f.heightM = dH_m; f.muS = mu_s; f.muD = mu_d;
+    f.accelMps2 = a_est; f.velMps = v_end; f.timeS = motionTime_s;
+    f.tStartMs = tStart; f.tEndMs = tEnd; f.samples = motionSamples;
+    f.wEnergyJ = Wfat_energy; f.wFrictionJ = Wfat_mu;
+    f.mpuOk = mpuOk ? 1 : 0; f.mpuOkAtSlip = mpuOkAtSlip ? 1 : 0; f.sonarOk = sonarOk ? 1 : 0;
+    f.sonarAgeMs = sonarAgeMs; f.filterAlpha = filterAlpha;
+    f.pitchRawDeg = pitchRawDeg; f.pitchFiltDeg = pitchFiltDeg; f.pitchZeroDeg = pitchZeroDeg;
+    f.sonarRawMm = lastSonarRawMm; f.sonarFiltMm = distNowMm; f.dist0Mm = dist0mm; f.distRefMm = refMm;
+    f.distTargetMm = d_target_mm; f.offsetMm = TARGET_OFFSET_MM;
+    f.sAbsMm = s_mm; f.sRelMm = s_rel_mm; f.distEndMm = distEndMm; f.sOk = s_ok;
+    f.calibPitchStdDeg = calibPitchStdDeg; f.calibDistStdMm = calibDistStdMm;
+    f.calibPitchN = calibPitchSamples; f.calibDistN = calibDistSamples; f.tempC = mpuTempC;
+    writeFrame(FRAME_TYPE_RESULT, (const byte *)&f, sizeof(f));
+    return;
+  }
   Serial.print(mass_g, 1); Serial.print(';');
   Serial.print(LBC); Serial.print(';');
   Serial.print(LBT); Serial.print(';');
@@ -98,8 +214,6 @@ void finishAndPrintResults() {
   Serial.print(s_mm); Serial.print(';');
   Serial.print(s_rel_mm); Serial.print(';');
   Serial.print(distEndMm); Serial.print(';');
-  long s_ok_ref = s_mm;
-  int s_ok = (dUse >= 0) ? ((labs((long)d_target_mm - s_ok_ref) <= 20) ? 1 : 0) : 0;
   Serial.print(s_ok); Serial.print(';');
   Serial.print(calibPitchStdDeg, 3); Serial.print(';');
   Serial.print(calibDistStdMm, 1); Serial.print(';');
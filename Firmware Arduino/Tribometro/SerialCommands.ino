@@ -7,7 +7,7 @@ long readSonarMmFresh();
 byte readMPUWhoAmI();
 void scanI2CDevices();
 
-void printHelp() { Serial.println(F("\nComandos: h r z s x p u <ms> j <ms> ip fp scan who | m <g> lbc <val> lbt <val>")); }
+void printHelp() { Serial.println(F("\nComandos: h r z s x p u <ms> j <ms> ip fp scan who | m <g> lbc <val> lbt <val> | b <0|1> tr <0|1>")); }
 
 void printConfig() {
   Serial.print(F("Massa: "));
@@ -78,8 +78,17 @@ void handleCommand(char *cmd) {
   if (cmd[0] == 'l' && cmd[1] == 'b' && cmd[2] == 'c') { LBC = atoi(cmd + 3); Serial.print(F("OK LBC: ")); Serial.println(LBC); return; }
   if (cmd[0] == 'l' && cmd[1] == 'b' && cmd[2] == 't') { LBT = atoi(cmd + 3); Serial.print(F("OK LBT: ")); Serial.println(LBT); return; }
 
+  // tr 1: envia o traço do movimento antes de cada resultado (traco_movimento.py).
+  if (cmd[0] == 't' && cmd[1] == 'r') {
+    traceEnabled = atoi(cmd + 2) != 0;
+    Serial.print(F("OK traco: ")); Serial.println(traceEnabled ? 1 : 0);
+    return;
+  }
   if (c == 't') { LBT = atoi(cmd + 1); return; }
 
+  // b 1: resultados em quadro binario (protocolo_binario.py); b 0: texto CSV.
+  if (c == 'b') { binaryResults = atoi(cmd + 1) != 0; Serial.print(F("OK binario: ")); Serial.println(binaryResults ? 1 : 0); return; }
+
   if (c == 'z') {
     levelStartMs = millis();
     pitchFiltDeg = readMPUPitchDegSigned();
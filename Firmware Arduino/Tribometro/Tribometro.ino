@@ -194,6 +194,20 @@ float Wfat_energy = 0.0f;
 float Wfat_mu = 0.0f;
 float motionTime_s = 0.0f;
 bool headerPrinted = false;
+bool binaryResults = false;
+// Traço do movimento ('tr 1'): amostras usadas no ajuste de a_est, enviadas em quadro
+// binario antes do resultado. Com o buffer cheio, descarta uma a cada duas e dobra o passo.
+const byte TRACE_MAX_SAMPLES = 64;
+struct __attribute__((packed)) TraceSample { uint16_t tMs; int16_t sMm; int16_t pitchCdeg; };
+struct __attribute__((packed)) TraceFrame {
+  uint32_t tStartMs;
+  uint16_t count;
+  uint16_t stride;
+  TraceSample samples[TRACE_MAX_SAMPLES];
+};
+bool traceEnabled = false;
+TraceFrame trace;
+unsigned long traceSeen = 0;
 double sum_t2s = 0.0;
 double sum_t4  = 0.0;
 unsigned long motionSamples = 0;
@@ -400,6 +414,7 @@ void loop() {
         motorEnable = false;
           motionStartMs = millis();
           distEndMm = -1;
+        traceReset();
         sum_t2s = 0.0;
         sum_t4  = 0.0;
         motionSamples = 0;
@@ -422,6 +437,7 @@ void loop() {
         motionStartMs = millis();
         distEndMm = -1;
         motionEndMs = motionStartMs;
+        traceReset();
         Serial.println(F("Ângulo máximo atingido (sem movimento)."));
         finishAndPrintResults();
         state = DONE;
@@ -460,6 +476,7 @@ void loop() {
         sum_t2s += t2 * s_m;
         sum_t4  += t2 * t2;
         motionSamples++;
+        traceAdd(millis() - motionStartMs, s_rel_mm, pitchFiltDeg - pitchZeroDeg);
       }
 
       bool useAbsTarget = (distInitialMm >= 0 && distFinalMm >= 0);
@@ -1,10 +1,57 @@
+import argparse
 import os
 import sys
-import math
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
+import matplotlib
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from cache_graficos import CacheGraficos
+from estatistica_bootstrap import CONFIANCA_PADRAO, REAMOSTRAGENS_PADRAO, intervalos_bootstrap
+from exportacao_excel import calcular_larguras, gravar_arquivo_lateral, gravar_excel_rapido, limitar_planilha
+from perfil_etapas import ETAPAS_ANALISE, MODOS_MEMORIA, SEM_PERFIL, PerfilEtapas, caminho_relatorio_padrao
+from resumo_incremental import COLUNAS_CRITICAS, COLUNAS_GRUPO, CRITERIOS_VALIDADE
+
+# Colunas usadas pela análise; o armazenamento colunar carrega só estas.
+COLUNAS_ANALISE = [
+    'massa_g', 'LBC', 'LBT', 'angulo_deg', 'mu_s', 'mu_d', 'tempo_s', 's_abs_mm',
+    'trabalho_energia_J', 'trabalho_atrito_J', 'mpu_ok', 'mpu_ok_no_escorregamento',
+    'sonar_ok', 'sonar_stale_ms', 's_ok', 'Timestamp_PC',
+]
+
+AGREGACOES_RESUMO = {
+    'mu_s_media': ('mu_s_final', 'mean'),
+    'mu_s_std': ('mu_s_final', 'std'),
+    'mu_s_count': ('mu_s_final', 'count'),
+    'mu_d_media': ('mu_d_final', 'mean'),
+    'mu_d_std': ('mu_d_final', 'std'),
+    'mu_d_count': ('mu_d_final', 'count'),
+    'tempo_media': ('tempo_s', 'mean'),
+    'tempo_std': ('tempo_s', 'std'),
+    'distancia_media': ('s_abs_mm', 'mean'),
+    'angulo_media': ('angulo_deg', 'mean'),
+    'trabalho_energia_media': ('trabalho_energia_J', 'mean'),
+    'trabalho_energia_std': ('trabalho_energia_J', 'std'),
+    'trabalho_atrito_media': ('trabalho_atrito_J', 'mean'),
+    'trabalho_atrito_std': ('trabalho_atrito_J', 'std'),
+}
+
+DIR_SAIDA_PADRAO = "saida_analise"
+
+# Abaixo disso o custo de subir os processos supera o ganho.
+MIN_TAREFAS_PARALELAS = 4
+MAX_TRABALHADORES_PADRAO = 8
+
+# Semente fixa por padrão: reanalisar os mesmos dados reproduz os mesmos intervalos.
+SEMENTE_BOOTSTRAP_PADRAO = 0
+
+# 'completo' usa o ExcelWriter do pandas; 'rapido' grava em modo write-only (exportacao_excel).
+MODOS_EXCEL = ('completo', 'rapido')
+
 LEGENDAS = {
     'Variável': [
         'massa_g', 'LBC', 'LBT', 'repeticao',
@@ -25,7 +72,9 @@ LEGENDAS = {
         'distancia_media', 'angulo_media',
         'trabalho_energia_media', 'trabalho_energia_std',
         'trabalho_atrito_media', 'trabalho_atrito_std',
-        'comparacao_trabalho_delta_J'
+        'comparacao_trabalho_delta_J',
+        'mu_s_ic_perc_inf', 'mu_s_ic_perc_sup', 'mu_s_ic_bca_inf', 'mu_s_ic_bca_sup',
+        'mu_d_ic_perc_inf', 'mu_d_ic_perc_sup', 'mu_d_ic_bca_inf', 'mu_d_ic_bca_sup',
     ],
     'Descrição': [
         'Massa do conjunto deslizante (corpo de prova + pesos) em gramas.',
@@ -71,7 +120,15 @@ LEGENDAS = {
         'Desvio padrão da perda de energia (J) para o grupo.',
         'Média do trabalho da força de atrito (J) para o grupo.',
         'Desvio padrão do trabalho da força de atrito (J) para o grupo.',
-        'Comparação (delta) entre trabalho de atrito e perda de energia (J).'
+        'Comparação (delta) entre trabalho de atrito e perda de energia (J).',
+        'Limite inferior do IC 95% bootstrap (percentil) da média de mu_s no grupo.',
+        'Limite superior do IC 95% bootstrap (percentil) da média de mu_s no grupo.',
+        'Limite inferior do IC 95% bootstrap BCa (corrigido de viés e assimetria) da média de mu_s.',
+        'Limite superior do IC 95% bootstrap BCa (corrigido de viés e assimetria) da média de mu_s.',
+        'Limite inferior do IC 95% bootstrap (percentil) da média de mu_d no grupo.',
+        'Limite superior do IC 95% bootstrap (percentil) da média de mu_d no grupo.',
+        'Limite inferior do IC 95% bootstrap BCa (corrigido de viés e assimetria) da média de mu_d.',
+        'Limite superior do IC 95% bootstrap BCa (corrigido de viés e assimetria) da média de mu_d.',
     ]
 }
 
@@ -89,13 +146,65 @@ def ajustar_largura_colunas(writer, sheet_name, df, padding=2, max_width=50):
     worksheet = writer.sheets.get(sheet_name)
     if worksheet is None:
         return
-    for idx, coluna in enumerate(df.columns, start=1):
-        valores = df[coluna].astype(str).tolist()
-        max_len = max([len(str(coluna))] + [len(v) for v in valores]) if valores else len(str(coluna))
-        largura = min(max_len + padding, max_width)
+    for idx, largura in enumerate(calcular_larguras(df, padding, max_width), start=1):
         worksheet.column_dimensions[get_column_letter(idx)].width = largura
 
 
+def exportar_excel(dir_saida, resumo, df_raw, df_limpos, modo='completo', max_linhas=None):
+    """Gera analise_tribometro.xlsx. Planilhas de dados acima de ``max_linhas`` (0 = omitir)
+    são cortadas no Excel e gravadas inteiras em analise_<planilha>.parquet/.csv."""
+    if modo not in MODOS_EXCEL:
+        raise ValueError(f"Modo de exportação inválido: {modo} (use {', '.join(MODOS_EXCEL)})")
+    output_excel = os.path.join(dir_saida, 'analise_tribometro.xlsx')
+    df_legenda = pd.DataFrame(LEGENDAS)
+    planilhas = [('resumo', resumo, 50)]
+    for nome, df in (('dados_raw', df_raw), ('dados_limpos', df_limpos)):
+        df_excel, cortado = limitar_planilha(df, max_linhas)
+        if not cortado:
+            # Remove arquivo lateral de uma exportação anterior que foi cortada.
+            for extensao in ('.parquet', '.csv'):
+                antigo = os.path.join(dir_saida, f'analise_{nome}{extensao}')
+                if os.path.isfile(antigo):
+                    os.remove(antigo)
+        else:
+            lateral = gravar_arquivo_lateral(df, os.path.join(dir_saida, f'analise_{nome}'))
+            if df_excel is None:
+                print(f"Planilha '{nome}' omitida do Excel; dados completos em: {lateral}")
+            else:
+                print(f"Planilha '{nome}' limitada a {len(df_excel)} de {len(df)} linhas; "
+                      f"dados completos em: {lateral}")
+        if df_excel is not None:
+            planilhas.append((nome, df_excel, 50))
+    planilhas.append(('legenda', df_legenda, 80))
+
+    # Grava num temporário e troca no fim: o Excel anterior fica intacto se a escrita falhar.
+    temporario = os.path.join(dir_saida, 'analise_tribometro.tmp.xlsx')
+    try:
+        if modo == 'rapido':
+            gravar_excel_rapido(temporario, planilhas)
+        else:
+            with pd.ExcelWriter(temporario, engine='openpyxl') as writer:
+                for nome, df, _ in planilhas:
+                    df.to_excel(writer, sheet_name=nome, index=False)
+                for nome, df, largura_maxima in planilhas:
+                    ajustar_largura_colunas(writer, nome, df, max_width=largura_maxima)
+        os.replace(temporario, output_excel)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+    return output_excel
+
+
+def salvar_figura(caminho_saida, dpi):
+    # Grava num temporário e troca de uma vez: a galeria web nunca lista um PNG
+    # pela metade, e a pasta muda de mtime a cada gráfico refeito.
+    raiz, extensao = os.path.splitext(caminho_saida)
+    temporario = f"{raiz}.tmp{extensao}"
+    plt.savefig(temporario, dpi=dpi)
+    plt.close()
+    os.replace(temporario, caminho_saida)
+
+
 def plotar_grafico_atrito(massa_g, angulo_deg, mu_s, mu_d, titulo, titulo_extra, caminho_saida):
     if massa_g is None or angulo_deg is None:
         return False
@@ -106,8 +215,8 @@ def plotar_grafico_atrito(massa_g, angulo_deg, mu_s, mu_d, titulo, titulo_extra,
         return False
 
     theta_max = max(35.0, angulo_deg * 1.2)
-    angulos = [i * theta_max / 200.0 for i in range(201)]
-    tan_thetas = [math.tan(math.radians(a)) for a in angulos]
+    tan_thetas = np.tan(np.radians(np.linspace(0.0, theta_max, 201)))
+    tan_max = tan_thetas[-1]
 
     with plt.rc_context({
         "font.size": 11,
@@ -122,11 +231,11 @@ def plotar_grafico_atrito(massa_g, angulo_deg, mu_s, mu_d, titulo, titulo_extra,
             plt.axhline(mu_s_val, color="#c0392b", linewidth=2.2, label=f"μ_s = {mu_s_val:.3f}")
         if mu_d_val is not None:
             plt.axhline(mu_d_val, color="#e67e22", linewidth=2.2, label=f"μ_d = {mu_d_val:.3f}")
-        tan_theta_ensaio = math.tan(math.radians(angulo_deg))
+        tan_theta_ensaio = np.tan(np.radians(angulo_deg))
         plt.axvline(tan_theta_ensaio, color="#555555", linestyle="--", linewidth=1)
         plt.text(
             tan_theta_ensaio * 1.02,
-            max(tan_thetas) * 0.05,
+            tan_max * 0.05,
             f"tan(θ)={tan_theta_ensaio:.3f}\nθ={angulo_deg:.2f}°",
             fontsize=10,
         )
@@ -134,151 +243,56 @@ def plotar_grafico_atrito(massa_g, angulo_deg, mu_s, mu_d, titulo, titulo_extra,
         plt.xlabel("tan(θ) do plano inclinado (–)")
         plt.ylabel("Coeficiente de atrito (–)")
         plt.title(f"{titulo}\n{titulo_extra}")
-        limite_max = max([max(tan_thetas), mu_s_val or 0.0, mu_d_val or 0.0])
-        plt.xlim(0, max(tan_thetas) * 1.05)
+        limite_max = max(tan_max, mu_s_val or 0.0, mu_d_val or 0.0)
+        plt.xlim(0, tan_max * 1.05)
         plt.ylim(0, limite_max * 1.15)
         plt.legend(frameon=False)
 
         plt.tight_layout()
-        plt.savefig(caminho_saida, dpi=200)
-        plt.close()
+        salvar_figura(caminho_saida, dpi=200)
     return True
 
 
-def executar_analise(caminho_csv='resultados_tribometro.csv'):
-    print("Iniciando análise de dados do Tribômetro...")
-
-    dir_saida = "saida_analise"
-    dir_graficos = os.path.join(dir_saida, "graficos")
-    dir_graficos_resumo = os.path.join(dir_graficos, "resumo")
-    os.makedirs(dir_graficos_resumo, exist_ok=True)
-
-    if not os.path.isfile(caminho_csv):
-        print(f"Arquivo não encontrado: {caminho_csv}")
-        return 1
-
-    try:
-        df_raw = pd.read_csv(caminho_csv, sep=';', decimal='.')
-        print(f"Dados carregados: {len(df_raw)} linhas.")
-    except Exception as e:
-        print(f"Erro ao ler o arquivo CSV: {e}")
-        return 1
-
-    criterios_validade = (
-        (df_raw['mpu_ok'] == 1) &
-        (df_raw['sonar_ok'] == 1) &
-        (df_raw['s_ok'] == 1) &
-        (df_raw['sonar_stale_ms'] == 0)
-    )
-
-    df_limpos = df_raw[criterios_validade].copy()
-
-    cols_criticas = ['massa_g', 'LBC', 'LBT', 'mu_d', 'tempo_s']
-    df_limpos.dropna(subset=cols_criticas, inplace=True)
-
-    print(f"Dados limpos: {len(df_limpos)} linhas válidas (de {len(df_raw)} originais).")
-
-    df_limpos['mu_s_final'] = df_limpos.apply(
-        lambda row: row['mu_s'] if row['mpu_ok_no_escorregamento'] == 1 else None,
-        axis=1
-    )
-
-    df_limpos['mu_d_final'] = df_limpos['mu_d']
-
-    group_cols = ['LBT', 'LBC', 'massa_g']
-    resumo = df_limpos.groupby(group_cols).agg(
-        mu_s_media=('mu_s_final', 'mean'),
-        mu_s_std=('mu_s_final', 'std'),
-        mu_s_count=('mu_s_final', 'count'),
-        mu_d_media=('mu_d_final', 'mean'),
-        mu_d_std=('mu_d_final', 'std'),
-        mu_d_count=('mu_d_final', 'count'),
-        tempo_media=('tempo_s', 'mean'),
-        tempo_std=('tempo_s', 'std'),
-        distancia_media=('s_abs_mm', 'mean'),
-        angulo_media=('angulo_deg', 'mean'),
-        trabalho_energia_media=('trabalho_energia_J', 'mean'),
-        trabalho_energia_std=('trabalho_energia_J', 'std'),
-        trabalho_atrito_media=('trabalho_atrito_J', 'mean'),
-        trabalho_atrito_std=('trabalho_atrito_J', 'std'),
-    ).reset_index()
-
-    resumo['comparacao_trabalho_delta_J'] = (
-        resumo['trabalho_atrito_media'] - resumo['trabalho_energia_media']
-    )
-    resumo = resumo.round(4)
-
-    output_excel = os.path.join(dir_saida, 'analise_tribometro.xlsx')
-    try:
-        with pd.ExcelWriter(output_excel, engine='openpyxl') as writer:
-            resumo.to_excel(writer, sheet_name='resumo', index=False)
-            df_raw.to_excel(writer, sheet_name='dados_raw', index=False)
-            df_limpos.to_excel(writer, sheet_name='dados_limpos', index=False)
-            adicionar_legenda_excel(writer)
-            ajustar_largura_colunas(writer, 'resumo', resumo)
-            ajustar_largura_colunas(writer, 'dados_raw', df_raw)
-            ajustar_largura_colunas(writer, 'dados_limpos', df_limpos)
-            df_legenda = pd.DataFrame(LEGENDAS)
-            ajustar_largura_colunas(writer, 'legenda', df_legenda, max_width=80)
-        print(f"Arquivo Excel gerado com sucesso: {output_excel}")
-    except ImportError:
-        print("Biblioteca 'openpyxl' não encontrada. Salvando resumo em CSV.")
-        resumo.to_csv(os.path.join(dir_saida, 'analise_resumo.csv'), sep=';', decimal=',', index=False)
-        df_limpos.to_csv(os.path.join(dir_saida, 'analise_dados_limpos.csv'), sep=';', decimal=',', index=False)
-
+def aplicar_tema():
     sns.set_theme(style="whitegrid", context="talk")
 
-    plt.figure(figsize=(10, 6))
-    df_plot_mus = df_limpos.dropna(subset=['mu_s_final'])
-    sns.barplot(
-        data=df_plot_mus,
-        x='LBT',
-        y='mu_s_final',
-        hue='massa_g',
-        palette="viridis",
-        estimator='mean',
-        errorbar='sd',
-        capsize=0.2,
-    )
-    plt.title('Atrito Estático (mu_s) por Lixa da Base')
-    plt.ylabel('Coeficiente de Atrito Estático (mu_s)')
-    plt.xlabel('Lixa Base (LBT)')
-    plt.legend(title='Massa (g)', bbox_to_anchor=(1.02, 1), loc='upper left', borderaxespad=0)
-    plt.tight_layout()
-    plt.savefig(os.path.join(dir_graficos, 'grafico_01_media_mu_s.png'), dpi=300)
-    plt.close()
 
+def plotar_barras_mu(df, coluna_y, titulo, rotulo_y, caminho_saida):
     plt.figure(figsize=(10, 6))
     sns.barplot(
-        data=df_limpos,
+        data=df,
         x='LBT',
-        y='mu_d_final',
+        y=coluna_y,
         hue='massa_g',
         palette="viridis",
         estimator='mean',
         errorbar='sd',
         capsize=0.2,
     )
-    plt.title('Atrito Dinâmico (mu_d) por Lixa da Base')
-    plt.ylabel('Coeficiente de Atrito Dinâmico (mu_d)')
+    plt.title(titulo)
+    plt.ylabel(rotulo_y)
     plt.xlabel('Lixa Base (LBT)')
     plt.legend(title='Massa (g)', bbox_to_anchor=(1.02, 1), loc='upper left', borderaxespad=0)
     plt.tight_layout()
-    plt.savefig(os.path.join(dir_graficos, 'grafico_02_media_mu_d.png'), dpi=300)
-    plt.close()
+    salvar_figura(caminho_saida, dpi=300)
+    return True
 
+
+def plotar_dispersao_mu_d(df, caminho_saida):
     plt.figure(figsize=(10, 6))
-    sns.scatterplot(data=df_limpos, x='massa_g', y='mu_d_final', hue='LBT', style='LBC', s=150, palette="deep")
+    sns.scatterplot(data=df, x='massa_g', y='mu_d_final', hue='LBT', style='LBC', s=150, palette="deep")
     plt.title('Dispersão: mu_d vs Massa')
     plt.ylabel('Coeficiente de Atrito Dinâmico (mu_d)')
     plt.xlabel('Massa (g)')
     plt.legend(title='LBT / LBC', bbox_to_anchor=(1.02, 1), loc='upper left', borderaxespad=0)
     plt.tight_layout()
-    plt.savefig(os.path.join(dir_graficos, 'grafico_03_scatter_mu_d_massa.png'), dpi=300)
-    plt.close()
+    salvar_figura(caminho_saida, dpi=300)
+    return True
+
 
+def plotar_delta_trabalho(df, caminho_saida):
     plt.figure(figsize=(10, 6))
-    df_trabalho = df_limpos.dropna(subset=['trabalho_energia_J', 'trabalho_atrito_J']).copy()
+    df_trabalho = df.dropna(subset=['trabalho_energia_J', 'trabalho_atrito_J']).copy()
     df_trabalho['delta_trabalho_J'] = df_trabalho['trabalho_atrito_J'] - df_trabalho['trabalho_energia_J']
     sns.scatterplot(
         data=df_trabalho,
@@ -295,8 +309,55 @@ def executar_analise(caminho_csv='resultados_tribometro.csv'):
     plt.ylabel('Delta de trabalho (J)')
     plt.legend(title='LBT / LBC', bbox_to_anchor=(1.02, 1), loc='upper left', borderaxespad=0)
     plt.tight_layout()
-    plt.savefig(os.path.join(dir_graficos, 'grafico_04_delta_trabalho.png'), dpi=300)
-    plt.close()
+    salvar_figura(caminho_saida, dpi=300)
+    return True
+
+
+def plotar_heatmap_delta(tabela, massa_val, caminho_saida):
+    plt.figure(figsize=(10, 6))
+    sns.heatmap(
+        tabela,
+        annot=True,
+        fmt=".3f",
+        cmap="vlag",
+        center=0.0,
+        linewidths=0.4,
+        linecolor="#e6e6e6",
+        cbar_kws={"label": "Delta trabalho (J)"},
+    )
+    plt.title(f'Delta trabalho (atr - energia) | m={massa_val:.1f} g')
+    plt.xlabel('LBC')
+    plt.ylabel('LBT')
+    plt.tight_layout()
+    salvar_figura(caminho_saida, dpi=300)
+    return True
+
+
+def montar_tarefas_graficos(df_limpos, resumo, dir_graficos, dir_graficos_resumo):
+    """Lista de (função, argumentos) independentes, cada uma gravando um PNG de caminho fixo.
+
+    Cada tarefa recebe só as colunas de que precisa, para o envio aos processos ser barato.
+    """
+    tarefas = []
+    df_mu = df_limpos[['LBT', 'LBC', 'massa_g', 'mu_s_final', 'mu_d_final']]
+    tarefas.append((plotar_barras_mu, (
+        df_mu.dropna(subset=['mu_s_final'])[['LBT', 'massa_g', 'mu_s_final']], 'mu_s_final',
+        'Atrito Estático (mu_s) por Lixa da Base', 'Coeficiente de Atrito Estático (mu_s)',
+        os.path.join(dir_graficos, 'grafico_01_media_mu_s.png'),
+    )))
+    tarefas.append((plotar_barras_mu, (
+        df_mu[['LBT', 'massa_g', 'mu_d_final']], 'mu_d_final',
+        'Atrito Dinâmico (mu_d) por Lixa da Base', 'Coeficiente de Atrito Dinâmico (mu_d)',
+        os.path.join(dir_graficos, 'grafico_02_media_mu_d.png'),
+    )))
+    tarefas.append((plotar_dispersao_mu_d, (
+        df_mu[['LBT', 'LBC', 'massa_g', 'mu_d_final']],
+        os.path.join(dir_graficos, 'grafico_03_scatter_mu_d_massa.png'),
+    )))
+    tarefas.append((plotar_delta_trabalho, (
+        df_limpos[['LBT', 'LBC', 'massa_g', 'trabalho_energia_J', 'trabalho_atrito_J']],
+        os.path.join(dir_graficos, 'grafico_04_delta_trabalho.png'),
+    )))
 
     for massa_val in sorted(resumo['massa_g'].unique()):
         df_massa = resumo[resumo['massa_g'] == massa_val]
@@ -305,57 +366,409 @@ def executar_analise(caminho_csv='resultados_tribometro.csv'):
         tabela = df_massa.pivot(index='LBT', columns='LBC', values='comparacao_trabalho_delta_J')
         if tabela.empty:
             continue
-        plt.figure(figsize=(10, 6))
-        sns.heatmap(
-            tabela,
-            annot=True,
-            fmt=".3f",
-            cmap="vlag",
-            center=0.0,
-            linewidths=0.4,
-            linecolor="#e6e6e6",
-            cbar_kws={"label": "Delta trabalho (J)"},
-        )
-        plt.title(f'Delta trabalho (atr - energia) | m={massa_val:.1f} g')
-        plt.xlabel('LBC')
-        plt.ylabel('LBT')
-        plt.tight_layout()
         massa_tag = f"{massa_val:.1f}".replace('.', 'p')
-        plt.savefig(os.path.join(dir_graficos, f"grafico_05_heatmap_delta_m{massa_tag}.png"), dpi=300)
-        plt.close()
-
-    print(f"Gráficos salvos em: {dir_graficos}")
-
-    for _, linha in resumo.iterrows():
-        lbt_val = linha['LBT']
-        lbc_val = linha['LBC']
-        massa_val = linha['massa_g']
-        mu_s_media = linha['mu_s_media']
-        mu_d_media = linha['mu_d_media']
-        angulo_media = linha['angulo_media']
-
-        titulo = "Atrito estático e dinâmico do ensaio"
+        tarefas.append((plotar_heatmap_delta, (
+            tabela, massa_val,
+            os.path.join(dir_graficos, f"grafico_05_heatmap_delta_m{massa_tag}.png"),
+        )))
+
+    # LBT/LBC como float, como o iterrows fazia: mantém os nomes de arquivo existentes (LBC1.0_LBT2.0).
+    linhas_resumo = zip(
+        resumo['LBT'].astype(float), resumo['LBC'].astype(float), resumo['massa_g'],
+        resumo['mu_s_media'], resumo['mu_d_media'], resumo['angulo_media'],
+    )
+    for lbt_val, lbc_val, massa_val, mu_s_media, mu_d_media, angulo_media in linhas_resumo:
         titulo_extra = f"LBC={lbc_val} | LBT={lbt_val} | m={massa_val:.1f} g"
         massa_tag = f"{massa_val:.1f}".replace('.', 'p')
         caminho_saida = os.path.join(
             dir_graficos_resumo,
             f"grafico_mu_vs_tan_LBC{lbc_val}_LBT{lbt_val}_m{massa_tag}.png"
         )
+        tarefas.append((plotar_grafico_atrito, (
+            massa_val, angulo_media, mu_s_media, mu_d_media,
+            "Atrito estático e dinâmico do ensaio", titulo_extra, caminho_saida,
+        )))
+    return tarefas
+
+
+def _iniciar_trabalhador():
+    # Com --perfil o filho herda o tracemalloc do pai; aqui ele só atrasaria os gráficos.
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    matplotlib.use("Agg")
+    aplicar_tema()
+
+
+def _executar_tarefa(tarefa):
+    funcao, argumentos = tarefa
+    inicio = time.perf_counter()
+    inicio_cpu = time.process_time()
+    # plotar_grafico_atrito retorna False quando não há o que desenhar; os outros retornam None.
+    desenhou = funcao(*argumentos) is not False
+    if not desenhou:
+        # Não deixa o PNG de uma execução anterior passar pelo gráfico atual.
+        try:
+            os.remove(argumentos[-1])
+        except OSError:
+            pass
+    return argumentos[-1], time.perf_counter() - inicio, time.process_time() - inicio_cpu, desenhou
+
+
+def inteiro_do_ambiente(nome, padrao, se_nao_numerico):
+    """Inteiro >= 0 da variável ``nome`` (ausente: ``padrao``).
+
+    Valor inválido não derruba a análise: avisa e usa ``se_nao_numerico`` (texto
+    como "off") ou ``padrao`` (número negativo).
+    """
+    texto = os.environ.get(nome, "").strip()
+    if not texto:
+        return padrao
+    descrever = lambda v: "o padrão" if v is None else v
+    try:
+        valor = int(texto)
+    except ValueError:
+        print(f"[AVISO] {nome}={texto!r} não é um número inteiro; usando {descrever(se_nao_numerico)}.")
+        return se_nao_numerico
+    if valor < 0:
+        print(f"[AVISO] {nome}={valor} é negativo; usando {descrever(padrao)}.")
+        return padrao
+    return valor
+
+
+def obter_trabalhadores(trabalhadores=None):
+    """Número de processos: argumento, TRIBO_TRABALHADORES_GRAFICOS ou nº de CPUs (até 8)."""
+    if trabalhadores is None:
+        trabalhadores = os.environ.get("TRIBO_TRABALHADORES_GRAFICOS")
+    if trabalhadores is None or str(trabalhadores).strip() == "":
+        return min(MAX_TRABALHADORES_PADRAO, os.cpu_count() or 1)
+    return max(1, int(trabalhadores))
+
+
+def renderizar_graficos(tarefas, trabalhadores=None, cache=None, progresso=None):
+    """Executa as tarefas em série (1 trabalhador) ou num pool de processos com backend Agg.
+
+    Com ``cache`` (CacheGraficos), só refaz os gráficos cujas entradas mudaram e
+    remove os PNGs que não pertencem mais a nenhuma tarefa.
+    ``progresso(feitos, total)`` é chamado após cada gráfico; se levantar uma
+    exceção, os gráficos ainda não iniciados são descartados e o manifesto
+    registra só os que foram gravados.
+    Retorna um relatório com o tempo total, o tempo de cada gráfico e, em
+    ``por_funcao``, parede e CPU somadas por função de plotagem.
+    """
+    inicio = time.perf_counter()
+    pendentes, chaves, reaproveitados = tarefas, {}, 0
+    if cache is not None:
+        pendentes, chaves, reaproveitados = cache.filtrar(tarefas)
+    trabalhadores = min(obter_trabalhadores(trabalhadores), max(1, len(pendentes)))
+    if len(pendentes) < MIN_TAREFAS_PARALELAS:
+        trabalhadores = 1
+    tempos = []
+    try:
+        if trabalhadores == 1:
+            aplicar_tema()
+            for tarefa in pendentes:
+                tempos.append(_executar_tarefa(tarefa))
+                if progresso is not None:
+                    progresso(len(tempos), len(pendentes))
+        else:
+            # Os processos filhos herdam o ambiente: já sobem com o backend sem janela.
+            os.environ.setdefault("MPLBACKEND", "Agg")
+            pool = ProcessPoolExecutor(max_workers=trabalhadores, initializer=_iniciar_trabalhador)
+            try:
+                for tempo in pool.map(_executar_tarefa, pendentes):
+                    tempos.append(tempo)
+                    if progresso is not None:
+                        progresso(len(tempos), len(pendentes))
+            finally:
+                # Numa interrupção, espera só os gráficos em andamento terminarem de gravar.
+                pool.shutdown(wait=True, cancel_futures=True)
+    finally:
+        removidos = 0
+        if cache is not None:
+            # Só entram no manifesto as tarefas que chegaram ao fim (com ou sem PNG).
+            for caminho, _, _, desenhou in tempos:
+                cache.registrar(caminho, chaves[caminho], desenhou)
+            diretorios = sorted({os.path.dirname(argumentos[-1]) for _, argumentos in tarefas})
+            removidos = cache.limpar_obsoletos(diretorios, chaves)
+            cache.salvar()
+    total = time.perf_counter() - inicio
+    funcoes = {argumentos[-1]: funcao.__name__ for funcao, argumentos in pendentes}
+    por_funcao = {}
+    for caminho, parede, cpu, _ in tempos:
+        soma = por_funcao.setdefault(funcoes[caminho], {"graficos": 0, "parede_s": 0.0, "cpu_s": 0.0})
+        soma["graficos"] += 1
+        soma["parede_s"] += parede
+        soma["cpu_s"] += cpu
+    return {
+        "trabalhadores": trabalhadores,
+        "tarefas": len(tarefas),
+        "renderizados": len(tempos),
+        "reaproveitados": reaproveitados,
+        "removidos": removidos,
+        "total_s": total,
+        "cpu_s": sum(cpu for _, _, cpu, _ in tempos),
+        "por_grafico_s": {os.path.basename(caminho): t for caminho, t, _, _ in sorted(tempos)},
+        "por_funcao": por_funcao,
+    }
+
+
+def formatar_relatorio_graficos(relatorio):
+    """O tempo de CPU somado das tarefas aproxima quanto o caminho em série levaria.
+
+    É só uma estimativa (não um speedup medido): ignora o tempo fora da CPU e
+    o custo de subir os processos, que o caminho em série não pagaria.
+    """
+    if relatorio["renderizados"]:
+        texto = (f"{relatorio['renderizados']} de {relatorio['tarefas']} gráficos gerados em "
+                 f"{relatorio['total_s']:.1f} s com {relatorio['trabalhadores']} processo(s) "
+                 f"(CPU somada {relatorio['cpu_s']:.1f} s")
+        if relatorio["trabalhadores"] > 1 and relatorio["total_s"]:
+            ganho = relatorio["cpu_s"] / relatorio["total_s"]
+            texto += f"; estimativa pela CPU, não medida: ~{ganho:.1f}x sobre o caminho em série"
+        texto += ")."
+    else:
+        texto = f"Nenhum dos {relatorio['tarefas']} gráficos precisou ser refeito."
+    if relatorio.get("reaproveitados") or relatorio.get("removidos"):
+        texto += (f" {relatorio['reaproveitados']} reaproveitado(s) do cache, "
+                  f"{relatorio['removidos']} obsoleto(s) removido(s).")
+    return texto
+
+
+def normalizar_tipos(df_raw):
+    """Descarta cabeçalhos repetidos lidos como dados e converte as colunas do firmware em números.
+
+    Todas, não só as da análise: texto misturado com float em dados_raw faz o
+    arquivo lateral em Parquet falhar quando a planilha é cortada.
+    """
+    if 'massa_g' in df_raw.columns and df_raw['massa_g'].dtype == object:
+        df_raw = df_raw[df_raw['massa_g'].astype(str).str.strip() != 'massa_g']
+    convertidas = {
+        coluna: pd.to_numeric(df_raw[coluna], errors='coerce')
+        for coluna in df_raw.columns
+        if coluna != 'Timestamp_PC' and df_raw[coluna].dtype == object
+    }
+    if convertidas:
+        df_raw = df_raw.assign(**convertidas)
+    return df_raw
+
+
+def processar_dados(df_raw):
+    """Limpeza, colunas derivadas e resumo por grupo, só com operações por coluna.
+
+    Não lê nem grava arquivos. Retorna (df_limpos, resumo).
+    """
+    df_limpos = limpar_dados(normalizar_tipos(df_raw))
+    return df_limpos, resumir_grupos(df_limpos)
+
+
+def limpar_dados(df_raw):
+    """Linhas válidas pelos CRITERIOS_VALIDADE, com mu_s_final e mu_d_final.
+
+    Espera ``df_raw`` já passado por normalizar_tipos (executar_analise precisa
+    dele normalizado também para o Excel; converter de novo aqui dobraria o custo).
+    """
+    validos = np.ones(len(df_raw), dtype=bool)
+    for coluna, valor in CRITERIOS_VALIDADE:
+        validos &= (df_raw[coluna] == valor).to_numpy()
+    validos &= df_raw[list(COLUNAS_CRITICAS)].notna().all(axis=1).to_numpy()
+
+    df_limpos = df_raw[validos].copy()
+    for coluna in ('LBT', 'LBC'):
+        valores = df_limpos[coluna].to_numpy()
+        if valores.dtype.kind == 'f' and np.array_equal(valores, np.round(valores)):
+            df_limpos[coluna] = valores.astype(np.int64)
+
+    df_limpos['mu_s_final'] = df_limpos['mu_s'].where(df_limpos['mpu_ok_no_escorregamento'] == 1)
+    df_limpos['mu_d_final'] = df_limpos['mu_d']
+    return df_limpos
 
-        plotar_grafico_atrito(
-            massa_val,
-            angulo_media,
-            mu_s_media,
-            mu_d_media,
-            titulo,
-            titulo_extra,
-            caminho_saida
-        )
 
+def resumir_grupos(df_limpos):
+    """AGREGACOES_RESUMO por COLUNAS_GRUPO, com o delta de trabalho."""
+    resumo = df_limpos.groupby(list(COLUNAS_GRUPO)).agg(**AGREGACOES_RESUMO).reset_index()
+    resumo['comparacao_trabalho_delta_J'] = (
+        resumo['trabalho_atrito_media'] - resumo['trabalho_energia_media']
+    )
+    return resumo.round(4)
+
+
+def adicionar_intervalos_confianca(resumo, df_limpos, reamostragens=REAMOSTRAGENS_PADRAO,
+                                   semente=SEMENTE_BOOTSTRAP_PADRAO, trabalhadores=None):
+    """Acrescenta ao resumo os IC bootstrap (percentil e BCa) de mu_s e mu_d, logo após cada contagem."""
+    if not reamostragens or resumo.empty:
+        return resumo
+    ic = intervalos_bootstrap(df_limpos, COLUNAS_GRUPO, reamostragens=reamostragens, confianca=CONFIANCA_PADRAO,
+                              semente=semente, trabalhadores=obter_trabalhadores(trabalhadores))
+    # Mesmo groupby (ordenado) que montou o resumo: as linhas já estão alinhadas.
+    resumo = resumo.copy()
+    for prefixo in ('mu_s', 'mu_d'):
+        posicao = resumo.columns.get_loc(f'{prefixo}_count') + 1
+        for sufixo in ('ic_bca_sup', 'ic_bca_inf', 'ic_perc_sup', 'ic_perc_inf'):
+            coluna = f'{prefixo}_{sufixo}'
+            resumo.insert(posicao, coluna, ic[coluna].round(4).to_numpy())
+    return resumo
+
+
+def executar_analise(caminho_csv='resultados_tribometro.csv', trabalhadores=None, usar_cache=True,
+                     modo_excel=None, max_linhas_excel=None, progresso=None,
+                     reamostragens=None, semente=SEMENTE_BOOTSTRAP_PADRAO, perfil=None, perfil_etapa=None,
+                     perfil_memoria="rss", dir_saida=DIR_SAIDA_PADRAO):
+    """``progresso(etapa, percentual)``, se informado, é chamado entre as etapas e a
+    cada gráfico. Uma exceção levantada por ele interrompe a análise sem deixar
+    arquivos pela metade: o Excel é trocado atomicamente e o manifesto de
+    gráficos só registra os PNGs gravados.
+
+    ``reamostragens`` (padrão: TRIBO_BOOTSTRAP ou 10000; 0 desliga) define o
+    bootstrap dos intervalos de confiança do resumo.
+
+    ``dir_saida`` recebe o Excel e os gráficos (com o manifesto do cache); cada
+    conjunto de dados deve ter a sua pasta, senão uma análise apaga os gráficos
+    da outra.
+
+    ``perfil`` (caminho do JSON, ou True para <dir_saida>/perfil/perfil_<data>.json)
+    mede parede, CPU e memória de cada etapa de ETAPAS_ANALISE; ``perfil_etapa``
+    roda também sob cProfile; ``perfil_memoria`` escolhe como o pico de memória é
+    medido (ver perfil_etapas). O relatório é gravado mesmo se a análise falhar."""
+    if not perfil:
+        return _executar_etapas(caminho_csv, dir_saida, trabalhadores, usar_cache, modo_excel,
+                                max_linhas_excel, progresso, reamostragens, semente, SEM_PERFIL)
+    medidor = PerfilEtapas(perfil_etapa, perfil_memoria)
+    codigo = None
+    try:
+        codigo = _executar_etapas(caminho_csv, dir_saida, trabalhadores, usar_cache, modo_excel,
+                                  max_linhas_excel, progresso, reamostragens, semente, medidor)
+        return codigo
+    finally:
+        medidor.info["codigo"] = codigo
+        if perfil is True:
+            perfil = caminho_relatorio_padrao(os.path.join(dir_saida, "perfil"))
+        caminho_perfil = medidor.salvar(perfil)
+        for nome, medida in medidor.etapas.items():
+            pico = medida.get("pico_memoria_mb")
+            print(f"  {nome:<22} {medida['parede_s']:8.3f} s | CPU {medida['cpu_s']:8.3f} s"
+                  + (f" | pico {pico:.1f} MB" if pico is not None else ""))
+        print(f"Perfil por etapa salvo em: {caminho_perfil}")
+
+
+def _executar_etapas(caminho_csv, dir_saida, trabalhadores, usar_cache, modo_excel, max_linhas_excel,
+                     progresso, reamostragens, semente, perfil):
+    if progresso is None:
+        progresso = lambda etapa, percentual: None
+    print("Iniciando análise de dados do Tribômetro...")
+    progresso("carregando dados", 0)
+
+    dir_graficos = os.path.join(dir_saida, "graficos")
+    dir_graficos_resumo = os.path.join(dir_graficos, "resumo")
+    os.makedirs(dir_graficos_resumo, exist_ok=True)
+
+    if not os.path.isfile(caminho_csv) and not os.path.isdir(caminho_csv):
+        print(f"Arquivo não encontrado: {caminho_csv}")
+        return 1
+
+    perfil.info["caminho"] = str(caminho_csv)
+    try:
+        with perfil.etapa("carregar_dados"):
+            if os.path.isdir(caminho_csv):
+                import armazenamento_colunar
+                df_raw = armazenamento_colunar.carregar_dataframe(caminho_csv, COLUNAS_ANALISE)
+            else:
+                df_raw = pd.read_csv(caminho_csv, sep=';', decimal='.')
+        print(f"Dados carregados: {len(df_raw)} linhas.")
+    except Exception as e:
+        print(f"Erro ao ler o arquivo CSV: {e}")
+        return 1
+
+    progresso("processando dados", 10)
+    with perfil.etapa("limpeza"):
+        df_raw = normalizar_tipos(df_raw)
+        df_limpos = limpar_dados(df_raw)
+    with perfil.etapa("agrupamento"):
+        resumo = resumir_grupos(df_limpos)
+    print(f"Dados limpos: {len(df_limpos)} linhas válidas (de {len(df_raw)} originais).")
+    perfil.info.update(linhas_brutas=len(df_raw), linhas_limpas=len(df_limpos), grupos=len(resumo))
+
+    if reamostragens is None:
+        reamostragens = inteiro_do_ambiente("TRIBO_BOOTSTRAP", REAMOSTRAGENS_PADRAO, 0)
+    perfil.info["reamostragens"] = reamostragens
+    if reamostragens:
+        progresso("intervalos de confiança", 15)
+        inicio = time.perf_counter()
+        with perfil.etapa("intervalos_confianca"):
+            resumo = adicionar_intervalos_confianca(resumo, df_limpos, reamostragens, semente, trabalhadores)
+        print(f"Intervalos de confiança bootstrap ({reamostragens} reamostragens): "
+              f"{time.perf_counter() - inicio:.1f} s")
+
+    if modo_excel is None:
+        modo_excel = os.environ.get("TRIBO_EXCEL", "completo")
+    if max_linhas_excel is None:
+        # Inválido fica sem limite, como se a variável não existisse.
+        max_linhas_excel = inteiro_do_ambiente("TRIBO_EXCEL_MAX_LINHAS", None, None)
+    perfil.info["modo_excel"] = modo_excel
+    progresso("exportando Excel", 20)
+    try:
+        inicio = time.perf_counter()
+        with perfil.etapa("excel"):
+            output_excel = exportar_excel(dir_saida, resumo, df_raw, df_limpos, modo_excel, max_linhas_excel)
+        print(f"Arquivo Excel gerado com sucesso: {output_excel} "
+              f"({modo_excel}, {time.perf_counter() - inicio:.1f} s)")
+    except ImportError:
+        print("Biblioteca 'openpyxl' não encontrada. Salvando resumo em CSV.")
+        resumo.to_csv(os.path.join(dir_saida, 'analise_resumo.csv'), sep=';', decimal=',', index=False)
+        df_limpos.to_csv(os.path.join(dir_saida, 'analise_dados_limpos.csv'), sep=';', decimal=',', index=False)
+
+    progresso("gerando gráficos", 40)
+    with perfil.etapa("montar_graficos"):
+        tarefas = montar_tarefas_graficos(df_limpos, resumo, dir_graficos, dir_graficos_resumo)
+        cache = CacheGraficos(dir_graficos, dependencias=(aplicar_tema,)) if usar_cache else None
+    with perfil.etapa("graficos") as extra:
+        relatorio = renderizar_graficos(
+            tarefas, trabalhadores, cache,
+            lambda feitos, total: progresso(f"gerando gráficos ({feitos}/{total})", 40 + 60 * feitos / total),
+        )
+        # Com pool, a CPU dos processos filhos não aparece no process_time deste.
+        extra.update(trabalhadores=relatorio["trabalhadores"], renderizados=relatorio["renderizados"],
+                     reaproveitados=relatorio["reaproveitados"], cpu_graficos_s=round(relatorio["cpu_s"], 6),
+                     por_funcao=relatorio["por_funcao"], por_grafico_s=relatorio["por_grafico_s"])
+    print(f"Gráficos salvos em: {dir_graficos}")
     print(f"Gráficos médios de atrito gerados em: {dir_graficos_resumo}")
+    print(formatar_relatorio_graficos(relatorio))
     return 0
 
 
 if __name__ == "__main__":
-    caminho = sys.argv[1] if len(sys.argv) > 1 else 'resultados_tribometro.csv'
-    sys.exit(executar_analise(caminho))
+    parser = argparse.ArgumentParser(description="Análise dos ensaios do tribômetro.")
+    parser.add_argument("caminho", nargs="?", default='resultados_tribometro.csv',
+                        help="CSV de resultados ou pasta do armazenamento colunar.")
+    parser.add_argument("--saida", default=DIR_SAIDA_PADRAO,
+                        help=f"Pasta do Excel e dos gráficos (padrão: {DIR_SAIDA_PADRAO}).")
+    parser.add_argument("--trabalhadores", type=int, default=None,
+                        help="Processos para gerar os gráficos (1 = em série). Padrão: nº de CPUs, até 8.")
+    parser.add_argument("--sem-cache", action="store_true",
+                        help="Refaz todos os gráficos, ignorando o manifesto de cache.")
+    parser.add_argument("--excel", choices=MODOS_EXCEL, default=None,
+                        help="'rapido' grava o Excel em modo write-only (grandes volumes). "
+                             "Padrão: TRIBO_EXCEL ou 'completo'.")
+    parser.add_argument("--max-linhas-excel", type=int, default=None,
+                        help="Limita dados_raw/dados_limpos a N linhas no Excel (0 = omitir); "
+                             "os dados completos vão para analise_<planilha>.parquet/.csv.")
+    parser.add_argument("--bootstrap", type=int, default=None,
+                        help="Reamostragens dos intervalos de confiança do resumo (0 = sem intervalos). "
+                             "Padrão: TRIBO_BOOTSTRAP ou 10000.")
+    parser.add_argument("--semente", type=int, default=SEMENTE_BOOTSTRAP_PADRAO,
+                        help="Semente do bootstrap (mesma semente, mesmos intervalos).")
+    parser.add_argument("--perfil", "--profile", nargs="?", const=True, default=None, metavar="ARQUIVO.json",
+                        help="Mede parede, CPU e pico de memória de cada etapa e grava um relatório JSON "
+                             "(padrão: <saida>/perfil/perfil_<data>.json).")
+    parser.add_argument("--perfil-etapa", "--profile-stage", choices=ETAPAS_ANALISE, default=None,
+                        help="Roda também esta etapa sob cProfile e grava o .pstats ao lado do relatório "
+                             "(para 'graficos', use --trabalhadores 1 e --sem-cache).")
+    parser.add_argument("--perfil-memoria", choices=MODOS_MEMORIA, default="rss",
+                        help="'rss' amostra a memória do processo (barato, só Linux); 'tracemalloc' é exato, "
+                             "mas deixa Excel e gráficos várias vezes mais lentos.")
+    args = parser.parse_args()
+    if args.perfil_etapa and not args.perfil:
+        args.perfil = True
+    sys.exit(executar_analise(args.caminho, args.trabalhadores, not args.sem_cache,
+                              args.excel, args.max_linhas_excel, reamostragens=args.bootstrap,
+                              semente=args.semente, perfil=args.perfil, perfil_etapa=args.perfil_etapa,
+                              perfil_memoria=args.perfil_memoria, dir_saida=args.saida))
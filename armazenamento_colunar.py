@@ -0,0 +1,360 @@
+"""Armazenamento colunar opcional (Parquet ou Arrow IPC/Feather) dos resultados.
+
+Os arquivos ficam particionados por mês do Timestamp_PC:
+
+    resultados_tribometro_colunar/
+        mes=2026-10/parte-<ns>.parquet
+        mes=2026-10/convertido-resultados_tribometro.parquet
+
+O ingest acumula as linhas e grava uma nova parte a cada ``linhas_por_parte``
+linhas, ou por um timer ``intervalo_s`` segundos depois da primeira linha
+pendente (uma bancada parada não fica com ensaios só na memória); o CSV
+continua sendo gravado normalmente. A leitura carrega só as colunas pedidas,
+com memory-map nos arquivos .arrow.
+
+A pasta só recebe o que foi gravado com TRIBO_COLUNAR ativo: o histórico
+anterior entra pela conversão única abaixo. ``cobre_csv`` diz se a pasta tem
+todos os ensaios do CSV; se não tem, a análise deve continuar lendo o CSV.
+
+Depende de pyarrow, que é opcional (pip install pyarrow).
+
+Uso:
+    python armazenamento_colunar.py converter resultados_tribometro*.csv [--formato feather]
+    python armazenamento_colunar.py compactar resultados_tribometro_colunar
+"""
+import argparse
+import glob
+import io
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+
+import indice_resultados
+
+DIR_SCRIPT = os.path.dirname(os.path.abspath(__file__))
+DIR_COLUNAR_PADRAO = os.path.join(DIR_SCRIPT, "resultados_tribometro_colunar")
+FORMATOS = {"parquet": ".parquet", "feather": ".arrow"}
+LINHAS_POR_PARTE = 500
+INTERVALO_DESCARGA_S = 60.0
+PARTICAO_DESCONHECIDA = "desconhecido"
+
+COLUNAS_INTEIRAS = {
+    "LBC", "LBT", "t_inicio_ms", "t_fim_ms", "amostras_validas",
+    "mpu_ok", "mpu_ok_no_escorregamento", "sonar_ok", "sonar_stale_ms",
+    "sonar_bruto_mm", "sonar_filtrado_mm", "dist0_mm", "dist_ref_mm",
+    "s_abs_mm", "s_rel_mm", "dist_fim_mm", "s_ok",
+    "calib_pitch_n", "calib_dist_n",
+}
+COLUNAS_TEXTO = {"Timestamp_PC"}
+
+
+def _importar_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError("Armazenamento colunar requer pyarrow (pip install pyarrow).") from e
+    return pyarrow
+
+
+def formato_do_ambiente():
+    """Lê TRIBO_COLUNAR ("parquet"/"feather"). Vazio desativa o armazenamento colunar."""
+    formato = os.environ.get("TRIBO_COLUNAR", "").strip().lower()
+    if not formato or formato in ("0", "nao", "não", "off"):
+        return None
+    if formato not in FORMATOS:
+        raise ValueError(f"TRIBO_COLUNAR inválido: {formato!r} (use parquet ou feather).")
+    return formato
+
+
+def tipar_dataframe(df):
+    """Converte colunas de texto nos tipos fixos do esquema (float64, Int64 ou texto)."""
+    tipado = {}
+    for nome in df.columns:
+        serie = df[nome]
+        if nome in COLUNAS_TEXTO:
+            tipado[nome] = serie.astype("string")
+            continue
+        numeros = pd.to_numeric(serie, errors="coerce")
+        if nome in COLUNAS_INTEIRAS:
+            tipado[nome] = numeros.round().astype("Int64")
+        else:
+            tipado[nome] = numeros.astype("float64")
+    return pd.DataFrame(tipado, columns=df.columns)
+
+
+def _particao(timestamp):
+    if isinstance(timestamp, str) and len(timestamp) >= 7 and timestamp[4] == "-":
+        return f"mes={timestamp[:7]}"
+    return f"mes={PARTICAO_DESCONHECIDA}"
+
+
+def gravar_tabela(df, caminho, formato):
+    pa = _importar_pyarrow()
+    # Sem os metadados do pandas: a leitura devolve tipos numpy (inteiros com nulos viram float64).
+    tabela = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata(None)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = caminho + ".tmp"
+    if formato == "feather":
+        # Sem compressão: permite leitura zero-cópia via memory-map.
+        pa.feather.write_feather(tabela, temporario, compression="uncompressed")
+    else:
+        pa.parquet.write_table(tabela, temporario)
+    os.replace(temporario, caminho)
+
+
+def listar_partes(diretorio):
+    partes = []
+    for extensao in FORMATOS.values():
+        partes.extend(glob.glob(os.path.join(glob.escape(diretorio), "**", "*" + extensao), recursive=True))
+    return sorted(partes)
+
+
+def _ler_parte(caminho, colunas):
+    pa = _importar_pyarrow()
+    if caminho.endswith(FORMATOS["feather"]):
+        with pa.memory_map(caminho) as origem:
+            esquema = pa.ipc.open_file(origem).schema
+        existentes = None if colunas is None else [c for c in colunas if c in esquema.names]
+        return pa.feather.read_table(caminho, columns=existentes, memory_map=True)
+    esquema = pa.parquet.read_schema(caminho)
+    existentes = None if colunas is None else [c for c in colunas if c in esquema.names]
+    return pa.parquet.read_table(caminho, columns=existentes, memory_map=True)
+
+
+def carregar_tabela(diretorio, colunas=None):
+    pa = _importar_pyarrow()
+    tabelas = [_ler_parte(caminho, colunas) for caminho in listar_partes(diretorio)]
+    if not tabelas:
+        return pa.table({nome: pa.array([], pa.float64()) for nome in (colunas or [])})
+    tabela = pa.concat_tables(tabelas, promote_options="default")
+    if colunas is not None:
+        tabela = tabela.select([c for c in colunas if c in tabela.column_names])
+    return tabela
+
+
+def contar_linhas(diretorio):
+    """Linhas de todas as partes, lidas dos metadados (sem carregar os dados)."""
+    pa = _importar_pyarrow()
+    total = 0
+    for caminho in listar_partes(diretorio):
+        if caminho.endswith(FORMATOS["feather"]):
+            with pa.memory_map(caminho) as origem:
+                leitor = pa.ipc.open_file(origem)
+                total += sum(leitor.get_batch(i).num_rows for i in range(leitor.num_record_batches))
+        else:
+            total += pa.parquet.read_metadata(caminho).num_rows
+    return total
+
+
+def cobre_csv(diretorio, caminho_csv):
+    """True se a pasta tem pelo menos tantos ensaios quanto o CSV (contados pelo índice do CSV).
+
+    Falha quando o CSV tem ensaios de antes de ativar TRIBO_COLUNAR (ou de
+    quando ele esteve desligado) que não foram convertidos.
+    """
+    if not os.path.isdir(diretorio):
+        return False
+    if not os.path.isfile(caminho_csv):
+        return True
+    indice = indice_resultados.obter_indice(caminho_csv)
+    indice.sincronizar()
+    return contar_linhas(diretorio) >= len(indice)
+
+
+def carregar_dataframe(diretorio, colunas=None):
+    """DataFrame com as colunas pedidas de todas as partes (as ausentes ficam de fora)."""
+    return carregar_tabela(diretorio, colunas).to_pandas()
+
+
+class ArmazemColunar:
+    """Recebe as linhas gravadas pelo ingest e as descarrega em partes colunares."""
+
+    def __init__(self, diretorio=DIR_COLUNAR_PADRAO, formato="parquet",
+                 linhas_por_parte=LINHAS_POR_PARTE, intervalo_s=INTERVALO_DESCARGA_S, ao_erro=None):
+        """``ao_erro(excecao)`` recebe as falhas da descarga feita pelo timer, fora do ingest."""
+        _importar_pyarrow()
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato colunar inválido: {formato!r}")
+        self.diretorio = str(diretorio)
+        self.formato = formato
+        self.linhas_por_parte = linhas_por_parte
+        self.intervalo_s = intervalo_s
+        self.ao_erro = ao_erro
+        self.partes_gravadas = 0
+        self._cabecalho = None
+        self._pendentes = []
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def anexar(self, colunas, eh_cabecalho=False, caminho_csv=None):
+        """Recebe as colunas já gravadas no CSV (com Timestamp_PC)."""
+        with self._lock:
+            if eh_cabecalho:
+                self._descarregar()
+                self._cabecalho = tuple(c.strip() for c in colunas)
+                return
+            if self._cabecalho is None and caminho_csv:
+                encontrado = indice_resultados.ler_linha_do_fim(caminho_csv, 0)
+                if encontrado is not None:
+                    self._cabecalho = tuple(encontrado[0])
+            if self._cabecalho is None:
+                return
+            self._pendentes.append([c.strip() for c in colunas])
+            if len(self._pendentes) >= self.linhas_por_parte:
+                self._descarregar()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.intervalo_s, self._descarregar_por_tempo)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _descarregar_por_tempo(self):
+        try:
+            self.descarregar()
+        except Exception as e:
+            if self.ao_erro is not None:
+                self.ao_erro(e)
+
+    def descarregar(self):
+        with self._lock:
+            self._descarregar()
+
+    def _descarregar(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pendentes:
+            return
+        cabecalho = list(self._cabecalho)
+        largura = len(cabecalho)
+        linhas = [(linha + [None] * largura)[:largura] for linha in self._pendentes]
+        self._pendentes = []
+        df = tipar_dataframe(pd.DataFrame(linhas, columns=cabecalho, dtype=object))
+        if "Timestamp_PC" in df.columns:
+            particoes = df["Timestamp_PC"].map(_particao)
+        else:
+            particoes = pd.Series(f"mes={PARTICAO_DESCONHECIDA}", index=df.index)
+        for particao, grupo in df.groupby(particoes, sort=False):
+            nome = f"parte-{time.time_ns()}{FORMATOS[self.formato]}"
+            gravar_tabela(grupo, os.path.join(self.diretorio, particao, nome), self.formato)
+            self.partes_gravadas += 1
+
+    def fechar(self):
+        self.descarregar()
+
+
+def criar_armazem_do_ambiente(diretorio=DIR_COLUNAR_PADRAO, ao_erro=None):
+    """ArmazemColunar configurado por TRIBO_COLUNAR, ou None se desativado."""
+    formato = formato_do_ambiente()
+    if formato is None:
+        return None
+    return ArmazemColunar(diretorio, formato, ao_erro=ao_erro)
+
+
+def _segmentos_csv(caminho_csv):
+    """Gera (cabecalho_bytes, corpo_bytes) para cada trecho entre linhas de cabeçalho."""
+    with open(caminho_csv, "rb") as arquivo:
+        cabecalho = None
+        corpo = io.BytesIO()
+        for linha in arquivo:
+            minusculas = linha.lower()
+            if b"massa_g" in minusculas and b"lbc" in minusculas:
+                colunas = indice_resultados.separar_colunas(linha)
+                if indice_resultados.eh_linha_cabecalho(colunas):
+                    if cabecalho is not None and corpo.tell():
+                        yield cabecalho, corpo.getvalue()
+                    cabecalho = linha.lstrip(b"\xef\xbb\xbf")
+                    corpo = io.BytesIO()
+                    continue
+            if cabecalho is not None:
+                corpo.write(linha)
+        if cabecalho is not None and corpo.tell():
+            yield cabecalho, corpo.getvalue()
+
+
+def ler_csv_resultados(caminho_csv):
+    """Lê um CSV de resultados com cabeçalhos repetidos, já com os tipos do esquema."""
+    partes = []
+    for cabecalho, corpo in _segmentos_csv(caminho_csv):
+        df = pd.read_csv(io.BytesIO(cabecalho + corpo), sep=";", dtype={"Timestamp_PC": str})
+        df.columns = [c.strip() for c in df.columns]
+        partes.append(tipar_dataframe(df))
+    if not partes:
+        return pd.DataFrame()
+    return pd.concat(partes, ignore_index=True, sort=False)
+
+
+def converter_csv(caminhos_csv, diretorio=DIR_COLUNAR_PADRAO, formato="parquet"):
+    """Conversão única de CSVs existentes. Retorna o número de linhas convertidas."""
+    total = 0
+    for caminho_csv in caminhos_csv:
+        df = ler_csv_resultados(caminho_csv)
+        if df.empty:
+            continue
+        if "Timestamp_PC" in df.columns:
+            particoes = df["Timestamp_PC"].astype(object).map(_particao)
+        else:
+            particoes = pd.Series(f"mes={PARTICAO_DESCONHECIDA}", index=df.index)
+        base = os.path.splitext(os.path.basename(caminho_csv))[0]
+        for particao, grupo in df.groupby(particoes, sort=True):
+            destino = os.path.join(diretorio, particao, f"convertido-{base}{FORMATOS[formato]}")
+            gravar_tabela(grupo, destino, formato)
+        total += len(df)
+    return total
+
+
+def compactar(diretorio, formato="parquet"):
+    """Junta as partes de cada partição num único arquivo. Retorna quantas partes foram removidas."""
+    removidas = 0
+    por_particao = {}
+    for caminho in listar_partes(diretorio):
+        por_particao.setdefault(os.path.dirname(caminho), []).append(caminho)
+    pa = _importar_pyarrow()
+    for particao, caminhos in por_particao.items():
+        if len(caminhos) < 2:
+            continue
+        tabela = pa.concat_tables([_ler_parte(c, None) for c in caminhos], promote_options="default")
+        destino = os.path.join(particao, f"compactado-{time.time_ns()}{FORMATOS[formato]}")
+        gravar_tabela(tabela.to_pandas(), destino, formato)
+        for caminho in caminhos:
+            os.remove(caminho)
+            removidas += 1
+    return removidas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Armazenamento colunar dos resultados do tribômetro.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    conv = sub.add_parser("converter", help="Converte CSVs existentes (uma única vez).")
+    conv.add_argument("csv", nargs="+")
+    conv.add_argument("--destino", default=DIR_COLUNAR_PADRAO)
+    conv.add_argument("--formato", choices=sorted(FORMATOS), default="parquet")
+    comp = sub.add_parser("compactar", help="Junta as partes pequenas de cada partição.")
+    comp.add_argument("diretorio", nargs="?", default=DIR_COLUNAR_PADRAO)
+    comp.add_argument("--formato", choices=sorted(FORMATOS), default="parquet")
+    args = parser.parse_args()
+
+    try:
+        if args.comando == "converter":
+            caminhos = []
+            for padrao in args.csv:
+                caminhos.extend(sorted(glob.glob(padrao)) if glob.has_magic(padrao) else [padrao])
+            inicio = time.perf_counter()
+            total = converter_csv(caminhos, args.destino, args.formato)
+            print(f"{total} linhas de {len(caminhos)} arquivo(s) convertidas para {args.destino} "
+                  f"em {time.perf_counter() - inicio:.1f} s.")
+        else:
+            removidas = compactar(args.diretorio, args.formato)
+            print(f"{removidas} parte(s) compactada(s) em {args.diretorio}.")
+    except RuntimeError as e:
+        print(f"[ERRO] {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""Benchmark do núcleo da análise (limpeza + derivação + resumo), sem I/O nem gráficos.
+
+Compara processar_dados com o caminho anterior (apply linha a linha) e mostra o
+custo por linha em cada tamanho, que deve ficar aproximadamente constante.
+
+Uso: python benchmarks/bench_analise_vetorizada.py [--linhas 10000 100000 1000000 3000000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from analise_de_ensaios import AGREGACOES_RESUMO, processar_dados
+from dados_sinteticos import gerar_dataframe
+
+
+def processar_legado(df_raw):
+    """Caminho anterior de executar_analise, com apply por linha."""
+    criterios_validade = (
+        (df_raw['mpu_ok'] == 1) &
+        (df_raw['sonar_ok'] == 1) &
+        (df_raw['s_ok'] == 1) &
+        (df_raw['sonar_stale_ms'] == 0)
+    )
+    df_limpos = df_raw[criterios_validade].copy()
+    df_limpos.dropna(subset=['massa_g', 'LBC', 'LBT', 'mu_d', 'tempo_s'], inplace=True)
+    df_limpos['mu_s_final'] = df_limpos.apply(
+        lambda row: row['mu_s'] if row['mpu_ok_no_escorregamento'] == 1 else None,
+        axis=1
+    )
+    df_limpos['mu_d_final'] = df_limpos['mu_d']
+    resumo = df_limpos.groupby(['LBT', 'LBC', 'massa_g']).agg(**AGREGACOES_RESUMO).reset_index()
+    resumo['comparacao_trabalho_delta_J'] = resumo['trabalho_atrito_media'] - resumo['trabalho_energia_media']
+    return df_limpos, resumo.round(4)
+
+
+def _cronometrar(funcao, df, repeticoes):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao(df)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def medir(linhas, limite_legado):
+    df = gerar_dataframe(linhas)
+    repeticoes = 3 if linhas <= 1000000 else 1
+    tempo, (df_limpos, resumo) = _cronometrar(processar_dados, df, repeticoes)
+    resultado = {
+        "linhas": linhas,
+        "linhas_validas": len(df_limpos),
+        "grupos": len(resumo),
+        "vetorizado_s": tempo,
+        "vetorizado_ns_por_linha": tempo / linhas * 1e9,
+    }
+    if linhas <= limite_legado:
+        tempo_legado, (_, resumo_legado) = _cronometrar(processar_legado, df, 1)
+        resultado["legado_s"] = tempo_legado
+        resultado["legado_ns_por_linha"] = tempo_legado / linhas * 1e9
+        resultado["aceleracao"] = tempo_legado / tempo
+        resultado["resumo_identico"] = bool(resumo.equals(resumo_legado))
+    return resultado
+
+
+def executar(tamanhos=(10000, 100000, 1000000, 3000000), limite_legado=1000000):
+    return {"benchmark": "analise_vetorizada", "resultados": [medir(n, limite_legado) for n in tamanhos]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10000, 100000, 1000000, 3000000])
+    parser.add_argument("--limite-legado", type=int, default=1000000,
+                        help="Não roda o caminho legado acima deste número de linhas.")
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    args = parser.parse_args()
+    relatorio = executar(args.linhas, args.limite_legado)
+    if args.json:
+        print(json.dumps(relatorio, indent=2))
+        return
+    for r in relatorio["resultados"]:
+        linha = (f"{r['linhas']:>8} linhas: vetorizado {r['vetorizado_s'] * 1000:9.1f} ms "
+                 f"({r['vetorizado_ns_por_linha']:6.0f} ns/linha)")
+        if "legado_s" in r:
+            linha += (f" | legado {r['legado_s'] * 1000:9.1f} ms ({r['legado_ns_por_linha']:6.0f} ns/linha) "
+                      f"| {r['aceleracao']:.0f}x | resumo idêntico: {r['resumo_identico']}")
+        print(linha)
+
+
+if __name__ == "__main__":
+    main()
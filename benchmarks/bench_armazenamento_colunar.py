@@ -0,0 +1,128 @@
+"""Benchmark de carga da análise: CSV x Parquet x Feather (memory-map), tempo e pico de RSS.
+
+Cada leitura roda num processo separado para medir o pico de memória isolado.
+
+Uso: python benchmarks/bench_armazenamento_colunar.py [--linhas 10000 100000 1000000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+DIR_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIR_RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import armazenamento_colunar
+from analise_de_ensaios import COLUNAS_ANALISE
+from dados_sinteticos import gerar_csv
+
+MODOS = ("csv", "csv_usecols", "parquet", "feather")
+
+# Executado no processo filho: importa tudo, mede o RSS base e depois a carga.
+# No Linux o pico (VmHWM) é zerado antes da carga; nos demais usa ru_maxrss.
+_FILHO = r"""
+import json, os, resource, sys, time
+sys.path.insert(0, {raiz!r})
+import pandas as pd
+import pyarrow, pyarrow.parquet, pyarrow.feather
+import armazenamento_colunar
+
+def status_mb(campo):
+    try:
+        with open("/proc/self/status") as arquivo:
+            for linha in arquivo:
+                if linha.startswith(campo + ":"):
+                    return int(linha.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return None
+
+def rss_pico_mb():
+    pico = status_mb("VmHWM")
+    if pico is not None:
+        return pico
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / 1e6 if sys.platform == "darwin" else pico / 1024.0
+
+modo, origem, colunas = sys.argv[1], sys.argv[2], sys.argv[3].split(",")
+try:
+    with open("/proc/self/clear_refs", "w") as arquivo:
+        arquivo.write("5")
+except OSError:
+    pass
+base = status_mb("VmRSS") or rss_pico_mb()
+inicio = time.perf_counter()
+if modo == "csv":
+    df = pd.read_csv(origem, sep=";", decimal=".")
+elif modo == "csv_usecols":
+    df = pd.read_csv(origem, sep=";", decimal=".", usecols=colunas)
+else:
+    df = armazenamento_colunar.carregar_dataframe(origem, colunas)
+duracao = time.perf_counter() - inicio
+print(json.dumps({{"linhas": len(df), "colunas": df.shape[1], "carga_s": duracao,
+                  "rss_base_mb": base, "rss_pico_mb": rss_pico_mb()}}))
+"""
+
+
+def medir_carga(modo, origem):
+    codigo = _FILHO.format(raiz=DIR_RAIZ)
+    saida = subprocess.run([sys.executable, "-c", codigo, modo, origem, ",".join(COLUNAS_ANALISE)],
+                           capture_output=True, text=True, check=True)
+    resultado = json.loads(saida.stdout.strip().splitlines()[-1])
+    resultado["rss_carga_mb"] = resultado["rss_pico_mb"] - resultado["rss_base_mb"]
+    return resultado
+
+
+def _tamanho_dir(diretorio):
+    return sum(os.path.getsize(c) for c in armazenamento_colunar.listar_partes(diretorio))
+
+
+def medir(linhas, dir_saida):
+    caminho_csv = os.path.join(dir_saida, f"resultados_{linhas}.csv")
+    inicio = time.perf_counter()
+    gerar_csv(caminho_csv, linhas)
+    resultado = {"linhas": linhas, "geracao_s": time.perf_counter() - inicio,
+                 "bytes": {"csv": os.path.getsize(caminho_csv)}, "conversao_s": {}, "carga": {}}
+    origens = {"csv": caminho_csv, "csv_usecols": caminho_csv}
+    for formato in ("parquet", "feather"):
+        destino = os.path.join(dir_saida, f"colunar_{formato}_{linhas}")
+        inicio = time.perf_counter()
+        armazenamento_colunar.converter_csv([caminho_csv], destino, formato)
+        resultado["conversao_s"][formato] = time.perf_counter() - inicio
+        resultado["bytes"][formato] = _tamanho_dir(destino)
+        origens[formato] = destino
+    for modo in MODOS:
+        resultado["carga"][modo] = medir_carga(modo, origens[modo])
+    return resultado
+
+
+def executar(tamanhos=(10000, 100000, 1000000)):
+    with tempfile.TemporaryDirectory() as dir_saida:
+        return {"benchmark": "armazenamento_colunar", "colunas_analise": COLUNAS_ANALISE,
+                "resultados": [medir(n, dir_saida) for n in tamanhos]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    args = parser.parse_args()
+    relatorio = executar(args.linhas)
+    if args.json:
+        print(json.dumps(relatorio, indent=2))
+        return
+    for r in relatorio["resultados"]:
+        tamanhos = " | ".join(f"{k} {v / 1e6:.1f} MB" for k, v in r["bytes"].items())
+        print(f"{r['linhas']} linhas: {tamanhos}")
+        print(f"  conversão: parquet {r['conversao_s']['parquet']:.2f} s | feather {r['conversao_s']['feather']:.2f} s")
+        for modo, c in r["carga"].items():
+            print(f"  {modo:>12}: {c['carga_s'] * 1000:9.1f} ms | +{c['rss_carga_mb']:7.1f} MB RSS "
+                  f"({c['colunas']} colunas, {c['linhas']} linhas)")
+
+
+if __name__ == "__main__":
+    main()
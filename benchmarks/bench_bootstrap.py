@@ -0,0 +1,172 @@
+"""Intervalos bootstrap por grupo: lote NumPy x laço Python, conferência, cobertura e determinismo.
+
+1. Tempo de estatistica_bootstrap.intervalos_bootstrap (10000 reamostragens,
+   todos os grupos e as duas métricas) em dados sintéticos com poucas
+   repetições por grupo e com centenas, contra um laço Python que sorteia e tira a
+   média de cada reamostragem (só no caso pequeno).
+2. Conferência: uma implementação direta, unidade a unidade e com os mesmos
+   geradores, tem de dar os mesmos limites que o lote.
+3. Cobertura: com grupos de n pequeno tirados de uma distribuição assimétrica
+   de média conhecida, a fração de intervalos que contêm a média verdadeira
+   (percentil x BCa).
+4. Determinismo: mesma semente, mesmo resultado em série e com 2 processos.
+
+Uso: python benchmarks/bench_bootstrap.py [--reamostragens 10000] [--linhas-grande 20000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import estatistica_bootstrap
+from analise_de_ensaios import processar_dados
+from dados_sinteticos import gerar_dataframe
+from resumo_incremental import COLUNAS_GRUPO
+
+COLUNAS_IC = [f"{m}_{s}" for m in ("mu_s", "mu_d") for s in ("ic_perc_inf", "ic_perc_sup", "ic_bca_inf", "ic_bca_sup")]
+
+
+def _dados(linhas, semente):
+    df_limpos, _ = processar_dados(gerar_dataframe(linhas, semente=semente))
+    return df_limpos
+
+
+def _laco_python(df, reamostragens, semente):
+    """Como se faria sem vetorizar: uma média por reamostragem, em Python."""
+    rng = np.random.default_rng(semente)
+    saida = []
+    for _, grupo in df.groupby(list(COLUNAS_GRUPO)):
+        for coluna in ("mu_s_final", "mu_d_final"):
+            valores = grupo[coluna].dropna().to_numpy()
+            if len(valores) < 2:
+                continue
+            medias = [valores[rng.integers(0, len(valores), len(valores))].mean() for _ in range(reamostragens)]
+            saida.append(np.percentile(medias, [2.5, 97.5]))
+    return saida
+
+
+def _referencia_unidade(valores, semente, reamostragens, confianca):
+    """BCa escrito direto da definição, para uma unidade."""
+    normal = NormalDist()
+    n = len(valores)
+    indices = np.random.default_rng(semente).integers(0, n, size=(reamostragens, n),
+                                                      dtype=np.int16 if n <= 32767 else np.int32)
+    medias = np.sort(valores[indices].mean(axis=1))
+    alfa = (1 - confianca) / 2
+    perc = np.quantile(medias, [alfa, 1 - alfa])
+    media = valores.mean()
+    if np.ptp(valores) == 0:
+        return [perc[0], perc[1], media, media]
+    z0 = normal.inv_cdf((np.sum(medias < media) + 0.5 * np.sum(medias == media)) / reamostragens)
+    jack = np.array([np.delete(valores, i).mean() for i in range(n)])
+    d = jack.mean() - jack
+    a = np.sum(d ** 3) / (6 * np.sum(d ** 2) ** 1.5) if np.sum(d ** 2) > 0 else 0.0
+    bca = []
+    for z in (normal.inv_cdf(alfa), normal.inv_cdf(1 - alfa)):
+        p = normal.cdf(z0 + (z0 + z) / (1 - a * (z0 + z)))
+        bca.append(np.quantile(medias, p))
+    return [perc[0], perc[1], bca[0], bca[1]]
+
+
+def conferir(df, reamostragens, semente):
+    lote = estatistica_bootstrap.intervalos_bootstrap(df, COLUNAS_GRUPO, reamostragens=reamostragens, semente=semente)
+    sementes = iter(np.random.SeedSequence(semente).spawn(len(lote) * 2))
+    maior_diferenca = 0.0
+    for linha, (_, grupo) in zip(lote.itertuples(index=False), df.groupby(list(COLUNAS_GRUPO))):
+        for prefixo, coluna in (("mu_s", "mu_s_final"), ("mu_d", "mu_d_final")):
+            s = next(sementes)
+            valores = grupo[coluna].dropna().to_numpy(dtype=float)
+            if len(valores) < 2:
+                continue
+            esperado = _referencia_unidade(valores, s, reamostragens, estatistica_bootstrap.CONFIANCA_PADRAO)
+            obtido = [getattr(linha, f"{prefixo}_{c}") for c in ("ic_perc_inf", "ic_perc_sup", "ic_bca_inf", "ic_bca_sup")]
+            maior_diferenca = max(maior_diferenca, float(np.max(np.abs(np.subtract(esperado, obtido)))))
+    return maior_diferenca
+
+
+def cobertura(grupos, n, reamostragens, semente):
+    rng = np.random.default_rng(semente)
+    sigma = 0.5
+    verdadeira = np.exp(sigma ** 2 / 2)  # média da lognormal(0, sigma)
+    df = pd.DataFrame({
+        "LBT": np.repeat(np.arange(grupos), n), "LBC": 1, "massa_g": 250.0,
+        "mu_s_final": rng.lognormal(0.0, sigma, grupos * n),
+        "mu_d_final": rng.lognormal(0.0, sigma, grupos * n),
+    })
+    ic = estatistica_bootstrap.intervalos_bootstrap(df, COLUNAS_GRUPO, reamostragens=reamostragens, semente=semente)
+    resultado = {}
+    for metodo in ("perc", "bca"):
+        dentro = [((ic[f"{m}_ic_{metodo}_inf"] <= verdadeira) & (verdadeira <= ic[f"{m}_ic_{metodo}_sup"])).to_numpy()
+                  for m in ("mu_s", "mu_d")]
+        resultado[metodo] = float(np.concatenate(dentro).mean())
+    return resultado
+
+
+def executar(reamostragens=10000, linhas_grande=20000, semente=1):
+    pequeno = _dados(36 * 6, semente)  # 36 grupos, ~6 repetições cada
+    grande = _dados(linhas_grande, semente)
+    tempos = {}
+    for nome, df in (("pequeno", pequeno), ("grande", grande)):
+        inicio = time.perf_counter()
+        estatistica_bootstrap.intervalos_bootstrap(df, COLUNAS_GRUPO, reamostragens=reamostragens, semente=semente)
+        tempos[nome] = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    _laco_python(pequeno, reamostragens, semente)
+    tempo_laco = time.perf_counter() - inicio
+
+    serie = estatistica_bootstrap.intervalos_bootstrap(pequeno, COLUNAS_GRUPO, reamostragens=2000, semente=7)
+    limite = estatistica_bootstrap.MIN_ELEMENTOS_PARALELOS
+    estatistica_bootstrap.MIN_ELEMENTOS_PARALELOS = 0
+    try:
+        paralelo = estatistica_bootstrap.intervalos_bootstrap(pequeno, COLUNAS_GRUPO, reamostragens=2000,
+                                                              semente=7, trabalhadores=2)
+    finally:
+        estatistica_bootstrap.MIN_ELEMENTOS_PARALELOS = limite
+
+    return {
+        "benchmark": "bootstrap",
+        "reamostragens": reamostragens,
+        "grupos": int(pequeno.groupby(list(COLUNAS_GRUPO)).ngroups),
+        "repeticoes_por_grupo_pequeno": len(pequeno) / max(1, pequeno.groupby(list(COLUNAS_GRUPO)).ngroups),
+        "repeticoes_por_grupo_grande": len(grande) / max(1, grande.groupby(list(COLUNAS_GRUPO)).ngroups),
+        "lote_s_pequeno": tempos["pequeno"],
+        "lote_s_grande": tempos["grande"],
+        "laco_python_s_pequeno": tempo_laco,
+        "maior_diferenca_referencia": conferir(pequeno, 2000, semente),
+        "cobertura_95_n8": cobertura(400, 8, 2000, semente),
+        "serie_igual_paralelo": bool(serie[COLUNAS_IC].equals(paralelo[COLUNAS_IC])),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reamostragens", type=int, default=10000)
+    parser.add_argument("--linhas-grande", type=int, default=20000)
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    args = parser.parse_args()
+    r = executar(args.reamostragens, args.linhas_grande)
+    if args.json:
+        print(json.dumps(r, indent=2))
+    else:
+        print(f"{r['reamostragens']} reamostragens, {r['grupos']} grupos x 2 métricas:")
+        print(f"  ~{r['repeticoes_por_grupo_pequeno']:.0f} repetições/grupo: lote {r['lote_s_pequeno']:.2f} s | "
+              f"laço Python {r['laco_python_s_pequeno']:.1f} s")
+        print(f"  ~{r['repeticoes_por_grupo_grande']:.0f} repetições/grupo: lote {r['lote_s_grande']:.2f} s")
+        print(f"Maior diferença para a implementação direta: {r['maior_diferenca_referencia']:.2e}")
+        c = r["cobertura_95_n8"]
+        print(f"Cobertura de IC 95% (lognormal, n=8): percentil {c['perc']:.1%} | BCa {c['bca']:.1%}")
+        print(f"Série == 2 processos (mesma semente): {'sim' if r['serie_igual_paralelo'] else 'NÃO'}")
+    if r["maior_diferenca_referencia"] > 1e-12 or not r["serie_igual_paralelo"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
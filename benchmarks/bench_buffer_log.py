@@ -0,0 +1,146 @@
+"""Microbenchmark do log da interface web: lista com corte x buffer circular.
+
+Mede o custo de anexar e de ler "o que veio depois" com o buffer cheio e,
+num segundo cenário, uma thread escrevendo enquanto N leitores acompanham o
+log como o /api/log faz. Cada linha leva o seu número, então os leitores
+conferem se pularam ou repetiram linhas: na lista antiga o índice ``desde``
+muda de significado a cada corte (de 1000 para 800 linhas).
+
+Uso: python benchmarks/bench_buffer_log.py [--linhas 200000] [--leitores 1 4 16]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from buffer_log import BufferCircular
+
+
+class LogLegado:
+    """Comportamento anterior de GerenciadorSerial._adicionar_log/obter_log."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._log = []
+
+    def anexar(self, item):
+        with self._lock:
+            self._log.append(item)
+            if len(self._log) > 1000:
+                self._log = self._log[-800:]
+
+    def ler_desde(self, desde):
+        with self._lock:
+            linhas = self._log[max(0, desde):]
+            return linhas, len(self._log), 0
+
+
+def _cronometrar(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1e9
+
+
+def medir_isolado(repeticoes=200000):
+    """ns por operação com o buffer cheio, sem concorrência."""
+    resultado = {}
+    for nome, log in (("legado", LogLegado()), ("circular", BufferCircular(1000))):
+        for i in range(1000):
+            log.anexar(i)
+        contador = iter(range(10 ** 9))
+        resultado[nome] = {"anexar_ns": _cronometrar(lambda: log.anexar(next(contador)), repeticoes)}
+        for k in (1, 10, 100):
+            if nome == "legado":
+                # O cliente que está em dia pede a partir de len - k.
+                desde = len(log._log) - k
+            else:
+                desde = log.ultimo_seq - k
+            resultado[nome][f"ler_{k}_ns"] = _cronometrar(lambda: log.ler_desde(desde), repeticoes // 10)
+    return resultado
+
+
+def _leitor(log, parar, estatisticas):
+    desde = 0
+    esperado = 0
+    pulos = repetidas = perdidas = leituras = 0
+    while True:
+        terminou = parar.is_set()
+        linhas, desde, perdidas_agora = log.ler_desde(desde)
+        leituras += 1
+        perdidas += perdidas_agora
+        esperado += perdidas_agora
+        for valor in linhas:
+            if valor > esperado:
+                pulos += valor - esperado
+            elif valor < esperado:
+                repetidas += 1
+                continue
+            esperado = valor + 1
+        if terminou:
+            break
+        time.sleep(0.0005)
+    estatisticas.append({"leituras": leituras, "pulos_silenciosos": pulos,
+                         "repetidas": repetidas, "perdidas_informadas": perdidas})
+
+
+def medir_concorrente(linhas, leitores):
+    resultado = {}
+    for nome, log in (("legado", LogLegado()), ("circular", BufferCircular(1000))):
+        parar = threading.Event()
+        estatisticas = []
+        threads = [threading.Thread(target=_leitor, args=(log, parar, estatisticas)) for _ in range(leitores)]
+        for t in threads:
+            t.start()
+        inicio = time.perf_counter()
+        for i in range(linhas):
+            log.anexar(i)
+            if i % 200 == 0:
+                time.sleep(0)
+        duracao = time.perf_counter() - inicio
+        parar.set()
+        for t in threads:
+            t.join()
+        resultado[nome] = {
+            "anexar_ns": duracao / linhas * 1e9,
+            "leituras": sum(e["leituras"] for e in estatisticas),
+            "pulos_silenciosos": sum(e["pulos_silenciosos"] for e in estatisticas),
+            "repetidas": sum(e["repetidas"] for e in estatisticas),
+            "perdidas_informadas": sum(e["perdidas_informadas"] for e in estatisticas),
+        }
+    return {"leitores": leitores, "linhas": linhas, "modos": resultado}
+
+
+def executar(linhas=200000, leitores=(1, 4, 16)):
+    return {"benchmark": "buffer_log", "isolado": medir_isolado(),
+            "concorrente": [medir_concorrente(linhas, n) for n in leitores]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=200000)
+    parser.add_argument("--leitores", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    args = parser.parse_args()
+    relatorio = executar(args.linhas, args.leitores)
+    if args.json:
+        print(json.dumps(relatorio, indent=2))
+        return
+    print("Buffer cheio, sem concorrência (ns/operação):")
+    for nome, r in relatorio["isolado"].items():
+        print(f"  {nome:>8}: anexar {r['anexar_ns']:7.0f} | ler 1 {r['ler_1_ns']:7.0f} | "
+              f"ler 10 {r['ler_10_ns']:7.0f} | ler 100 {r['ler_100_ns']:7.0f}")
+    for c in relatorio["concorrente"]:
+        print(f"{c['linhas']} linhas com {c['leitores']} leitor(es):")
+        for nome, r in c["modos"].items():
+            print(f"  {nome:>8}: anexar {r['anexar_ns']:7.0f} ns | {r['leituras']:7d} leituras | "
+                  f"pulos silenciosos {r['pulos_silenciosos']:8d} | repetidas {r['repetidas']:8d} | "
+                  f"perdidas informadas {r['perdidas_informadas']:8d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark do cache de gráficos: análise completa x reexecução sem mudanças x "mais um ensaio".
+
+Uso: python benchmarks/bench_cache_graficos.py [--linhas 2000] [--trabalhadores 1]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from analise_de_ensaios import aplicar_tema, montar_tarefas_graficos, processar_dados, renderizar_graficos
+from cache_graficos import CacheGraficos
+from dados_sinteticos import gerar_dataframe
+
+
+def _rodada(df_raw, dir_graficos, trabalhadores):
+    dir_resumo = os.path.join(dir_graficos, "resumo")
+    os.makedirs(dir_resumo, exist_ok=True)
+    df_limpos, resumo = processar_dados(df_raw)
+    tarefas = montar_tarefas_graficos(df_limpos, resumo, dir_graficos, dir_resumo)
+    cache = CacheGraficos(dir_graficos, dependencias=(aplicar_tema,))
+    relatorio = renderizar_graficos(tarefas, trabalhadores, cache)
+    relatorio["graficos_refeitos"] = sorted(relatorio.pop("por_grafico_s"))
+    return relatorio
+
+
+def mais_um_ensaio(df_raw, semente=1):
+    """Repete um ensaio válido com pequeno ruído: muda só o grupo dele."""
+    rng = np.random.default_rng(semente)
+    validos = df_raw[(df_raw["mpu_ok"] == 1) & (df_raw["mpu_ok_no_escorregamento"] == 1)
+                     & (df_raw["sonar_ok"] == 1) & (df_raw["s_ok"] == 1) & (df_raw["sonar_stale_ms"] == 0)]
+    novo = validos.iloc[[0]].copy()
+    for coluna in ("mu_s", "mu_d", "angulo_deg"):
+        novo[coluna] = novo[coluna] * (1 + rng.normal(0, 0.01))
+    return pd.concat([df_raw, novo], ignore_index=True)
+
+
+def executar(linhas=2000, trabalhadores=1):
+    df_raw = gerar_dataframe(linhas)
+    with tempfile.TemporaryDirectory() as dir_base:
+        dir_graficos = os.path.join(dir_base, "graficos")
+        rodadas = {
+            "completa": _rodada(df_raw, dir_graficos, trabalhadores),
+            "sem_mudancas": _rodada(df_raw, dir_graficos, trabalhadores),
+            "mais_um_ensaio": _rodada(mais_um_ensaio(df_raw), dir_graficos, trabalhadores),
+        }
+    return {"benchmark": "cache_graficos", "linhas": linhas, "rodadas": rodadas}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=2000)
+    parser.add_argument("--trabalhadores", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    args = parser.parse_args()
+    relatorio = executar(args.linhas, args.trabalhadores)
+    if args.json:
+        print(json.dumps(relatorio, indent=2))
+        return
+    for nome, r in relatorio["rodadas"].items():
+        print(f"{nome:>15}: {r['renderizados']:>3} de {r['tarefas']} gráficos refeitos em {r['total_s']:6.2f} s "
+              f"({r['reaproveitados']} do cache)")
+        if nome == "mais_um_ensaio":
+            for grafico in r["graficos_refeitos"]:
+                print(f"{'':>17}- {grafico}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark de gravação de linhas de resultado: laço legado x DiarioResultados por política.
+
+Uso: python benchmarks/bench_diario_resultados.py [--linhas 2000] [--politicas linha ms:200 linhas:50]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from diario_resultados import DiarioResultados
+from simulador_tribometro import CABECALHO_CSV
+
+POLITICAS_PADRAO = ("linha", "ms:50", "ms:200", "linhas:10", "linhas:100")
+LINHA = (
+    "250.0;2;1;21.345;0.0182;0.3907;0.3121;1.0384;0.4462;0.412;123456;123868;8;"
+    "-0.0079;-0.0081;1;1;1;0;0.900;21.402;21.345;0.112;152;151;301;301;140;10.0;"
+    "150;148;151;1;0.084;2.1;40;40;27.31"
+).split(";") + ["2026-01-01 00:00:00"]
+
+
+def _gravar_legado(caminho, colunas):
+    """O que salvar_em_csv fazia por linha: stat, abre, grava e fecha."""
+    arquivo_existe = os.path.isfile(caminho)
+    _ = arquivo_existe and os.path.getsize(caminho) > 0
+    with open(caminho, "a", newline="", encoding="utf-8-sig") as arquivo:
+        csv.writer(arquivo, delimiter=";").writerow(colunas)
+
+
+def _estatisticas(nome, latencias, duracao, extra=None):
+    ordenadas = sorted(latencias)
+
+    def p(q):
+        return ordenadas[min(len(ordenadas) - 1, int(q * (len(ordenadas) - 1)))] * 1e6
+
+    resultado = {
+        "politica": nome,
+        "linhas": len(latencias),
+        "linhas_por_s": len(latencias) / duracao,
+        "latencia_us_p50": p(0.50),
+        "latencia_us_p99": p(0.99),
+        "latencia_us_max": ordenadas[-1] * 1e6,
+    }
+    resultado.update(extra or {})
+    return resultado
+
+
+def medir_legado(linhas, dir_saida):
+    caminho = os.path.join(dir_saida, "legado.csv")
+    _gravar_legado(caminho, CABECALHO_CSV.split(";") + ["Timestamp_PC"])
+    latencias = []
+    inicio = time.perf_counter()
+    for _ in range(linhas):
+        t0 = time.perf_counter()
+        _gravar_legado(caminho, LINHA)
+        latencias.append(time.perf_counter() - t0)
+    return _estatisticas("legado (abre/fecha por linha)", latencias, time.perf_counter() - inicio)
+
+
+def medir_politica(politica, linhas, dir_saida):
+    caminho = os.path.join(dir_saida, f"diario_{politica.replace(':', '_')}.csv")
+    diario = DiarioResultados(lambda: [caminho], politica=politica)
+    diario.gravar(CABECALHO_CSV.split(";") + ["Timestamp_PC"], eh_cabecalho=True)
+    latencias = []
+    inicio = time.perf_counter()
+    for _ in range(linhas):
+        t0 = time.perf_counter()
+        diario.gravar(LINHA)
+        latencias.append(time.perf_counter() - t0)
+    duracao = time.perf_counter() - inicio
+    diario.fechar()
+    return _estatisticas(politica, latencias, duracao, {"fsyncs": diario.fsyncs})
+
+
+def executar(linhas=2000, politicas=POLITICAS_PADRAO):
+    with tempfile.TemporaryDirectory() as dir_saida:
+        resultados = [medir_legado(linhas, dir_saida)]
+        resultados.extend(medir_politica(p, linhas, dir_saida) for p in politicas)
+    return {"benchmark": "diario_resultados", "resultados": resultados}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=2000)
+    parser.add_argument("--politicas", nargs="+", default=list(POLITICAS_PADRAO))
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    args = parser.parse_args()
+    relatorio = executar(args.linhas, args.politicas)
+    if args.json:
+        print(json.dumps(relatorio, indent=2))
+        return
+    for r in relatorio["resultados"]:
+        fsyncs = f" | {r['fsyncs']} fsyncs" if "fsyncs" in r else ""
+        print(f"{r['politica']:>30}: {r['linhas_por_s']:>10.0f} linhas/s | p50 {r['latencia_us_p50']:8.1f} us | "
+              f"p99 {r['latencia_us_p99']:8.1f} us | max {r['latencia_us_max']:9.1f} us{fsyncs}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Custo por linha do ingest: várias passadas sobre o texto x um registro de esquema_registro.
+
+Gera linhas de resultado sintéticas (layout do firmware, com as flags
+inválidas de dados_sinteticos) e mede, por linha, o caminho antigo (count,
+strip e split em salvar_em_csv; lower, outro split e o dict {nome: i}
+refeito em avisar_flags_qualidade) contra uma única chamada a
+AnalisadorLinhas.analisar. Mede também o caminho completo com os avisos
+(saída num StringIO) e confere que as colunas gravadas no CSV são as mesmas
+e que os avisos de mpu_ok_no_escorregamento agora aparecem (sai com código 1
+se não).
+
+Uso: python benchmarks/bench_esquema_registro.py [--linhas 20000] [--repeticoes 5]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+DIR_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(DIR_BENCHMARKS))
+sys.path.insert(0, DIR_BENCHMARKS)
+
+import esquema_registro
+import interface_tribometro
+import protocolo_binario
+from dados_sinteticos import CASAS_DECIMAIS, gerar_dataframe
+
+CARIMBO = "2026-01-01 00:00:00"
+COLUNA_ESCORREGAMENTO = protocolo_binario.COLUNAS_RESULTADO.index("mpu_ok_no_escorregamento")
+
+
+def gerar_linhas(linhas, semente=0):
+    """Cabeçalho do firmware seguido de ``linhas`` resultados, como chegam da serial."""
+    df = gerar_dataframe(linhas, semente).round(CASAS_DECIMAIS).drop(columns=["Timestamp_PC"])
+    return df.to_csv(sep=";", index=False, na_rep="nan", lineterminator="\n").splitlines()
+
+
+def _colunas_antigas(linha):
+    """Separação que salvar_em_csv fazia."""
+    linha = linha.strip()
+    eh_cabecalho = "massa_g" in linha and "LBC" in linha
+    colunas = linha.split(";")
+    colunas.append("Timestamp_PC" if eh_cabecalho else CARIMBO)
+    return colunas
+
+
+class _AvisosAntigos:
+    """avisar_flags_qualidade antes do esquema compilado (com os nomes errados)."""
+
+    def __init__(self):
+        self.cabecalho = None
+
+    def __call__(self, linha):
+        linha_minuscula = linha.lower()
+        if "massa_g" in linha_minuscula and "lbc" in linha_minuscula:
+            self.cabecalho = [c.strip() for c in linha.split(';')]
+            return
+        if self.cabecalho is None:
+            if "nan" in linha_minuscula:
+                print("[AVISO] Resultado contém NaN (medida inválida).")
+            return
+        colunas = [c.strip() for c in linha.split(';')]
+        if len(colunas) != len(self.cabecalho) and len(colunas) + 1 != len(self.cabecalho):
+            return
+        indice = {nome: i for i, nome in enumerate(self.cabecalho)}
+
+        def obter(nome, default=None):
+            i = indice.get(nome)
+            if i is None or i >= len(colunas):
+                return default
+            return colunas[i]
+        if obter("mpu_ok") == "0":
+            print("[AVISO] MPU inválido nesta amostra (mpu_ok=0).")
+        if obter("mpu_ok_slip") == "0":
+            print("[AVISO] Escorregamento detectado sem MPU válido (mpu_ok_slip=0).")
+        if obter("sonar_ok") == "0":
+            print("[AVISO] Sonar inválido nesta amostra (sonar_ok=0).")
+        sonar_atraso_ms = obter("sonar_stale_ms")
+        try:
+            if sonar_atraso_ms is not None and int(float(sonar_atraso_ms)) > 0:
+                print(f"[AVISO] Sonar stale: {sonar_atraso_ms} ms.")
+        except ValueError:
+            pass
+        if "nan" in linha_minuscula:
+            print("[AVISO] Resultado contém NaN (medida inválida).")
+        sonar_filtrado, dist0, tempo_s = obter("sonar_filt_mm"), obter("dist0_mm"), obter("tempo_s")
+        try:
+            if sonar_filtrado is not None and dist0 is not None:
+                tempo = float(tempo_s) if tempo_s is not None else None
+                if abs(float(sonar_filtrado) - float(dist0)) > 50 and (tempo is None or tempo < 0.2):
+                    print(f"[AVISO] Divergência grande: sonar_filt_mm={sonar_filtrado} vs dist0_mm={dist0}.")
+        except ValueError:
+            pass
+        if obter("s_ok") == "0":
+            print("[AVISO] Percurso fora da tolerância (s_ok=0).")
+        calib_pitch_std, calib_dist_std = obter("calib_pitch_std_deg"), obter("calib_dist_std_mm")
+        try:
+            if calib_pitch_std is not None and float(calib_pitch_std) > interface_tribometro.LIMITE_CALIB_PITCH_STD:
+                print(f"[AVISO] Calibração MPU instável (std={calib_pitch_std} deg).")
+            if calib_dist_std is not None and float(calib_dist_std) > interface_tribometro.LIMITE_CALIB_DIST_STD:
+                print(f"[AVISO] Calibração Sonar instável (std={calib_dist_std} mm).")
+        except ValueError:
+            pass
+
+
+def caminho_antigo(linhas):
+    avisar = _AvisosAntigos()
+    gravadas = []
+    for linha in linhas:
+        if linha.count(';') > 5:
+            gravadas.append(_colunas_antigas(linha))
+            avisar(linha)
+    return gravadas
+
+
+def caminho_novo(linhas):
+    analisador = esquema_registro.AnalisadorLinhas()
+    gravadas = []
+    for linha in linhas:
+        registro = analisador.analisar(linha, CARIMBO)
+        if registro is not None:
+            gravadas.append(registro.colunas)
+            interface_tribometro.avisar_flags_qualidade(registro)
+    return gravadas
+
+
+def so_analise_antiga(linhas):
+    """Só o trabalho de texto do caminho antigo, sem os avisos."""
+    cabecalho = None
+    for linha in linhas:
+        if linha.count(';') <= 5:
+            continue
+        _colunas_antigas(linha)
+        linha_minuscula = linha.lower()
+        colunas = [c.strip() for c in linha.split(';')]
+        if "massa_g" in linha_minuscula and "lbc" in linha_minuscula:
+            cabecalho = colunas
+            continue
+        indice = {nome: i for i, nome in enumerate(cabecalho)}
+        for nome in ("mpu_ok", "sonar_ok", "s_ok", "tempo_s", "dist0_mm"):
+            colunas[indice[nome]]
+
+
+def so_analise_nova(linhas):
+    analisador = esquema_registro.AnalisadorLinhas()
+    for linha in linhas:
+        registro = analisador.analisar(linha, CARIMBO)
+        if not registro.eh_cabecalho:
+            registro.mpu_ok, registro.sonar_ok, registro.s_ok, registro.tempo_s, registro.dist0_mm
+
+
+def _cronometrar(funcao, linhas, repeticoes):
+    melhor = None
+    saida = io.StringIO()
+    for _ in range(repeticoes):
+        saida.seek(0)
+        saida.truncate()
+        with contextlib.redirect_stdout(saida):
+            inicio = time.perf_counter()
+            resultado = funcao(linhas)
+            decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor / len(linhas) * 1e6, resultado, saida.getvalue()
+
+
+def executar(linhas=20000, repeticoes=5):
+    texto = gerar_linhas(linhas)
+    antigo_us, gravadas_antigas, avisos_antigos = _cronometrar(caminho_antigo, texto, repeticoes)
+    novo_us, gravadas_novas, avisos_novos = _cronometrar(caminho_novo, texto, repeticoes)
+    analise_antiga_us = _cronometrar(so_analise_antiga, texto, repeticoes)[0]
+    analise_nova_us = _cronometrar(so_analise_nova, texto, repeticoes)[0]
+
+    esperados = sum(1 for linha in texto[1:] if linha.split(";")[COLUNA_ESCORREGAMENTO] == "0")
+    contagem = {
+        "antigo": avisos_antigos.count("(mpu_ok_slip=0)"),
+        "novo": avisos_novos.count("(mpu_ok_no_escorregamento=0)"),
+    }
+    colunas_iguais = gravadas_antigas == gravadas_novas
+    return {
+        "benchmark": "esquema_registro",
+        "linhas": len(texto),
+        "por_linha_us": {
+            "analise_antiga": analise_antiga_us,
+            "analise_registro": analise_nova_us,
+            "com_avisos_antigo": antigo_us,
+            "com_avisos_registro": novo_us,
+        },
+        "avisos_escorregamento": dict(contagem, esperados=esperados),
+        "colunas_iguais": colunas_iguais,
+        "ok": colunas_iguais and contagem["novo"] == esperados > 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=20000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    args = parser.parse_args()
+    relatorio = executar(args.linhas, args.repeticoes)
+    if args.json:
+        print(json.dumps(relatorio, indent=2))
+    else:
+        t = relatorio["por_linha_us"]
+        print(f"{relatorio['linhas']} linhas")
+        print(f"Separação e busca de campos: antigo {t['analise_antiga']:.2f} us/linha | "
+              f"registro {t['analise_registro']:.2f} us/linha")
+        print(f"Com os avisos de qualidade: antigo {t['com_avisos_antigo']:.2f} us/linha | "
+              f"registro {t['com_avisos_registro']:.2f} us/linha")
+        a = relatorio["avisos_escorregamento"]
+        print(f"Avisos de escorregamento sem MPU: antigo {a['antigo']} | registro {a['novo']} "
+              f"(esperados {a['esperados']})")
+        print(f"Colunas gravadas idênticas: {'sim' if relatorio['colunas_iguais'] else 'NÃO'}")
+    if not relatorio["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
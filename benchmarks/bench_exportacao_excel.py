@@ -0,0 +1,148 @@
+"""Benchmark da exportação Excel da análise: tempo e pico de RSS por modo.
+
+Modos: legado (ExcelWriter + larguras com astype(str).tolist() em todas as
+células), completo (ExcelWriter + larguras por amostragem), rapido (write-only),
+rapido_limitado (dados brutos cortados em --max-linhas + Parquet ao lado) e
+rapido_sem_brutos (só resumo e legenda no Excel, dados em Parquet).
+Cada modo roda num processo separado para medir o pico de memória isolado.
+
+Uso: python benchmarks/bench_exportacao_excel.py [--linhas 10000 100000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+DIR_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIR_RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dados_sinteticos import gerar_dataframe
+
+MODOS = ("legado", "completo", "rapido", "rapido_limitado", "rapido_sem_brutos")
+
+# Executado no processo filho: carrega os dados já processados, zera o pico
+# (VmHWM) e mede só a exportação. Fora do Linux usa ru_maxrss.
+_FILHO = r"""
+import json, os, resource, sys, time
+sys.path.insert(0, {raiz!r})
+import pandas as pd
+import openpyxl
+import analise_de_ensaios as analise
+
+def status_mb(campo):
+    try:
+        with open("/proc/self/status") as arquivo:
+            for linha in arquivo:
+                if linha.startswith(campo + ":"):
+                    return int(linha.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return None
+
+def rss_pico_mb():
+    pico = status_mb("VmHWM")
+    if pico is not None:
+        return pico
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / 1e6 if sys.platform == "darwin" else pico / 1024.0
+
+def exportar_legado(dir_saida, resumo, df_raw, df_limpos):
+    from openpyxl.utils import get_column_letter
+    def ajustar(writer, nome, df, padding=2, max_width=50):
+        worksheet = writer.sheets[nome]
+        for idx, coluna in enumerate(df.columns, start=1):
+            valores = df[coluna].astype(str).tolist()
+            max_len = max([len(str(coluna))] + [len(v) for v in valores]) if valores else len(str(coluna))
+            worksheet.column_dimensions[get_column_letter(idx)].width = min(max_len + padding, max_width)
+    with pd.ExcelWriter(os.path.join(dir_saida, "analise_tribometro.xlsx"), engine="openpyxl") as writer:
+        resumo.to_excel(writer, sheet_name="resumo", index=False)
+        df_raw.to_excel(writer, sheet_name="dados_raw", index=False)
+        df_limpos.to_excel(writer, sheet_name="dados_limpos", index=False)
+        analise.adicionar_legenda_excel(writer)
+        ajustar(writer, "resumo", resumo)
+        ajustar(writer, "dados_raw", df_raw)
+        ajustar(writer, "dados_limpos", df_limpos)
+        ajustar(writer, "legenda", pd.DataFrame(analise.LEGENDAS), max_width=80)
+
+modo, origem, dir_saida, max_linhas = sys.argv[1], sys.argv[2], sys.argv[3], int(sys.argv[4])
+df_raw = pd.read_pickle(origem)
+df_limpos, resumo = analise.processar_dados(df_raw)
+try:
+    with open("/proc/self/clear_refs", "w") as arquivo:
+        arquivo.write("5")
+except OSError:
+    pass
+base = status_mb("VmRSS") or rss_pico_mb()
+inicio = time.perf_counter()
+if modo == "legado":
+    exportar_legado(dir_saida, resumo, df_raw, df_limpos)
+elif modo == "completo":
+    analise.exportar_excel(dir_saida, resumo, df_raw, df_limpos, "completo")
+elif modo == "rapido":
+    analise.exportar_excel(dir_saida, resumo, df_raw, df_limpos, "rapido")
+elif modo == "rapido_limitado":
+    analise.exportar_excel(dir_saida, resumo, df_raw, df_limpos, "rapido", max_linhas)
+else:
+    analise.exportar_excel(dir_saida, resumo, df_raw, df_limpos, "rapido", 0)
+duracao = time.perf_counter() - inicio
+tamanho = sum(os.path.getsize(os.path.join(dir_saida, n)) for n in os.listdir(dir_saida))
+print(json.dumps({{"exportacao_s": duracao, "rss_base_mb": base, "rss_pico_mb": rss_pico_mb(),
+                  "bytes_saida": tamanho, "arquivos": sorted(os.listdir(dir_saida))}}))
+"""
+
+
+def medir_modo(modo, origem, dir_saida, max_linhas):
+    os.makedirs(dir_saida)
+    codigo = _FILHO.format(raiz=DIR_RAIZ)
+    saida = subprocess.run([sys.executable, "-c", codigo, modo, origem, dir_saida, str(max_linhas)],
+                           capture_output=True, text=True, check=True)
+    resultado = json.loads(saida.stdout.strip().splitlines()[-1])
+    resultado["rss_exportacao_mb"] = resultado["rss_pico_mb"] - resultado["rss_base_mb"]
+    return resultado
+
+
+def medir(linhas, dir_trabalho, max_linhas, modos):
+    import analise_de_ensaios
+    origem = os.path.join(dir_trabalho, f"dados_{linhas}.pkl")
+    analise_de_ensaios.normalizar_tipos(gerar_dataframe(linhas)).to_pickle(origem)
+    resultado = {"linhas": linhas, "modos": {}}
+    for modo in modos:
+        destino = os.path.join(dir_trabalho, f"{modo}_{linhas}")
+        resultado["modos"][modo] = medir_modo(modo, origem, destino, max_linhas)
+    return resultado
+
+
+def executar(tamanhos=(10000, 100000), max_linhas=10000, modos=MODOS):
+    with tempfile.TemporaryDirectory() as dir_trabalho:
+        return {"benchmark": "exportacao_excel", "max_linhas": max_linhas,
+                "resultados": [medir(n, dir_trabalho, max_linhas, modos) for n in tamanhos]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--max-linhas", type=int, default=10000,
+                        help="Limite das planilhas brutas no modo rapido_limitado.")
+    parser.add_argument("--modos", nargs="+", choices=MODOS, default=list(MODOS))
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    args = parser.parse_args()
+    relatorio = executar(args.linhas, args.max_linhas, args.modos)
+    if args.json:
+        print(json.dumps(relatorio, indent=2))
+        return
+    for r in relatorio["resultados"]:
+        print(f"{r['linhas']} linhas:")
+        referencia = r["modos"].get("legado")
+        for modo, m in r["modos"].items():
+            linha = (f"  {modo:>18}: {m['exportacao_s']:8.2f} s | +{m['rss_exportacao_mb']:7.1f} MB RSS "
+                     f"| {m['bytes_saida'] / 1e6:6.1f} MB em disco")
+            if referencia and modo != "legado":
+                linha += f" | {referencia['exportacao_s'] / m['exportacao_s']:.1f}x"
+            print(linha)
+
+
+if __name__ == "__main__":
+    main()
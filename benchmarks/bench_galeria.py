@@ -0,0 +1,145 @@
+"""Galeria de gráficos: listagem em cache, validadores HTTP e miniaturas x imagens inteiras.
+
+Desenha um gráfico de barras real com o matplotlib a 300 dpi (como a análise),
+copia para ``--imagens`` arquivos nas três pastas da galeria e mede pelo
+cliente de teste do Flask: /api/graficos com a listagem em cache x refazendo a
+varredura a cada chamada (como antes), /files com e sem If-None-Match (304),
+e os bytes que uma atualização da galeria baixa com miniaturas x imagens
+inteiras. Também confere que um gráfico novo aparece na listagem seguinte.
+
+Uso: python benchmarks/bench_galeria.py [--imagens 60] [--chamadas 200]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ui_server
+from galeria_graficos import GaleriaGraficos, eh_imagem
+
+
+def _grafico_modelo(caminho):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(12, 7))
+    plt.bar([f"LBT {i}" for i in range(8)], [0.2 + 0.03 * i for i in range(8)], color="#3498db")
+    plt.title("μ_d médio por LBT")
+    plt.tight_layout()
+    plt.savefig(caminho, dpi=300)
+    plt.close()
+
+
+def _listar_sem_cache(bases):
+    # O que /api/graficos fazia antes: varrer as três pastas a cada chamada.
+    return [sorted(p.name for p in base.iterdir() if p.is_file() and eh_imagem(p.name)) for base in bases]
+
+
+def _cronometrar(funcao, vezes):
+    tempos = []
+    for _ in range(vezes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1000.0
+
+
+def executar(imagens=60, chamadas=200):
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        ui_server.DIR_GRAFICOS_ENSAIO = tmp / "graficos_ensaio"
+        ui_server.DIR_GRAFICOS_ANALISE = tmp / "saida_analise" / "graficos"
+        ui_server.DIR_GRAFICOS_RESUMO = ui_server.DIR_GRAFICOS_ANALISE / "resumo"
+        ui_server.galeria = GaleriaGraficos(tmp / "graficos_miniaturas")
+        bases = ui_server._bases_graficos()
+        for base in bases:
+            base.mkdir(parents=True, exist_ok=True)
+        modelo = tmp / "modelo.png"
+        _grafico_modelo(modelo)
+        nomes = []
+        for i in range(imagens):
+            nome = f"grafico_{i:03d}.png"
+            shutil.copyfile(modelo, bases[i % len(bases)] / nome)
+            nomes.append(nome)
+        # Fora da janela em que a pasta recém-modificada é sempre relida.
+        antigo = time.time() - 60
+        for base in bases:
+            os.utime(base, (antigo, antigo))
+
+        cliente = ui_server.app.test_client()
+        endpoint_ms = _cronometrar(lambda: cliente.get("/api/graficos"), chamadas)
+        em_cache_ms = _cronometrar(lambda: [ui_server.galeria.versoes(b) for b in bases], chamadas)
+        varredura_ms = _cronometrar(lambda: _listar_sem_cache(bases), chamadas)
+        versoes = cliente.get("/api/graficos").get_json()["versoes"]
+
+        # Primeira visita: miniaturas geradas; segunda: já existem no disco.
+        inicio = time.perf_counter()
+        bytes_miniaturas = sum(len(cliente.get(f"/miniaturas/{n}?v={versoes[n]}").data) for n in nomes)
+        geracao_s = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        for n in nomes:
+            cliente.get(f"/miniaturas/{n}?v={versoes[n]}")
+        miniaturas_prontas_ms = (time.perf_counter() - inicio) / imagens * 1000.0
+        bytes_inteiras = sum(len(cliente.get(f"/files/{n}").data) for n in nomes)
+
+        primeira = cliente.get(f"/files/{nomes[0]}?v={versoes[nomes[0]]}")
+        revalidacao = cliente.get(f"/files/{nomes[0]}", headers={"If-None-Match": primeira.headers["ETag"]})
+
+        # Gráfico novo (gravado com os.replace, como a análise): deve aparecer já na próxima listagem.
+        temporario = bases[1] / "novo.tmp.png"
+        shutil.copyfile(modelo, temporario)
+        os.replace(temporario, bases[1] / "novo.png")
+        aparece = "novo.png" in cliente.get("/api/graficos").get_json()["graficos_analise"]
+
+        return {
+            "benchmark": "galeria",
+            "imagens": imagens,
+            "api_graficos_ms": endpoint_ms,
+            "listagem_em_cache_ms": em_cache_ms,
+            "listagem_varrendo_ms": varredura_ms,
+            "leituras_pasta": ui_server.galeria.leituras_pasta,
+            "miniaturas_geradas": ui_server.galeria.miniaturas_geradas,
+            "geracao_miniatura_ms": geracao_s / imagens * 1000.0,
+            "miniatura_pronta_ms": miniaturas_prontas_ms,
+            "bytes_galeria_miniaturas": bytes_miniaturas,
+            "bytes_galeria_inteiras": bytes_inteiras,
+            "cache_control_versionado": primeira.headers.get("Cache-Control"),
+            "revalidacao_status": revalidacao.status_code,
+            "novo_grafico_listado": aparece,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--imagens", type=int, default=60)
+    parser.add_argument("--chamadas", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    args = parser.parse_args()
+    r = executar(args.imagens, args.chamadas)
+    if args.json:
+        print(json.dumps(r, indent=2))
+    else:
+        print(f"Listagem das 3 pastas ({r['imagens']} imagens): {r['listagem_em_cache_ms']:.3f} ms em cache | "
+              f"{r['listagem_varrendo_ms']:.3f} ms varrendo ({r['leituras_pasta']} leituras de pasta no total); "
+              f"/api/graficos completo {r['api_graficos_ms']:.3f} ms")
+        print(f"Miniaturas: {r['geracao_miniatura_ms']:.1f} ms para gerar, {r['miniatura_pronta_ms']:.2f} ms já geradas "
+              f"({r['miniaturas_geradas']} geradas)")
+        print(f"Galeria inteira: miniaturas {r['bytes_galeria_miniaturas'] / 1024:.0f} KiB | "
+              f"imagens inteiras {r['bytes_galeria_inteiras'] / 1024:.0f} KiB")
+        print(f"URL versionada: Cache-Control '{r['cache_control_versionado']}'; "
+              f"revalidação com ETag -> {r['revalidacao_status']}")
+        print(f"Gráfico novo aparece na listagem seguinte: {'sim' if r['novo_grafico_listado'] else 'NÃO'}")
+    if r["revalidacao_status"] != 304 or not r["novo_grafico_listado"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Gráfico do ensaio: PNG do matplotlib no servidor x dados em JSON desenhados no navegador.
+
+Gera um resultados_tribometro.csv sintético, aponta o ui_server para ele e mede,
+para os mesmos ensaios (g 0, g 1, ...), o tempo de gerar_grafico_ensaio (PNG a
+dpi=200, como a exportação) e o de GET /api/grafico pelo cliente de teste do
+Flask (o que a página faz antes de desenhar no canvas), além dos bytes que
+cada um manda ao navegador. Confere que o JSON traz os valores da linha do CSV.
+
+Uso: python benchmarks/bench_grafico_dados.py [--linhas 20000] [--ensaios 20]
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import indice_resultados
+import ui_server
+from dados_sinteticos import gerar_csv
+
+
+def _conferir(grafico, caminho_csv, deslocamento):
+    cabecalho, linha = indice_resultados.ler_linha_do_fim(caminho_csv, deslocamento)
+    valores = dict(zip(cabecalho, linha))
+    for campo in ("massa_g", "angulo_deg", "mu_s", "mu_d"):
+        esperado = float(valores[campo])
+        obtido = grafico[campo]
+        if math.isnan(esperado) or math.isinf(esperado):
+            if obtido is not None:
+                return False
+        elif obtido is None or abs(obtido - esperado) > 1e-9:
+            return False
+    return grafico["LBC"] == valores["LBC"] and grafico["LBT"] == valores["LBT"]
+
+
+def executar(linhas=20000, ensaios=20):
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho_csv = gerar_csv(Path(tmp) / "resultados_tribometro.csv", linhas)
+        ui_server.CAMINHO_CSV_PADRAO = Path(caminho_csv)
+        ui_server.DIR_GRAFICOS_ENSAIO = Path(tmp) / "graficos_ensaio"
+        cliente = ui_server.app.test_client()
+
+        tempos_json, bytes_json, conferidos, validos = [], [], 0, []
+        for deslocamento in range(ensaios):
+            inicio = time.perf_counter()
+            resposta = cliente.get(f"/api/grafico?deslocamento={deslocamento}")
+            tempos_json.append(time.perf_counter() - inicio)
+            if resposta.status_code != 200:
+                continue
+            validos.append(deslocamento)
+            bytes_json.append(len(resposta.data))
+            conferidos += _conferir(resposta.get_json()["grafico"], str(caminho_csv), deslocamento)
+
+        tempos_png, bytes_png = [], []
+        for deslocamento in validos:
+            inicio = time.perf_counter()
+            ok, caminho_png = ui_server.gerar_grafico_ensaio(deslocamento)
+            tempos_png.append(time.perf_counter() - inicio)
+            if ok:
+                bytes_png.append(os.path.getsize(caminho_png))
+
+    # O primeiro PNG inclui importar o matplotlib; os demais, só desenhar e gravar.
+    return {
+        "benchmark": "grafico_dados",
+        "linhas_csv": linhas,
+        "ensaios": len(validos),
+        "json_conferidos": conferidos,
+        "json_ms_mediana": statistics.median(tempos_json) * 1000.0,
+        "json_bytes_medio": statistics.mean(bytes_json) if bytes_json else 0,
+        "png_ms_primeiro": tempos_png[0] * 1000.0 if tempos_png else None,
+        "png_ms_mediana": statistics.median(tempos_png[1:] or tempos_png) * 1000.0 if tempos_png else None,
+        "png_bytes_medio": statistics.mean(bytes_png) if bytes_png else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=20000)
+    parser.add_argument("--ensaios", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    args = parser.parse_args()
+    r = executar(args.linhas, args.ensaios)
+    if args.json:
+        print(json.dumps(r, indent=2))
+    else:
+        print(f"{r['ensaios']} ensaios válidos de um CSV com {r['linhas_csv']} linhas "
+              f"({r['json_conferidos']}/{r['ensaios']} JSON conferidos com o CSV)")
+        print(f"  PNG (matplotlib, dpi=200): {r['png_ms_mediana']:.1f} ms (primeiro {r['png_ms_primeiro']:.0f} ms), "
+              f"{r['png_bytes_medio'] / 1024:.0f} KiB")
+        print(f"  JSON /api/grafico:         {r['json_ms_mediana']:.2f} ms, {r['json_bytes_medio']:.0f} B")
+    if r["json_conferidos"] != r["ensaios"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
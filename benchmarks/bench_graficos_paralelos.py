@@ -0,0 +1,80 @@
+"""Benchmark da geração de gráficos da análise: em série x pool de processos.
+
+Gera os mesmos gráficos de executar_analise (barras, dispersões, heatmaps e um
+PNG por grupo LBT/LBC/massa) a partir de dados sintéticos, confere que todos os
+modos produzem arquivos idênticos e relata o ganho sobre o caminho em série.
+
+Uso: python benchmarks/bench_graficos_paralelos.py [--linhas 2000] [--trabalhadores 2 4 8]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from analise_de_ensaios import montar_tarefas_graficos, processar_dados, renderizar_graficos
+from dados_sinteticos import gerar_dataframe
+
+
+def _assinaturas(*diretorios):
+    assinaturas = {}
+    for diretorio in diretorios:
+        for nome in sorted(os.listdir(diretorio)):
+            caminho = os.path.join(diretorio, nome)
+            if os.path.isfile(caminho):
+                with open(caminho, "rb") as arquivo:
+                    assinaturas[nome] = hashlib.sha256(arquivo.read()).hexdigest()
+    return assinaturas
+
+
+def medir(df_limpos, resumo, trabalhadores, dir_base):
+    dir_graficos = os.path.join(dir_base, f"graficos_{trabalhadores}")
+    dir_resumo = os.path.join(dir_graficos, "resumo")
+    os.makedirs(dir_resumo, exist_ok=True)
+    tarefas = montar_tarefas_graficos(df_limpos, resumo, dir_graficos, dir_resumo)
+    relatorio = renderizar_graficos(tarefas, trabalhadores)
+    relatorio["arquivos"] = _assinaturas(dir_graficos, dir_resumo)
+    return relatorio
+
+
+def executar(linhas=2000, trabalhadores=(2, 4)):
+    df_limpos, resumo = processar_dados(gerar_dataframe(linhas))
+    with tempfile.TemporaryDirectory() as dir_base:
+        serie = medir(df_limpos, resumo, 1, dir_base)
+        resultados = [serie]
+        for n in trabalhadores:
+            resultado = medir(df_limpos, resumo, n, dir_base)
+            resultado["ganho"] = serie["total_s"] / resultado["total_s"]
+            resultado["identico_ao_serie"] = resultado["arquivos"] == serie["arquivos"]
+            resultados.append(resultado)
+    for resultado in resultados:
+        del resultado["arquivos"]
+    return {"benchmark": "graficos_paralelos", "linhas": linhas, "grupos": len(resumo),
+            "cpus": os.cpu_count(), "resultados": resultados}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=2000)
+    parser.add_argument("--trabalhadores", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    args = parser.parse_args()
+    relatorio = executar(args.linhas, args.trabalhadores)
+    if args.json:
+        print(json.dumps(relatorio, indent=2))
+        return
+    print(f"{relatorio['linhas']} linhas, {relatorio['grupos']} grupos, {relatorio['cpus']} CPUs")
+    for r in relatorio["resultados"]:
+        extra = ""
+        if "ganho" in r:
+            extra = f" | ganho {r['ganho']:.2f}x | idêntico ao série: {r['identico_ao_serie']}"
+        print(f"  {r['trabalhadores']} processo(s): {r['tarefas']} gráficos em {r['total_s']:.2f} s "
+              f"(CPU somada {r['cpu_s']:.2f} s){extra}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Tempo de importação da interface e do servidor (python -X importtime) e efeito do pré-aquecimento.
+
+Importa cada módulo num processo novo com ``-X importtime``, soma o tempo
+próprio por pacote de topo e confere que interface_tribometro e ui_server não
+carregam pandas, matplotlib nem seaborn ao subir (sai com código 1 se
+carregarem). Depois compara, também em processos novos, o custo do primeiro
+'a'/'g' (importar analise_de_ensaios e desenhar um gráfico) a frio e depois de
+preaquecimento.Preaquecedor terminar.
+
+Uso: python benchmarks/bench_importacao.py [--repeticoes 3] [--top 8]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+DIR_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIR_RAIZ)
+
+MODULOS_LEVES = ("interface_tribometro", "ui_server")
+MODULOS_REFERENCIA = ("analise_de_ensaios",)
+PACOTES_PESADOS = ("pandas", "matplotlib", "seaborn")
+
+_PRIMEIRO_USO = """
+import time
+{preparo}
+inicio = time.perf_counter()
+import analise_de_ensaios
+import preaquecimento
+preaquecimento._desenhar_grafico()
+print(time.perf_counter() - inicio)
+"""
+
+_PREPARO_AQUECIDO = """
+import preaquecimento
+_aquecedor = preaquecimento.Preaquecedor(atraso_s=0).iniciar()
+_aquecedor.aguardar()
+assert _aquecedor.erro is None, _aquecedor.erro
+"""
+
+
+def _python(codigo, importtime=False):
+    comando = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", codigo]
+    ambiente = dict(os.environ, MPLBACKEND="Agg")
+    return subprocess.run(comando, cwd=DIR_RAIZ, env=ambiente, capture_output=True, text=True, check=True)
+
+
+def analisar_importtime(saida):
+    """Retorna (total_us, {pacote de topo: tempo próprio em us}) da saída de -X importtime."""
+    por_pacote = defaultdict(int)
+    total = 0
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        proprio, cumulativo, nome = linha[len("import time:"):].split("|")
+        por_pacote[nome.strip().split(".")[0]] += int(proprio)
+        if not nome.startswith("  "):
+            # Sem recuo: importado direto pelo comando; o acumulado já inclui os filhos.
+            total += int(cumulativo)
+    return total, dict(por_pacote)
+
+
+def medir_importacao(modulo, repeticoes, top):
+    melhor = None
+    for _ in range(repeticoes):
+        total, por_pacote = analisar_importtime(_python(f"import {modulo}", importtime=True).stderr)
+        if melhor is None or total < melhor[0]:
+            melhor = (total, por_pacote)
+    total, por_pacote = melhor
+    maiores = sorted(por_pacote.items(), key=lambda item: -item[1])[:top]
+    return {
+        "modulo": modulo,
+        "total_ms": total / 1000.0,
+        "pacotes_ms": {nome: us / 1000.0 for nome, us in maiores},
+        "pesados_carregados": [p for p in PACOTES_PESADOS if p in por_pacote],
+    }
+
+
+def medir_primeiro_uso(repeticoes):
+    resultado = {}
+    for nome, preparo in (("frio", ""), ("preaquecido", _PREPARO_AQUECIDO)):
+        tempos = [float(_python(_PRIMEIRO_USO.format(preparo=preparo)).stdout) for _ in range(repeticoes)]
+        resultado[nome + "_ms"] = min(tempos) * 1000.0
+    return resultado
+
+
+def executar(repeticoes=3, top=8):
+    importacoes = [medir_importacao(m, repeticoes, top) for m in MODULOS_LEVES + MODULOS_REFERENCIA]
+    violacoes = [r["modulo"] for r in importacoes if r["modulo"] in MODULOS_LEVES and r["pesados_carregados"]]
+    return {
+        "benchmark": "importacao",
+        "importacoes": importacoes,
+        "primeiro_uso": medir_primeiro_uso(repeticoes),
+        "violacoes": violacoes,
+        "ok": not violacoes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    args = parser.parse_args()
+    relatorio = executar(args.repeticoes, args.top)
+    if args.json:
+        print(json.dumps(relatorio, indent=2))
+    else:
+        for r in relatorio["importacoes"]:
+            pesados = ", ".join(r["pesados_carregados"]) or "nenhum"
+            print(f"{r['modulo']}: {r['total_ms']:.1f} ms (pacotes pesados: {pesados})")
+            for nome, ms in r["pacotes_ms"].items():
+                print(f"  {nome:>22}: {ms:7.1f} ms")
+        uso = relatorio["primeiro_uso"]
+        print(f"Primeiro 'a'/'g' (importar análise + gráfico): frio {uso['frio_ms']:.0f} ms | "
+              f"preaquecido {uso['preaquecido_ms']:.0f} ms")
+        if relatorio["violacoes"]:
+            print(f"FALHOU: {', '.join(relatorio['violacoes'])} importa pacotes pesados ao subir.")
+    if not relatorio["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Benchmark do "g N": leitura completa do CSV x índice de deslocamentos x leitura reversa.
+
+Uso: python benchmarks/bench_indice_resultados.py [--linhas 10000 100000]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import indice_resultados
+from simulador_tribometro import CABECALHO_CSV, ModeloAtrito, TribometroVirtual
+
+DESLOCAMENTOS = (0, 1, 10, 1000)
+
+
+def gerar_csv(caminho, linhas, semente=7):
+    """Gera um CSV no formato gravado pelo ingest, usando o tribômetro virtual."""
+    saida = []
+    tribometro = TribometroVirtual(ModeloAtrito(semente=semente), emitir=saida.append)
+    tribometro.massa_g = 250.0
+    tribometro.processar_comando("ip")
+    tribometro.processar_comando("fp")
+    with open(caminho, "w", newline="", encoding="utf-8-sig") as arquivo:
+        escritor = csv.writer(arquivo, delimiter=";")
+        escritor.writerow(CABECALHO_CSV.split(";") + ["Timestamp_PC"])
+        for i in range(linhas):
+            saida.clear()
+            tribometro.lbc = 1 + i % 3
+            tribometro.lbt = 1 + (i // 3) % 3
+            tribometro.executar_ensaio()
+            escritor.writerow(saida[-1].split(";") + ["2026-01-01 00:00:00"])
+
+
+def ler_legado(caminho, deslocamento):
+    """Algoritmo anterior: interpreta o arquivo inteiro a cada chamada."""
+    cabecalho = None
+    linhas_dados = []
+    with open(caminho, "r", newline="", encoding="utf-8-sig") as arquivo:
+        for linha in csv.reader(arquivo, delimiter=";"):
+            if not linha:
+                continue
+            linha_minuscula = [c.strip().lower() for c in linha]
+            if "massa_g" in linha_minuscula and "lbc" in linha_minuscula:
+                cabecalho = [c.strip() for c in linha]
+                continue
+            if cabecalho is None:
+                continue
+            if len(linha) >= len(cabecalho) - 1:
+                linhas_dados.append([c.strip() for c in linha])
+    if cabecalho is None or deslocamento >= len(linhas_dados):
+        return None
+    return cabecalho, linhas_dados[-1 - deslocamento]
+
+
+def _cronometrar(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1000.0
+
+
+def medir(linhas, dir_saida):
+    caminho = os.path.join(dir_saida, f"resultados_{linhas}.csv")
+    gerar_csv(caminho, linhas)
+    indice_resultados._indices.clear()
+    resultado = {"linhas": linhas, "csv_bytes": os.path.getsize(caminho), "deslocamentos": {}}
+
+    inicio = time.perf_counter()
+    indice = indice_resultados.obter_indice(caminho)
+    indice.sincronizar()
+    resultado["construcao_indice_ms"] = (time.perf_counter() - inicio) * 1000.0
+    resultado["indice_bytes"] = os.path.getsize(caminho + indice_resultados.SUFIXO_INDICE)
+
+    indice_resultados._indices.clear()
+    inicio = time.perf_counter()
+    indice_resultados.obter_indice(caminho).sincronizar()
+    resultado["carga_indice_ms"] = (time.perf_counter() - inicio) * 1000.0
+
+    for deslocamento in DESLOCAMENTOS:
+        if deslocamento >= linhas:
+            continue
+        esperado = ler_legado(caminho, deslocamento)
+        assert indice_resultados.ler_linha_do_fim(caminho, deslocamento) == esperado
+        assert indice_resultados.ler_linha_do_fim_sem_indice(caminho, deslocamento) == esperado
+        repeticoes_legado = 1 if linhas > 50000 else 3
+        resultado["deslocamentos"][str(deslocamento)] = {
+            "legado_ms": _cronometrar(lambda: ler_legado(caminho, deslocamento), repeticoes_legado),
+            "indice_ms": _cronometrar(lambda: indice_resultados.ler_linha_do_fim(caminho, deslocamento), 200),
+            "reverso_sem_indice_ms": _cronometrar(
+                lambda: indice_resultados.ler_linha_do_fim_sem_indice(caminho, deslocamento), 1
+            ),
+        }
+    return resultado
+
+
+def executar(tamanhos=(10000, 100000)):
+    with tempfile.TemporaryDirectory() as dir_saida:
+        return {"benchmark": "indice_resultados", "resultados": [medir(n, dir_saida) for n in tamanhos]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    args = parser.parse_args()
+    relatorio = executar(args.linhas)
+    if args.json:
+        print(json.dumps(relatorio, indent=2))
+        return
+    for r in relatorio["resultados"]:
+        print(f"{r['linhas']} linhas ({r['csv_bytes'] / 1e6:.1f} MB): índice construído em "
+              f"{r['construcao_indice_ms']:.1f} ms, recarregado em {r['carga_indice_ms']:.2f} ms "
+              f"({r['indice_bytes'] / 1e6:.2f} MB)")
+        for deslocamento, t in r["deslocamentos"].items():
+            print(f"  g {deslocamento:>4}: legado {t['legado_ms']:9.2f} ms | índice {t['indice_ms']:7.3f} ms | "
+                  f"reverso sem índice {t['reverso_sem_indice_ms']:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
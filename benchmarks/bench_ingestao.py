@@ -0,0 +1,201 @@
+"""Benchmark ponta a ponta da ingestão usando o tribômetro virtual.
+
+Mede, para ui_server.GerenciadorSerial e interface_tribometro.ler_da_serial, a
+latência entre a emissão de uma linha de resultado pelo dispositivo e o fim da
+gravação no CSV, a vazão em ensaios/s e o crescimento do arquivo.
+
+Uso: python benchmarks/bench_ingestao.py [--ensaios 2000] [--alvo ui|interface|ambos]
+"""
+import argparse
+import collections
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serial
+
+from simulador_tribometro import DispositivoVirtual, ModeloAtrito
+
+
+def _percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(p / 100.0 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+class _Cronometro:
+    """Casa cada linha de resultado emitida com o fim da sua gravação (ordem FIFO)."""
+
+    def __init__(self):
+        self.emitidas = collections.deque()
+        self.latencias = []
+        self.lock = threading.Lock()
+
+    def ao_emitir(self, linha, instante):
+        if linha.count(";") > 5 and "massa_g" not in linha:
+            with self.lock:
+                self.emitidas.append(instante)
+
+    def ao_salvar(self, registro):
+        if registro.eh_cabecalho:
+            return
+        agora = time.perf_counter()
+        with self.lock:
+            if self.emitidas:
+                self.latencias.append(agora - self.emitidas.popleft())
+
+
+def _resumo(alvo, cronometro, ensaios, duracao, caminho_csv):
+    latencias_ms = [v * 1000.0 for v in cronometro.latencias]
+    tamanho = os.path.getsize(caminho_csv) if os.path.isfile(caminho_csv) else 0
+    return {
+        "alvo": alvo,
+        "ensaios": ensaios,
+        "linhas_gravadas": len(latencias_ms),
+        "segundos": duracao,
+        "ensaios_por_s": ensaios / duracao if duracao else 0.0,
+        "latencia_ms_p50": _percentil(latencias_ms, 50),
+        "latencia_ms_p95": _percentil(latencias_ms, 95),
+        "latencia_ms_max": max(latencias_ms) if latencias_ms else None,
+        "csv_bytes": tamanho,
+        "csv_bytes_por_ensaio": tamanho / max(1, len(latencias_ms)),
+    }
+
+
+def _rodar_dispositivo(dispositivo, ensaios, timeout):
+    dispositivo.configurar_padrao()
+    inicio = time.perf_counter()
+    dispositivo.enfileirar_ensaios(ensaios)
+    dispositivo.aguardar_fila(timeout)
+    return inicio
+
+
+def _aguardar_gravacoes(cronometro, total, timeout):
+    limite = time.monotonic() + timeout
+    while len(cronometro.latencias) < total and time.monotonic() < limite:
+        time.sleep(0.01)
+
+
+def medir_ui_server(ensaios, aceleracao, dir_saida, timeout=600):
+    import ui_server
+
+    caminho_csv = Path(dir_saida) / "resultados_ui.csv"
+    ui_server.CAMINHO_CSV_PADRAO = caminho_csv
+    ui_server.CAMINHO_RESUMO = Path(dir_saida) / "resumo_ui.json"
+    cronometro = _Cronometro()
+    dispositivo = DispositivoVirtual(ModeloAtrito(semente=1), aceleracao=aceleracao)
+    dispositivo.ao_emitir = cronometro.ao_emitir
+    dispositivo.iniciar()
+    gerenciador = ui_server.GerenciadorSerial()
+    salvar_original = gerenciador._salvar_em_csv
+
+    def salvar_cronometrado(registro):
+        salvar_original(registro)
+        cronometro.ao_salvar(registro)
+
+    gerenciador._salvar_em_csv = salvar_cronometrado
+    ok, msg = gerenciador.conectar(dispositivo.caminho)
+    if not ok:
+        dispositivo.parar()
+        raise RuntimeError(msg)
+    try:
+        while dispositivo.reinicios == 0:
+            time.sleep(0.01)
+        inicio = _rodar_dispositivo(dispositivo, ensaios, timeout)
+        _aguardar_gravacoes(cronometro, dispositivo.ensaios_concluidos, 30)
+        duracao = time.perf_counter() - inicio
+    finally:
+        gerenciador.desconectar()
+        dispositivo.parar()
+    return _resumo("ui_server", cronometro, dispositivo.ensaios_concluidos, duracao, caminho_csv)
+
+
+def medir_interface(ensaios, aceleracao, dir_saida, timeout=600):
+    import interface_tribometro
+
+    caminho_csv = os.path.join(dir_saida, "resultados_interface.csv")
+    interface_tribometro.CAMINHO_SAIDA_PADRAO = caminho_csv
+    interface_tribometro.CAMINHO_SAIDA_TEMP = os.path.join(dir_saida, "resultados_interface_tmp.csv")
+    interface_tribometro.ARQUIVO_ATIVO = None
+    interface_tribometro.CAMINHO_RESUMO = os.path.join(dir_saida, "resumo_interface.json")
+    interface_tribometro.RESUMO = None
+    cronometro = _Cronometro()
+    dispositivo = DispositivoVirtual(ModeloAtrito(semente=1), aceleracao=aceleracao)
+    dispositivo.ao_emitir = cronometro.ao_emitir
+    dispositivo.iniciar()
+    salvar_original = interface_tribometro.salvar_em_csv
+
+    def salvar_cronometrado(registro):
+        salvar_original(registro)
+        cronometro.ao_salvar(registro)
+
+    interface_tribometro.salvar_em_csv = salvar_cronometrado
+    porta = serial.Serial(dispositivo.caminho, interface_tribometro.TAXA_BAUD, timeout=1)
+    evento_parar = threading.Event()
+    saida = io.StringIO()
+
+    def ler():
+        with contextlib.redirect_stdout(saida):
+            interface_tribometro.ler_da_serial(porta, evento_parar)
+
+    thread = threading.Thread(target=ler, daemon=True)
+    thread.start()
+    try:
+        while dispositivo.reinicios == 0:
+            time.sleep(0.01)
+        inicio = _rodar_dispositivo(dispositivo, ensaios, timeout)
+        _aguardar_gravacoes(cronometro, dispositivo.ensaios_concluidos, 30)
+        duracao = time.perf_counter() - inicio
+    finally:
+        evento_parar.set()
+        porta.cancel_read()
+        thread.join(timeout=2)
+        porta.close()
+        dispositivo.parar()
+        interface_tribometro.salvar_em_csv = salvar_original
+    return _resumo("interface_tribometro", cronometro, dispositivo.ensaios_concluidos, duracao, caminho_csv)
+
+
+def executar(ensaios=2000, aceleracao=0.0, alvo="ambos"):
+    resultados = []
+    with tempfile.TemporaryDirectory() as dir_saida:
+        if alvo in ("ui", "ambos"):
+            resultados.append(medir_ui_server(ensaios, aceleracao, dir_saida))
+        if alvo in ("interface", "ambos"):
+            resultados.append(medir_interface(ensaios, aceleracao, dir_saida))
+    return {"benchmark": "ingestao", "aceleracao": aceleracao, "resultados": resultados}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ensaios", type=int, default=2000)
+    parser.add_argument("--aceleracao", type=float, default=0.0,
+                        help="Fator de tempo do dispositivo (0 = sem esperas).")
+    parser.add_argument("--alvo", choices=["ui", "interface", "ambos"], default="ambos")
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    args = parser.parse_args()
+    relatorio = executar(args.ensaios, args.aceleracao, args.alvo)
+    if args.json:
+        print(json.dumps(relatorio, indent=2))
+        return
+    for r in relatorio["resultados"]:
+        print(
+            f"{r['alvo']:>20}: {r['ensaios']} ensaios em {r['segundos']:.2f} s "
+            f"({r['ensaios_por_s'] * 60:.0f}/min) | latência p50={r['latencia_ms_p50']:.2f} ms "
+            f"p95={r['latencia_ms_p95']:.2f} ms max={r['latencia_ms_max']:.2f} ms | "
+            f"CSV {r['csv_bytes']} bytes ({r['csv_bytes_por_ensaio']:.0f} B/ensaio)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Benchmark de ingestão serial: LeitorLinhasSerial x laço legado byte a byte.
+
+Uma thread escreve linhas de resultado no lado mestre de um pty e o leitor abre o
+lado escravo com pyserial, como faria com o Arduino.
+
+Uso: python benchmarks/bench_leitor_serial.py [--linhas 20000] [--janela-legado 3]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serial
+
+from leitor_serial import LeitorLinhasSerial
+
+TAXA_BAUD = 115200
+LINHA_RESULTADO = (
+    "250.0;2;1;21.345;0.0182;0.3907;0.3121;1.0384;0.4462;0.412;123456;123868;8;"
+    "-0.0079;-0.0081;1;1;1;0;0.900;21.402;21.345;0.112;152;151;301;301;140;10.0;"
+    "150;148;151;1;0.084;2.1;40;40;27.31\r\n"
+).encode("ascii")
+
+
+def abrir_pty():
+    mestre, escravo = os.openpty()
+    return mestre, os.ttyname(escravo), escravo
+
+
+def _escritor(mestre, total_linhas, evento_parar):
+    bloco = LINHA_RESULTADO * 8
+    restantes = total_linhas
+    while restantes > 0 and not evento_parar.is_set():
+        n = min(8, restantes)
+        dados = bloco if n == 8 else LINHA_RESULTADO * n
+        vista = memoryview(dados)
+        while vista:
+            escritos = os.write(mestre, vista)
+            vista = vista[escritos:]
+        restantes -= n
+
+
+def medir_leitor(total_linhas):
+    mestre, nome, escravo = abrir_pty()
+    porta = serial.Serial(nome, TAXA_BAUD, timeout=1)
+    evento_parar = threading.Event()
+    thread = threading.Thread(target=_escritor, args=(mestre, total_linhas, evento_parar), daemon=True)
+    leitor = LeitorLinhasSerial(porta)
+    recebidas = 0
+    inicio = time.perf_counter()
+    thread.start()
+    try:
+        while recebidas < total_linhas:
+            linhas = leitor.ler_linhas()
+            if not linhas and not thread.is_alive():
+                break
+            recebidas += len(linhas)
+        duracao = time.perf_counter() - inicio
+    finally:
+        evento_parar.set()
+        porta.close()
+        os.close(mestre)
+        os.close(escravo)
+    return {
+        "modo": "leitor_em_blocos",
+        "linhas": recebidas,
+        "bytes": leitor.bytes_lidos,
+        "segundos": duracao,
+        "linhas_por_s": recebidas / duracao if duracao else 0.0,
+        "bytes_por_s": leitor.bytes_lidos / duracao if duracao else 0.0,
+    }
+
+
+def medir_legado(janela_s):
+    """Reproduz o laço antigo (read() de 1 byte + sleep de 10 ms) durante uma janela fixa."""
+    mestre, nome, escravo = abrir_pty()
+    porta = serial.Serial(nome, TAXA_BAUD, timeout=1)
+    evento_parar = threading.Event()
+    thread = threading.Thread(target=_escritor, args=(mestre, 10 ** 6, evento_parar), daemon=True)
+    buffer_linha = bytearray()
+    linhas = 0
+    total_bytes = 0
+    inicio = time.perf_counter()
+    thread.start()
+    try:
+        while time.perf_counter() - inicio < janela_s:
+            if porta.in_waiting > 0:
+                byte_lido = porta.read()
+                total_bytes += 1
+                if byte_lido == b"\n":
+                    linhas += 1
+                    buffer_linha.clear()
+                else:
+                    buffer_linha.extend(byte_lido)
+            time.sleep(0.01)
+        duracao = time.perf_counter() - inicio
+    finally:
+        evento_parar.set()
+        porta.close()
+        os.close(mestre)
+        os.close(escravo)
+    return {
+        "modo": "legado_byte_a_byte",
+        "linhas": linhas,
+        "bytes": total_bytes,
+        "segundos": duracao,
+        "linhas_por_s": linhas / duracao,
+        "bytes_por_s": total_bytes / duracao,
+    }
+
+
+def executar(total_linhas=20000, janela_legado=3.0):
+    resultados = [medir_leitor(total_linhas)]
+    if janela_legado > 0:
+        resultados.append(medir_legado(janela_legado))
+    return {
+        "benchmark": "leitor_serial",
+        "tamanho_linha_bytes": len(LINHA_RESULTADO),
+        "limite_uart_bytes_por_s": TAXA_BAUD / 10,
+        "resultados": resultados,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=20000)
+    parser.add_argument("--janela-legado", type=float, default=3.0,
+                        help="Segundos medindo o laço antigo (0 desativa).")
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    args = parser.parse_args()
+    relatorio = executar(args.linhas, args.janela_legado)
+    if args.json:
+        print(json.dumps(relatorio, indent=2))
+        return
+    print(f"Linha de resultado: {relatorio['tamanho_linha_bytes']} bytes | "
+          f"limite da UART a {TAXA_BAUD} baud: {relatorio['limite_uart_bytes_por_s']:.0f} B/s")
+    for r in relatorio["resultados"]:
+        print(f"{r['modo']:>20}: {r['linhas']:>7} linhas em {r['segundos']:.2f} s | "
+              f"{r['linhas_por_s']:>10.1f} linhas/s | {r['bytes_por_s']:>12.0f} B/s")
+
+
+if __name__ == "__main__":
+    main()
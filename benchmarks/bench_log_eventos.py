@@ -0,0 +1,191 @@
+"""Log de eventos: custo para quem registra, rotação com compressão e leitura paginada a partir do fim.
+
+Compara o registrar_erro antigo (abre, anexa e fecha o arquivo a cada erro,
+na própria thread) com log_eventos.LogEventos.registrar (só enfileira), com
+disco normal e com cada descarga (flush) atrasada artificialmente. Depois grava
+eventos suficientes para várias rotações por tamanho, força uma por idade e
+pagina tudo com ler_eventos, conferindo que os seq saem em ordem, sem
+repetição nem buraco desde o arquivo comprimido mais antigo mantido (sai
+com código 1 se não). Por fim mede a última página de um arquivo grande
+contra ler e decodificar o arquivo inteiro.
+
+Uso: python benchmarks/bench_log_eventos.py [--eventos 20000] [--atraso-ms 2]
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import log_eventos
+
+MENSAGEM = "[ERRO] Falha ao salvar: [Errno 13] Permission denied: 'resultados_tribometro.csv'"
+
+
+def _percentis_us(tempos):
+    tempos = sorted(tempos)
+    return {
+        "p50_us": tempos[len(tempos) // 2] * 1e6,
+        "p99_us": tempos[int(len(tempos) * 0.99)] * 1e6,
+        "max_us": tempos[-1] * 1e6,
+    }
+
+
+def _registrar_erro_antigo(caminho, mensagem, atraso_s=0.0):
+    try:
+        with open(caminho, 'a', encoding='utf-8') as arquivo:
+            arquivo.write(mensagem + "\n")
+            if atraso_s:
+                time.sleep(atraso_s)
+    except Exception:
+        pass
+
+
+def medir_chamadas(eventos, atraso_ms, diretorio):
+    resultado = {}
+    caminho = os.path.join(diretorio, "antigo.log")
+    # O antigo bloqueia a cada evento: com disco lento basta uma amostra menor.
+    for nome, atraso_s, quantidade in (("antigo", 0.0, eventos),
+                                       ("antigo_disco_lento", atraso_ms / 1000.0, min(eventos, 200))):
+        tempos = []
+        for i in range(quantidade):
+            inicio = time.perf_counter()
+            _registrar_erro_antigo(caminho, f"{MENSAGEM} #{i}", atraso_s)
+            tempos.append(time.perf_counter() - inicio)
+        resultado[nome] = _percentis_us(tempos)
+
+    for nome, atraso_s in (("fila", 0.0), ("fila_disco_lento", atraso_ms / 1000.0)):
+        log = log_eventos.LogEventos(os.path.join(diretorio, f"{nome}.jsonl"))
+        if atraso_s:
+            # Disco lento: cada descarga (flush) demora ``atraso_s``.
+            descarregar = log.arquivo.descarregar
+
+            def descarregar_lento(descarregar=descarregar, atraso_s=atraso_s):
+                time.sleep(atraso_s)
+                descarregar()
+            log.arquivo.descarregar = descarregar_lento
+        tempos = []
+        for i in range(eventos):
+            inicio = time.perf_counter()
+            log.registrar(f"{MENSAGEM} #{i}", dispositivo="principal")
+            tempos.append(time.perf_counter() - inicio)
+        inicio = time.perf_counter()
+        log.fechar()
+        resultado[nome] = dict(_percentis_us(tempos), descartados=log.descartados,
+                               esvaziar_fila_s=time.perf_counter() - inicio)
+    return resultado
+
+
+def verificar_rotacao(eventos, diretorio):
+    caminho = os.path.join(diretorio, "rotacao.jsonl")
+    # Fila do tamanho da rajada: aqui interessa a rotação, não o descarte.
+    log = log_eventos.LogEventos(caminho, tamanho_maximo=256 * 1024, intervalo_s=3600, mantidos=5,
+                                 capacidade_fila=eventos)
+    for i in range(eventos):
+        log.registrar(f"{MENSAGEM} #{i}", dispositivo="principal" if i % 3 else "bancada2")
+    log.fechar()
+    por_tamanho = log.arquivo.rotacoes
+
+    # Reabre com intervalo curto: o primeiro evento do arquivo ativo já está velho.
+    log = log_eventos.LogEventos(caminho, intervalo_s=0.2, mantidos=5)
+    time.sleep(0.3)
+    log.registrar("depois da rotação por idade")
+    log.fechar()
+    por_idade = log.arquivo.rotacoes
+
+    comprimidos = log_eventos.rotacionados(caminho)
+    bytes_gz = sum(os.path.getsize(c) for _, _, c in comprimidos)
+    bytes_texto = 0
+    for _, _, c in comprimidos:
+        with gzip.open(c, "rb") as arquivo:
+            bytes_texto += len(arquivo.read())
+
+    seqs, cursor, paginas = [], None, 0
+    while True:
+        pagina, cursor = log_eventos.ler_eventos(caminho, limite=997, antes=cursor)
+        seqs = [e["seq"] for e in pagina] + seqs
+        paginas += 1
+        if cursor is None:
+            break
+    esperado = list(range(comprimidos[-1][0], log.arquivo.ultimo_seq + 1)) if comprimidos else []
+    filtrados, _ = log_eventos.ler_eventos(caminho, limite=50, filtro=lambda e: e.get("dispositivo") == "bancada2")
+    return {
+        "rotacoes_tamanho": por_tamanho,
+        "rotacoes_idade": por_idade,
+        "comprimidos_mantidos": len(comprimidos),
+        "razao_compressao": bytes_texto / bytes_gz if bytes_gz else 0.0,
+        "eventos_paginados": len(seqs),
+        "paginas": paginas,
+        "sequencia_ok": seqs == esperado,
+        "filtro_ok": len(filtrados) == 50 and all(e["dispositivo"] == "bancada2" for e in filtrados),
+    }
+
+
+def medir_leitura(eventos, diretorio):
+    caminho = os.path.join(diretorio, "grande.jsonl")
+    log = log_eventos.LogEventos(caminho, tamanho_maximo=1 << 40, capacidade_fila=eventos)
+    for i in range(eventos):
+        log.registrar(f"{MENSAGEM} #{i}", dispositivo="principal")
+    log.fechar()
+    inicio = time.perf_counter()
+    pagina, _ = log_eventos.ler_eventos(caminho, limite=200)
+    do_fim_s = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    with open(caminho, encoding="utf-8") as arquivo:
+        todos = [json.loads(linha) for linha in arquivo]
+    inteiro_s = time.perf_counter() - inicio
+    return {
+        "bytes": os.path.getsize(caminho),
+        "ultima_pagina_ms": do_fim_s * 1000.0,
+        "arquivo_inteiro_ms": inteiro_s * 1000.0,
+        "pagina_ok": pagina == todos[-200:],
+    }
+
+
+def executar(eventos=20000, atraso_ms=2.0):
+    with tempfile.TemporaryDirectory() as diretorio:
+        chamadas = medir_chamadas(min(eventos, 5000), atraso_ms, diretorio)
+        rotacao = verificar_rotacao(eventos, diretorio)
+        leitura = medir_leitura(eventos * 5, diretorio)
+    return {
+        "benchmark": "log_eventos",
+        "chamadas": chamadas,
+        "rotacao": rotacao,
+        "leitura": leitura,
+        "ok": rotacao["sequencia_ok"] and rotacao["filtro_ok"] and leitura["pagina_ok"]
+              and rotacao["rotacoes_tamanho"] > 0 and rotacao["rotacoes_idade"] == 1,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--eventos", type=int, default=20000)
+    parser.add_argument("--atraso-ms", type=float, default=2.0)
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    args = parser.parse_args()
+    relatorio = executar(args.eventos, args.atraso_ms)
+    if args.json:
+        print(json.dumps(relatorio, indent=2))
+    else:
+        for nome, r in relatorio["chamadas"].items():
+            extra = f" | descartados {r['descartados']}" if "descartados" in r else ""
+            print(f"{nome:>18}: p50 {r['p50_us']:7.1f} us | p99 {r['p99_us']:7.1f} us | "
+                  f"max {r['max_us']:8.1f} us{extra}")
+        r = relatorio["rotacao"]
+        print(f"Rotação: {r['rotacoes_tamanho']} por tamanho, {r['rotacoes_idade']} por idade, "
+              f"{r['comprimidos_mantidos']} comprimidos mantidos (compressão {r['razao_compressao']:.1f}x)")
+        print(f"Paginação: {r['eventos_paginados']} eventos em {r['paginas']} páginas, "
+              f"sequência {'ok' if r['sequencia_ok'] else 'COM FALHAS'}, filtro {'ok' if r['filtro_ok'] else 'FALHOU'}")
+        r = relatorio["leitura"]
+        print(f"Última página de {r['bytes'] / 1e6:.1f} MB: {r['ultima_pagina_ms']:.2f} ms "
+              f"(arquivo inteiro {r['arquivo_inteiro_ms']:.0f} ms), conteúdo {'ok' if r['pagina_ok'] else 'DIFERENTE'}")
+    if not relatorio["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Custo da instrumentação do /api/metrics no caminho quente e formato da exposição.
+
+Mede o custo de uma observação de histograma, de um incremento de contador,
+dos dois ganchos que cada requisição do Flask passa a executar e do que o
+ingest executa a mais por linha. Depois grava N linhas sintéticas pelo
+GerenciadorSerial._salvar_em_csv do ui_server, com as métricas reais e com
+observadores vazios, em rodadas intercaladas, e compara esse acréscimo com
+o custo por linha (a diferença ponta a ponta fica dentro do ruído do disco e
+é só informativa). No fim confere a exposição: toda linha
+no formato do Prometheus, faixas acumuladas, +Inf igual a _count, uma
+observação de ingestão por linha e bytes/linhas da serial iguais aos que o
+leitor consumiu (sai com código 1 se algo falhar).
+
+Uso: python benchmarks/bench_metricas.py [--linhas 5000] [--rodadas 5]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+DIR_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(DIR_BENCHMARKS))
+sys.path.insert(0, DIR_BENCHMARKS)
+
+import esquema_registro
+import metricas
+import ui_server
+from dados_sinteticos import CASAS_DECIMAIS, gerar_dataframe
+from leitor_serial import LeitorLinhasSerial
+
+PADRAO_AMOSTRA = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_]\w*="([^"\\]|\\.)*",?)*\})? \S+$')
+
+
+class _SemMetrica:
+    def observar(self, valor):
+        pass
+
+    def incrementar(self, quantidade=1):
+        pass
+
+
+def _por_chamada_ns(funcao, repeticoes=200000):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1e9
+
+
+def medir_primitivas():
+    histograma = metricas.Histograma(metricas.LIMITES_LATENCIA_S)
+    contador = metricas.Contador()
+    vazio = _por_chamada_ns(lambda: None)
+
+    def com_medir():
+        with histograma.medir():
+            pass
+    return {
+        "observar_ns": _por_chamada_ns(lambda: histograma.observar(0.0031)) - vazio,
+        "incrementar_ns": _por_chamada_ns(contador.incrementar) - vazio,
+        "medir_bloco_ns": _por_chamada_ns(com_medir) - vazio,
+    }
+
+
+def medir_ganchos_ns():
+    """Os dois ganchos de requisição, chamados direto num contexto de /api/status."""
+    resposta = ui_server.Response()
+    with ui_server.app.test_request_context("/api/status"):
+        vazio = _por_chamada_ns(lambda: None, 50000)
+        return _por_chamada_ns(lambda: (ui_server._marcar_inicio_requisicao(),
+                                        ui_server._medir_requisicao(resposta)), 50000) - vazio
+
+
+def medir_acrescimo_linha_ns(gerenciador):
+    """O que _ler_linhas e _salvar_em_csv passaram a executar por linha gravada.
+
+    Observa num histograma à parte para não mexer no que a exposição confere.
+    """
+    metrica_ingestao = metricas.Histograma(metricas.LIMITES_LATENCIA_S)
+    arquivo_alvo = gerenciador._arquivo_ativo
+
+    def acrescimo():
+        gerenciador._instante_linha = time.perf_counter()
+        if gerenciador._instante_linha is not None:
+            metrica_ingestao.observar(time.perf_counter() - gerenciador._instante_linha)
+        if str(arquivo_alvo) != (gerenciador._arquivo_ativo or str(gerenciador.caminho_csv)):
+            gerenciador._metrica_trocas.incrementar()
+    return _por_chamada_ns(acrescimo) - _por_chamada_ns(lambda: None)
+
+
+def medir_requisicoes(requisicoes=3000):
+    cliente = ui_server.app.test_client()
+    antes = dict(ui_server.app.before_request_funcs)
+    depois = dict(ui_server.app.after_request_funcs)
+    tempos = {}
+    for nome in ("sem_ganchos", "com_ganchos", "sem_ganchos_2", "com_ganchos_2"):
+        if nome.startswith("sem"):
+            ui_server.app.before_request_funcs = {}
+            ui_server.app.after_request_funcs = {}
+        else:
+            ui_server.app.before_request_funcs = dict(antes)
+            ui_server.app.after_request_funcs = dict(depois)
+        inicio = time.perf_counter()
+        for _ in range(requisicoes):
+            cliente.get("/api/status")
+        tempos[nome] = (time.perf_counter() - inicio) / requisicoes * 1e6
+    ui_server.app.before_request_funcs = antes
+    ui_server.app.after_request_funcs = depois
+    sem = min(tempos["sem_ganchos"], tempos["sem_ganchos_2"])
+    com = min(tempos["com_ganchos"], tempos["com_ganchos_2"])
+    ganchos_us = medir_ganchos_ns() / 1000.0
+    return {"sem_ganchos_us": sem, "com_ganchos_us": com, "ganchos_us": ganchos_us,
+            "ganchos_pct": ganchos_us / sem * 100.0}
+
+
+def gerar_linhas(linhas):
+    df = gerar_dataframe(linhas, semente=3).round(CASAS_DECIMAIS).drop(columns=["Timestamp_PC"])
+    return df.to_csv(sep=";", index=False, na_rep="nan", lineterminator="\n").splitlines()
+
+
+def _gravar(gerenciador, texto):
+    analisador = esquema_registro.AnalisadorLinhas()
+    inicio = time.perf_counter()
+    for linha in texto:
+        gerenciador._instante_linha = time.perf_counter()
+        gerenciador._salvar_em_csv(analisador.analisar(linha))
+    return time.perf_counter() - inicio
+
+
+def medir_ingestao(linhas, rodadas, diretorio):
+    texto = gerar_linhas(linhas)
+    tempos = {"com_metricas": [], "sem_metricas": []}
+    ultimo = None
+    for rodada in range(rodadas):
+        for nome in ("sem_metricas", "com_metricas") if rodada % 2 else ("com_metricas", "sem_metricas"):
+            pasta = Path(diretorio) / f"{nome}_{rodada}"
+            pasta.mkdir()
+            gerenciador = ui_server.GerenciadorSerial(
+                f"bench_{nome}_{rodada}", caminho_csv=pasta / "resultados.csv",
+                caminho_resumo=pasta / "resumo.json", dir_colunar=pasta / "colunar", dir_tracos=pasta / "tracos")
+            if nome == "sem_metricas":
+                gerenciador._metrica_ingestao = gerenciador._metrica_trocas = _SemMetrica()
+            tempos[nome].append(_gravar(gerenciador, texto) / len(texto) * 1e6)
+            gerenciador._diario.fechar()
+            if nome == "com_metricas":
+                ultimo = gerenciador
+    com, sem = min(tempos["com_metricas"]), min(tempos["sem_metricas"])
+    acrescimo_us = medir_acrescimo_linha_ns(ultimo) / 1000.0
+    return {
+        "linhas": len(texto),
+        "com_metricas_us": com,
+        "sem_metricas_us": sem,
+        "ponta_a_ponta_pct": (com - sem) / sem * 100.0,
+        "acrescimo_us": acrescimo_us,
+        "acrescimo_pct": acrescimo_us / sem * 100.0,
+    }, ultimo, len(texto)
+
+
+def verificar_exposicao(gerenciador, linhas_gravadas):
+    # Bytes que o leitor "recebeu" da serial, sem porta: alimentar conta como uma leitura.
+    dados = b"".join(f"linha {i};a;b\r\n".encode() for i in range(1000))
+    leitor = LeitorLinhasSerial(None)
+    leitor.alimentar(dados)
+    gerenciador._leitor = leitor
+    ui_server.registro._dispositivos[gerenciador.id] = gerenciador
+    try:
+        texto = ui_server.app.test_client().get("/api/metrics").get_data(as_text=True)
+    finally:
+        ui_server.registro._dispositivos.pop(gerenciador.id, None)
+    invalidas = [l for l in texto.splitlines() if l and not l.startswith("#") and not PADRAO_AMOSTRA.match(l)]
+
+    valores = {}
+    for linha in texto.splitlines():
+        if linha and not linha.startswith("#"):
+            nome, valor = linha.rsplit(" ", 1)
+            valores[nome] = float(valor)
+    rotulo = f'dispositivo="{gerenciador.id}"'
+    faixas = [v for k, v in valores.items() if k.startswith("tribo_ingestao_csv_segundos_bucket{" + rotulo)]
+    contagem = valores.get(f"tribo_ingestao_csv_segundos_count{{{rotulo}}}")
+    return {
+        "linhas_invalidas": invalidas[:5],
+        "faixas_acumuladas": faixas == sorted(faixas) and faixas[-1] == contagem,
+        "observacoes_ingestao": contagem,
+        "linhas_gravadas": linhas_gravadas,
+        "serial_bytes": valores.get(f"tribo_serial_bytes_total{{{rotulo}}}"),
+        "serial_linhas": valores.get(f"tribo_serial_linhas_total{{{rotulo}}}"),
+        "esperado_bytes": len(dados),
+        "tem_requisicoes": any(k.startswith('tribo_requisicao_segundos_count{rota="/api/status"') for k in valores),
+    }
+
+
+def executar(linhas=5000, rodadas=5):
+    primitivas = medir_primitivas()
+    requisicoes = medir_requisicoes()
+    with tempfile.TemporaryDirectory() as diretorio:
+        ingestao, gerenciador, gravadas = medir_ingestao(linhas, rodadas, diretorio)
+        exposicao = verificar_exposicao(gerenciador, gravadas)
+    ok = (not exposicao["linhas_invalidas"] and exposicao["faixas_acumuladas"]
+          and exposicao["observacoes_ingestao"] == gravadas
+          and exposicao["serial_bytes"] == exposicao["esperado_bytes"]
+          and exposicao["serial_linhas"] == 1000 and exposicao["tem_requisicoes"])
+    return {
+        "benchmark": "metricas",
+        "primitivas": primitivas,
+        "requisicoes": requisicoes,
+        "ingestao": ingestao,
+        "exposicao": exposicao,
+        "ok": ok,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=5000)
+    parser.add_argument("--rodadas", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    args = parser.parse_args()
+    relatorio = executar(args.linhas, args.rodadas)
+    if args.json:
+        print(json.dumps(relatorio, indent=2))
+    else:
+        p = relatorio["primitivas"]
+        print(f"Histograma.observar {p['observar_ns']:.0f} ns | Contador.incrementar {p['incrementar_ns']:.0f} ns | "
+              f"with medir() {p['medir_bloco_ns']:.0f} ns")
+        r = relatorio["requisicoes"]
+        print(f"GET /api/status: ganchos {r['ganchos_us']:.2f} us = {r['ganchos_pct']:.2f}% de "
+              f"{r['sem_ganchos_us']:.0f} us | ponta a ponta {r['sem_ganchos_us']:.0f} us sem, "
+              f"{r['com_ganchos_us']:.0f} us com")
+        i = relatorio["ingestao"]
+        print(f"Ingest, {i['linhas']} linhas: acréscimo {i['acrescimo_us']:.2f} us/linha = {i['acrescimo_pct']:.2f}% de "
+              f"{i['sem_metricas_us']:.1f} us | ponta a ponta {i['sem_metricas_us']:.1f} us sem, "
+              f"{i['com_metricas_us']:.1f} us com ({i['ponta_a_ponta_pct']:+.1f}%, ruído do disco)")
+        e = relatorio["exposicao"]
+        print(f"Exposição: {len(e['linhas_invalidas'])} linha(s) inválida(s) | faixas "
+              f"{'ok' if e['faixas_acumuladas'] else 'ERRADAS'} | ingestão {e['observacoes_ingestao']:.0f}/"
+              f"{e['linhas_gravadas']} | serial {e['serial_bytes']:.0f}/{e['esperado_bytes']} bytes, "
+              f"{e['serial_linhas']:.0f} linhas")
+    if not relatorio["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
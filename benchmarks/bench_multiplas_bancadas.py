@@ -0,0 +1,163 @@
+"""Várias bancadas no mesmo servidor: vazão e latência por bancada, com e sem uma bancada lenta.
+
+Sobe N tribômetros virtuais em pty, registra cada um em ui_server.registro (cada
+bancada com o seu CSV numa pasta temporária) e mede, por bancada, ensaios/s e a
+latência entre a emissão da linha de resultado e o fim da sua gravação. No
+cenário "lenta", a gravação da primeira bancada leva ``--atraso-ms`` por linha
+(disco lento, arquivo bloqueado): as demais não devem sentir.
+
+Uso: python benchmarks/bench_multiplas_bancadas.py [--bancadas 1 4 8] [--ensaios 300] [--atraso-ms 50]
+"""
+import argparse
+import collections
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulador_tribometro import DispositivoVirtual, ModeloAtrito
+
+
+def _percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100.0 * (len(ordenados) - 1))))]
+
+
+class _Bancada:
+    def __init__(self, ui_server, indice, ensaios, atraso_s):
+        self.ensaios = ensaios
+        self.emitidas = collections.deque()
+        self.latencias = []
+        self.trava = threading.Lock()
+        self.dispositivo = DispositivoVirtual(ModeloAtrito(semente=indice), aceleracao=0)
+        self.dispositivo.ao_emitir = self._ao_emitir
+        self.dispositivo.iniciar()
+        ok, msg, self.gerenciador = ui_server.registro.adicionar(self.dispositivo.caminho, f"bancada{indice}")
+        if not ok:
+            raise RuntimeError(msg)
+        salvar_original = self.gerenciador._salvar_em_csv
+
+        def salvar(registro):
+            if atraso_s and not registro.eh_cabecalho:
+                time.sleep(atraso_s)
+            salvar_original(registro)
+            if registro.eh_cabecalho:
+                return
+            agora = time.perf_counter()
+            with self.trava:
+                if self.emitidas:
+                    self.latencias.append(agora - self.emitidas.popleft())
+
+        self.gerenciador._salvar_em_csv = salvar
+
+    def _ao_emitir(self, linha, instante):
+        if linha.count(";") > 5 and "massa_g" not in linha:
+            with self.trava:
+                self.emitidas.append(instante)
+
+    def rodar(self, timeout):
+        while self.dispositivo.reinicios == 0:
+            time.sleep(0.01)
+        self.dispositivo.configurar_padrao()
+        self.inicio = time.perf_counter()
+        self.dispositivo.enfileirar_ensaios(self.ensaios)
+        self.dispositivo.aguardar_fila(timeout)
+        limite = time.monotonic() + timeout
+        while len(self.latencias) < self.dispositivo.ensaios_concluidos and time.monotonic() < limite:
+            time.sleep(0.01)
+        self.duracao = time.perf_counter() - self.inicio
+
+    def resumo(self):
+        latencias_ms = [v * 1000.0 for v in self.latencias]
+        return {
+            "bancada": self.gerenciador.id,
+            "ensaios": self.dispositivo.ensaios_concluidos,
+            "gravados": len(latencias_ms),
+            "ensaios_por_s": len(latencias_ms) / self.duracao if self.duracao else 0.0,
+            "latencia_ms_p50": _percentil(latencias_ms, 50),
+            "latencia_ms_p95": _percentil(latencias_ms, 95),
+            "csv": str(self.gerenciador.caminho_csv),
+        }
+
+    def encerrar(self, ui_server):
+        ui_server.registro.remover(self.gerenciador.id)
+        self.dispositivo.parar()
+
+
+def medir(quantidade, ensaios, atraso_s, dir_saida, timeout=600):
+    import ui_server
+
+    ui_server.CAMINHO_CSV_PADRAO = Path(dir_saida) / "resultados.csv"
+    ui_server.CAMINHO_RESUMO = Path(dir_saida) / "resumo.json"
+    ui_server.DIR_TRACOS = Path(dir_saida) / "tracos"
+    bancadas = []
+    # A conexão espera ~2 s pelo reset do Arduino; em paralelo, como faria o navegador.
+    erros = []
+
+    def criar(i):
+        try:
+            atraso = atraso_s if i == 1 else 0.0
+            bancadas.append(_Bancada(ui_server, i, ensaios, atraso))
+        except Exception as e:
+            erros.append(e)
+
+    threads = [threading.Thread(target=criar, args=(i,)) for i in range(1, quantidade + 1)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    try:
+        if erros:
+            raise erros[0]
+        threads = [threading.Thread(target=b.rodar, args=(timeout,)) for b in bancadas]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return sorted((b.resumo() for b in bancadas), key=lambda r: r["bancada"])
+    finally:
+        for b in bancadas:
+            b.encerrar(ui_server)
+
+
+def executar(bancadas=(1, 4, 8), ensaios=300, atraso_ms=50):
+    resultado = []
+    for quantidade in bancadas:
+        for cenario, atraso in (("normal", 0.0), ("lenta", atraso_ms / 1000.0)):
+            if cenario == "lenta" and quantidade < 2:
+                continue
+            with tempfile.TemporaryDirectory() as tmp:
+                resultado.append({"bancadas": quantidade, "cenario": cenario,
+                                  "por_bancada": medir(quantidade, ensaios, atraso, tmp)})
+    return {"benchmark": "multiplas_bancadas", "ensaios_por_bancada": ensaios,
+            "atraso_ms": atraso_ms, "execucoes": resultado}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bancadas", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--ensaios", type=int, default=300)
+    parser.add_argument("--atraso-ms", type=float, default=50.0)
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    args = parser.parse_args()
+    relatorio = executar(args.bancadas, args.ensaios, args.atraso_ms)
+    if args.json:
+        print(json.dumps(relatorio, indent=2))
+        return
+    for execucao in relatorio["execucoes"]:
+        print(f"{execucao['bancadas']} bancada(s), cenário {execucao['cenario']}:")
+        for r in execucao["por_bancada"]:
+            print(f"  {r['bancada']:>9}: {r['gravados']:4d}/{r['ensaios']:4d} gravados | "
+                  f"{r['ensaios_por_s']:7.1f} ensaios/s | latência p50 {r['latencia_ms_p50'] or 0:7.2f} ms "
+                  f"p95 {r['latencia_ms_p95'] or 0:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
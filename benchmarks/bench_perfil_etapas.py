@@ -0,0 +1,178 @@
+"""Perfil por etapa da análise: custo do --perfil e conteúdo do relatório JSON.
+
+Roda executar_analise sobre um CSV sintético (num diretório temporário, em
+série, sem cache de gráficos e com o Excel em modo 'rapido') sem perfil e com
+perfil, e compara o tempo total. Confere que o relatório traz todas as etapas de ETAPAS_ANALISE, que
+elas cobrem quase todo o tempo medido, que os gráficos aparecem por função de
+plotagem (seaborn e plotar_grafico_atrito), que o cProfile da etapa escolhida
+gera um .pstats legível, que perfil_etapas.comparar lê os dois relatórios e que
+uma análise interrompida no meio dos gráficos ainda grava o relatório, com a
+etapa marcada (sai com código 1 se algo falhar).
+
+Uso: python benchmarks/bench_perfil_etapas.py [--linhas 20000] [--reamostragens 200] [--rodadas 1]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import pstats
+import sys
+import tempfile
+import time
+
+DIR_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(DIR_BENCHMARKS))
+sys.path.insert(0, DIR_BENCHMARKS)
+
+import analise_de_ensaios
+import perfil_etapas
+from dados_sinteticos import gerar_csv
+
+FUNCOES_SEABORN = ("plotar_barras_mu", "plotar_dispersao_mu_d", "plotar_delta_trabalho", "plotar_heatmap_delta")
+
+
+class _Interromper(Exception):
+    pass
+
+
+def _analisar(caminho, reamostragens, **opcoes):
+    saida = io.StringIO()
+    with contextlib.redirect_stdout(saida):
+        inicio = time.perf_counter()
+        codigo = analise_de_ensaios.executar_analise(caminho, trabalhadores=1, usar_cache=False,
+                                                     modo_excel="rapido", reamostragens=reamostragens, **opcoes)
+        return codigo, time.perf_counter() - inicio
+
+
+def _ler(caminho):
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def medir_custo(caminho, reamostragens, rodadas):
+    tempos = {"sem_perfil": [], "com_perfil": []}
+    relatorios = []
+    for rodada in range(rodadas):
+        for nome in ("com_perfil", "sem_perfil") if rodada % 2 else ("sem_perfil", "com_perfil"):
+            destino = f"perfil_{rodada}.json" if nome == "com_perfil" else None
+            codigo, tempo = _analisar(caminho, reamostragens, perfil=destino)
+            if codigo != 0:
+                raise RuntimeError(f"executar_analise retornou {codigo}")
+            tempos[nome].append(tempo)
+            if destino:
+                relatorios.append(_ler(destino))
+    sem, com = min(tempos["sem_perfil"]), min(tempos["com_perfil"])
+    return {"sem_perfil_s": sem, "com_perfil_s": com, "custo_pct": (com - sem) / sem * 100.0}, relatorios
+
+
+def verificar_relatorio(relatorio):
+    etapas = relatorio["etapas"]
+    graficos = etapas.get("graficos", {})
+    por_funcao = graficos.get("por_funcao", {})
+    soma_etapas = sum(e["parede_s"] for e in etapas.values())
+    return {
+        "etapas": list(etapas),
+        "todas_as_etapas": list(etapas) == list(perfil_etapas.ETAPAS_ANALISE),
+        "cobertura_pct": soma_etapas / relatorio["total"]["parede_s"] * 100.0,
+        "linhas_limpas": relatorio["info"].get("linhas_limpas"),
+        "por_funcao": {nome: round(f["parede_s"], 3) for nome, f in por_funcao.items()},
+        "funcoes_ok": ("plotar_grafico_atrito" in por_funcao and all(f in por_funcao for f in FUNCOES_SEABORN)
+                       and sum(f["graficos"] for f in por_funcao.values()) == graficos.get("renderizados")),
+        "memoria": relatorio["info"].get("memoria"),
+        "pico_memoria_mb": {nome: e.get("pico_memoria_mb") for nome, e in etapas.items()},
+        "memoria_ok": all(e.get("pico_memoria_mb", 0) >= 0 for e in etapas.values()),
+    }
+
+
+def verificar_cprofile(caminho, reamostragens, etapa):
+    codigo, _ = _analisar(caminho, reamostragens, perfil="perfil_cprofile.json", perfil_etapa=etapa)
+    relatorio = _ler("perfil_cprofile.json")
+    cprofile = relatorio["cprofile"] or {}
+    arquivo = cprofile.get("arquivo")
+    funcoes_pstats = len(pstats.Stats(arquivo).stats) if arquivo and os.path.isfile(arquivo) else 0
+    return relatorio, {
+        "etapa": etapa,
+        "codigo": codigo,
+        "funcoes_pstats": funcoes_pstats,
+        "principais": [f["funcao"] for f in cprofile.get("funcoes", [])[:5]],
+        "ok": codigo == 0 and cprofile.get("etapa") == etapa and funcoes_pstats > 0
+              and any("groupby" in f["funcao"] or "agg" in f["funcao"] for f in cprofile.get("funcoes", [])),
+    }
+
+
+def verificar_interrupcao(caminho, reamostragens):
+    def progresso(etapa, percentual):
+        if etapa.startswith("gerando gráficos ("):
+            raise _Interromper()
+    try:
+        _analisar(caminho, reamostragens, perfil="perfil_interrompido.json", progresso=progresso)
+        interrompeu = False
+    except _Interromper:
+        interrompeu = True
+    relatorio = _ler("perfil_interrompido.json")
+    return {
+        "interrompeu": interrompeu,
+        "codigo": relatorio["info"].get("codigo"),
+        "graficos_marcada": relatorio["etapas"].get("graficos", {}).get("interrompida", False),
+    }
+
+
+def executar(linhas=20000, reamostragens=200, rodadas=1):
+    anterior = os.getcwd()
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.chdir(diretorio)
+        try:
+            caminho = gerar_csv("resultados.csv", linhas, semente=5)
+            custo, relatorios = medir_custo(caminho, reamostragens, rodadas)
+            conteudo = verificar_relatorio(relatorios[-1])
+            relatorio_cprofile, cprofile = verificar_cprofile(caminho, reamostragens, "agrupamento")
+            comparacao = perfil_etapas.comparar(relatorios[-1], relatorio_cprofile)
+            interrupcao = verificar_interrupcao(caminho, reamostragens)
+        finally:
+            os.chdir(anterior)
+    etapas_comparadas = {etapa for etapa, _, _, _, _ in comparacao}
+    ok = (conteudo["todas_as_etapas"] and conteudo["funcoes_ok"] and conteudo["memoria_ok"]
+          and conteudo["cobertura_pct"] > 90.0 and cprofile["ok"]
+          and etapas_comparadas == set(perfil_etapas.ETAPAS_ANALISE) | {"total"}
+          and interrupcao["interrompeu"] and interrupcao["codigo"] is None and interrupcao["graficos_marcada"])
+    return {
+        "benchmark": "perfil_etapas",
+        "linhas": linhas,
+        "custo": custo,
+        "relatorio": conteudo,
+        "cprofile": cprofile,
+        "interrupcao": interrupcao,
+        "ok": ok,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=20000)
+    parser.add_argument("--reamostragens", type=int, default=200)
+    parser.add_argument("--rodadas", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    args = parser.parse_args()
+    relatorio = executar(args.linhas, args.reamostragens, args.rodadas)
+    if args.json:
+        print(json.dumps(relatorio, indent=2))
+    else:
+        c = relatorio["custo"]
+        print(f"{relatorio['linhas']} linhas: análise {c['sem_perfil_s']:.2f} s sem perfil | "
+              f"{c['com_perfil_s']:.2f} s com perfil ({c['custo_pct']:+.1f}%)")
+        r = relatorio["relatorio"]
+        print(f"Etapas: {', '.join(r['etapas'])} ({r['cobertura_pct']:.1f}% do tempo total)")
+        print("Gráficos por função (s): " + ", ".join(f"{nome} {t}" for nome, t in r["por_funcao"].items()))
+        p = relatorio["cprofile"]
+        print(f"cProfile de '{p['etapa']}': {p['funcoes_pstats']} funções no .pstats | "
+              f"principais: {'; '.join(p['principais'])}")
+        i = relatorio["interrupcao"]
+        print(f"Interrompida nos gráficos: relatório gravado, codigo={i['codigo']}, "
+              f"etapa marcada {'sim' if i['graficos_marcada'] else 'NÃO'}")
+    if not relatorio["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
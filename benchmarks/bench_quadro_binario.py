@@ -0,0 +1,174 @@
+"""Quadro binário de resultado x linha de texto: ida e volta, bytes na linha e custo no host.
+
+Roda o mesmo tribômetro virtual (mesma semente) duas vezes num pty, em modo
+texto e com 'b 1', lê as duas saídas com leitor_serial.LeitorLinhasSerial e
+confere que os quadros viram exatamente as mesmas linhas de texto. Depois
+compara os bytes por ensaio (e o tempo de linha a 115200 baud) e o custo de
+decodificar N resultados no host: texto com split/float, quadros pelo leitor
+serial, struct e NumPy em lote.
+
+Uso: python benchmarks/bench_quadro_binario.py [--ensaios 200] [--decodificar 20000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serial
+
+import protocolo_binario
+from leitor_serial import LeitorLinhasSerial
+from simulador_tribometro import TAXA_BAUD, DispositivoVirtual, ModeloAtrito, TribometroVirtual
+
+
+def _eh_resultado(linha):
+    return linha.count(b";") == len(protocolo_binario.CAMPOS_RESULTADO) - 1 and b"massa_g" not in linha
+
+
+def coletar(ensaios, binario, semente=7, timeout=120):
+    """Executa ``ensaios`` no dispositivo virtual e devolve (linhas de resultado, leitor, bytes emitidos)."""
+    dispositivo = DispositivoVirtual(ModeloAtrito(semente=semente), aceleracao=0)
+    dispositivo.iniciar()
+    porta = serial.Serial(dispositivo.caminho, 115200, timeout=0.1)
+    leitor = LeitorLinhasSerial(porta)
+    resultados = []
+    try:
+        while dispositivo.reinicios == 0:
+            time.sleep(0.01)
+        dispositivo.configurar_padrao()
+        if binario:
+            dispositivo.tribometro.processar_comando("b 1")
+        dispositivo.aguardar_fila(timeout)
+        bytes_antes = dispositivo.bytes_emitidos
+        dispositivo.enfileirar_ensaios(ensaios)
+        limite = time.monotonic() + timeout
+        while len(resultados) < ensaios and time.monotonic() < limite:
+            resultados.extend(l.rstrip(b"\r") for l in leitor.ler_linhas() if _eh_resultado(l))
+        bytes_ensaios = dispositivo.bytes_emitidos - bytes_antes
+    finally:
+        porta.close()
+        dispositivo.parar()
+    return resultados, leitor, bytes_ensaios
+
+
+def verificar_ida_e_volta(ensaios):
+    texto, _, bytes_texto = coletar(ensaios, binario=False)
+    quadros, leitor, bytes_binario = coletar(ensaios, binario=True)
+    divergentes = sum(1 for a, b in zip(texto, quadros) if a != b)
+    return {
+        "ensaios": ensaios,
+        "resultados_texto": len(texto),
+        "resultados_binario": len(quadros),
+        "quadros_lidos": leitor.quadros_lidos,
+        "quadros_invalidos": leitor.quadros_invalidos,
+        "divergentes": divergentes,
+        "identicos": len(texto) == len(quadros) == ensaios and divergentes == 0,
+        # Inclui as demais mensagens do ensaio (calibração, DONE...), que seguem em texto.
+        "bytes_por_ensaio_texto": bytes_texto / max(1, ensaios),
+        "bytes_por_ensaio_binario": bytes_binario / max(1, ensaios),
+    }
+
+
+def _gerar_resultados(quantidade, semente=3):
+    """(quadro, linha de texto) de ``quantidade`` ensaios, sem passar pelo pty."""
+    pares = []
+    tribometro = TribometroVirtual(ModeloAtrito(semente=semente),
+                                   emitir_quadro=lambda quadro, linha: pares.append((quadro, linha)))
+    for comando in ("b 1", "m 250", "ip", "fp"):
+        tribometro.processar_comando(comando)
+    for _ in range(quantidade):
+        tribometro.processar_comando("s")
+    return pares
+
+
+def _cronometrar(funcao, repeticoes=3):
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        duracao = time.perf_counter() - inicio
+        melhor = duracao if melhor is None else min(melhor, duracao)
+    return melhor
+
+
+def medir_decodificacao(quantidade):
+    pares = _gerar_resultados(quantidade)
+    quadros = [q for q, _ in pares]
+    linhas = [(l + "\r\n").encode("ascii") for _, l in pares]
+    fluxo_texto = b"".join(linhas)
+    fluxo_binario = b"".join(quadros)
+    payloads = [q[protocolo_binario.TAMANHO_CABECALHO:-protocolo_binario.TAMANHO_CRC] for q in quadros]
+
+    def texto_floats():
+        for linha in fluxo_texto.split(b"\n"):
+            if linha:
+                [float(c) for c in linha.split(b";")]
+
+    def leitor(fluxo):
+        def executar_leitor():
+            LeitorLinhasSerial(None).alimentar(fluxo)
+        return executar_leitor
+
+    def struct_quadros():
+        for p in payloads:
+            protocolo_binario.decodificar_resultado(p)
+
+    tempos = {
+        "texto_split_float": _cronometrar(texto_floats),
+        "leitor_texto": _cronometrar(leitor(fluxo_texto)),
+        "leitor_binario": _cronometrar(leitor(fluxo_binario)),
+        "struct_unpack": _cronometrar(struct_quadros),
+        "numpy_lote": _cronometrar(lambda: protocolo_binario.decodificar_lote(payloads)),
+    }
+    return {
+        "resultados": len(pares),
+        "bytes_linha_texto": len(fluxo_texto) / len(pares),
+        "bytes_quadro": len(fluxo_binario) / len(pares),
+        "us_por_resultado": {nome: t / len(pares) * 1e6 for nome, t in tempos.items()},
+    }
+
+
+def executar(ensaios=200, decodificar=20000):
+    ida_volta = verificar_ida_e_volta(ensaios)
+    decodificacao = medir_decodificacao(decodificar)
+    ms_linha = {
+        "texto": decodificacao["bytes_linha_texto"] * 10.0 / TAXA_BAUD * 1000.0,
+        "binario": decodificacao["bytes_quadro"] * 10.0 / TAXA_BAUD * 1000.0,
+    }
+    return {"benchmark": "quadro_binario", "ida_e_volta": ida_volta,
+            "ms_na_linha_115200": ms_linha, "decodificacao": decodificacao}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ensaios", type=int, default=200)
+    parser.add_argument("--decodificar", type=int, default=20000)
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    args = parser.parse_args()
+    relatorio = executar(args.ensaios, args.decodificar)
+    if args.json:
+        print(json.dumps(relatorio, indent=2))
+        return
+    r = relatorio["ida_e_volta"]
+    print(f"Ida e volta ({r['ensaios']} ensaios): texto {r['resultados_texto']}, "
+          f"binário {r['resultados_binario']} ({r['quadros_lidos']} quadros, "
+          f"{r['quadros_invalidos']} inválidos), divergentes {r['divergentes']} -> "
+          f"{'OK' if r['identicos'] else 'FALHOU'}")
+    print(f"  bytes por ensaio (todas as mensagens): texto {r['bytes_por_ensaio_texto']:.0f}, "
+          f"binário {r['bytes_por_ensaio_binario']:.0f}")
+    d = relatorio["decodificacao"]
+    m = relatorio["ms_na_linha_115200"]
+    print(f"Resultado: linha {d['bytes_linha_texto']:.0f} B ({m['texto']:.2f} ms a 115200) | "
+          f"quadro {d['bytes_quadro']:.0f} B ({m['binario']:.2f} ms)")
+    print(f"Decodificação de {d['resultados']} resultados (us/resultado):")
+    for nome, us in d["us_por_resultado"].items():
+        print(f"  {nome:>18}: {us:7.2f}")
+    if not r["identicos"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Traço do movimento: captura pelo leitor serial e reajuste em lote da aceleração.
+
+Roda o tribômetro virtual com 'tr 1' num pty, lê a saída com o leitor serial e o
+ColetorTracos e confere que cada resultado ganhou o seu arquivo de traço e que o
+reajuste em precisão dupla (modelo do firmware) reproduz o ``a_est`` enviado.
+Depois gera N traços sintéticos em disco e mede o reajuste em lote (carregar +
+ajustar) contra um laço com ``np.polyfit`` por traço.
+
+Uso: python benchmarks/bench_traco_movimento.py [--ensaios 100] [--tracos 5000]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import serial
+
+import esquema_registro
+import protocolo_binario
+import traco_movimento
+from leitor_serial import LeitorLinhasSerial
+from simulador_tribometro import DispositivoVirtual, ModeloAtrito
+
+
+def verificar_captura(ensaios, diretorio, timeout=120):
+    dispositivo = DispositivoVirtual(ModeloAtrito(semente=5), aceleracao=0)
+    dispositivo.iniciar()
+    coletor = traco_movimento.ColetorTracos(diretorio)
+    porta = serial.Serial(dispositivo.caminho, 115200, timeout=0.1)
+    leitor = LeitorLinhasSerial(porta, ao_quadro=coletor.receber_quadro)
+    analisador = esquema_registro.AnalisadorLinhas()
+    resultados = gravados = 0
+    try:
+        while dispositivo.reinicios == 0:
+            time.sleep(0.01)
+        dispositivo.configurar_padrao()
+        dispositivo.tribometro.processar_comando("tr 1")
+        dispositivo.enfileirar_ensaios(ensaios)
+        inicio = datetime(2026, 1, 1)
+        limite = time.monotonic() + timeout
+        while resultados < ensaios and time.monotonic() < limite:
+            for dados in leitor.ler_linhas():
+                linha = dados.decode("utf-8", errors="replace").strip()
+                if linha.count(";") <= 5 or "massa_g" in linha:
+                    continue
+                carimbo = (inicio + timedelta(seconds=resultados)).strftime("%Y-%m-%d %H:%M:%S")
+                if coletor.associar_resultado(analisador.analisar(linha, carimbo)):
+                    gravados += 1
+                resultados += 1
+    finally:
+        porta.close()
+        dispositivo.parar()
+    df = traco_movimento.reajustar_tracos(traco_movimento.listar_tracos(diretorio))
+    com_a = df[df["a_firmware"].notna()]
+    diferenca = (com_a["a_origem"] - com_a["a_firmware"]).abs() / com_a["a_firmware"].abs()
+    return {
+        "resultados": resultados,
+        "tracos_gravados": gravados,
+        "amostras_mediana": float(df["n"].median()) if len(df) else 0.0,
+        "diferenca_relativa_max_a": float(diferenca.max()) if len(diferenca) else None,
+        "rms_origem_mm_mediana": float(df["rms_origem_mm"].median()) if len(df) else None,
+        "rms_quadratico_mm_mediana": float(df["rms_quadratico_mm"].median()) if len(df) else None,
+    }
+
+
+def gerar_tracos(quantidade, diretorio, semente=11):
+    rng = np.random.default_rng(semente)
+    inicio = datetime(2026, 1, 1)
+    for i in range(quantidade):
+        n = int(rng.integers(6, 65))
+        aceleracao = rng.uniform(0.3, 2.0)
+        t_ms = np.arange(1, n + 1) * 50
+        s_mm = np.round(500.0 * aceleracao * (t_ms / 1000.0) ** 2 + rng.normal(0.0, 1.0, n))
+        amostras = np.zeros(n, dtype=protocolo_binario.dtype_amostra_traco())
+        amostras["t_ms"] = t_ms
+        amostras["s_mm"] = np.clip(s_mm, 0, 32767)
+        amostras["pitch_cdeg"] = 1800
+        registro = {"Timestamp_PC": (inicio + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S"),
+                    "angulo_deg": "18.0", "aceleracao_mps2": f"{aceleracao:.4f}"}
+        traco_movimento.gravar_traco(diretorio, 1000 + i, 1, amostras, registro)
+
+
+def medir_reajuste(quantidade, diretorio):
+    gerar_tracos(quantidade, diretorio)
+    caminhos = traco_movimento.listar_tracos(diretorio)
+
+    inicio = time.perf_counter()
+    tracos = [traco_movimento.carregar_traco(c) for c in caminhos]
+    carregar_s = time.perf_counter() - inicio
+
+    t = np.concatenate([tr["t_s"] for tr in tracos])
+    s = np.concatenate([tr["s_m"] for tr in tracos])
+    n = [len(tr["t_s"]) for tr in tracos]
+    inicio = time.perf_counter()
+    lote = traco_movimento.ajustar_lote(t, s, n)
+    lote_s = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    laco = np.array([np.polyfit(tr["t_s"], tr["s_m"], 2)[0] * 2.0 for tr in tracos])
+    laco_s = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    df = traco_movimento.reajustar_tracos(caminhos)
+    total_s = time.perf_counter() - inicio
+    return {
+        "tracos": len(caminhos),
+        "amostras": int(len(t)),
+        "carregar_s": carregar_s,
+        "ajuste_lote_s": lote_s,
+        "ajuste_laco_polyfit_s": laco_s,
+        "reajustar_tracos_total_s": total_s,
+        "diferenca_max_lote_polyfit": float(np.nanmax(np.abs(lote["a_quadratico"] - laco))),
+        "linhas_dataframe": len(df),
+    }
+
+
+def executar(ensaios=100, tracos=5000):
+    with tempfile.TemporaryDirectory() as tmp:
+        captura = verificar_captura(ensaios, os.path.join(tmp, "captura"))
+        reajuste = medir_reajuste(tracos, os.path.join(tmp, "lote"))
+    return {"benchmark": "traco_movimento", "captura": captura, "reajuste": reajuste}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ensaios", type=int, default=100)
+    parser.add_argument("--tracos", type=int, default=5000)
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    args = parser.parse_args()
+    relatorio = executar(args.ensaios, args.tracos)
+    if args.json:
+        print(json.dumps(relatorio, indent=2))
+        return
+    c = relatorio["captura"]
+    print(f"Captura: {c['resultados']} resultados, {c['tracos_gravados']} traços gravados "
+          f"(mediana {c['amostras_mediana']:.0f} amostras)")
+    print(f"  a_origem x a_firmware: diferença relativa máx {c['diferenca_relativa_max_a']:.2e}")
+    print(f"  RMS dos resíduos (mediana): origem {c['rms_origem_mm_mediana']:.2f} mm | "
+          f"quadrático {c['rms_quadratico_mm_mediana']:.2f} mm")
+    r = relatorio["reajuste"]
+    print(f"Reajuste de {r['tracos']} traços ({r['amostras']} amostras):")
+    print(f"  carregar arquivos   {r['carregar_s']:8.3f} s")
+    print(f"  ajuste em lote      {r['ajuste_lote_s']:8.4f} s")
+    print(f"  laço com polyfit    {r['ajuste_laco_polyfit_s']:8.3f} s "
+          f"(diferença máx {r['diferenca_max_lote_polyfit']:.1e} m/s²)")
+    print(f"  reajustar_tracos    {r['reajustar_tracos_total_s']:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
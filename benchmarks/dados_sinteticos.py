@@ -0,0 +1,152 @@
+"""Gerador vetorizado de resultados_tribometro.csv sintéticos para os benchmarks.
+
+Segue o layout exato de printCSVHeader (Results.ino) + Timestamp_PC, repete a
+linha de cabeçalho a cada "sessão" e marca uma fração realista de ensaios com
+flags inválidas (mpu_ok, mpu_ok_no_escorregamento, sonar_ok, s_ok, sonar_stale_ms).
+
+Uso: python benchmarks/dados_sinteticos.py saida.csv --linhas 100000
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulador_tribometro import CABECALHO_CSV, G
+
+COLUNAS = CABECALHO_CSV.split(";") + ["Timestamp_PC"]
+CASAS_DECIMAIS = {
+    "massa_g": 1, "angulo_deg": 3, "altura_m": 4, "mu_s": 4, "mu_d": 4,
+    "aceleracao_mps2": 4, "velocidade_mps": 4, "tempo_s": 3,
+    "trabalho_energia_J": 4, "trabalho_atrito_J": 4, "filtro_alpha": 3,
+    "pitch_bruto_deg": 3, "pitch_filtrado_deg": 3, "pitch_zero_deg": 3,
+    "dist_alvo_mm": 0, "offset_mm": 1, "calib_pitch_std_deg": 3,
+    "calib_dist_std_mm": 1, "temp_mpu_c": 2,
+}
+MASSAS_G = (150.0, 250.0, 350.0, 500.0)
+LINHAS_POR_SESSAO = 5000
+
+
+def gerar_dataframe(linhas, semente=0, prob_falha=0.03):
+    """Gera ``linhas`` ensaios com a mesma física do simulador_tribometro."""
+    rng = np.random.default_rng(semente)
+    n = linhas
+    lbc = rng.integers(1, 4, n)
+    lbt = rng.integers(1, 4, n)
+    massa = rng.choice(MASSAS_G, n)
+    mu_s_real = np.maximum(0.05, 0.28 + 0.035 * (lbc + lbt) - 0.02 * massa / 1000.0 + rng.normal(0, 0.015, n))
+    theta_deg = np.minimum(np.degrees(np.arctan(mu_s_real)) + rng.normal(0, 0.05, n), 44.9)
+    theta = np.radians(theta_deg)
+    mu_d_real = np.minimum(mu_s_real * 0.82 + rng.normal(0, 0.0075, n), np.tan(theta) * 0.98)
+    aceleracao_real = G * (np.sin(theta) - mu_d_real * np.cos(theta))
+
+    dist_ref = np.rint(rng.normal(300, 1.0, n)).astype(np.int64)
+    dist_alvo = np.full(n, 140.0)
+    s_abs = np.rint(dist_alvo + np.abs(rng.normal(0, 2.0, n))).astype(np.int64)
+    tempo = np.sqrt(2.0 * (s_abs / 1000.0) / aceleracao_real)
+    amostras = np.maximum(0, (tempo * 1000 / 50).astype(np.int64) - 1)
+
+    mpu_ok = rng.random(n) >= prob_falha
+    mpu_ok_slip = mpu_ok & (rng.random(n) >= prob_falha)
+    sonar_ok = rng.random(n) >= prob_falha
+    # Percurso fora da tolerância: sonar ok, mas s_abs longe do alvo.
+    fora = sonar_ok & (rng.random(n) < prob_falha)
+    s_abs = np.where(fora, s_abs + rng.integers(25, 60, n), s_abs)
+    s_abs = np.where(sonar_ok, s_abs, 0)
+
+    d_m = np.where(sonar_ok, s_abs / 1000.0, np.nan)
+    a_est = np.where(sonar_ok & (amostras >= 6), 2.0 * d_m / tempo ** 2 * (1 + rng.normal(0, 0.02, n)), np.nan)
+    v_end = np.sqrt(np.maximum(0.0, 2.0 * a_est * d_m))
+    mu_d = (G * np.sin(theta) - a_est) / (G * np.cos(theta))
+    dh = d_m * np.sin(theta)
+    m_kg = massa / 1000.0
+    w_energia = 0.5 * m_kg * v_end ** 2 - m_kg * G * dh
+    w_atrito = mu_d * m_kg * G * np.cos(theta) * d_m
+    mu_s = np.where(mpu_ok & mpu_ok_slip, np.tan(theta), np.nan)
+    mu_d = np.where(mpu_ok, mu_d, np.nan)
+
+    t_inicio = np.cumsum(rng.integers(30000, 90000, n))
+    pitch_zero = rng.normal(0, 0.01, n)
+    dist_agora = dist_ref - s_abs
+    s_ok = (sonar_ok & (np.abs(dist_alvo.astype(np.int64) - s_abs) <= 20)).astype(np.int64)
+    timestamp = pd.Timestamp("2024-01-01") + pd.to_timedelta(t_inicio // 1000, unit="s")
+
+    return pd.DataFrame({
+        "massa_g": massa,
+        "LBC": lbc,
+        "LBT": lbt,
+        "angulo_deg": theta_deg,
+        "altura_m": dh,
+        "mu_s": mu_s,
+        "mu_d": mu_d,
+        "aceleracao_mps2": a_est,
+        "velocidade_mps": v_end,
+        "tempo_s": tempo,
+        "t_inicio_ms": t_inicio,
+        "t_fim_ms": t_inicio + (tempo * 1000).astype(np.int64),
+        "amostras_validas": amostras,
+        "trabalho_energia_J": w_energia,
+        "trabalho_atrito_J": w_atrito,
+        "mpu_ok": mpu_ok.astype(np.int64),
+        "mpu_ok_no_escorregamento": mpu_ok_slip.astype(np.int64),
+        "sonar_ok": sonar_ok.astype(np.int64),
+        "sonar_stale_ms": np.where(sonar_ok, 0, rng.integers(500, 1500, n)),
+        "filtro_alpha": np.full(n, 0.9),
+        "pitch_bruto_deg": pitch_zero + theta_deg + rng.normal(0, 0.05, n),
+        "pitch_filtrado_deg": pitch_zero + theta_deg,
+        "pitch_zero_deg": pitch_zero,
+        "sonar_bruto_mm": np.where(sonar_ok, dist_agora + rng.integers(-1, 2, n), -1),
+        "sonar_filtrado_mm": dist_agora,
+        "dist0_mm": dist_ref + rng.integers(-1, 2, n),
+        "dist_ref_mm": dist_ref,
+        "dist_alvo_mm": dist_alvo,
+        "offset_mm": np.full(n, 10.0),
+        "s_abs_mm": s_abs,
+        "s_rel_mm": np.where(sonar_ok, np.maximum(0, s_abs - rng.integers(20, 31, n)), 0),
+        "dist_fim_mm": dist_agora,
+        "s_ok": s_ok,
+        "calib_pitch_std_deg": np.abs(rng.normal(0.08, 0.03, n)),
+        "calib_dist_std_mm": np.abs(rng.normal(2.0, 0.8, n)),
+        "calib_pitch_n": np.full(n, 40),
+        "calib_dist_n": np.full(n, 40),
+        "temp_mpu_c": rng.normal(27.0, 0.5, n),
+        "Timestamp_PC": timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+    }, columns=COLUNAS)
+
+
+def escrever_csv(caminho, df, linhas_por_sessao=LINHAS_POR_SESSAO):
+    """Grava como o ingest: BOM, ';', CRLF, 'nan' e o cabeçalho repetido a cada sessão."""
+    df = df.round(CASAS_DECIMAIS)
+    cabecalho = ";".join(COLUNAS) + "\r\n"
+    with open(caminho, "w", newline="", encoding="utf-8-sig") as arquivo:
+        for inicio in range(0, len(df), linhas_por_sessao):
+            arquivo.write(cabecalho)
+            df.iloc[inicio:inicio + linhas_por_sessao].to_csv(
+                arquivo, sep=";", header=False, index=False, na_rep="nan", lineterminator="\r\n"
+            )
+        if len(df) == 0:
+            arquivo.write(cabecalho)
+
+
+def gerar_csv(caminho, linhas, semente=0, linhas_por_sessao=LINHAS_POR_SESSAO):
+    escrever_csv(caminho, gerar_dataframe(linhas, semente), linhas_por_sessao)
+    return caminho
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("saida")
+    parser.add_argument("--linhas", type=int, default=100000)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--linhas-por-sessao", type=int, default=LINHAS_POR_SESSAO,
+                        help="Repete o cabeçalho a cada N linhas (sessões do ingest).")
+    args = parser.parse_args()
+    gerar_csv(args.saida, args.linhas, args.semente, args.linhas_por_sessao)
+    print(f"{args.linhas} linhas gravadas em {args.saida} ({os.path.getsize(args.saida) / 1e6:.1f} MB).")
+
+
+if __name__ == "__main__":
+    main()
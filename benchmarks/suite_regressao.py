@@ -0,0 +1,354 @@
+"""Suíte de regressão: análise por etapa, "g N", gravação do ingest e cada gráfico, com resultado em JSON.
+
+Para cada tamanho (padrão 1k, 100k e 1M linhas) gera uma vez, com
+dados_sinteticos, um resultados_tribometro.csv no layout do firmware, com
+cabeçalho repetido a cada sessão e flags inválidas. Os CSVs ficam em
+benchmarks/dados_suite/ e são reaproveitados. Mede então:
+
+- executar_analise com --perfil: parede, CPU e pico de memória por etapa e o
+  tempo de cada gráfico (em série, sem cache, Excel 'rapido' com até
+  100 mil linhas por planilha, para o 1M terminar em minutos);
+- interface_tribometro.ler_resultado_do_fim em vários deslocamentos, a frio
+  (construindo o índice) e a quente;
+- salvar_em_csv da interface e do ui_server anexando linhas a um CSV novo.
+
+Todas as medidas vão em segundos, achatadas em ``medidas`` ("analise/100000/excel",
+"graficos/1000/grafico_01_media_mu_s.png", ...), junto do commit, num JSON em
+benchmarks/resultados_suite/. Com --comparar (um JSON anterior ou "ultimo"),
+lista as medidas que ficaram mais de --tolerancia mais lentas, ignorando as
+abaixo de --piso-s, e sai com código 1 se houver alguma.
+
+Uso: python benchmarks/suite_regressao.py [--tamanhos 1000 100000 1000000] [--comparar ultimo]
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+DIR_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+DIR_PROJETO = os.path.dirname(DIR_BENCHMARKS)
+sys.path.insert(0, DIR_PROJETO)
+sys.path.insert(0, DIR_BENCHMARKS)
+
+import esquema_registro
+import indice_resultados
+from dados_sinteticos import gerar_csv
+
+TAMANHOS_PADRAO = (1000, 100000, 1000000)
+COMPONENTES = ("analise", "ler_do_fim", "salvar_em_csv")
+DESLOCAMENTOS = (0, 10, 1000, 100000)
+DIR_DADOS = os.path.join(DIR_BENCHMARKS, "dados_suite")
+DIR_RESULTADOS = os.path.join(DIR_BENCHMARKS, "resultados_suite")
+MAX_LINHAS_EXCEL = 100000
+TOLERANCIA_PADRAO = 0.25
+PISO_PADRAO_S = 0.02
+
+
+def obter_dataset(tamanho, semente, diretorio=DIR_DADOS):
+    """(caminho, segundos para gerar ou 0.0 se reaproveitado)."""
+    os.makedirs(diretorio, exist_ok=True)
+    caminho = os.path.join(diretorio, f"resultados_{tamanho}_s{semente}.csv")
+    if os.path.isfile(caminho):
+        return caminho, 0.0
+    inicio = time.perf_counter()
+    temporario = caminho + ".tmp"
+    gerar_csv(temporario, tamanho, semente)
+    os.replace(temporario, caminho)
+    return caminho, time.perf_counter() - inicio
+
+
+def _git(*argumentos):
+    try:
+        return subprocess.run(("git",) + argumentos, cwd=DIR_PROJETO, capture_output=True,
+                              text=True, timeout=30, check=True).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def medir_analise(caminho, reamostragens, trabalhadores):
+    import analise_de_ensaios
+
+    anterior = os.getcwd()
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.chdir(diretorio)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                codigo = analise_de_ensaios.executar_analise(
+                    os.path.abspath(caminho), trabalhadores=trabalhadores, usar_cache=False,
+                    modo_excel="rapido", max_linhas_excel=MAX_LINHAS_EXCEL,
+                    reamostragens=reamostragens, perfil="perfil.json",
+                )
+            with open("perfil.json", encoding="utf-8") as arquivo:
+                relatorio = json.load(arquivo)
+        finally:
+            os.chdir(anterior)
+    if codigo != 0:
+        raise RuntimeError(f"executar_analise retornou {codigo} para {caminho}")
+    return relatorio
+
+
+def medir_ler_do_fim(caminho, tamanho, chamadas=50):
+    import interface_tribometro
+
+    resultado = {}
+    for deslocamento in DESLOCAMENTOS:
+        if deslocamento >= tamanho * 0.9:
+            continue
+        # A frio: sem índice em memória nem no disco, como no primeiro "g N" depois de abrir.
+        indice_resultados._indices.clear()
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(caminho + indice_resultados.SUFIXO_INDICE)
+        inicio = time.perf_counter()
+        dados = interface_tribometro.ler_resultado_do_fim(caminho, deslocamento)
+        frio = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        for _ in range(chamadas):
+            interface_tribometro.ler_resultado_do_fim(caminho, deslocamento)
+        resultado[str(deslocamento)] = {
+            "frio_s": frio,
+            "quente_s": (time.perf_counter() - inicio) / chamadas,
+            "encontrado": dados is not None,
+        }
+    indice_resultados._indices.clear()
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(caminho + indice_resultados.SUFIXO_INDICE)
+    return resultado
+
+
+def _linhas_serial(caminho, linhas):
+    """Cabeçalho e as primeiras ``linhas`` de dados como chegam da serial (sem Timestamp_PC)."""
+    saida = []
+    with open(caminho, encoding="utf-8-sig") as arquivo:
+        for linha in arquivo:
+            colunas = linha.rstrip("\r\n").split(";")[:-1]
+            eh_cabecalho = colunas[0] == "massa_g"
+            if eh_cabecalho and saida:
+                continue
+            saida.append(";".join(colunas))
+            if len(saida) > linhas:
+                break
+    return saida
+
+
+def _gravar(salvar, texto):
+    analisador = esquema_registro.AnalisadorLinhas()
+    registros = [analisador.analisar(linha) for linha in texto]
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for registro in registros:
+            salvar(registro)
+    return time.perf_counter() - inicio
+
+
+def medir_salvar_em_csv(caminho, linhas):
+    import interface_tribometro
+    import ui_server
+
+    texto = _linhas_serial(caminho, linhas)
+    resultado = {"linhas": len(texto) - 1}
+    with tempfile.TemporaryDirectory() as diretorio:
+        interface_tribometro.CAMINHO_SAIDA_PADRAO = os.path.join(diretorio, "interface.csv")
+        interface_tribometro.CAMINHO_SAIDA_TEMP = os.path.join(diretorio, "interface_tmp.csv")
+        interface_tribometro.CAMINHO_RESUMO = os.path.join(diretorio, "resumo_interface.json")
+        interface_tribometro.ARQUIVO_ATIVO = interface_tribometro.DIARIO = interface_tribometro.RESUMO = None
+        try:
+            resultado["interface_s"] = _gravar(interface_tribometro.salvar_em_csv, texto)
+        finally:
+            if interface_tribometro.DIARIO is not None:
+                interface_tribometro.DIARIO.fechar()
+            interface_tribometro.DIARIO = None
+            indice_resultados._indices.clear()
+
+        pasta = Path(diretorio) / "ui"
+        gerenciador = ui_server.GerenciadorSerial(
+            "suite", caminho_csv=pasta / "resultados.csv", caminho_resumo=pasta / "resumo.json",
+            dir_colunar=pasta / "colunar", dir_tracos=pasta / "tracos")
+        try:
+            resultado["ui_server_s"] = _gravar(gerenciador._salvar_em_csv, texto)
+        finally:
+            gerenciador._diario.fechar()
+    for alvo in ("interface", "ui_server"):
+        resultado[f"{alvo}_us_por_linha"] = resultado[f"{alvo}_s"] / len(texto) * 1e6
+    return resultado
+
+
+def achatar(resultados):
+    """{"componente/tamanho/nome": segundos}: o formato que comparar() usa."""
+    medidas = {}
+    for tamanho, partes in resultados["por_tamanho"].items():
+        analise = partes.get("analise")
+        if analise:
+            for etapa, medida in analise["etapas"].items():
+                medidas[f"analise/{tamanho}/{etapa}"] = medida["parede_s"]
+            medidas[f"analise/{tamanho}/total"] = analise["total"]["parede_s"]
+            for grafico, segundos in analise["etapas"].get("graficos", {}).get("por_grafico_s", {}).items():
+                medidas[f"graficos/{tamanho}/{grafico}"] = segundos
+        for deslocamento, medida in (partes.get("ler_do_fim") or {}).items():
+            medidas[f"ler_do_fim/{tamanho}/{deslocamento}/frio"] = medida["frio_s"]
+            medidas[f"ler_do_fim/{tamanho}/{deslocamento}/quente"] = medida["quente_s"]
+    salvar = resultados.get("salvar_em_csv")
+    if salvar:
+        for alvo in ("interface", "ui_server"):
+            medidas[f"salvar_em_csv/{salvar['linhas']}/{alvo}"] = salvar[f"{alvo}_s"]
+    return medidas
+
+
+def comparar(base, novo, tolerancia=TOLERANCIA_PADRAO, piso_s=PISO_PADRAO_S):
+    """[(medida, base_s, novo_s, razão)] das medidas de ``novo`` mais de ``tolerancia`` acima de ``base``.
+
+    Medidas abaixo de ``piso_s`` nos dois lados ficam de fora: nessa escala o
+    ruído do sistema passa da tolerância. Por isso ``quente`` do "g N" só
+    detecta regressões grosseiras (várias ordens de grandeza).
+    """
+    regressoes = []
+    for nome, valor_novo in novo["medidas"].items():
+        valor_base = base["medidas"].get(nome)
+        if valor_base is None or max(valor_base, valor_novo) < piso_s or valor_base <= 0:
+            continue
+        razao = valor_novo / valor_base
+        if razao > 1.0 + tolerancia:
+            regressoes.append((nome, valor_base, valor_novo, razao))
+    return sorted(regressoes, key=lambda item: item[3], reverse=True)
+
+
+def _ultimo_resultado(diretorio):
+    arquivos = sorted(glob.glob(os.path.join(diretorio, "suite_*.json")))
+    return arquivos[-1] if arquivos else None
+
+
+def executar(tamanhos=TAMANHOS_PADRAO, componentes=COMPONENTES, semente=0, reamostragens=1000,
+             trabalhadores=1, linhas_ingestao=20000, dir_dados=DIR_DADOS):
+    resultados = {
+        "benchmark": "suite_regressao",
+        "criado_em": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git("rev-parse", "--short", "HEAD"),
+        "alteracoes_locais": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "parametros": {"tamanhos": list(tamanhos), "componentes": list(componentes), "semente": semente,
+                       "reamostragens": reamostragens, "trabalhadores": trabalhadores,
+                       "linhas_ingestao": linhas_ingestao},
+        "por_tamanho": {},
+    }
+    caminhos = {}
+    for tamanho in tamanhos:
+        caminho, geracao_s = obter_dataset(tamanho, semente, dir_dados)
+        caminhos[tamanho] = caminho
+        partes = {"csv_bytes": os.path.getsize(caminho), "geracao_s": geracao_s}
+        if "analise" in componentes:
+            partes["analise"] = medir_analise(caminho, reamostragens, trabalhadores)
+        if "ler_do_fim" in componentes:
+            partes["ler_do_fim"] = medir_ler_do_fim(caminho, tamanho)
+        resultados["por_tamanho"][str(tamanho)] = partes
+    if "salvar_em_csv" in componentes:
+        maior = max(tamanhos)
+        resultados["salvar_em_csv"] = medir_salvar_em_csv(caminhos[maior], min(linhas_ingestao, maior))
+    resultados["medidas"] = achatar(resultados)
+    resultados["ok"] = all(
+        medida["encontrado"]
+        for partes in resultados["por_tamanho"].values()
+        for medida in (partes.get("ler_do_fim") or {}).values()
+    )
+    return resultados
+
+
+def salvar_resultado(resultados, diretorio=DIR_RESULTADOS):
+    os.makedirs(diretorio, exist_ok=True)
+    carimbo = datetime.now().strftime("%Y%m%d_%H%M%S")
+    caminho = os.path.join(diretorio, f"suite_{carimbo}_{resultados['commit'] or 'semgit'}.json")
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(resultados, arquivo, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=list(TAMANHOS_PADRAO))
+    parser.add_argument("--componentes", nargs="+", choices=COMPONENTES, default=list(COMPONENTES))
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--reamostragens", type=int, default=1000,
+                        help="Bootstrap dos intervalos de confiança na análise (0 = sem intervalos).")
+    parser.add_argument("--trabalhadores", type=int, default=1,
+                        help="Processos dos gráficos; 1 mede cada gráfico sem disputa de CPU.")
+    parser.add_argument("--linhas-ingestao", type=int, default=20000)
+    parser.add_argument("--dados", default=DIR_DADOS, help="Onde guardar os CSVs sintéticos gerados.")
+    parser.add_argument("--saida", default=DIR_RESULTADOS, help="Pasta dos JSON de resultado.")
+    parser.add_argument("--comparar", default=None, metavar="JSON|ultimo",
+                        help="Resultado anterior para detectar regressões ('ultimo' = o mais recente em --saida).")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO,
+                        help="Fração acima da base que conta como regressão (0.25 = 25%%).")
+    parser.add_argument("--piso-s", type=float, default=PISO_PADRAO_S,
+                        help="Medidas abaixo disso (nos dois lados) não são comparadas.")
+    parser.add_argument("--limpar-dados", action="store_true", help="Apaga os CSVs sintéticos ao terminar.")
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    args = parser.parse_args()
+
+    base = None
+    if args.comparar:
+        caminho_base = _ultimo_resultado(args.saida) if args.comparar == "ultimo" else args.comparar
+        if caminho_base is None:
+            print(f"Nenhum resultado anterior em {args.saida}; esta execução vira a base.")
+        else:
+            with open(caminho_base, encoding="utf-8") as arquivo:
+                base = json.load(arquivo)
+
+    resultados = executar(args.tamanhos, args.componentes, args.semente, args.reamostragens,
+                          args.trabalhadores, args.linhas_ingestao, args.dados)
+    regressoes = comparar(base, resultados, args.tolerancia, args.piso_s) if base else []
+    if base:
+        resultados["comparacao"] = {
+            "base": base.get("commit"),
+            "base_criado_em": base.get("criado_em"),
+            "tolerancia": args.tolerancia,
+            "regressoes": [{"medida": n, "base_s": b, "novo_s": v, "razao": r} for n, b, v, r in regressoes],
+        }
+    caminho = salvar_resultado(resultados, args.saida)
+    if args.limpar_dados:
+        shutil.rmtree(args.dados, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+    else:
+        print(f"commit {resultados['commit']}{' (com alterações locais)' if resultados['alteracoes_locais'] else ''}"
+              f" | {resultados['cpus']} CPUs | Python {resultados['python']}")
+        for tamanho, partes in resultados["por_tamanho"].items():
+            print(f"\n{int(tamanho):,} linhas ({partes['csv_bytes'] / 1e6:.1f} MB)".replace(",", "."))
+            analise = partes.get("analise")
+            if analise:
+                etapas = " | ".join(f"{nome} {m['parede_s']:.2f}" for nome, m in analise["etapas"].items())
+                print(f"  análise {analise['total']['parede_s']:.2f} s: {etapas}")
+                graficos = analise["etapas"].get("graficos", {}).get("por_grafico_s", {})
+                if graficos:
+                    mais_lento = max(graficos, key=graficos.get)
+                    print(f"  {len(graficos)} gráficos, mais lento {mais_lento} {graficos[mais_lento]:.2f} s")
+            for deslocamento, m in (partes.get("ler_do_fim") or {}).items():
+                print(f"  g {deslocamento}: frio {m['frio_s'] * 1000:.1f} ms | quente {m['quente_s'] * 1000:.3f} ms")
+        salvar = resultados.get("salvar_em_csv")
+        if salvar:
+            print(f"\nsalvar_em_csv ({salvar['linhas']} linhas): interface {salvar['interface_us_por_linha']:.1f} us/linha"
+                  f" | ui_server {salvar['ui_server_us_por_linha']:.1f} us/linha")
+        if base:
+            print(f"\nComparado com {base.get('commit')} ({base.get('criado_em')}): "
+                  f"{len(regressoes)} regressão(ões) acima de {args.tolerancia:.0%}")
+            for nome, valor_base, valor_novo, razao in regressoes:
+                print(f"  {nome}: {valor_base:.4f} s -> {valor_novo:.4f} s ({razao:.2f}x)")
+        print(f"\nResultado salvo em: {caminho}")
+    if not resultados["ok"] or regressoes:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Buffer circular de capacidade fixa com números de sequência globais.
+
+Cada item recebe a sequência 1, 2, 3... na ordem de chegada e a numeração
+nunca reinicia, mesmo quando os itens mais antigos são sobrescritos. Um
+leitor guarda a última sequência que viu e pede "o que veio depois dela":
+recebe só os itens novos (custo proporcional a eles, não ao buffer) e, se
+ficou para trás além da capacidade, a quantidade de itens que perdeu.
+"""
+import threading
+
+CAPACIDADE_PADRAO = 1000
+
+
+class BufferCircular:
+    def __init__(self, capacidade=CAPACIDADE_PADRAO):
+        if capacidade < 1:
+            raise ValueError("Capacidade deve ser >= 1.")
+        self.capacidade = capacidade
+        # Anexar e ler usam só a trava; a condição só é notificada se houver quem espere.
+        self._trava = threading.Lock()
+        self.condicao = threading.Condition(self._trava)
+        self._esperando = 0
+        self._itens = [None] * capacidade
+        self._ultimo_seq = 0
+
+    @property
+    def ultimo_seq(self):
+        return self._ultimo_seq
+
+    def anexar(self, item):
+        """Guarda ``item`` e retorna a sua sequência."""
+        with self._trava:
+            self._ultimo_seq += 1
+            self._itens[(self._ultimo_seq - 1) % self.capacidade] = item
+            if self._esperando:
+                self.condicao.notify_all()
+            return self._ultimo_seq
+
+    def ler_desde(self, seq, limite=None):
+        """Itens com sequência > ``seq``. Retorna (itens, última sequência entregue, perdidos).
+
+        ``perdidos`` conta os itens que já foram sobrescritos antes da leitura.
+        Uma sequência à frente da atual (buffer recriado) recomeça do início.
+        """
+        with self._trava:
+            ultimo = self._ultimo_seq
+            if seq < 0 or seq > ultimo:
+                seq = 0
+            primeiro = max(1, ultimo - self.capacidade + 1)
+            inicio = max(seq + 1, primeiro)
+            perdidos = inicio - (seq + 1)
+            quantidade = ultimo - inicio + 1
+            if limite is not None:
+                quantidade = min(quantidade, limite)
+            if quantidade <= 0:
+                return [], seq, perdidos
+            i = (inicio - 1) % self.capacidade
+            j = i + quantidade
+            if j <= self.capacidade:
+                itens = self._itens[i:j]
+            else:
+                itens = self._itens[i:] + self._itens[:j - self.capacidade]
+            return itens, inicio + quantidade - 1, perdidos
+
+    def aguardar(self, seq, timeout=None, outro_evento=None):
+        """Bloqueia até existir item com sequência > ``seq``, ``outro_evento()`` ser
+        verdadeiro ou o timeout. Uma sequência à frente da atual conta como 0."""
+        with self.condicao:
+            if seq > self._ultimo_seq:
+                seq = 0
+            self._esperando += 1
+            try:
+                return self.condicao.wait_for(
+                    lambda: self._ultimo_seq > seq or (outro_evento is not None and outro_evento()),
+                    timeout,
+                )
+            finally:
+                self._esperando -= 1
+
+    def notificar(self):
+        """Acorda quem está em ``aguardar`` para reavaliar ``outro_evento``."""
+        with self.condicao:
+            self.condicao.notify_all()
+
+    def __len__(self):
+        return min(self._ultimo_seq, self.capacidade)
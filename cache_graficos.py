@@ -0,0 +1,124 @@
+"""Cache de gráficos endereçado por conteúdo.
+
+A chave de cada gráfico é um hash dos dados que ele recebe (fatia do DataFrame
+ou valores do resumo), do código da função que o desenha e das versões do
+matplotlib/seaborn. O manifesto (``manifesto_graficos.json``, ao lado dos PNGs)
+guarda a chave com que cada arquivo foi gerado; um gráfico só é refeito quando
+a chave muda ou o arquivo sumiu. PNGs que não pertencem mais a nenhuma tarefa
+(grupo que deixou de existir, por exemplo) são removidos. Tarefas que não
+tinham o que desenhar (a função retornou False e nenhum PNG foi gravado) ficam
+em ``sem_grafico``, para não serem refeitas a cada execução.
+"""
+import hashlib
+import inspect
+import json
+import os
+
+import matplotlib
+import pandas as pd
+import seaborn as sns
+
+ARQUIVO_MANIFESTO = "manifesto_graficos.json"
+VERSAO_MANIFESTO = 1
+
+
+def _atualizar_hash(h, valor):
+    if isinstance(valor, pd.DataFrame):
+        # O índice entra no hash: no heatmap ele traz os rótulos de LBT.
+        h.update(repr((list(valor.columns), [str(t) for t in valor.dtypes])).encode())
+        h.update(pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+    else:
+        h.update(repr(valor).encode())
+    h.update(b"\0")
+
+
+def chave_tarefa(funcao, argumentos, dependencias=()):
+    """Hash de (código da função e dependências, versões, argumentos exceto o caminho de saída)."""
+    h = hashlib.sha256()
+    h.update(f"{VERSAO_MANIFESTO}|{matplotlib.__version__}|{sns.__version__}".encode())
+    for codigo in (funcao, *dependencias):
+        h.update(inspect.getsource(codigo).encode())
+    for argumento in argumentos[:-1]:
+        _atualizar_hash(h, argumento)
+    h.update(os.path.basename(argumentos[-1]).encode())
+    return h.hexdigest()
+
+
+class CacheGraficos:
+    def __init__(self, dir_base, dependencias=()):
+        self.dir_base = dir_base
+        self.caminho_manifesto = os.path.join(dir_base, ARQUIVO_MANIFESTO)
+        self.dependencias = tuple(dependencias)
+        self._anterior, self._anterior_sem_grafico = self._carregar()
+        self._atual = {}
+        self._sem_grafico = {}
+
+    def _carregar(self):
+        try:
+            with open(self.caminho_manifesto, "r", encoding="utf-8") as arquivo:
+                manifesto = json.load(arquivo)
+        except (OSError, ValueError):
+            return {}, {}
+        if manifesto.get("versao") != VERSAO_MANIFESTO:
+            return {}, {}
+        return manifesto.get("graficos", {}), manifesto.get("sem_grafico", {})
+
+    def _relativo(self, caminho):
+        return os.path.relpath(caminho, self.dir_base).replace(os.sep, "/")
+
+    def filtrar(self, tarefas):
+        """Separa as tarefas que precisam ser refeitas. Retorna (pendentes, chaves, reaproveitadas)."""
+        pendentes = []
+        chaves = {}
+        reaproveitadas = 0
+        for tarefa in tarefas:
+            funcao, argumentos = tarefa
+            caminho = argumentos[-1]
+            chave = chave_tarefa(funcao, argumentos, self.dependencias)
+            relativo = self._relativo(caminho)
+            chaves[caminho] = chave
+            if self._anterior.get(relativo) == chave and os.path.isfile(caminho):
+                self._atual[relativo] = chave
+                reaproveitadas += 1
+            elif self._anterior_sem_grafico.get(relativo) == chave and not os.path.isfile(caminho):
+                self._sem_grafico[relativo] = chave
+                reaproveitadas += 1
+            else:
+                pendentes.append(tarefa)
+        return pendentes, chaves, reaproveitadas
+
+    def registrar(self, caminho, chave, desenhou=True):
+        """``desenhou=False``: a tarefa rodou mas não tinha o que desenhar."""
+        destino = self._atual if desenhou else self._sem_grafico
+        destino[self._relativo(caminho)] = chave
+
+    def limpar_obsoletos(self, diretorios, validos):
+        """Remove PNGs dos diretórios que não correspondem a nenhuma tarefa atual."""
+        validos = {os.path.abspath(c) for c in validos}
+        removidos = 0
+        for diretorio in diretorios:
+            try:
+                nomes = os.listdir(diretorio)
+            except OSError:
+                continue
+            for nome in nomes:
+                caminho = os.path.join(diretorio, nome)
+                if not nome.lower().endswith(".png") or os.path.abspath(caminho) in validos:
+                    continue
+                try:
+                    os.remove(caminho)
+                    removidos += 1
+                except OSError:
+                    pass
+        return removidos
+
+    def salvar(self):
+        temporario = self.caminho_manifesto + ".tmp"
+        try:
+            with open(temporario, "w", encoding="utf-8") as arquivo:
+                json.dump({"versao": VERSAO_MANIFESTO, "graficos": dict(sorted(self._atual.items())),
+                           "sem_grafico": dict(sorted(self._sem_grafico.items()))},
+                          arquivo, indent=1)
+            os.replace(temporario, self.caminho_manifesto)
+        except OSError:
+            pass
@@ -0,0 +1,243 @@
+"""Diário de gravação (append-only) do CSV de resultados com commit em grupo.
+
+Mantém um único handle aberto no arquivo ativo e agrupa os fsync conforme a
+política de durabilidade:
+
+    "linha"      fsync a cada linha gravada
+    "ms:<N>"     fsync no máximo a cada N milissegundos (thread em segundo plano)
+    "linhas:<N>" fsync a cada N linhas
+
+Toda linha é entregue ao sistema operacional assim que gravada, então leitores
+(índice, pandas) a enxergam na hora; a política só decide quando ela chega ao disco.
+Ao abrir um arquivo, uma última linha sem '\\n' (gravação interrompida) é truncada.
+"""
+import csv
+import io
+import os
+import threading
+
+POLITICA_PADRAO = "ms:200"
+BOM_UTF8 = b"\xef\xbb\xbf"
+
+
+def interpretar_politica(texto):
+    """Converte "linha", "ms:200" ou "linhas:50" em (tipo, valor)."""
+    texto = (texto or POLITICA_PADRAO).strip().lower()
+    if texto == "linha":
+        return "linha", 1
+    tipo, _, valor = texto.partition(":")
+    if tipo not in ("ms", "linhas"):
+        raise ValueError(f"Política de durabilidade inválida: {texto!r}")
+    try:
+        numero = int(valor)
+    except ValueError:
+        raise ValueError(f"Política de durabilidade inválida: {texto!r}") from None
+    if numero <= 0:
+        raise ValueError(f"Política de durabilidade inválida: {texto!r}")
+    return tipo, numero
+
+
+def politica_do_ambiente(avisar=print):
+    """TRIBO_DURABILIDADE validada; se inválida, ``avisar(mensagem)`` e POLITICA_PADRAO.
+
+    Uma variável de ambiente errada não pode impedir a gravação dos ensaios;
+    já a política passada direto ao DiarioResultados continua levantando ValueError.
+    """
+    texto = os.environ.get("TRIBO_DURABILIDADE", POLITICA_PADRAO)
+    try:
+        interpretar_politica(texto)
+    except ValueError as e:
+        avisar(f"[AVISO] TRIBO_DURABILIDADE: {e}; usando {POLITICA_PADRAO!r}.")
+        return POLITICA_PADRAO
+    return texto
+
+
+def reparar_final_truncado(caminho, tamanho_bloco=64 * 1024):
+    """Remove uma última linha incompleta. Retorna quantos bytes foram descartados."""
+    try:
+        arquivo = open(caminho, "r+b")
+    except FileNotFoundError:
+        return 0
+    with arquivo:
+        tamanho = arquivo.seek(0, os.SEEK_END)
+        if tamanho == 0:
+            return 0
+        arquivo.seek(tamanho - 1)
+        if arquivo.read(1) == b"\n":
+            return 0
+        posicao = tamanho
+        corte = 0
+        while posicao > 0:
+            leitura = min(tamanho_bloco, posicao)
+            posicao -= leitura
+            arquivo.seek(posicao)
+            fim = arquivo.read(leitura).rfind(b"\n")
+            if fim >= 0:
+                corte = posicao + fim + 1
+                break
+        arquivo.truncate(corte)
+        return tamanho - corte
+
+
+class DiarioResultados:
+    """Grava linhas no primeiro candidato disponível, sem reabrir o arquivo a cada linha.
+
+    ``montar_candidatos`` devolve a lista de caminhos na ordem de preferência
+    (o arquivo ativo primeiro); ela só é consultada ao abrir ou trocar de arquivo.
+    ``ao_bloqueio(caminho, erro)`` é chamado para cada arquivo recusado por
+    PermissionError e ``ao_truncar(caminho, bytes)`` quando uma linha rasgada é removida.
+    """
+
+    def __init__(self, montar_candidatos, politica=POLITICA_PADRAO, ao_bloqueio=None, ao_truncar=None):
+        self.montar_candidatos = montar_candidatos
+        self.tipo_politica, self.valor_politica = interpretar_politica(politica)
+        self.ao_bloqueio = ao_bloqueio
+        self.ao_truncar = ao_truncar
+        self.caminho_ativo = None
+        self.linhas_gravadas = 0
+        self.fsyncs = 0
+        self.trocas_de_arquivo = 0
+        self._arquivo = None
+        self._tamanho = 0
+        self._pendentes = 0
+        self._lock = threading.Lock()
+        self._acordar = threading.Condition(self._lock)
+        self._parar = False
+        self._thread = None
+        self._texto = io.StringIO()
+        self._escritor = csv.writer(self._texto, delimiter=";")
+
+    def _formatar(self, colunas):
+        self._texto.seek(0)
+        self._texto.truncate(0)
+        self._escritor.writerow(colunas)
+        return self._texto.getvalue().encode("utf-8")
+
+    def _abrir(self, caminho):
+        descartados = reparar_final_truncado(caminho)
+        if descartados and self.ao_truncar is not None:
+            self.ao_truncar(caminho, descartados)
+        arquivo = open(caminho, "ab", buffering=0)
+        self._arquivo = arquivo
+        self._tamanho = arquivo.seek(0, os.SEEK_END)
+        if self.caminho_ativo is not None and self.caminho_ativo != caminho:
+            self.trocas_de_arquivo += 1
+        self.caminho_ativo = caminho
+
+    def _fechar_arquivo(self):
+        if self._arquivo is None:
+            return
+        try:
+            if self._pendentes:
+                os.fsync(self._arquivo.fileno())
+                self.fsyncs += 1
+        except OSError:
+            pass
+        finally:
+            self._pendentes = 0
+            try:
+                self._arquivo.close()
+            except OSError:
+                pass
+            self._arquivo = None
+
+    def _escrever(self, dados):
+        vista = memoryview(dados)
+        while vista:
+            escritos = self._arquivo.write(vista)
+            vista = vista[escritos:]
+        self._tamanho += len(dados)
+
+    def _tentar(self, caminho, dados, eh_cabecalho):
+        """Grava em ``caminho``. Retorna False se o arquivo estiver bloqueado."""
+        try:
+            if self._arquivo is None or self.caminho_ativo != caminho:
+                self._fechar_arquivo()
+                self._abrir(caminho)
+            if eh_cabecalho and self._tamanho > 0:
+                return True
+            if self._tamanho == 0:
+                self._escrever(BOM_UTF8)
+            self._escrever(dados)
+        except PermissionError as e:
+            self._fechar_arquivo()
+            if self.ao_bloqueio is not None:
+                self.ao_bloqueio(caminho, e)
+            return False
+        except Exception:
+            self._fechar_arquivo()
+            raise
+        self._pendentes += 1
+        self.linhas_gravadas += 1
+        self._aplicar_politica()
+        return True
+
+    def gravar(self, colunas, eh_cabecalho=False):
+        """Grava uma linha. Retorna o caminho usado ou None se nenhum candidato aceitou."""
+        with self._lock:
+            dados = self._formatar(colunas)
+            tentados = set()
+            if self._arquivo is not None:
+                tentados.add(self.caminho_ativo)
+                if self._tentar(self.caminho_ativo, dados, eh_cabecalho):
+                    return self.caminho_ativo
+            for caminho in self.montar_candidatos():
+                if caminho in tentados:
+                    continue
+                tentados.add(caminho)
+                if self._tentar(caminho, dados, eh_cabecalho):
+                    return caminho
+            return None
+
+    def _aplicar_politica(self):
+        if self.tipo_politica == "linha":
+            self._sincronizar()
+        elif self.tipo_politica == "linhas":
+            if self._pendentes >= self.valor_politica:
+                self._sincronizar()
+        elif self._thread is None:
+            self._thread = threading.Thread(target=self._laco_sincronizacao, daemon=True)
+            self._thread.start()
+
+    def _sincronizar(self):
+        if self._arquivo is None or not self._pendentes:
+            return
+        os.fsync(self._arquivo.fileno())
+        self._pendentes = 0
+        self.fsyncs += 1
+
+    def sincronizar(self):
+        """Força o fsync das linhas pendentes."""
+        with self._lock:
+            self._sincronizar()
+
+    def _laco_sincronizacao(self):
+        intervalo = self.valor_politica / 1000.0
+        while True:
+            with self._lock:
+                self._acordar.wait(intervalo)
+                if self._parar:
+                    return
+                if self._arquivo is None or not self._pendentes:
+                    continue
+                # fsync numa cópia do descritor, fora do lock: a gravação não espera o disco.
+                descritor = os.dup(self._arquivo.fileno())
+                self._pendentes = 0
+                self.fsyncs += 1
+            try:
+                os.fsync(descritor)
+            except OSError:
+                pass
+            finally:
+                os.close(descritor)
+
+    def fechar(self):
+        with self._lock:
+            self._parar = True
+            self._acordar.notify_all()
+            self._fechar_arquivo()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        with self._lock:
+            self._thread = None
+            self._parar = False
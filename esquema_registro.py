@@ -0,0 +1,143 @@
+"""Esquema compilado das linhas de resultado: cada linha é separada uma única vez num registro tipado.
+
+Quando chega um cabeçalho, ``compilar_esquema`` monta (uma vez por cabeçalho
+distinto) uma classe com ``__slots__`` e um acessor por coluna, com o índice
+e a conversão já fixados. Os nomes de ``APELIDOS`` apontam para o mesmo
+acessor. O registro guarda as colunas como texto, exatamente como vieram (é
+esse texto que vai para o CSV), e só converte o campo que for lido.
+
+O mesmo registro é usado pelo diário CSV, pelo armazém colunar, pelos avisos
+de qualidade e pelos traços do movimento. Antes de qualquer cabeçalho vale o
+layout de protocolo_binario.COLUNAS_RESULTADO. Todo campo conhecido do
+firmware tem acessor, mesmo que o cabeçalho recebido não o traga (lê None).
+"""
+import functools
+from datetime import datetime
+
+import protocolo_binario
+
+COLUNA_CARIMBO = "Timestamp_PC"
+FORMATO_CARIMBO = "%Y-%m-%d %H:%M:%S"
+# Linha de dados ou cabeçalho: mais de 5 ';'.
+MIN_COLUNAS = 7
+
+# Nomes antigos ou abreviados -> coluna que o firmware emite.
+APELIDOS = {
+    "mpu_ok_slip": "mpu_ok_no_escorregamento",
+    "sonar_filt_mm": "sonar_filtrado_mm",
+}
+
+
+def _inteiro(texto):
+    try:
+        return int(texto)
+    except ValueError:
+        try:
+            return int(float(texto))
+        except (ValueError, OverflowError):
+            return None
+
+
+def _real(texto):
+    try:
+        return float(texto)
+    except ValueError:
+        return None
+
+
+def _texto(texto):
+    return texto.strip()
+
+
+CONVERSORES = {nome: (_real if fmt == "f" else _inteiro) for nome, fmt, _ in protocolo_binario.CAMPOS_RESULTADO}
+CONVERSORES[COLUNA_CARIMBO] = _texto
+
+
+def _acessor(indice, converter):
+    if indice is None:
+        return property(lambda self: None)
+
+    def ler(self):
+        colunas = self.colunas
+        if indice >= len(colunas):
+            return None
+        return converter(colunas[indice])
+    return property(ler)
+
+
+class RegistroBase:
+    """Uma linha já separada. ``colunas`` é a lista gravada no CSV (com Timestamp_PC)."""
+
+    __slots__ = ("colunas", "eh_cabecalho")
+    CAMPOS = ()
+    _INDICES = {}
+
+    def __init__(self, colunas, eh_cabecalho=False):
+        self.colunas = colunas
+        self.eh_cabecalho = eh_cabecalho
+
+    @property
+    def completo(self):
+        """Mesmo número de colunas do cabeçalho que compilou o esquema."""
+        return len(self.colunas) == len(self.CAMPOS)
+
+    def texto(self, nome, padrao=None):
+        i = self._INDICES.get(APELIDOS.get(nome, nome))
+        if i is None or i >= len(self.colunas):
+            return padrao
+        return self.colunas[i].strip()
+
+    def get(self, nome, padrao=None):
+        """Valor convertido da coluna ``nome`` (como dict.get; aceita apelidos)."""
+        nome = APELIDOS.get(nome, nome)
+        i = self._INDICES.get(nome)
+        if i is None or i >= len(self.colunas):
+            return padrao
+        valor = CONVERSORES.get(nome, _texto)(self.colunas[i])
+        return padrao if valor is None else valor
+
+    def tem_nan(self):
+        return any("nan" in c.lower() for c in self.colunas)
+
+    def para_dict(self):
+        return {nome: self.get(nome) for nome in self.CAMPOS}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.colunas!r})"
+
+
+@functools.lru_cache(maxsize=32)
+def compilar_esquema(campos):
+    """Classe de registro para as colunas ``campos`` (tupla, já com Timestamp_PC)."""
+    indices = {}
+    for i, nome in enumerate(campos):
+        indices.setdefault(nome, i)
+    atributos = {"__slots__": (), "CAMPOS": tuple(campos), "_INDICES": indices}
+    for nome in set(CONVERSORES) | set(indices):
+        atributos[nome] = _acessor(indices.get(nome), CONVERSORES.get(nome, _texto))
+    for apelido, nome in APELIDOS.items():
+        atributos[apelido] = atributos[nome]
+    return type("Registro", (RegistroBase,), atributos)
+
+
+class AnalisadorLinhas:
+    """Separa as linhas de uma bancada, recompilando o esquema a cada cabeçalho."""
+
+    def __init__(self, campos=protocolo_binario.COLUNAS_RESULTADO + (COLUNA_CARIMBO,)):
+        self.classe = compilar_esquema(tuple(campos))
+
+    def analisar(self, linha, carimbo=None):
+        """Registro de ``linha`` (já sem espaços nas pontas), ou None se não for resultado nem cabeçalho.
+
+        Acrescenta Timestamp_PC: o texto ``carimbo`` (ou a hora atual) nos
+        dados e o nome da coluna no cabeçalho.
+        """
+        colunas = linha.split(";")
+        if len(colunas) < MIN_COLUNAS:
+            return None
+        if "massa_g" in linha and "LBC" in linha:
+            colunas.append(COLUNA_CARIMBO)
+            self.classe = compilar_esquema(tuple(c.strip() for c in colunas))
+            return self.classe(colunas, True)
+        colunas.append(carimbo if carimbo is not None else datetime.now().strftime(FORMATO_CARIMBO))
+        return self.classe(colunas)
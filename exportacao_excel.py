@@ -0,0 +1,93 @@
+"""Exportação rápida da análise para Excel em grandes volumes de dados.
+
+Grava as planilhas em modo write-only do openpyxl, em blocos de linhas: cada
+linha vai direto para o arquivo em vez de ficar em memória como célula. As
+larguras das colunas são estimadas por amostragem vetorizada do comprimento
+dos textos. As planilhas brutas podem ser limitadas a N linhas (ou omitidas);
+nesse caso os dados completos vão para arquivos ao lado (Parquet ou CSV).
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+# Limite do formato .xlsx, descontando a linha de cabeçalho.
+MAX_LINHAS_EXCEL = 1048575
+AMOSTRA_LARGURA = 2000
+LINHAS_POR_BLOCO = 10000
+
+
+def calcular_larguras(df, padding=2, max_width=50, amostra=AMOSTRA_LARGURA):
+    """Largura de cada coluna pelo maior texto numa amostra espaçada das linhas."""
+    if len(df) > amostra:
+        posicoes = np.unique(np.linspace(0, len(df) - 1, amostra).astype(np.int64))
+        df = df.iloc[posicoes]
+    larguras = []
+    for coluna in df.columns:
+        comprimento = 0
+        if len(df):
+            maior = df[coluna].astype(str).str.len().max()
+            comprimento = 0 if pd.isna(maior) else int(maior)
+        larguras.append(min(max(len(str(coluna)), comprimento) + padding, max_width))
+    return larguras
+
+
+def _linhas_em_blocos(df):
+    for inicio in range(0, len(df), LINHAS_POR_BLOCO):
+        bloco = df.iloc[inicio:inicio + LINHAS_POR_BLOCO]
+        # Células vazias no lugar de NaN, como o to_excel do pandas.
+        valores = bloco.astype(object).where(bloco.notna(), None)
+        yield from valores.itertuples(index=False, name=None)
+
+
+def gravar_excel_rapido(caminho, planilhas):
+    """Grava ``planilhas`` [(nome, df, largura_maxima), ...] em modo write-only."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    livro = Workbook(write_only=True)
+    negrito = Font(bold=True)
+    for nome, df, largura_maxima in planilhas:
+        planilha = livro.create_sheet(nome)
+        for indice, largura in enumerate(calcular_larguras(df, max_width=largura_maxima), start=1):
+            planilha.column_dimensions[get_column_letter(indice)].width = largura
+        cabecalho = []
+        for coluna in df.columns:
+            celula = WriteOnlyCell(planilha, value=str(coluna))
+            celula.font = negrito
+            cabecalho.append(celula)
+        planilha.append(cabecalho)
+        for linha in _linhas_em_blocos(df):
+            planilha.append(linha)
+    livro.save(caminho)
+
+
+def gravar_arquivo_lateral(df, caminho_base, formato="parquet"):
+    """Grava ``df`` completo em Parquet (se houver pyarrow) ou CSV. Retorna o caminho usado."""
+    if formato == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            formato = "csv"
+    caminho = caminho_base + (".parquet" if formato == "parquet" else ".csv")
+    temporario = caminho + ".tmp"
+    try:
+        if formato == "parquet":
+            df.to_parquet(temporario, index=False)
+        else:
+            df.to_csv(temporario, sep=';', decimal=',', index=False)
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+    return caminho
+
+
+def limitar_planilha(df, max_linhas):
+    """Retorna (df a gravar no Excel, se foi cortado). ``max_linhas`` 0 omite a planilha."""
+    limite = MAX_LINHAS_EXCEL if max_linhas is None else min(max_linhas, MAX_LINHAS_EXCEL)
+    if len(df) <= limite:
+        return df, False
+    return (None if limite == 0 else df.iloc[:limite]), True
@@ -0,0 +1,168 @@
+"""Fila de tarefas em segundo plano para a interface web.
+
+Uma única thread executa as tarefas (análise, gráfico do ensaio) na ordem em
+que chegam, então duas execuções nunca escrevem os mesmos arquivos ao mesmo
+tempo. Pedir uma tarefa idêntica a outra que ainda está na fila devolve a já
+existente. A função da tarefa informa etapa e percentual por
+``Tarefa.atualizar``; é nesse ponto que um cancelamento pedido é atendido, de
+modo que a tarefa só para entre etapas, nunca no meio da escrita de um arquivo.
+"""
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDA = "concluida"
+FALHOU = "falhou"
+CANCELADA = "cancelada"
+ESTADOS_FINAIS = (CONCLUIDA, FALHOU, CANCELADA)
+
+MAX_HISTORICO = 50
+
+
+class TarefaCancelada(Exception):
+    pass
+
+
+class Tarefa:
+    def __init__(self, identificador, tipo, parametros):
+        self.id = identificador
+        self.tipo = tipo
+        self.parametros = dict(parametros)
+        self.estado = PENDENTE
+        self.etapa = "na fila"
+        self.percentual = 0.0
+        self.ok = None
+        self.msg = ""
+        self.criada_em = time.time()
+        self._inicio = None
+        self._fim = None
+        self._cancelar = threading.Event()
+
+    @property
+    def chave(self):
+        return self.tipo, tuple(sorted(self.parametros.items()))
+
+    def atualizar(self, etapa, percentual=None):
+        """Registra o progresso; levanta TarefaCancelada se o cancelamento foi pedido."""
+        if self._cancelar.is_set():
+            raise TarefaCancelada()
+        self.etapa = etapa
+        if percentual is not None:
+            self.percentual = max(0.0, min(100.0, float(percentual)))
+
+    def cancelamento_pedido(self):
+        return self._cancelar.is_set()
+
+    def decorrido_s(self):
+        if self._inicio is None:
+            return 0.0
+        return (self._fim or time.monotonic()) - self._inicio
+
+    def para_dict(self):
+        return {
+            "id": self.id,
+            "tipo": self.tipo,
+            "parametros": self.parametros,
+            "estado": self.estado,
+            "etapa": self.etapa,
+            "percentual": round(self.percentual, 1),
+            "decorrido_s": round(self.decorrido_s(), 2),
+            "cancelamento_pedido": self._cancelar.is_set() and self.estado == EXECUTANDO,
+            "ok": self.ok,
+            "msg": self.msg,
+        }
+
+
+class FilaTarefas:
+    def __init__(self, max_historico=MAX_HISTORICO):
+        self._funcoes = {}
+        self._tarefas = OrderedDict()
+        self._pendentes = deque()
+        self._max_historico = max_historico
+        self._contador = itertools.count(1)
+        self._condicao = threading.Condition()
+        self._thread = None
+
+    def registrar(self, tipo, funcao):
+        """``funcao(tarefa, **parametros)`` deve retornar (ok, msg)."""
+        self._funcoes[tipo] = funcao
+
+    def enfileirar(self, tipo, parametros=None):
+        """Retorna (tarefa, nova). Uma tarefa igual ainda pendente é reaproveitada."""
+        if tipo not in self._funcoes:
+            raise ValueError(f"Tipo de tarefa desconhecido: {tipo}")
+        tarefa = Tarefa(None, tipo, parametros or {})
+        with self._condicao:
+            for existente in self._pendentes:
+                if existente.chave == tarefa.chave:
+                    return existente, False
+            tarefa.id = str(next(self._contador))
+            self._tarefas[tarefa.id] = tarefa
+            self._pendentes.append(tarefa)
+            self._descartar_antigas()
+            self._iniciar_thread()
+            self._condicao.notify()
+        return tarefa, True
+
+    def obter(self, identificador):
+        with self._condicao:
+            return self._tarefas.get(str(identificador))
+
+    def listar(self):
+        with self._condicao:
+            return list(self._tarefas.values())
+
+    def cancelar(self, identificador):
+        with self._condicao:
+            tarefa = self._tarefas.get(str(identificador))
+            if tarefa is None:
+                return False, "Tarefa não encontrada."
+            if tarefa.estado in ESTADOS_FINAIS:
+                return False, f"Tarefa já {tarefa.estado}."
+            tarefa._cancelar.set()
+            if tarefa.estado == PENDENTE:
+                self._pendentes.remove(tarefa)
+                tarefa.estado = CANCELADA
+                tarefa.etapa = "cancelada"
+                tarefa.msg = "Cancelada antes de iniciar."
+                return True, tarefa.msg
+        return True, "Cancelamento pedido; a tarefa para na próxima etapa."
+
+    def _descartar_antigas(self):
+        finais = [t for t in self._tarefas.values() if t.estado in ESTADOS_FINAIS]
+        for tarefa in finais[:max(0, len(self._tarefas) - self._max_historico)]:
+            del self._tarefas[tarefa.id]
+
+    def _iniciar_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._trabalhar, name="fila-tarefas", daemon=True)
+            self._thread.start()
+
+    def _trabalhar(self):
+        while True:
+            with self._condicao:
+                while not self._pendentes:
+                    self._condicao.wait()
+                tarefa = self._pendentes.popleft()
+                tarefa.estado = EXECUTANDO
+                tarefa.etapa = "iniciando"
+                tarefa._inicio = time.monotonic()
+            self._executar(tarefa)
+
+    def _executar(self, tarefa):
+        try:
+            ok, msg = self._funcoes[tarefa.tipo](tarefa, **tarefa.parametros)
+            estado = CONCLUIDA if ok else FALHOU
+        except TarefaCancelada:
+            ok, msg, estado = False, "Tarefa cancelada.", CANCELADA
+        except Exception as e:
+            ok, msg, estado = False, f"Erro na tarefa: {e}", FALHOU
+        with self._condicao:
+            tarefa._fim = time.monotonic()
+            tarefa.ok, tarefa.msg, tarefa.estado = ok, msg, estado
+            tarefa.etapa = estado
+            if estado == CONCLUIDA:
+                tarefa.percentual = 100.0
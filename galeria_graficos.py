@@ -0,0 +1,111 @@
+"""Galeria de gráficos da interface web: listagem em cache, resolução de nomes e miniaturas.
+
+A listagem de cada pasta fica em memória e só é refeita quando o mtime da
+pasta muda; como os gráficos são gravados num temporário e trocados com
+os.replace (ui_server e analise_de_ensaios), todo gráfico novo ou refeito
+muda o mtime da pasta. Uma pasta modificada há menos de ``IDADE_CONFIAVEL_S``
+é relida sempre, para não perder uma segunda mudança no mesmo tique do
+relógio do sistema de arquivos.
+
+A versão de cada imagem é o seu mtime em ns. O navegador pede
+``/files/<nome>?v=<versao>`` e pode guardar a resposta sem revalidar. As
+miniaturas são geradas uma vez por versão (Pillow) numa pasta à parte e levam
+o mesmo mtime do original.
+"""
+import hashlib
+import os
+import threading
+import time
+
+EXTENSOES_IMAGEM = (".png", ".jpg", ".jpeg")
+LARGURA_MINIATURA = 360
+IDADE_CONFIAVEL_S = 2.0
+
+
+def eh_imagem(nome):
+    return nome.lower().endswith(EXTENSOES_IMAGEM) and ".tmp." not in nome
+
+
+class GaleriaGraficos:
+    def __init__(self, dir_miniaturas, largura_miniatura=LARGURA_MINIATURA):
+        self.dir_miniaturas = dir_miniaturas
+        self.largura_miniatura = largura_miniatura
+        self._listagens = {}
+        self._trava = threading.Lock()
+        self._trava_miniaturas = threading.Lock()
+        self.leituras_pasta = 0
+        self.miniaturas_geradas = 0
+
+    def versoes(self, diretorio):
+        """{nome: versão} das imagens de ``diretorio`` (vazio se a pasta não existe)."""
+        diretorio = str(diretorio)
+        try:
+            mtime = os.stat(diretorio).st_mtime_ns
+        except OSError:
+            return {}
+        with self._trava:
+            em_cache = self._listagens.get(diretorio)
+        if em_cache is not None and em_cache[0] == mtime and em_cache[1]:
+            return em_cache[2]
+        versoes = {}
+        with os.scandir(diretorio) as entradas:
+            for entrada in entradas:
+                if not eh_imagem(entrada.name):
+                    continue
+                try:
+                    if entrada.is_file():
+                        versoes[entrada.name] = entrada.stat().st_mtime_ns
+                except OSError:
+                    continue  # Trocado ou removido entre a listagem e o stat.
+        confiavel = time.time_ns() - mtime > IDADE_CONFIAVEL_S * 1e9
+        with self._trava:
+            self._listagens[diretorio] = (mtime, confiavel, versoes)
+            self.leituras_pasta += 1
+        return versoes
+
+    def listar(self, diretorio):
+        return sorted(self.versoes(diretorio))
+
+    def resolver(self, nome, diretorios):
+        """(caminho, versão) da primeira pasta que tem ``nome`` na listagem, ou None."""
+        for diretorio in diretorios:
+            versao = self.versoes(diretorio).get(nome)
+            if versao is not None:
+                return os.path.join(str(diretorio), nome), versao
+        return None
+
+    def _caminho_miniatura(self, caminho):
+        # Uma subpasta por pasta de origem: o mesmo nome pode existir em duas delas.
+        diretorio, nome = os.path.split(os.path.abspath(caminho))
+        chave = hashlib.sha1(diretorio.encode("utf-8")).hexdigest()[:12]
+        return os.path.join(str(self.dir_miniaturas), chave, nome + ".png")
+
+    def miniatura(self, caminho, versao):
+        """Caminho da miniatura de ``caminho`` na ``versao`` dada, gerando-a se preciso."""
+        destino = self._caminho_miniatura(caminho)
+        try:
+            if os.stat(destino).st_mtime_ns == versao:
+                return destino
+        except OSError:
+            pass
+        from PIL import Image
+
+        with self._trava_miniaturas:
+            try:
+                if os.stat(destino).st_mtime_ns == versao:
+                    return destino
+            except OSError:
+                pass
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            temporario = destino + ".tmp"
+            with Image.open(caminho) as imagem:
+                if imagem.mode == "RGBA" and imagem.getchannel("A").getextrema() == (255, 255):
+                    # PNG do matplotlib é RGBA opaco; reduzir em RGB é ~10x mais rápido.
+                    imagem = imagem.convert("RGB")
+                imagem.thumbnail((self.largura_miniatura, self.largura_miniatura * 4),
+                                 Image.Resampling.LANCZOS, reducing_gap=2.0)
+                imagem.save(temporario, format="PNG")
+            os.utime(temporario, ns=(versao, versao))
+            os.replace(temporario, destino)
+            self.miniaturas_geradas += 1
+        return destino
@@ -0,0 +1,311 @@
+"""Índice de deslocamentos (bytes) das linhas de dados do CSV de resultados.
+
+O índice fica ao lado do CSV (``resultados_tribometro.csv.idx``) e guarda, para
+cada linha de dados, o deslocamento da linha e o do cabeçalho que a precede.
+Buscar o N-ésimo ensaio a partir do fim custa uma leitura de 16 bytes no índice
+e duas linhas no CSV, independente do tamanho do arquivo.
+
+Formato do .idx (little-endian):
+    cabeçalho (32 bytes): b"TRIBIDX1", bytes do CSV já indexados,
+                          bytes usados na assinatura, crc32 da assinatura,
+                          deslocamento + 1 do cabeçalho vigente (0 = nenhum)
+    registros (16 bytes): deslocamento da linha, deslocamento do cabeçalho
+"""
+import array
+import csv
+import os
+import struct
+import sys
+import threading
+import zlib
+
+MAGICO = b"TRIBIDX1"
+FORMATO_CABECALHO = struct.Struct("<8sQIIQ")
+FORMATO_REGISTRO = struct.Struct("<QQ")
+TAMANHO_ASSINATURA = 4096
+TAMANHO_BLOCO = 1024 * 1024
+SUFIXO_INDICE = ".idx"
+
+_indices = {}
+_lock_indices = threading.Lock()
+
+
+def eh_linha_cabecalho(colunas):
+    colunas_minusculas = [c.strip().lower() for c in colunas]
+    return "massa_g" in colunas_minusculas and "lbc" in colunas_minusculas
+
+
+def separar_colunas(dados):
+    texto = dados.decode("utf-8-sig", errors="replace").rstrip("\r\n")
+    if not texto.strip():
+        return []
+    return next(csv.reader([texto], delimiter=";"))
+
+
+class IndiceResultados:
+    def __init__(self, caminho_csv, caminho_indice=None):
+        self.caminho_csv = str(caminho_csv)
+        self.caminho_indice = caminho_indice or self.caminho_csv + SUFIXO_INDICE
+        self._lock = threading.Lock()
+        self._registros = array.array("Q")
+        self._coberto = 0
+        self._cabecalho_atual = None
+        self._num_colunas_cabecalho = 0
+        self._cache_cabecalhos = {}
+        self._persistir = True
+        self._carregar()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._registros) // 2
+
+    def _assinatura(self, tamanho):
+        tamanho = min(tamanho, TAMANHO_ASSINATURA)
+        with open(self.caminho_csv, "rb") as arquivo:
+            return tamanho, zlib.crc32(arquivo.read(tamanho))
+
+    def _carregar(self):
+        try:
+            with open(self.caminho_indice, "rb") as arquivo:
+                cabecalho = arquivo.read(FORMATO_CABECALHO.size)
+                corpo = arquivo.read()
+        except OSError:
+            return
+        if len(cabecalho) != FORMATO_CABECALHO.size:
+            return
+        magico, coberto, tamanho_assinatura, crc, cabecalho_atual = FORMATO_CABECALHO.unpack(cabecalho)
+        if magico != MAGICO:
+            return
+        try:
+            tamanho_csv = os.path.getsize(self.caminho_csv)
+            if tamanho_csv < coberto or self._assinatura(tamanho_assinatura) != (tamanho_assinatura, crc):
+                return
+        except OSError:
+            return
+        registros = array.array("Q")
+        registros.frombytes(corpo[: len(corpo) - len(corpo) % FORMATO_REGISTRO.size])
+        if sys.byteorder == "big":
+            registros.byteswap()
+        # Registros gravados depois da última atualização do cabeçalho são descartados.
+        while registros and registros[-2] >= coberto:
+            del registros[-2:]
+        self._registros = registros
+        self._coberto = coberto
+        if cabecalho_atual:
+            self._cabecalho_atual = cabecalho_atual - 1
+            self._num_colunas_cabecalho = len(self._ler_cabecalho(self._cabecalho_atual))
+
+    def _gravar(self, novos):
+        if not self._persistir:
+            return
+        esperado = FORMATO_CABECALHO.size + (len(self._registros) - len(novos)) * self._registros.itemsize
+        cabecalho_atual = 0 if self._cabecalho_atual is None else self._cabecalho_atual + 1
+        try:
+            tamanho_assinatura, crc = self._assinatura(self._coberto)
+            try:
+                arquivo = open(self.caminho_indice, "r+b")
+            except FileNotFoundError:
+                arquivo = open(self.caminho_indice, "w+b")
+            with arquivo:
+                if arquivo.seek(0, os.SEEK_END) == esperado:
+                    dados = array.array("Q", novos)
+                else:
+                    arquivo.truncate(0)
+                    arquivo.seek(FORMATO_CABECALHO.size)
+                    dados = array.array("Q", self._registros)
+                if sys.byteorder == "big":
+                    dados.byteswap()
+                arquivo.write(dados.tobytes())
+                arquivo.seek(0)
+                arquivo.write(FORMATO_CABECALHO.pack(
+                    MAGICO, self._coberto, tamanho_assinatura, crc, cabecalho_atual
+                ))
+        except OSError:
+            # Pasta sem permissão de escrita: o índice continua válido em memória.
+            self._persistir = False
+
+    def sincronizar(self):
+        """Indexa o que foi acrescentado ao CSV desde a última chamada. Retorna o nº de linhas novas."""
+        with self._lock:
+            return self._sincronizar()
+
+    def _sincronizar(self):
+        try:
+            tamanho = os.path.getsize(self.caminho_csv)
+        except OSError:
+            return 0
+        if tamanho < self._coberto:
+            self._reiniciar()
+        if tamanho == self._coberto:
+            return 0
+        novos = array.array("Q")
+        with open(self.caminho_csv, "rb") as arquivo:
+            arquivo.seek(self._coberto)
+            posicao = self._coberto
+            resto = b""
+            while True:
+                bloco = arquivo.read(TAMANHO_BLOCO)
+                if not bloco:
+                    break
+                dados = resto + bloco
+                inicio = 0
+                fim = dados.find(b"\n")
+                while fim >= 0:
+                    self._indexar_linha(dados[inicio:fim + 1], posicao + inicio, novos)
+                    inicio = fim + 1
+                    fim = dados.find(b"\n", inicio)
+                posicao += inicio
+                resto = dados[inicio:]
+        # Uma linha sem '\n' no fim ainda está sendo escrita; fica para a próxima vez.
+        self._coberto = posicao
+        self._registros.extend(novos)
+        self._gravar(novos)
+        return len(novos) // 2
+
+    def _reiniciar(self):
+        self._registros = array.array("Q")
+        self._coberto = 0
+        self._cabecalho_atual = None
+        self._num_colunas_cabecalho = 0
+        self._cache_cabecalhos.clear()
+        try:
+            os.remove(self.caminho_indice)
+        except OSError:
+            pass
+
+    def _indexar_linha(self, dados, deslocamento, novos):
+        if not dados.strip():
+            return
+        minusculas = dados.lower()
+        if b"massa_g" in minusculas and b"lbc" in minusculas:
+            colunas = separar_colunas(dados)
+            if eh_linha_cabecalho(colunas):
+                self._cabecalho_atual = deslocamento
+                self._num_colunas_cabecalho = len(colunas)
+                return
+        if self._cabecalho_atual is None:
+            return
+        # O firmware nunca usa aspas, então contar ';' equivale a separar as colunas.
+        if dados.count(b";") + 1 >= self._num_colunas_cabecalho - 1:
+            novos.append(deslocamento)
+            novos.append(self._cabecalho_atual)
+
+    def _ler_linha(self, deslocamento):
+        with open(self.caminho_csv, "rb") as arquivo:
+            arquivo.seek(deslocamento)
+            return separar_colunas(arquivo.readline())
+
+    def _ler_cabecalho(self, deslocamento):
+        cabecalho = self._cache_cabecalhos.get(deslocamento)
+        if cabecalho is None:
+            cabecalho = [c.strip() for c in self._ler_linha(deslocamento)]
+            self._cache_cabecalhos[deslocamento] = cabecalho
+        return cabecalho
+
+    def linha_do_fim(self, deslocamento):
+        """Devolve (cabecalho, colunas) da linha de dados ``deslocamento`` posições antes da última."""
+        with self._lock:
+            self._sincronizar()
+            total = len(self._registros) // 2
+            if deslocamento < 0 or deslocamento >= total:
+                return None
+            posicao = 2 * (total - 1 - deslocamento)
+            offset_linha = self._registros[posicao]
+            offset_cabecalho = self._registros[posicao + 1]
+            cabecalho = self._ler_cabecalho(offset_cabecalho)
+            colunas = [c.strip() for c in self._ler_linha(offset_linha)]
+            return cabecalho, colunas
+
+
+def obter_indice(caminho_csv):
+    chave = os.path.abspath(str(caminho_csv))
+    with _lock_indices:
+        indice = _indices.get(chave)
+        if indice is None:
+            indice = IndiceResultados(chave)
+            _indices[chave] = indice
+        return indice
+
+
+def notificar_gravacao(caminho_csv):
+    """Chamado pelo ingest após cada linha gravada: mantém o índice em dia se ele já existe."""
+    chave = os.path.abspath(str(caminho_csv))
+    with _lock_indices:
+        indice = _indices.get(chave)
+    if indice is None:
+        if not os.path.isfile(chave + SUFIXO_INDICE):
+            return
+        indice = obter_indice(chave)
+    try:
+        indice.sincronizar()
+    except OSError:
+        pass
+
+
+def _linhas_reversas(caminho_csv, tamanho_bloco=64 * 1024):
+    """Gera (deslocamento, bytes) das linhas do CSV, da última para a primeira."""
+    with open(caminho_csv, "rb") as arquivo:
+        arquivo.seek(0, os.SEEK_END)
+        posicao = arquivo.tell()
+        resto = b""
+        while posicao > 0:
+            leitura = min(tamanho_bloco, posicao)
+            posicao -= leitura
+            arquivo.seek(posicao)
+            dados = arquivo.read(leitura) + resto
+            partes = dados.split(b"\n")
+            resto = partes[0]
+            deslocamento = posicao + len(resto) + 1
+            fins = []
+            for parte in partes[1:]:
+                fins.append((deslocamento, parte))
+                deslocamento += len(parte) + 1
+            for item in reversed(fins):
+                yield item
+        if resto:
+            yield 0, resto
+
+
+def ler_linha_do_fim_sem_indice(caminho_csv, deslocamento):
+    """Leitura reversa do CSV, para quando o índice não pode ser usado.
+
+    Percorre o arquivo de trás para frente e para no primeiro cabeçalho que
+    cobre a linha pedida, sem acumular as linhas lidas no caminho.
+    """
+    if deslocamento < 0:
+        return None
+    contagens = array.array("I")
+    posicoes = array.array("Q")
+    encontrados = 0
+    for posicao, dados in _linhas_reversas(caminho_csv):
+        if not dados.strip():
+            continue
+        minusculas = dados.lower()
+        colunas = None
+        if b"massa_g" in minusculas and b"lbc" in minusculas:
+            colunas = separar_colunas(dados)
+        if colunas is None or not eh_linha_cabecalho(colunas):
+            contagens.append(dados.count(b";") + 1)
+            posicoes.append(posicao)
+            continue
+        minimo = len(colunas) - 1
+        for i, quantidade in enumerate(contagens):
+            if quantidade < minimo:
+                continue
+            if encontrados == deslocamento:
+                with open(caminho_csv, "rb") as arquivo:
+                    arquivo.seek(posicoes[i])
+                    linha = separar_colunas(arquivo.readline())
+                return [c.strip() for c in colunas], [c.strip() for c in linha]
+            encontrados += 1
+        contagens = array.array("I")
+        posicoes = array.array("Q")
+    return None
+
+
+def ler_linha_do_fim(caminho_csv, deslocamento):
+    """(cabecalho, colunas) do ensaio ``deslocamento`` a partir do fim, ou None."""
+    try:
+        return obter_indice(caminho_csv).linha_do_fim(deslocamento)
+    except OSError:
+        return ler_linha_do_fim_sem_indice(caminho_csv, deslocamento)
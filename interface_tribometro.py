@@ -1,17 +1,22 @@
 import serial
 import serial.tools.list_ports
 import time
-import csv
 import threading
 import os
 import tempfile
-from datetime import datetime
 import math
 import sys
 import io
 import locale
+import logging
 import atexit
-import analise_de_ensaios
+import esquema_registro
+import indice_resultados
+import log_eventos
+import preaquecimento
+import resumo_incremental
+from diario_resultados import DiarioResultados, politica_do_ambiente
+from leitor_serial import LeitorLinhasSerial
 
 # ================= CONFIGURAÇÕES =================
 TAXA_BAUD = 115200
@@ -19,13 +24,24 @@ NOME_ARQUIVO = "resultados_tribometro.csv"
 DIR_SCRIPT = os.path.dirname(os.path.abspath(__file__))
 CAMINHO_SAIDA_PADRAO = os.path.join(DIR_SCRIPT, NOME_ARQUIVO)
 CAMINHO_SAIDA_TEMP = os.path.join(tempfile.gettempdir(), NOME_ARQUIVO)
-CAMINHO_LOG = os.path.join(DIR_SCRIPT, "interface_tribometro.log")
+DIR_COLUNAR = os.path.join(DIR_SCRIPT, "resultados_tribometro_colunar")
+DIR_TRACOS = os.path.join(DIR_SCRIPT, "tracos_ensaio")
+CAMINHO_RESUMO = os.path.join(DIR_SCRIPT, "resumo_incremental.json")
+CAMINHO_EVENTOS = os.path.join(DIR_SCRIPT, "eventos_interface.jsonl")
 DIR_GRAFICOS_ENSAIO = os.path.join(DIR_SCRIPT, "graficos_ensaio")
 ARQUIVO_GRAFICO_PADRAO = os.path.join(DIR_GRAFICOS_ENSAIO, "grafico_ensaio_atual.png")
 CAMINHO_HISTORICO = os.path.join(DIR_SCRIPT, ".interface_tribometro_history")
 MAX_ARQUIVOS_ALT = 5
 ARQUIVO_ATIVO = None
-CABECALHO_ATUAL = None
+DIARIO = None
+ARMAZEM = None
+RESUMO = None
+TRACOS = None
+LOG_EVENTOS = None
+PREAQUECEDOR = None
+ARMAZEM_VERIFICADO = False
+AVISOU_BLOQUEIO = False
+ANALISADOR = esquema_registro.AnalisadorLinhas()
 LIMITE_CALIB_PITCH_STD = 0.5
 LIMITE_CALIB_DIST_STD = 20.0
 # =================================================
@@ -73,10 +89,13 @@ def listar_portas_seriais():
     portas = serial.tools.list_ports.comports()
     return [porta.device for porta in portas]
 
-def registrar_erro(mensagem):
+def registrar_erro(mensagem, **campos):
+    """Enfileira o erro no log de eventos; a gravação fica com a thread do log."""
+    global LOG_EVENTOS
     try:
-        with open(CAMINHO_LOG, 'a', encoding='utf-8') as arquivo:
-            arquivo.write(mensagem + "\n")
+        if LOG_EVENTOS is None:
+            LOG_EVENTOS = log_eventos.LogEventos(CAMINHO_EVENTOS)
+        LOG_EVENTOS.registrar(mensagem, logging.ERROR, **campos)
     except Exception:
         pass
 
@@ -128,26 +147,10 @@ def converter_float(valor):
     return numero
 
 def ler_resultado_do_fim(caminho, deslocamento):
-    cabecalho = None
-    linhas_dados = []
-    with open(caminho, 'r', newline='', encoding='utf-8-sig') as arquivo:
-        leitor = csv.reader(arquivo, delimiter=';')
-        for linha in leitor:
-            if not linha:
-                continue
-            linha_minuscula = [c.strip().lower() for c in linha]
-            if "massa_g" in linha_minuscula and "lbc" in linha_minuscula:
-                cabecalho = [c.strip() for c in linha]
-                continue
-            if cabecalho is None:
-                continue
-            if len(linha) >= len(cabecalho) - 1:
-                linhas_dados.append([c.strip() for c in linha])
-    if cabecalho is None or not linhas_dados:
-        return None
-    if deslocamento < 0 or deslocamento >= len(linhas_dados):
+    encontrado = indice_resultados.ler_linha_do_fim(caminho, deslocamento)
+    if encontrado is None:
         return None
-    linha_escolhida = linhas_dados[-1 - deslocamento]
+    cabecalho, linha_escolhida = encontrado
     indice = {nome: i for i, nome in enumerate(cabecalho)}
     def obter(nome):
         i = indice.get(nome)
@@ -247,55 +250,144 @@ def gerar_grafico_ensaio(deslocamento=0):
     if carimbo_tempo_pc:
         print(f"[INFO] Ensaio g {deslocamento}: {carimbo_tempo_pc}")
 
-def salvar_em_csv(linha_dados):
-    """Recebe a string de dados separada por ; e salva no arquivo."""
-    global ARQUIVO_ATIVO
-    linha_dados = linha_dados.strip()
-    if not linha_dados:
-        return
-    eh_cabecalho = "massa_g" in linha_dados and "LBC" in linha_dados
-    candidatos = montar_candidatos_saida()
+def obter_diario():
+    global DIARIO
+    if DIARIO is None:
+        DIARIO = DiarioResultados(
+            montar_candidatos_saida,
+            politica=politica_do_ambiente(),
+            ao_bloqueio=avisar_arquivo_bloqueado,
+            ao_truncar=avisar_linha_truncada,
+        )
+    return DIARIO
 
-    tentados = set()
-    avisou = False
-    for arquivo_alvo in candidatos:
-        if arquivo_alvo in tentados:
-            continue
-        tentados.add(arquivo_alvo)
+def obter_armazem():
+    """ArmazemColunar se TRIBO_COLUNAR estiver ativo, senão None."""
+    global ARMAZEM, ARMAZEM_VERIFICADO
+    if not ARMAZEM_VERIFICADO:
+        ARMAZEM_VERIFICADO = True
+        if not os.environ.get("TRIBO_COLUNAR"):
+            return None
         try:
-            arquivo_existe = os.path.isfile(arquivo_alvo)
-            arquivo_tem_dados = arquivo_existe and os.path.getsize(arquivo_alvo) > 0
-            with open(arquivo_alvo, 'a', newline='', encoding='utf-8-sig') as arquivo:
-                if eh_cabecalho and arquivo_tem_dados:
-                    ARQUIVO_ATIVO = arquivo_alvo
-                    return
-                escritor = csv.writer(arquivo, delimiter=';')
-                colunas = linha_dados.split(';')
-                if not eh_cabecalho:
-                    colunas.append(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                else:
-                    colunas.append("Timestamp_PC")
-                escritor.writerow(colunas)
+            # Importado só quando ativo: traz o pandas.
+            import armazenamento_colunar
+            ARMAZEM = armazenamento_colunar.criar_armazem_do_ambiente(DIR_COLUNAR, ao_erro=avisar_falha_colunar)
+        except (RuntimeError, ValueError) as e:
+            print(f"\n[AVISO] Armazenamento colunar desativado: {e}")
+    return ARMAZEM
 
-            ARQUIVO_ATIVO = arquivo_alvo
-            if not eh_cabecalho:
-                print(f"\n[SUCESSO] Dados salvos em '{arquivo_alvo}'!")
-            return
-        except PermissionError as e:
-            if not avisou:
-                print(f"\n[AVISO] Arquivo '{arquivo_alvo}' está aberto ou bloqueado!")
-                print("Tentando salvar em um arquivo alternativo...")
-                registrar_erro(f"{datetime.now().isoformat()} PermissionError: {arquivo_alvo} ({e})")
-                avisou = True
-            continue
-        except Exception as e:
-            print(f"\n[ERRO] Falha ao salvar: {e}")
-            registrar_erro(f"{datetime.now().isoformat()} Exception: {arquivo_alvo} ({e})")
-            return
+def obter_resumo():
+    global RESUMO
+    if RESUMO is None:
+        RESUMO = resumo_incremental.ResumoIncremental(CAMINHO_RESUMO)
+    return RESUMO
 
+def mostrar_resumo():
+    resumo = obter_resumo()
+    resumo.sincronizar(ARQUIVO_ATIVO or CAMINHO_SAIDA_PADRAO)
+    print(resumo_incremental.formatar_resumo(resumo.resumo()))
+    print(f"{resumo.ensaios_validos} ensaios válidos, {resumo.ensaios_descartados} descartados.")
+
+def avisar_falha_colunar(erro):
+    print(f"\n[ERRO] Falha ao gravar parte colunar: {erro}")
+    registrar_erro(f"Colunar: {DIR_COLUNAR} ({erro})")
+
+def caminho_dados_analise():
+    """Pasta colunar quando o armazém está ativo e tem todos os ensaios do CSV, senão o CSV.
+
+    Descarrega antes os ensaios que o armazém ainda guarda em memória: sem
+    isso a análise deixaria de fora justamente os mais recentes.
+    """
+    armazem = obter_armazem()
+    if armazem is None:
+        return CAMINHO_SAIDA_PADRAO
+    try:
+        import armazenamento_colunar
+        armazem.descarregar()
+        if armazenamento_colunar.cobre_csv(DIR_COLUNAR, CAMINHO_SAIDA_PADRAO):
+            return DIR_COLUNAR
+    except Exception as e:
+        print(f"[AVISO] Falha ao gravar parte colunar ({e}); a análise usará o CSV.")
+        return CAMINHO_SAIDA_PADRAO
+    print(f"[AVISO] {DIR_COLUNAR} não tem todos os ensaios do CSV; a análise usará o CSV "
+          "(converta o histórico com 'python armazenamento_colunar.py converter').")
+    return CAMINHO_SAIDA_PADRAO
+
+def avisar_arquivo_bloqueado(arquivo_alvo, erro):
+    global AVISOU_BLOQUEIO
+    if AVISOU_BLOQUEIO:
+        return
+    print(f"\n[AVISO] Arquivo '{arquivo_alvo}' está aberto ou bloqueado!")
+    print("Tentando salvar em um arquivo alternativo...")
+    registrar_erro(f"PermissionError: {arquivo_alvo} ({erro})", arquivo=arquivo_alvo)
+    AVISOU_BLOQUEIO = True
+
+def avisar_linha_truncada(arquivo_alvo, descartados):
+    print(f"\n[AVISO] Última linha incompleta removida de '{arquivo_alvo}' ({descartados} bytes).")
+    registrar_erro(f"Linha truncada: {arquivo_alvo} ({descartados} bytes)", arquivo=arquivo_alvo)
+
+def salvar_em_csv(registro):
+    """Recebe a linha já separada (esquema_registro) e salva no arquivo."""
+    global ARQUIVO_ATIVO, AVISOU_BLOQUEIO
+    colunas = registro.colunas
+    eh_cabecalho = registro.eh_cabecalho
+
+    AVISOU_BLOQUEIO = False
+    diario = obter_diario()
+    try:
+        arquivo_alvo = diario.gravar(colunas, eh_cabecalho)
+    except Exception as e:
+        print(f"\n[ERRO] Falha ao salvar: {e}")
+        registrar_erro(f"Exception: {diario.caminho_ativo} ({e})")
+        return
+
+    if arquivo_alvo is None:
+        if not eh_cabecalho:
+            print("\n[FALHA CRÍTICA] Não foi possível salvar os dados após várias tentativas.")
+            registrar_erro(f"Falha critica. Tentativas: {', '.join(montar_candidatos_saida())}")
+        return
+
+    ARQUIVO_ATIVO = arquivo_alvo
+    indice_resultados.notificar_gravacao(arquivo_alvo)
     if not eh_cabecalho:
-        print("\n[FALHA CRÍTICA] Não foi possível salvar os dados após várias tentativas.")
-        registrar_erro(f"{datetime.now().isoformat()} Falha critica. Tentativas: {', '.join(candidatos)}")
+        print(f"\n[SUCESSO] Dados salvos em '{arquivo_alvo}'!")
+    try:
+        resumo = obter_resumo()
+        chave = resumo.sincronizar(arquivo_alvo)
+        if not eh_cabecalho:
+            if chave is None:
+                print("[RESUMO] Ensaio fora dos critérios de validade; resumo inalterado.")
+            else:
+                print(f"[RESUMO] {resumo_incremental.formatar_linha(resumo.resumo_do_grupo(chave))}")
+    except OSError as e:
+        registrar_erro(f"Resumo: {arquivo_alvo} ({e})", arquivo=arquivo_alvo)
+    armazem = obter_armazem()
+    if armazem is not None:
+        try:
+            armazem.anexar(colunas, eh_cabecalho, arquivo_alvo)
+        except Exception as e:
+            avisar_falha_colunar(e)
+    if TRACOS is not None and not eh_cabecalho:
+        try:
+            caminho_traco = TRACOS.associar_resultado(registro)
+            if caminho_traco:
+                print(f"[TRAÇO] Amostras do movimento salvas em '{caminho_traco}'.")
+        except OSError as e:
+            registrar_erro(f"Traço: {DIR_TRACOS} ({e})")
+
+def receber_quadro(tipo, payload):
+    """Quadros binários sem texto equivalente (traço do movimento, comando 'tr 1')."""
+    global TRACOS
+    if TRACOS is None:
+        import traco_movimento
+        TRACOS = traco_movimento.ColetorTracos(DIR_TRACOS)
+    try:
+        recebido = TRACOS.receber_quadro(tipo, payload)
+    except ValueError as e:
+        print(f"\n[AVISO] Quadro de traço inválido: {e}")
+        return
+    if recebido is not None:
+        print(f"\r[Arduino]: Traço do movimento: {recebido[1]} amostra(s).")
 
 def decodificar_linha_serial(dados):
     try:
@@ -305,91 +397,63 @@ def decodificar_linha_serial(dados):
 
 def ler_da_serial(porta_serial, evento_parar):
     """Thread dedicada a ler do Arduino e imprimir na tela."""
-    buffer_linha = bytearray()
+    leitor = LeitorLinhasSerial(porta_serial, ao_quadro=receber_quadro)
     while not evento_parar.is_set():
         try:
-            if porta_serial.in_waiting > 0:
-                byte_lido = porta_serial.read()
-                if byte_lido == b'\n':
-                    linha = decodificar_linha_serial(buffer_linha).strip()
-                    print(f"\r[Arduino]: {linha}")
-                    print("> ", end="", flush=True) # Restaura o prompt
-                    
-                    # Verifica se parece ser uma linha de dados (tem muitos pontos e vírgula)
-                    if linha.count(';') > 5:
-                        salvar_em_csv(linha)
-                        avisar_flags_qualidade(linha)
-                    
-                    buffer_linha.clear()
-                else:
-                    buffer_linha.extend(byte_lido)
+            linhas = leitor.ler_linhas()
         except Exception as e:
-            print(f"\n[ERRO Serial]: {e}")
+            if not evento_parar.is_set():
+                print(f"\n[ERRO Serial]: {e}")
             evento_parar.set()
             break
-        time.sleep(0.01)
+        if linhas and PREAQUECEDOR is not None:
+            PREAQUECEDOR.marcar_atividade()
+        for dados in linhas:
+            linha = decodificar_linha_serial(dados).strip()
+            print(f"\r[Arduino]: {linha}")
+            print("> ", end="", flush=True) # Restaura o prompt
+
+            # Verifica se parece ser uma linha de dados (tem muitos pontos e vírgula)
+            registro = ANALISADOR.analisar(linha)
+            if registro is not None:
+                salvar_em_csv(registro)
+                avisar_flags_qualidade(registro)
 
-def avisar_flags_qualidade(linha):
-    global CABECALHO_ATUAL
-    linha_minuscula = linha.lower()
-    if "massa_g" in linha_minuscula and "lbc" in linha_minuscula:
-        CABECALHO_ATUAL = [c.strip() for c in linha.split(';')]
+def avisar_flags_qualidade(registro):
+    if registro.eh_cabecalho:
         return
-    if CABECALHO_ATUAL is None:
-        if "nan" in linha_minuscula:
+    if not registro.completo:
+        if registro.tem_nan():
             print("[AVISO] Resultado contém NaN (medida inválida).")
         return
-    colunas = [c.strip() for c in linha.split(';')]
-    if len(colunas) != len(CABECALHO_ATUAL) and len(colunas) + 1 != len(CABECALHO_ATUAL):
-        return
-    indice = {nome: i for i, nome in enumerate(CABECALHO_ATUAL)}
-    def obter(nome, default=None):
-        i = indice.get(nome)
-        if i is None or i >= len(colunas):
-            return default
-        return colunas[i]
-    mpu_ok = obter("mpu_ok")
-    mpu_ok_escorregamento = obter("mpu_ok_slip")
-    sonar_ok = obter("sonar_ok")
-    sonar_atraso_ms = obter("sonar_stale_ms")
-    if mpu_ok == "0":
+    if registro.mpu_ok == 0:
         print("[AVISO] MPU inválido nesta amostra (mpu_ok=0).")
-    if mpu_ok_escorregamento == "0":
-        print("[AVISO] Escorregamento detectado sem MPU válido (mpu_ok_slip=0).")
-    if sonar_ok == "0":
+    if registro.mpu_ok_no_escorregamento == 0:
+        print("[AVISO] Escorregamento detectado sem MPU válido (mpu_ok_no_escorregamento=0).")
+    if registro.sonar_ok == 0:
         print("[AVISO] Sonar inválido nesta amostra (sonar_ok=0).")
-    try:
-        if sonar_atraso_ms is not None and int(float(sonar_atraso_ms)) > 0:
-            print(f"[AVISO] Sonar stale: {sonar_atraso_ms} ms.")
-    except ValueError:
-        pass
-    if "nan" in linha_minuscula:
+    sonar_atraso_ms = registro.sonar_stale_ms
+    if sonar_atraso_ms is not None and sonar_atraso_ms > 0:
+        print(f"[AVISO] Sonar stale: {sonar_atraso_ms} ms.")
+    if registro.tem_nan():
         print("[AVISO] Resultado contém NaN (medida inválida).")
-    sonar_filtrado = obter("sonar_filt_mm")
-    dist0 = obter("dist0_mm")
-    tempo_s = obter("tempo_s")
-    s_ok = obter("s_ok")
-    calib_pitch_std = obter("calib_pitch_std_deg")
-    calib_dist_std = obter("calib_dist_std_mm")
-    try:
-        if sonar_filtrado is not None and dist0 is not None:
-            delta = abs(float(sonar_filtrado) - float(dist0))
-            tempo = float(tempo_s) if tempo_s is not None else None
-            if delta > 50 and (tempo is None or tempo < 0.2):
-                print(f"[AVISO] Divergência grande: sonar_filt_mm={sonar_filtrado} vs dist0_mm={dist0}.")
-    except ValueError:
-        pass
-    if s_ok == "0":
+    sonar_filtrado = registro.sonar_filtrado_mm
+    dist0 = registro.dist0_mm
+    tempo = registro.tempo_s
+    if sonar_filtrado is not None and dist0 is not None:
+        if abs(sonar_filtrado - dist0) > 50 and (tempo is None or tempo < 0.2):
+            print(f"[AVISO] Divergência grande: sonar_filtrado_mm={sonar_filtrado} vs dist0_mm={dist0}.")
+    if registro.s_ok == 0:
         print("[AVISO] Percurso fora da tolerância (s_ok=0).")
-    try:
-        if calib_pitch_std is not None and float(calib_pitch_std) > LIMITE_CALIB_PITCH_STD:
-            print(f"[AVISO] Calibração MPU instável (std={calib_pitch_std} deg).")
-        if calib_dist_std is not None and float(calib_dist_std) > LIMITE_CALIB_DIST_STD:
-            print(f"[AVISO] Calibração Sonar instável (std={calib_dist_std} mm).")
-    except ValueError:
-        pass
+    calib_pitch_std = registro.calib_pitch_std_deg
+    calib_dist_std = registro.calib_dist_std_mm
+    if calib_pitch_std is not None and calib_pitch_std > LIMITE_CALIB_PITCH_STD:
+        print(f"[AVISO] Calibração MPU instável (std={calib_pitch_std} deg).")
+    if calib_dist_std is not None and calib_dist_std > LIMITE_CALIB_DIST_STD:
+        print(f"[AVISO] Calibração Sonar instável (std={calib_dist_std} mm).")
 
 def principal():
+    global PREAQUECEDOR
     configurar_terminal_utf8()
     configurar_readline()
     print("=== Interface de Controle Tribometro ===")
@@ -418,8 +482,8 @@ def principal():
         time.sleep(2) # Aguarda reset do Arduino
         print("\n=== Conexão estabelecida ===")
         print(f"Porta: {porta_selecionada} | Baud rate: {TAXA_BAUD}")
-        print("Comandos do Arduino: s (iniciar), z (nivelar), m <g> (massa), ip (posição inicial), fp (posição final), r (config), x (abortar).")
-        print("Comandos locais: g (último ensaio) | g 1 (anterior) | g 2 (penúltimo), etc. | a (análise completa).")
+        print("Comandos do Arduino: s (iniciar), z (nivelar), m <g> (massa), ip (posição inicial), fp (posição final), r (config), x (abortar), tr 1 (traço do movimento).")
+        print("Comandos locais: g (último ensaio) | g 1 (anterior) | g 2 (penúltimo), etc. | resumo (resumo parcial) | a (análise completa).")
         print(f"Saída padrão: {CAMINHO_SAIDA_PADRAO}")
         print("Digite 'sair' para encerrar.\n")
 
@@ -428,8 +492,12 @@ def principal():
         thread_leitura.daemon = True
         thread_leitura.start()
 
+        PREAQUECEDOR = preaquecimento.iniciar_do_ambiente()
+
         while not evento_parar.is_set():
             comando = input("> ")
+            if PREAQUECEDOR is not None:
+                PREAQUECEDOR.marcar_atividade()
             if comando.lower() in ['sair', 'exit', 'quit']:
                 evento_parar.set()
                 break
@@ -448,8 +516,16 @@ def principal():
                     continue
                 gerar_grafico_ensaio(deslocamento)
                 continue
+            if comando.strip().lower() == 'resumo':
+                mostrar_resumo()
+                continue
             if comando.strip().lower() == 'a':
-                analise_de_ensaios.executar_analise(CAMINHO_SAIDA_PADRAO)
+                try:
+                    import analise_de_ensaios
+                except Exception as e:
+                    print(f"[ERRO] Análise indisponível: {e}")
+                    continue
+                analise_de_ensaios.executar_analise(caminho_dados_analise())
                 continue
             
             # Envia para o Arduino
@@ -461,8 +537,18 @@ def principal():
     except KeyboardInterrupt:
         print("\nEncerrando...")
     finally:
+        if PREAQUECEDOR is not None:
+            PREAQUECEDOR.parar()
         if 'porta_serial' in locals() and porta_serial.is_open:
             porta_serial.close()
+        if DIARIO is not None:
+            DIARIO.fechar()
+        if ARMAZEM is not None:
+            ARMAZEM.fechar()
+        if RESUMO is not None:
+            RESUMO.fechar()
+        if LOG_EVENTOS is not None:
+            LOG_EVENTOS.fechar()
         print("Desconectado.")
 
 if __name__ == "__main__":
@@ -0,0 +1,132 @@
+import protocolo_binario
+
+TAMANHO_BLOCO_PADRAO = 4096
+TAMANHO_MAX_LINHA = 64 * 1024
+
+
+def _achar_sincronia(buffer, inicio):
+    # Procura o primeiro byte da sincronia (busca de um byte só, bem mais rápida
+    # que a de dois) e confere o segundo; um A5 no fim do buffer conta como candidato.
+    primeiro, segundo = protocolo_binario.SINCRONIA
+    while True:
+        posicao = buffer.find(primeiro, inicio)
+        if posicao < 0 or posicao + 1 == len(buffer) or buffer[posicao + 1] == segundo:
+            return posicao
+        inicio = posicao + 1
+
+
+class LeitorLinhasSerial:
+    """Lê a porta serial em blocos e separa as linhas completas (terminadas em '\\n').
+
+    A leitura bloqueia em ``read(1)`` até chegar dado ou vencer o timeout da porta
+    e depois drena tudo o que estiver em ``in_waiting`` de uma só vez.
+
+    Com ``detectar_quadros``, quadros binários de resultado (protocolo_binario)
+    que chegarem no meio do texto são validados pelo CRC e devolvidos como a
+    linha de texto equivalente; o firmware pode alternar de modo sem aviso.
+    Quadros sem texto equivalente (traço do movimento) vão para
+    ``ao_quadro(tipo, payload)``, na ordem em que chegaram.
+    """
+
+    def __init__(self, porta_serial, tamanho_bloco=TAMANHO_BLOCO_PADRAO, tamanho_max_linha=TAMANHO_MAX_LINHA,
+                 detectar_quadros=True, ao_quadro=None):
+        self.porta_serial = porta_serial
+        self.tamanho_bloco = tamanho_bloco
+        self.tamanho_max_linha = tamanho_max_linha
+        self.detectar_quadros = detectar_quadros
+        self.ao_quadro = ao_quadro
+        self._buffer = bytearray()
+        self._busca = 0
+        self._busca_sincronia = 0
+        self.bytes_lidos = 0
+        self.linhas_lidas = 0
+        self.bytes_descartados = 0
+        self.quadros_lidos = 0
+        self.quadros_invalidos = 0
+
+    def _ler_bloco(self):
+        dados = self.porta_serial.read(1)
+        if not dados:
+            return dados
+        pendente = self.porta_serial.in_waiting
+        if pendente > 0:
+            dados += self.porta_serial.read(min(pendente, self.tamanho_bloco))
+        return dados
+
+    def alimentar(self, dados):
+        """Acrescenta bytes ao buffer e devolve a lista de linhas completas (bytes, sem '\\n')."""
+        if not dados:
+            return []
+        self.bytes_lidos += len(dados)
+        buffer = self._buffer
+        buffer += dados
+        linhas = []
+        inicio = 0
+        busca = self._busca
+        busca_sincronia = self._busca_sincronia
+        incompleto = False
+        # Próxima sincronia no buffer; só é procurada de novo depois de consumida.
+        sincronia = -1
+        if self.detectar_quadros:
+            sincronia = _achar_sincronia(buffer, max(inicio, busca_sincronia))
+        while True:
+            fim = buffer.find(b"\n", busca)
+            if sincronia < 0 or 0 <= fim < sincronia:
+                if fim < 0:
+                    break
+                linhas.append(bytes(buffer[inicio:fim]))
+                inicio = busca = fim + 1
+                continue
+            # Há um quadro começando antes do fim da linha atual.
+            estado, fim_quadro, tipo, payload = protocolo_binario.ler_quadro(buffer, sincronia)
+            if estado == protocolo_binario.INCOMPLETO:
+                incompleto = True
+                busca_sincronia = sincronia
+                break
+            if estado == protocolo_binario.INVALIDO:
+                # Os bytes eram texto: segue procurando depois deles.
+                self.quadros_invalidos += 1
+                busca_sincronia = sincronia + 1
+                sincronia = _achar_sincronia(buffer, busca_sincronia)
+                continue
+            if buffer[inicio:sincronia].strip():
+                linhas.append(bytes(buffer[inicio:sincronia]))
+            if tipo == protocolo_binario.TIPO_RESULTADO:
+                linhas.append(protocolo_binario.payload_para_linha(payload))
+            elif self.ao_quadro is not None:
+                self.ao_quadro(tipo, payload)
+            self.quadros_lidos += 1
+            inicio = busca = busca_sincronia = fim_quadro
+            sincronia = _achar_sincronia(buffer, fim_quadro)
+        if incompleto:
+            # O quadro é reavaliado inteiro quando chegar o resto.
+            busca = busca_sincronia
+        else:
+            # O resto do buffer não tem '\n'; a sincronia pode ter chegado pela metade.
+            busca = len(buffer)
+            busca_sincronia = max(busca_sincronia, len(buffer) - 1)
+        if inicio:
+            del buffer[:inicio]
+            busca -= inicio
+            busca_sincronia = max(0, busca_sincronia - inicio)
+        if len(buffer) > self.tamanho_max_linha:
+            # Sem '\n' há muito tempo: ruído na linha, descarta para não crescer sem limite.
+            self.bytes_descartados += len(buffer)
+            buffer.clear()
+            busca = busca_sincronia = 0
+        self._busca = busca
+        self._busca_sincronia = busca_sincronia
+        self.linhas_lidas += len(linhas)
+        return linhas
+
+    def ler_linhas(self):
+        """Bloqueia até chegar dado (ou vencer o timeout) e devolve as linhas completas."""
+        return self.alimentar(self._ler_bloco())
+
+    def pendente(self):
+        return bytes(self._buffer)
+
+    def limpar(self):
+        self._buffer.clear()
+        self._busca = 0
+        self._busca_sincronia = 0
@@ -0,0 +1,308 @@
+"""Log de eventos em JSON lines gravado por uma thread própria, com rotação e leitura a partir do fim.
+
+``LogEventos.registrar`` só põe o evento numa fila (logging.handlers.QueueHandler)
+e retorna; quem grava no disco é a thread do QueueListener. Com a fila cheia
+o evento é descartado e contado em ``descartados``, então a thread serial e
+as requisições nunca esperam pelo disco.
+
+Cada linha é um objeto JSON que começa com ``{"seq": N,``. N nunca reinicia,
+nem entre execuções: continua da última linha gravada. O arquivo ativo é
+rotacionado quando passa de ``tamanho_maximo`` bytes ou quando o seu primeiro
+evento fica mais velho que ``intervalo_s``. O arquivo rotacionado é
+comprimido em ``<raiz>.<seq inicial>-<seq final><ext>.gz`` e só os
+``mantidos`` mais novos são guardados.
+
+``ler_eventos`` pagina do mais novo para o mais antigo pelo seq: lê o
+arquivo ativo em blocos a partir do fim e pula, só pelo nome, os comprimidos
+fora da página.
+"""
+import gzip
+import io
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import shutil
+from datetime import datetime
+
+TAMANHO_MAXIMO_PADRAO = 5 * 1024 * 1024
+INTERVALO_ROTACAO_PADRAO_S = 24 * 3600
+MANTIDOS_PADRAO = 10
+CAPACIDADE_FILA_PADRAO = 10000
+LIMITE_PAGINA_PADRAO = 200
+TAMANHO_BLOCO = 64 * 1024
+
+NIVEIS = {logging.DEBUG: "debug", logging.INFO: "info", logging.WARNING: "aviso", logging.ERROR: "erro"}
+_PREFIXO_SEQ = b'{"seq": '
+
+
+def _seq_da_linha(linha):
+    """seq de uma linha (bytes) sem decodificar o JSON; None se não for um evento."""
+    if not linha.startswith(_PREFIXO_SEQ):
+        return None
+    try:
+        return int(linha[len(_PREFIXO_SEQ):linha.find(b",", len(_PREFIXO_SEQ))])
+    except ValueError:
+        return None
+
+
+def linhas_do_fim(arquivo, bloco=TAMANHO_BLOCO):
+    """Linhas não vazias (bytes, sem o \\n) de um arquivo binário, da última para a primeira."""
+    posicao = arquivo.seek(0, os.SEEK_END)
+    resto = b""
+    while posicao > 0:
+        tamanho = min(bloco, posicao)
+        posicao -= tamanho
+        arquivo.seek(posicao)
+        partes = (arquivo.read(tamanho) + resto).split(b"\n")
+        resto = partes[0]
+        for linha in reversed(partes[1:]):
+            if linha:
+                yield linha
+    if resto:
+        yield resto
+
+
+def rotacionados(caminho):
+    """[(seq inicial, seq final, caminho)] dos arquivos comprimidos de ``caminho``, do mais novo ao mais antigo."""
+    diretorio, nome = os.path.split(os.path.abspath(caminho))
+    raiz, ext = os.path.splitext(nome)
+    padrao = re.compile(re.escape(raiz) + r"\.(\d+)-(\d+)" + re.escape(ext) + r"\.gz$")
+    try:
+        nomes = os.listdir(diretorio)
+    except OSError:
+        return []
+    encontrados = []
+    for nome_arquivo in nomes:
+        encontrado = padrao.match(nome_arquivo)
+        if encontrado:
+            encontrados.append((int(encontrado.group(1)), int(encontrado.group(2)),
+                                os.path.join(diretorio, nome_arquivo)))
+    encontrados.sort(reverse=True)
+    return encontrados
+
+
+def _comprimir(origem, destino):
+    temporario = destino + ".tmp"
+    with open(origem, "rb") as entrada, gzip.open(temporario, "wb", compresslevel=6) as saida:
+        shutil.copyfileobj(entrada, saida)
+    os.replace(temporario, destino)
+    os.remove(origem)
+
+
+class FormatadorJson(logging.Formatter):
+    def format(self, record):
+        evento = {
+            "seq": record.seq,
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "nivel": NIVEIS.get(record.levelno, record.levelname.lower()),
+            "msg": record.getMessage(),
+        }
+        for chave, valor in (getattr(record, "campos", None) or {}).items():
+            evento.setdefault(chave, valor)
+        return json.dumps(evento, ensure_ascii=False, default=str)
+
+
+class ArquivoRotativo(logging.handlers.BaseRotatingHandler):
+    """Grava no arquivo ativo e rotaciona por tamanho ou por idade, comprimindo o antigo."""
+
+    def __init__(self, caminho, tamanho_maximo=TAMANHO_MAXIMO_PADRAO,
+                 intervalo_s=INTERVALO_ROTACAO_PADRAO_S, mantidos=MANTIDOS_PADRAO):
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        super().__init__(caminho, "a", encoding="utf-8")
+        self.tamanho_maximo = tamanho_maximo
+        self.intervalo_s = intervalo_s
+        self.mantidos = mantidos
+        self.rotator = _comprimir
+        self.setFormatter(FormatadorJson())
+        self.falhas = 0
+        self.rotacoes = 0
+        self.primeiro_seq = self.ultimo_seq = self._inicio = None
+        self._ler_limites()
+        self._tamanho = os.path.getsize(self.baseFilename)
+
+    def _ler_limites(self):
+        """Retoma seq e idade do arquivo ativo (ou do último comprimido) deixados por outra execução."""
+        with open(self.baseFilename, "rb") as arquivo:
+            for linha in arquivo:
+                seq = _seq_da_linha(linha)
+                if seq is not None:
+                    self.primeiro_seq = seq
+                    try:
+                        self._inicio = datetime.fromisoformat(json.loads(linha)["ts"]).timestamp()
+                    except (ValueError, KeyError):
+                        self._inicio = os.path.getmtime(self.baseFilename)
+                    break
+            for linha in linhas_do_fim(arquivo):
+                seq = _seq_da_linha(linha)
+                if seq is not None:
+                    self.ultimo_seq = seq
+                    break
+        if self.ultimo_seq is None:
+            anteriores = rotacionados(self.baseFilename)
+            self.ultimo_seq = anteriores[0][1] if anteriores else 0
+
+    def shouldRollover(self, record):
+        if self.primeiro_seq is None:
+            return False
+        if self.stream is None:
+            self.stream = self._open()
+        return self._tamanho >= self.tamanho_maximo or record.created - self._inicio >= self.intervalo_s
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        raiz, ext = os.path.splitext(self.baseFilename)
+        self.rotate(self.baseFilename, f"{raiz}.{self.primeiro_seq:012d}-{self.ultimo_seq:012d}{ext}.gz")
+        for _, _, antigo in rotacionados(self.baseFilename)[self.mantidos:]:
+            try:
+                os.remove(antigo)
+            except OSError:
+                pass
+        self.primeiro_seq = self._inicio = None
+        self._tamanho = 0
+        self.rotacoes += 1
+        self.stream = self._open()
+
+    def emit(self, record):
+        # Sem flush por evento: _Escritor descarrega quando a fila esvazia.
+        try:
+            record.seq = self.ultimo_seq + 1
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            texto = self.format(record) + "\n"
+            self.stream.write(texto)
+            self._tamanho += len(texto.encode("utf-8"))
+        except Exception:
+            self.handleError(record)
+            return
+        self.ultimo_seq = record.seq
+        if self.primeiro_seq is None:
+            self.primeiro_seq = record.seq
+            self._inicio = record.created
+
+    def descarregar(self):
+        with self.lock:
+            if self.stream is not None:
+                try:
+                    self.stream.flush()
+                except OSError:
+                    self.falhas += 1
+
+    def handleError(self, record):
+        # Disco cheio ou arquivo bloqueado: o evento se perde, mas nada é impresso no console.
+        self.falhas += 1
+
+
+class _FilaSemEspera(logging.handlers.QueueHandler):
+    def __init__(self, fila):
+        super().__init__(fila)
+        self.descartados = 0
+
+    def prepare(self, record):
+        # A mensagem já é texto pronto; formatar fica para a thread de escrita.
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+class _Escritor(logging.handlers.QueueListener):
+    def handle(self, record):
+        super().handle(record)
+        # Um flush por rajada de eventos, não por evento.
+        if self.queue.empty():
+            for handler in self.handlers:
+                handler.descarregar()
+
+    def enqueue_sentinel(self):
+        # Ao parar, espera vaga na fila em vez de perder o sentinela.
+        self.queue.put(self._sentinel)
+
+
+class LogEventos:
+    """Fila de eventos para um arquivo JSON lines (ver o docstring do módulo)."""
+
+    def __init__(self, caminho, tamanho_maximo=TAMANHO_MAXIMO_PADRAO, intervalo_s=INTERVALO_ROTACAO_PADRAO_S,
+                 mantidos=MANTIDOS_PADRAO, capacidade_fila=CAPACIDADE_FILA_PADRAO):
+        self.caminho = str(caminho)
+        self.arquivo = ArquivoRotativo(self.caminho, tamanho_maximo, intervalo_s, mantidos)
+        self._entrada = _FilaSemEspera(queue.Queue(capacidade_fila))
+        self._escritor = _Escritor(self._entrada.queue, self.arquivo)
+        self._escritor.start()
+        self._ativo = True
+
+    @property
+    def descartados(self):
+        return self._entrada.descartados
+
+    def registrar(self, mensagem, nivel=logging.INFO, **campos):
+        """Enfileira o evento e retorna sem tocar no disco."""
+        if not self._ativo:
+            return
+        registro = logging.LogRecord("tribometro", nivel, "", 0, mensagem, None, None)
+        registro.campos = campos
+        self._entrada.handle(registro)
+
+    def fechar(self):
+        """Grava o que ainda está na fila e fecha o arquivo."""
+        if not self._ativo:
+            return
+        self._ativo = False
+        self._escritor.stop()
+        self.arquivo.close()
+
+
+def ler_eventos(caminho, limite=LIMITE_PAGINA_PADRAO, antes=None, filtro=None):
+    """Até ``limite`` eventos com seq < ``antes`` (ou os mais recentes), em ordem cronológica.
+
+    ``filtro(evento)`` escolhe quais entram. Retorna (eventos, cursor): passe o
+    cursor como ``antes`` para a página anterior; None quando não há mais.
+    """
+    eventos = []
+    limite_seq = float("inf") if antes is None else antes
+
+    def ler(arquivo):
+        nonlocal limite_seq
+        for linha in linhas_do_fim(arquivo):
+            seq = _seq_da_linha(linha)
+            # Exigir seq decrescente também descarta repetidos de uma rotação em andamento.
+            if seq is None or seq >= limite_seq:
+                continue
+            try:
+                evento = json.loads(linha)
+            except ValueError:
+                continue
+            limite_seq = seq
+            if filtro is None or filtro(evento):
+                eventos.append(evento)
+                if len(eventos) >= limite:
+                    return True
+        return False
+
+    completo = False
+    try:
+        with open(caminho, "rb") as arquivo:
+            completo = ler(arquivo)
+    except FileNotFoundError:
+        pass
+    for primeiro, _, caminho_gz in rotacionados(caminho):
+        if completo:
+            break
+        if primeiro >= limite_seq:
+            continue
+        try:
+            with gzip.open(caminho_gz, "rb") as arquivo:
+                completo = ler(io.BytesIO(arquivo.read()))
+        except (OSError, EOFError):
+            continue
+    eventos.reverse()
+    return eventos, (limite_seq if completo else None)
@@ -0,0 +1,173 @@
+"""Métricas no formato texto do Prometheus, sem dependências, com histogramas de faixas fixas.
+
+``Histograma.observar`` acha a faixa com bisect sobre limites fixos e soma
+sob uma trava, sem alocar nada. Para não pagar a busca do rótulo a cada
+observação, quem mede guarda o filho da família (``familia.filho(...)``).
+Valores que o código já conta (bytes lidos, itens no buffer do log) entram
+como coletores: uma função lida só quando /api/metrics é pedido, sem custo
+no caminho quente.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+# Latências de ingestão e de requisições HTTP, em segundos.
+LIMITES_LATENCIA_S = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Tarefas longas (análise, gráfico), em segundos.
+LIMITES_DURACAO_S = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+TIPO_CONTEUDO = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _numero(valor):
+    if valor == float("inf"):
+        return "+Inf"
+    if isinstance(valor, float) and valor.is_integer() and abs(valor) < 1e15:
+        return str(int(valor))
+    return repr(valor)
+
+
+def _rotulos(pares):
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in pares) + "}"
+
+
+class Contador:
+    __slots__ = ("valor", "_trava")
+
+    def __init__(self):
+        self.valor = 0
+        self._trava = threading.Lock()
+
+    def incrementar(self, quantidade=1):
+        with self._trava:
+            self.valor += quantidade
+
+    def _linhas(self, nome, pares):
+        return [f"{nome}{_rotulos(pares)} {_numero(self.valor)}"]
+
+
+class _Cronometro:
+    __slots__ = ("histograma", "inicio")
+
+    def __init__(self, histograma):
+        self.histograma = histograma
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *erro):
+        self.histograma.observar(time.perf_counter() - self.inicio)
+        return False
+
+
+class Histograma:
+    __slots__ = ("limites", "contagens", "soma", "_trava")
+
+    def __init__(self, limites):
+        self.limites = tuple(sorted(limites))
+        # Uma faixa por limite e a última para o que passa de todos (+Inf).
+        self.contagens = [0] * (len(self.limites) + 1)
+        self.soma = 0.0
+        self._trava = threading.Lock()
+
+    def observar(self, valor):
+        i = bisect_left(self.limites, valor)
+        with self._trava:
+            self.contagens[i] += 1
+            self.soma += valor
+
+    def medir(self):
+        """``with histograma.medir():`` observa a duração do bloco."""
+        return _Cronometro(self)
+
+    def _linhas(self, nome, pares):
+        with self._trava:
+            contagens = list(self.contagens)
+            soma = self.soma
+        linhas = []
+        acumulado = 0
+        for limite, quantidade in zip(self.limites + (float("inf"),), contagens):
+            acumulado += quantidade
+            le = "+Inf" if limite == float("inf") else repr(float(limite))
+            linhas.append(f"{nome}_bucket{_rotulos(pares + (('le', le),))} {acumulado}")
+        linhas.append(f"{nome}_sum{_rotulos(pares)} {_numero(soma)}")
+        linhas.append(f"{nome}_count{_rotulos(pares)} {acumulado}")
+        return linhas
+
+
+class Familia:
+    """Métrica com rótulos: um Contador ou Histograma por combinação de valores."""
+
+    def __init__(self, nome, tipo, ajuda, rotulos, fabrica):
+        self.nome = nome
+        self.tipo = tipo
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._fabrica = fabrica
+        self._filhos = {}
+        self._trava = threading.Lock()
+
+    def filho(self, *valores):
+        if len(valores) != len(self.rotulos):
+            raise ValueError(f"{self.nome} espera os rótulos {self.rotulos}.")
+        filho = self._filhos.get(valores)
+        if filho is None:
+            with self._trava:
+                filho = self._filhos.setdefault(valores, self._fabrica())
+        return filho
+
+    def _linhas(self):
+        with self._trava:
+            filhos = sorted(self._filhos.items())
+        linhas = []
+        for valores, filho in filhos:
+            linhas.extend(filho._linhas(self.nome, tuple(zip(self.rotulos, valores))))
+        return linhas
+
+
+class _Coletor:
+    def __init__(self, nome, tipo, ajuda, funcao):
+        self.nome = nome
+        self.tipo = tipo
+        self.ajuda = ajuda
+        self._funcao = funcao
+
+    def _linhas(self):
+        return [f"{self.nome}{_rotulos(tuple(rotulos.items()))} {_numero(valor)}"
+                for rotulos, valor in self._funcao()]
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self._metricas = []
+
+    def _adicionar(self, metrica):
+        if any(m.nome == metrica.nome for m in self._metricas):
+            raise ValueError(f"Métrica {metrica.nome} já registrada.")
+        self._metricas.append(metrica)
+        return metrica
+
+    def contador(self, nome, ajuda, rotulos=()):
+        return self._adicionar(Familia(nome, "counter", ajuda, rotulos, Contador))
+
+    def histograma(self, nome, ajuda, limites=LIMITES_LATENCIA_S, rotulos=()):
+        return self._adicionar(Familia(nome, "histogram", ajuda, rotulos, lambda: Histograma(limites)))
+
+    def coletor(self, nome, tipo, ajuda, funcao):
+        """``funcao()`` devolve [(dict de rótulos, valor)] no momento da coleta."""
+        return self._adicionar(_Coletor(nome, tipo, ajuda, funcao))
+
+    def exportar(self):
+        linhas = []
+        for metrica in self._metricas:
+            ajuda = metrica.ajuda.replace("\\", "\\\\").replace("\n", "\\n")
+            linhas.append(f"# HELP {metrica.nome} {ajuda}")
+            linhas.append(f"# TYPE {metrica.nome} {metrica.tipo}")
+            linhas.extend(metrica._linhas())
+        return "\n".join(linhas) + "\n"
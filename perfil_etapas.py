@@ -0,0 +1,267 @@
+"""Perfil por etapa da análise: tempo de parede, CPU e pico de memória, com relatório JSON.
+
+``PerfilEtapas.etapa(nome)`` mede o bloco com perf_counter e process_time, e
+o pico de memória acima do que o processo usava quando a etapa começou (as
+etapas não se aninham). Com ``memoria="rss"`` (padrão) uma thread lê a
+memória residente do processo a cada 10 ms: custa quase nada, mas só existe
+no Linux e perde picos mais curtos que o intervalo. ``memoria="tracemalloc"``
+conta exatamente o que o Python alocou, porém deixa as etapas que alocam muito
+(o Excel do openpyxl, os gráficos) várias vezes mais lentas, então os tempos
+desse modo não servem para comparar. A etapa escolhida em ``etapa_cprofile``
+roda também sob cProfile: o dump do pstats vai para o lado do relatório e as
+funções de maior tempo acumulado entram no próprio JSON. ``comparar`` (ou
+``python perfil_etapas.py antes.json depois.json``) mostra a diferença de
+cada etapa entre duas execuções.
+
+Memória e cProfile só enxergam este processo: gráficos gerados num pool
+entram com o tempo de parede, e a CPU dos processos vem do relatório de
+renderizar_graficos.
+"""
+import argparse
+import contextlib
+import cProfile
+import json
+import os
+import platform
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Etapas de executar_analise, na ordem em que rodam.
+ETAPAS_ANALISE = (
+    "carregar_dados", "limpeza", "agrupamento", "intervalos_confianca",
+    "excel", "montar_graficos", "graficos",
+)
+MODOS_MEMORIA = ("rss", "tracemalloc", "nenhuma")
+VERSAO_RELATORIO = 1
+INTERVALO_AMOSTRA_RSS_S = 0.01
+FUNCOES_CPROFILE = 25
+DIR_PERFIL_PADRAO = os.path.join("saida_analise", "perfil")
+MB = 1024 * 1024
+
+
+def caminho_relatorio_padrao(diretorio=DIR_PERFIL_PADRAO):
+    """Um arquivo por execução, para comparar uma com a outra."""
+    return os.path.join(diretorio, f"perfil_{datetime.now():%Y%m%d_%H%M%S}.json")
+
+
+def _rss_max_mb():
+    """Pico de memória residente do processo desde o início (não só da etapa)."""
+    if resource is None:
+        return None
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KiB, macOS em bytes.
+    return maximo / MB if sys.platform == "darwin" else maximo / 1024
+
+
+def _rss_atual():
+    """Memória residente atual em bytes (Linux); None onde /proc não existe."""
+    try:
+        with open("/proc/self/statm", "rb") as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class _AmostradorRss(threading.Thread):
+    """Guarda o maior RSS visto desde o último ``reiniciar``."""
+
+    def __init__(self, intervalo_s=INTERVALO_AMOSTRA_RSS_S):
+        super().__init__(name="perfil-rss", daemon=True)
+        self.intervalo_s = intervalo_s
+        self.pico = 0
+        self._parar = threading.Event()
+
+    def reiniciar(self):
+        atual = _rss_atual()
+        self.pico = atual
+        return atual
+
+    def amostrar(self):
+        atual = _rss_atual()
+        if atual > self.pico:
+            self.pico = atual
+        return atual
+
+    def run(self):
+        while not self._parar.wait(self.intervalo_s):
+            self.amostrar()
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+
+def _funcoes_principais(estatisticas, limite=FUNCOES_CPROFILE):
+    linhas = sorted(estatisticas.stats.items(), key=lambda item: item[1][3], reverse=True)
+    return [
+        {
+            "funcao": pstats.func_std_string(pstats.func_strip_path(chave)),
+            "chamadas": chamadas,
+            "proprio_s": round(proprio, 6),
+            "acumulado_s": round(acumulado, 6),
+        }
+        for chave, (_, chamadas, proprio, acumulado, _) in linhas[:limite]
+    ]
+
+
+class _SemPerfil:
+    """Usado quando o perfil está desligado: as etapas não medem nada."""
+
+    def __init__(self):
+        self.info = {}
+
+    def etapa(self, nome):
+        return contextlib.nullcontext({})
+
+
+class PerfilEtapas:
+    def __init__(self, etapa_cprofile=None, memoria="rss"):
+        if etapa_cprofile is not None and etapa_cprofile not in ETAPAS_ANALISE:
+            raise ValueError(f"Etapa inválida: {etapa_cprofile} (use {', '.join(ETAPAS_ANALISE)})")
+        if memoria not in MODOS_MEMORIA:
+            raise ValueError(f"Modo de memória inválido: {memoria} (use {', '.join(MODOS_MEMORIA)})")
+        if memoria == "rss" and _rss_atual() is None:
+            memoria = "nenhuma"
+        self.etapa_cprofile = etapa_cprofile
+        self.memoria = memoria
+        self.etapas = {}
+        self.info = {"memoria": memoria}
+        self.cprofile = None
+        self.criado_em = datetime.now().isoformat(timespec="seconds")
+        self._amostrador = None
+        if memoria == "rss":
+            self._amostrador = _AmostradorRss()
+            self._amostrador.start()
+        self._iniciou_tracemalloc = memoria == "tracemalloc" and not tracemalloc.is_tracing()
+        if self._iniciou_tracemalloc:
+            tracemalloc.start()
+        self._inicio = time.perf_counter()
+        self._inicio_cpu = time.process_time()
+
+    @contextlib.contextmanager
+    def etapa(self, nome):
+        """``with perfil.etapa(nome) as extra:`` mede o bloco; ``extra`` (dict) vai junto para o relatório."""
+        extra = {}
+        perfilador = cProfile.Profile() if nome == self.etapa_cprofile else None
+        if self.memoria == "tracemalloc":
+            alocado_antes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        elif self.memoria == "rss":
+            alocado_antes = self._amostrador.reiniciar()
+        interrompida = True
+        inicio, inicio_cpu = time.perf_counter(), time.process_time()
+        if perfilador is not None:
+            perfilador.enable()
+        try:
+            yield extra
+            interrompida = False
+        finally:
+            if perfilador is not None:
+                perfilador.disable()
+            medida = {
+                "parede_s": round(time.perf_counter() - inicio, 6),
+                "cpu_s": round(time.process_time() - inicio_cpu, 6),
+            }
+            if self.memoria != "nenhuma":
+                if self.memoria == "tracemalloc":
+                    alocado, pico = tracemalloc.get_traced_memory()
+                else:
+                    alocado = self._amostrador.amostrar()
+                    pico = self._amostrador.pico
+                medida["pico_memoria_mb"] = round((pico - alocado_antes) / MB, 3)
+                medida["memoria_retida_mb"] = round((alocado - alocado_antes) / MB, 3)
+            medida["rss_max_mb"] = _rss_max_mb()
+            if interrompida:
+                medida["interrompida"] = True
+            medida.update(extra)
+            self.etapas[nome] = medida
+            if perfilador is not None:
+                self.cprofile = pstats.Stats(perfilador)
+
+    def relatorio(self, caminho_pstats=None):
+        return {
+            "versao": VERSAO_RELATORIO,
+            "criado_em": self.criado_em,
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "info": self.info,
+            "etapas": self.etapas,
+            "total": {
+                "parede_s": round(time.perf_counter() - self._inicio, 6),
+                "cpu_s": round(time.process_time() - self._inicio_cpu, 6),
+            },
+            "cprofile": None if self.cprofile is None else {
+                "etapa": self.etapa_cprofile,
+                "arquivo": caminho_pstats,
+                "funcoes": _funcoes_principais(self.cprofile),
+            },
+        }
+
+    def salvar(self, caminho):
+        """Grava o relatório (e o .pstats da etapa do cProfile) e para a medição de memória."""
+        if self._amostrador is not None:
+            self._amostrador.parar()
+            self._amostrador = None
+        if self._iniciou_tracemalloc:
+            tracemalloc.stop()
+            self._iniciou_tracemalloc = False
+        caminho = str(caminho)
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        caminho_pstats = None
+        if self.cprofile is not None:
+            caminho_pstats = f"{os.path.splitext(caminho)[0]}.{self.etapa_cprofile}.pstats"
+            self.cprofile.dump_stats(caminho_pstats)
+        temporario = caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            json.dump(self.relatorio(caminho_pstats), arquivo, ensure_ascii=False, indent=2)
+        os.replace(temporario, caminho)
+        return caminho
+
+
+SEM_PERFIL = _SemPerfil()
+
+
+def comparar(antes, depois, medidas=("parede_s", "cpu_s", "pico_memoria_mb")):
+    """[(etapa, medida, antes, depois, variação %)] de dois relatórios; None onde a etapa faltou."""
+    linhas = []
+    etapas = list(antes["etapas"]) + [e for e in depois["etapas"] if e not in antes["etapas"]]
+    for etapa in etapas + ["total"]:
+        a = antes["total"] if etapa == "total" else antes["etapas"].get(etapa, {})
+        d = depois["total"] if etapa == "total" else depois["etapas"].get(etapa, {})
+        for medida in medidas:
+            if medida not in a and medida not in d:
+                continue
+            valor_a, valor_d = a.get(medida), d.get(medida)
+            variacao = None
+            if valor_a and valor_d is not None:
+                variacao = (valor_d - valor_a) / valor_a * 100.0
+            linhas.append((etapa, medida, valor_a, valor_d, variacao))
+    return linhas
+
+
+def _formatar(valor):
+    return "-" if valor is None else f"{valor:.3f}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara dois relatórios de perfil da análise.")
+    parser.add_argument("antes")
+    parser.add_argument("depois")
+    args = parser.parse_args()
+    relatorios = []
+    for caminho in (args.antes, args.depois):
+        with open(caminho, encoding="utf-8") as arquivo:
+            relatorios.append(json.load(arquivo))
+    print(f"{'etapa':<22} {'medida':<16} {'antes':>10} {'depois':>10} {'variação':>9}")
+    for etapa, medida, valor_a, valor_d, variacao in comparar(*relatorios):
+        texto_variacao = "-" if variacao is None else f"{variacao:+.1f}%"
+        print(f"{etapa:<22} {medida:<16} {_formatar(valor_a):>10} {_formatar(valor_d):>10} {texto_variacao:>9}")
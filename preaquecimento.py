@@ -0,0 +1,120 @@
+"""Pré-aquecimento da pilha de análise (pandas, matplotlib, seaborn) em segundo plano.
+
+A interface de terminal e o servidor web sobem sem importar a análise; 'a' e
+'g' importam o que precisam na hora. Com TRIBO_PREAQUECER ligado (padrão), uma
+thread daemon espera a interface ficar ociosa e importa essas dependências uma
+a uma, terminando com um gráfico minúsculo desenhado fora do pyplot (carrega
+fontes e o renderizador Agg sem mexer no estado global de figuras nem no
+tema). Entre uma etapa e outra ela espera ``ociosidade_s`` sem atividade
+(``marcar_atividade``), para não disputar o GIL com a leitura serial de um
+ensaio em andamento; uma importação já começada, porém, vai até o fim.
+
+Se um comando pedir a análise no meio do aquecimento, a trava de importação
+do Python faz o comando esperar a etapa em curso, sem importar nada duas vezes.
+"""
+import importlib
+import os
+import threading
+import time
+
+ATRASO_PADRAO_S = 1.0
+OCIOSIDADE_PADRAO_S = 0.3
+
+
+def _importar(nome):
+    def etapa():
+        importlib.import_module(nome)
+    return etapa
+
+
+def _desenhar_grafico():
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figura = Figure(figsize=(2, 1.2), dpi=40)
+    FigureCanvasAgg(figura)
+    eixo = figura.add_subplot()
+    eixo.plot([0.0, 1.0], [0.0, 1.0], label="tan(θ)")
+    eixo.axhline(0.5, label="μ_s = 0.500")
+    eixo.set_title("Coeficientes\nμ_d")
+    eixo.legend(frameon=False)
+    figura.tight_layout()
+    figura.canvas.draw()
+
+
+ETAPAS = (
+    ("numpy", _importar("numpy")),
+    ("pandas", _importar("pandas")),
+    ("matplotlib", _importar("matplotlib.pyplot")),
+    ("seaborn", _importar("seaborn")),
+    ("analise_de_ensaios", _importar("analise_de_ensaios")),
+    ("grafico", _desenhar_grafico),
+)
+
+
+def ativado_no_ambiente():
+    """Lê TRIBO_PREAQUECER; vazio ou ausente liga, "0"/"nao"/"off" desliga."""
+    valor = os.environ.get("TRIBO_PREAQUECER", "1").strip().lower()
+    return valor not in ("0", "nao", "não", "off")
+
+
+class Preaquecedor:
+    def __init__(self, etapas=ETAPAS, atraso_s=ATRASO_PADRAO_S, ociosidade_s=OCIOSIDADE_PADRAO_S):
+        self.etapas = etapas
+        self.atraso_s = atraso_s
+        self.ociosidade_s = ociosidade_s
+        self.tempos = {}
+        self.erro = None
+        self._ultima_atividade = time.monotonic()
+        self._parar = threading.Event()
+        self._pronto = threading.Event()
+        self._thread = None
+
+    def marcar_atividade(self):
+        self._ultima_atividade = time.monotonic()
+
+    def iniciar(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._executar, name="preaquecimento", daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+
+    def pronto(self):
+        return self._pronto.is_set()
+
+    def aguardar(self, timeout=None):
+        return self._pronto.wait(timeout)
+
+    def _esperar_ociosidade(self):
+        while True:
+            restante = self._ultima_atividade + self.ociosidade_s - time.monotonic()
+            if restante <= 0:
+                return not self._parar.is_set()
+            if self._parar.wait(restante):
+                return False
+
+    def _executar(self):
+        if self._parar.wait(self.atraso_s):
+            return
+        for nome, etapa in self.etapas:
+            if not self._esperar_ociosidade():
+                return
+            inicio = time.perf_counter()
+            try:
+                etapa()
+            except Exception as e:
+                # Sem a dependência, o comando que precisar dela mostra o erro na hora.
+                self.erro = f"{nome}: {e}"
+                break
+            self.tempos[nome] = time.perf_counter() - inicio
+        self._pronto.set()
+
+
+def iniciar_do_ambiente(**kwargs):
+    """Preaquecedor já iniciado, ou None se TRIBO_PREAQUECER estiver desligado."""
+    if not ativado_no_ambiente():
+        return None
+    return Preaquecedor(**kwargs).iniciar()
@@ -0,0 +1,192 @@
+"""Quadro binário de resultado do firmware (Results.ino, comando 'b 1').
+
+Formato, little-endian:
+
+    A5 5A | versão (u8) | tipo (u8) | tamanho do payload (u16) | payload | CRC16 (u16)
+
+O CRC é o CRC-16/CCITT-FALSE (polinômio 0x1021, início 0xFFFF) sobre versão,
+tipo, tamanho e payload. O payload de resultado tem layout fixo, na ordem das
+colunas do CSV (``CAMPOS_RESULTADO``). O host converte o quadro na mesma linha
+de texto que o firmware imprimiria, então o restante do caminho (log, CSV,
+resumo) não muda; ``decodificar_lote`` decodifica muitos payloads de uma vez
+com NumPy.
+
+Com 'tr 1' o firmware manda também, antes do resultado, um quadro de traço
+(``TIPO_TRACO``) com as amostras do movimento usadas no ajuste da aceleração:
+cabeçalho ``t_inicio_ms`` (u32), quantidade (u16) e passo (u16), seguido de
+``quantidade`` amostras (t desde o início do movimento em ms, deslocamento
+relativo em mm e pitch em centésimos de grau). Com o buffer cheio o firmware
+passa a guardar uma amostra a cada ``passo``.
+"""
+import binascii
+import struct
+
+SINCRONIA = b"\xa5\x5a"
+VERSAO = 1
+TIPO_RESULTADO = 1
+TIPO_TRACO = 2
+
+# (coluna, formato struct, casas decimais do Serial.print; None = inteiro)
+CAMPOS_RESULTADO = (
+    ("massa_g", "f", 1),
+    ("LBC", "h", None),
+    ("LBT", "h", None),
+    ("angulo_deg", "f", 3),
+    ("altura_m", "f", 4),
+    ("mu_s", "f", 4),
+    ("mu_d", "f", 4),
+    ("aceleracao_mps2", "f", 4),
+    ("velocidade_mps", "f", 4),
+    ("tempo_s", "f", 3),
+    ("t_inicio_ms", "I", None),
+    ("t_fim_ms", "I", None),
+    ("amostras_validas", "I", None),
+    ("trabalho_energia_J", "f", 4),
+    ("trabalho_atrito_J", "f", 4),
+    ("mpu_ok", "B", None),
+    ("mpu_ok_no_escorregamento", "B", None),
+    ("sonar_ok", "B", None),
+    ("sonar_stale_ms", "I", None),
+    ("filtro_alpha", "f", 3),
+    ("pitch_bruto_deg", "f", 3),
+    ("pitch_filtrado_deg", "f", 3),
+    ("pitch_zero_deg", "f", 3),
+    ("sonar_bruto_mm", "i", None),
+    ("sonar_filtrado_mm", "i", None),
+    ("dist0_mm", "i", None),
+    ("dist_ref_mm", "i", None),
+    ("dist_alvo_mm", "f", 0),
+    ("offset_mm", "f", 1),
+    ("s_abs_mm", "i", None),
+    ("s_rel_mm", "i", None),
+    ("dist_fim_mm", "i", None),
+    ("s_ok", "B", None),
+    ("calib_pitch_std_deg", "f", 3),
+    ("calib_dist_std_mm", "f", 1),
+    ("calib_pitch_n", "h", None),
+    ("calib_dist_n", "h", None),
+    ("temp_mpu_c", "f", 2),
+)
+
+COLUNAS_RESULTADO = tuple(nome for nome, _, _ in CAMPOS_RESULTADO)
+ESTRUTURA_RESULTADO = struct.Struct("<" + "".join(fmt for _, fmt, _ in CAMPOS_RESULTADO))
+ESTRUTURA_CABECALHO = struct.Struct("<2sBBH")
+TAMANHO_CABECALHO = ESTRUTURA_CABECALHO.size
+TAMANHO_CRC = 2
+
+ESTRUTURA_TRACO = struct.Struct("<IHH")
+ESTRUTURA_AMOSTRA_TRACO = struct.Struct("<Hhh")
+# O firmware do Uno guarda 64 amostras; o limite do host deixa folga para placas maiores.
+MAX_AMOSTRAS_TRACO = 1024
+
+# Tamanho do payload de cada tipo conhecido: (mínimo, máximo, múltiplo além do mínimo).
+TAMANHOS_PAYLOAD = {
+    TIPO_RESULTADO: (ESTRUTURA_RESULTADO.size, ESTRUTURA_RESULTADO.size, 1),
+    TIPO_TRACO: (ESTRUTURA_TRACO.size,
+                 ESTRUTURA_TRACO.size + MAX_AMOSTRAS_TRACO * ESTRUTURA_AMOSTRA_TRACO.size,
+                 ESTRUTURA_AMOSTRA_TRACO.size),
+}
+
+INCOMPLETO = "incompleto"
+INVALIDO = "invalido"
+VALIDO = "valido"
+
+
+def tamanho_valido(tipo, tamanho):
+    limites = TAMANHOS_PAYLOAD.get(tipo)
+    if limites is None:
+        return False
+    minimo, maximo, multiplo = limites
+    return minimo <= tamanho <= maximo and (tamanho - minimo) % multiplo == 0
+
+
+def crc16(dados):
+    return binascii.crc_hqx(dados, 0xFFFF)
+
+
+def montar_quadro(payload, tipo=TIPO_RESULTADO):
+    corpo = struct.pack("<BBH", VERSAO, tipo, len(payload)) + payload
+    return SINCRONIA + corpo + struct.pack("<H", crc16(corpo))
+
+
+def montar_quadro_resultado(valores):
+    """Empacota os 38 valores na ordem de COLUNAS_RESULTADO (como Results.ino)."""
+    return montar_quadro(ESTRUTURA_RESULTADO.pack(*valores), TIPO_RESULTADO)
+
+
+def ler_quadro(buffer, posicao):
+    """Tenta ler um quadro que começa em ``posicao`` (onde está a sincronia).
+
+    Retorna (estado, fim, tipo, payload): INCOMPLETO se faltam bytes, INVALIDO
+    se versão, tipo, tamanho ou CRC não conferem (os bytes eram texto), VALIDO
+    com ``fim`` apontando logo após o quadro.
+    """
+    if len(buffer) - posicao < TAMANHO_CABECALHO:
+        return INCOMPLETO, posicao, None, None
+    sincronia, versao, tipo, tamanho = ESTRUTURA_CABECALHO.unpack_from(buffer, posicao)
+    if sincronia != SINCRONIA or versao != VERSAO or not tamanho_valido(tipo, tamanho):
+        return INVALIDO, posicao, None, None
+    inicio_payload = posicao + TAMANHO_CABECALHO
+    fim = inicio_payload + tamanho + TAMANHO_CRC
+    if len(buffer) < fim:
+        return INCOMPLETO, posicao, None, None
+    (crc,) = struct.unpack_from("<H", buffer, fim - TAMANHO_CRC)
+    if crc16(bytes(buffer[posicao + 2:fim - TAMANHO_CRC])) != crc:
+        return INVALIDO, posicao, None, None
+    return VALIDO, fim, tipo, bytes(buffer[inicio_payload:fim - TAMANHO_CRC])
+
+
+def decodificar_resultado(payload):
+    return ESTRUTURA_RESULTADO.unpack(payload)
+
+
+# Um único modelo de formatação para a linha toda; "nan" e "inf" já saem como
+# no Serial.print do Arduino, que só não distingue o sinal do infinito.
+_MODELO_LINHA = ";".join("{}" if casas is None else f"{{:.{casas}f}}" for _, _, casas in CAMPOS_RESULTADO)
+
+
+def formatar_resultado(valores):
+    """Linha de texto (sem '\\n') igual à que o firmware imprime em modo texto."""
+    linha = _MODELO_LINHA.format(*valores)
+    if "-inf" in linha:
+        linha = linha.replace("-inf", "inf")
+    return linha
+
+
+def payload_para_linha(payload):
+    return formatar_resultado(decodificar_resultado(payload)).encode("ascii")
+
+
+def dtype_resultado():
+    import numpy as np
+    tipos = {"f": "<f4", "h": "<i2", "I": "<u4", "i": "<i4", "B": "u1"}
+    return np.dtype([(nome, tipos[fmt]) for nome, fmt, _ in CAMPOS_RESULTADO])
+
+
+def dtype_amostra_traco():
+    import numpy as np
+    return np.dtype([("t_ms", "<u2"), ("s_mm", "<i2"), ("pitch_cdeg", "<i2")])
+
+
+def montar_quadro_traco(t_inicio_ms, passo, amostras):
+    """``amostras``: sequência de (t_ms, s_mm, pitch_cdeg), como o firmware guarda."""
+    payload = ESTRUTURA_TRACO.pack(t_inicio_ms, len(amostras), passo)
+    payload += b"".join(ESTRUTURA_AMOSTRA_TRACO.pack(*a) for a in amostras)
+    return montar_quadro(payload, TIPO_TRACO)
+
+
+def decodificar_traco(payload):
+    """Retorna (t_inicio_ms, passo, amostras) com as amostras num array estruturado NumPy."""
+    import numpy as np
+    t_inicio_ms, quantidade, passo = ESTRUTURA_TRACO.unpack_from(payload)
+    if len(payload) != ESTRUTURA_TRACO.size + quantidade * ESTRUTURA_AMOSTRA_TRACO.size:
+        raise ValueError("Quadro de traço com quantidade de amostras inconsistente.")
+    amostras = np.frombuffer(payload, dtype=dtype_amostra_traco(), count=quantidade,
+                             offset=ESTRUTURA_TRACO.size)
+    return t_inicio_ms, passo, amostras
+
+
+def decodificar_lote(payloads):
+    """Decodifica uma sequência de payloads de resultado num array estruturado NumPy."""
+    import numpy as np
+    return np.frombuffer(b"".join(payloads), dtype=dtype_resultado())
@@ -0,0 +1,341 @@
+"""Resumo por grupo (LBT, LBC, massa_g) atualizado a cada ensaio gravado.
+
+Mantém média, desvio padrão e contagem de cada métrica com a atualização de
+Welford, aplicando os mesmos critérios de validade da análise completa
+(analise_de_ensaios). O estado fica num checkpoint JSON junto com quantos bytes
+de cada CSV já foram lidos, então reiniciar o programa só processa as linhas
+acrescentadas desde então. Se um CSV encolher ou for trocado, tudo é refeito.
+
+Uso: python resumo_incremental.py [resultados_tribometro.csv ...]
+"""
+import json
+import math
+import os
+import sys
+import threading
+import time
+import zlib
+
+import indice_resultados
+
+DIR_SCRIPT = os.path.dirname(os.path.abspath(__file__))
+CAMINHO_CHECKPOINT_PADRAO = os.path.join(DIR_SCRIPT, "resumo_incremental.json")
+CAMINHO_CSV_PADRAO = os.path.join(DIR_SCRIPT, "resultados_tribometro.csv")
+VERSAO_CHECKPOINT = 1
+TAMANHO_ASSINATURA = indice_resultados.TAMANHO_ASSINATURA
+INTERVALO_CHECKPOINT_S = 2.0
+
+# Mesmos critérios de analise_de_ensaios.executar_analise.
+CRITERIOS_VALIDADE = (("mpu_ok", 1), ("sonar_ok", 1), ("s_ok", 1), ("sonar_stale_ms", 0))
+COLUNAS_CRITICAS = ("massa_g", "LBC", "LBT", "mu_d", "tempo_s")
+COLUNAS_GRUPO = ("LBT", "LBC", "massa_g")
+
+# métrica -> (prefixo no resumo, estatísticas publicadas)
+METRICAS = {
+    "mu_s_final": ("mu_s", ("media", "std", "count")),
+    "mu_d_final": ("mu_d", ("media", "std", "count")),
+    "tempo_s": ("tempo", ("media", "std")),
+    "s_abs_mm": ("distancia", ("media",)),
+    "angulo_deg": ("angulo", ("media",)),
+    "trabalho_energia_J": ("trabalho_energia", ("media", "std")),
+    "trabalho_atrito_J": ("trabalho_atrito", ("media", "std")),
+}
+# Só estas colunas são convertidas em número a cada linha.
+COLUNAS_USADAS = tuple(dict.fromkeys(
+    [c for c, _ in CRITERIOS_VALIDADE] + list(COLUNAS_CRITICAS)
+    + ["mu_s", "mpu_ok_no_escorregamento"] + [m for m in METRICAS if not m.endswith("_final")]
+))
+
+
+def _numero(texto):
+    try:
+        return float(texto)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _chave_inteira(valor):
+    return int(valor) if float(valor).is_integer() else valor
+
+
+class EstatisticaWelford:
+    """Média e variância acumuladas de forma numericamente estável."""
+
+    __slots__ = ("n", "media", "m2")
+
+    def __init__(self, n=0, media=0.0, m2=0.0):
+        self.n = n
+        self.media = media
+        self.m2 = m2
+
+    def adicionar(self, valor):
+        if math.isnan(valor):
+            return
+        self.n += 1
+        delta = valor - self.media
+        self.media += delta / self.n
+        self.m2 += delta * (valor - self.media)
+
+    def obter_media(self):
+        return self.media if self.n else math.nan
+
+    def obter_desvio(self):
+        # ddof=1, como o pandas.
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else math.nan
+
+
+def avaliar_linha(registro):
+    """Converte um registro (coluna -> texto) em (chave do grupo, métricas) ou None se inválido."""
+    valores = {coluna: _numero(registro.get(coluna)) for coluna in COLUNAS_USADAS}
+    for coluna, esperado in CRITERIOS_VALIDADE:
+        if valores[coluna] != esperado:
+            return None
+    for coluna in COLUNAS_CRITICAS:
+        if math.isnan(valores[coluna]):
+            return None
+    chave = (_chave_inteira(valores["LBT"]), _chave_inteira(valores["LBC"]), valores["massa_g"])
+    metricas = {
+        "mu_s_final": valores["mu_s"] if valores["mpu_ok_no_escorregamento"] == 1 else math.nan,
+        "mu_d_final": valores["mu_d"],
+    }
+    for coluna in METRICAS:
+        if coluna not in metricas:
+            metricas[coluna] = valores[coluna]
+    return chave, metricas
+
+
+def _arredondar(valor):
+    return None if math.isnan(valor) else round(valor, 4)
+
+
+class ResumoIncremental:
+    def __init__(self, caminho_checkpoint=CAMINHO_CHECKPOINT_PADRAO, intervalo_checkpoint_s=INTERVALO_CHECKPOINT_S):
+        self.caminho_checkpoint = caminho_checkpoint
+        self.intervalo_checkpoint_s = intervalo_checkpoint_s
+        self.ensaios_validos = 0
+        self.ensaios_descartados = 0
+        self._grupos = {}
+        self._arquivos = {}
+        self._lock = threading.Lock()
+        self._persistir = caminho_checkpoint is not None
+        self._alterado = False
+        self._ultimo_checkpoint = 0.0
+        self._carregar()
+
+    # --- checkpoint ---
+
+    def _carregar(self):
+        if not self._persistir:
+            return
+        try:
+            with open(self.caminho_checkpoint, "r", encoding="utf-8") as arquivo:
+                estado = json.load(arquivo)
+        except (OSError, ValueError):
+            return
+        if estado.get("versao") != VERSAO_CHECKPOINT:
+            return
+        try:
+            grupos = {}
+            for grupo in estado["grupos"]:
+                chave = tuple(grupo[c] for c in COLUNAS_GRUPO)
+                grupos[chave] = {m: EstatisticaWelford(*grupo["estatisticas"][m]) for m in METRICAS}
+            self._grupos = grupos
+            self._arquivos = estado["arquivos"]
+            self.ensaios_validos = estado["ensaios_validos"]
+            self.ensaios_descartados = estado["ensaios_descartados"]
+        except (KeyError, TypeError):
+            self._reiniciar()
+
+    def _gravar_checkpoint(self):
+        if not self._persistir or not self._alterado:
+            return
+        estado = {
+            "versao": VERSAO_CHECKPOINT,
+            "ensaios_validos": self.ensaios_validos,
+            "ensaios_descartados": self.ensaios_descartados,
+            "arquivos": self._arquivos,
+            "grupos": [
+                dict(zip(COLUNAS_GRUPO, chave), estatisticas={
+                    m: [e.n, e.media, e.m2] for m, e in estatisticas.items()
+                })
+                for chave, estatisticas in self._grupos.items()
+            ],
+        }
+        temporario = self.caminho_checkpoint + ".tmp"
+        try:
+            with open(temporario, "w", encoding="utf-8") as arquivo:
+                json.dump(estado, arquivo)
+            os.replace(temporario, self.caminho_checkpoint)
+        except OSError:
+            # Pasta sem permissão de escrita: o resumo continua válido em memória.
+            self._persistir = False
+            return
+        self._alterado = False
+        self._ultimo_checkpoint = time.monotonic()
+
+    def salvar_checkpoint(self):
+        with self._lock:
+            self._gravar_checkpoint()
+
+    def fechar(self):
+        self.salvar_checkpoint()
+
+    def _reiniciar(self):
+        self._grupos = {}
+        self._arquivos = {}
+        self.ensaios_validos = 0
+        self.ensaios_descartados = 0
+        self._alterado = True
+
+    # --- atualização ---
+
+    def adicionar(self, registro):
+        """Acrescenta um ensaio (coluna -> texto). Retorna a chave do grupo ou None se inválido."""
+        with self._lock:
+            return self._adicionar(registro)
+
+    def _adicionar(self, registro):
+        self._alterado = True
+        avaliado = avaliar_linha(registro)
+        if avaliado is None:
+            self.ensaios_descartados += 1
+            return None
+        chave, metricas = avaliado
+        estatisticas = self._grupos.get(chave)
+        if estatisticas is None:
+            estatisticas = {m: EstatisticaWelford() for m in METRICAS}
+            self._grupos[chave] = estatisticas
+        for metrica, valor in metricas.items():
+            estatisticas[metrica].adicionar(valor)
+        self.ensaios_validos += 1
+        return chave
+
+    def _assinatura(self, caminho_csv, tamanho):
+        tamanho = min(tamanho, TAMANHO_ASSINATURA)
+        with open(caminho_csv, "rb") as arquivo:
+            return [tamanho, zlib.crc32(arquivo.read(tamanho))]
+
+    def _estado_valido(self, caminho_csv, estado, tamanho):
+        if tamanho < estado["coberto"]:
+            return False
+        return self._assinatura(caminho_csv, estado["assinatura"][0]) == estado["assinatura"]
+
+    def sincronizar(self, caminho_csv=CAMINHO_CSV_PADRAO):
+        """Processa o que foi acrescentado ao CSV desde a última chamada. Retorna a última chave válida."""
+        caminho_csv = os.path.abspath(str(caminho_csv))
+        with self._lock:
+            try:
+                tamanho = os.path.getsize(caminho_csv)
+            except OSError:
+                return None
+            estado = self._arquivos.get(caminho_csv)
+            if estado is not None and not self._estado_valido(caminho_csv, estado, tamanho):
+                # Arquivo truncado ou substituído: as contribuições antigas não têm como ser
+                # desfeitas, então o resumo é refeito a partir de todos os CSVs conhecidos.
+                conhecidos = [c for c in self._arquivos if c != caminho_csv]
+                self._reiniciar()
+                for caminho in conhecidos:
+                    self._sincronizar_arquivo(caminho)
+                estado = None
+            ultima = self._sincronizar_arquivo(caminho_csv, tamanho, estado)
+            if self._alterado and time.monotonic() - self._ultimo_checkpoint >= self.intervalo_checkpoint_s:
+                self._gravar_checkpoint()
+            return ultima
+
+    def _sincronizar_arquivo(self, caminho_csv, tamanho=None, estado=None):
+        try:
+            if tamanho is None:
+                tamanho = os.path.getsize(caminho_csv)
+        except OSError:
+            return None
+        if estado is None:
+            estado = {"coberto": 0, "assinatura": [0, 0], "cabecalho": None}
+            self._arquivos[caminho_csv] = estado
+        if tamanho == estado["coberto"]:
+            return None
+        with open(caminho_csv, "rb") as arquivo:
+            arquivo.seek(estado["coberto"])
+            dados = arquivo.read(tamanho - estado["coberto"])
+        fim = dados.rfind(b"\n")
+        if fim < 0:
+            # Linha ainda sendo escrita; fica para a próxima vez.
+            return None
+        ultima = None
+        for linha in dados[:fim + 1].splitlines():
+            minusculas = linha.lower()
+            if b"massa_g" in minusculas and b"lbc" in minusculas:
+                colunas = indice_resultados.separar_colunas(linha)
+                if indice_resultados.eh_linha_cabecalho(colunas):
+                    estado["cabecalho"] = [c.strip() for c in colunas]
+                    continue
+            cabecalho = estado["cabecalho"]
+            # O firmware nunca usa aspas, então separar por ';' basta.
+            colunas = linha.decode("utf-8", errors="replace").split(";")
+            if cabecalho is None or not linha.strip() or len(colunas) < len(cabecalho) - 1:
+                continue
+            chave = self._adicionar(dict(zip(cabecalho, colunas)))
+            if chave is not None:
+                ultima = chave
+        estado["coberto"] += fim + 1
+        if estado["assinatura"][0] < TAMANHO_ASSINATURA:
+            estado["assinatura"] = self._assinatura(caminho_csv, estado["coberto"])
+        self._alterado = True
+        return ultima
+
+    # --- consulta ---
+
+    def _linha_resumo(self, chave, estatisticas):
+        linha = dict(zip(COLUNAS_GRUPO, chave))
+        for metrica, (prefixo, publicadas) in METRICAS.items():
+            estatistica = estatisticas[metrica]
+            if "media" in publicadas:
+                linha[f"{prefixo}_media"] = _arredondar(estatistica.obter_media())
+            if "std" in publicadas:
+                linha[f"{prefixo}_std"] = _arredondar(estatistica.obter_desvio())
+            if "count" in publicadas:
+                linha[f"{prefixo}_count"] = estatistica.n
+        delta = estatisticas["trabalho_atrito_J"].obter_media() - estatisticas["trabalho_energia_J"].obter_media()
+        linha["comparacao_trabalho_delta_J"] = _arredondar(delta)
+        return linha
+
+    def resumo(self):
+        """Linhas com as mesmas colunas do 'resumo' da análise completa, ordenadas por grupo."""
+        with self._lock:
+            return [self._linha_resumo(chave, self._grupos[chave]) for chave in sorted(self._grupos)]
+
+    def resumo_do_grupo(self, chave):
+        with self._lock:
+            estatisticas = self._grupos.get(chave)
+            return None if estatisticas is None else self._linha_resumo(chave, estatisticas)
+
+
+def _formatar(valor, casas=4):
+    return "-" if valor is None else f"{valor:.{casas}f}"
+
+
+def formatar_linha(linha):
+    return (f"LBT={linha['LBT']} LBC={linha['LBC']} m={linha['massa_g']:.1f} g | "
+            f"mu_s={_formatar(linha['mu_s_media'])}±{_formatar(linha['mu_s_std'])} (n={linha['mu_s_count']}) | "
+            f"mu_d={_formatar(linha['mu_d_media'])}±{_formatar(linha['mu_d_std'])} (n={linha['mu_d_count']}) | "
+            f"t={_formatar(linha['tempo_media'], 3)} s")
+
+
+def formatar_resumo(resumo):
+    if not resumo:
+        return "Nenhum ensaio válido até agora."
+    return "\n".join(formatar_linha(linha) for linha in resumo)
+
+
+def main():
+    caminhos = sys.argv[1:] or [CAMINHO_CSV_PADRAO]
+    agregador = ResumoIncremental()
+    for caminho in caminhos:
+        agregador.sincronizar(caminho)
+    agregador.fechar()
+    print(formatar_resumo(agregador.resumo()))
+    print(f"{agregador.ensaios_validos} ensaios válidos, {agregador.ensaios_descartados} descartados.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,704 @@
+"""Tribômetro virtual em um pseudo-terminal (pty).
+
+Reproduz o protocolo serial do firmware (Firmware Arduino/Tribometro) para testar
+ui_server.py e interface_tribometro.py sem o hardware:
+
+    python simulador_tribometro.py                       # tempo real
+    python simulador_tribometro.py --aceleracao 50       # 50x mais rápido
+    python simulador_tribometro.py --aceleracao 0 --ensaios-auto 5000
+
+O caminho do pty é impresso na saída; use-o como porta em ui_server/interface.
+"""
+import argparse
+import math
+import os
+import queue
+import random
+import select
+import struct
+import sys
+import termios
+import threading
+import time
+import tty
+
+import protocolo_binario
+
+G = 9.80665
+TAXA_BAUD = 115200
+TARGET_OFFSET_MM = 10.0
+MAX_ANGLE_DEG = 45.0
+SENSOR_PERIOD_MS = 50
+CALIB_AMOSTRAS = 40
+CALIB_PERIODO_MS = 70
+TAXA_RAMPA_DEG_S = 1.5
+DURACAO_NIVELAMENTO_S = 4.0
+TRACE_MAX_AMOSTRAS = 64
+MPU_ADDR = 0x68
+MOTOR_MANUAL_PADRAO_MS = 250
+MOTOR_MANUAL_MAX_MS = 8000
+
+CABECALHO_CSV = (
+    "massa_g;LBC;LBT;angulo_deg;altura_m;mu_s;mu_d;aceleracao_mps2;velocidade_mps;tempo_s;"
+    "t_inicio_ms;t_fim_ms;amostras_validas;trabalho_energia_J;trabalho_atrito_J;mpu_ok;"
+    "mpu_ok_no_escorregamento;sonar_ok;sonar_stale_ms;filtro_alpha;pitch_bruto_deg;"
+    "pitch_filtrado_deg;pitch_zero_deg;sonar_bruto_mm;sonar_filtrado_mm;dist0_mm;dist_ref_mm;"
+    "dist_alvo_mm;offset_mm;s_abs_mm;s_rel_mm;dist_fim_mm;s_ok;calib_pitch_std_deg;"
+    "calib_dist_std_mm;calib_pitch_n;calib_dist_n;temp_mpu_c"
+)
+
+
+class EnsaioAbortado(Exception):
+    pass
+
+
+def float32(valor):
+    """Arredonda para float de 32 bits, como as variáveis do firmware."""
+    return struct.unpack("<f", struct.pack("<f", valor))[0]
+
+
+def formatar_float(valor, casas=2):
+    """Imita Serial.print(float, casas) do Arduino (inclusive 'nan'/'inf')."""
+    if valor is None or math.isnan(valor):
+        return "nan"
+    if math.isinf(valor):
+        return "inf"
+    return f"{valor:.{casas}f}"
+
+
+class ModeloAtrito:
+    """Modelo de atrito por par de lixas (LBC/LBT) com dispersão e falhas de sensor.
+
+    Lixa 1=Fina/1200, 2=Média/600, 3=Grossa/280: quanto maior o número, maior o
+    atrito. mu_d é uma fração de mu_s e a massa tem um efeito pequeno e linear.
+    """
+
+    def __init__(
+        self,
+        mu_s_base=0.28,
+        ganho_lixa=0.035,
+        efeito_massa_por_kg=-0.02,
+        razao_dinamica=0.82,
+        desvio_mu=0.015,
+        desvio_aceleracao=0.02,
+        prob_falha_mpu=0.02,
+        prob_falha_sonar=0.02,
+        semente=None,
+    ):
+        self.mu_s_base = mu_s_base
+        self.ganho_lixa = ganho_lixa
+        self.efeito_massa_por_kg = efeito_massa_por_kg
+        self.razao_dinamica = razao_dinamica
+        self.desvio_mu = desvio_mu
+        self.desvio_aceleracao = desvio_aceleracao
+        self.prob_falha_mpu = prob_falha_mpu
+        self.prob_falha_sonar = prob_falha_sonar
+        self.rng = random.Random(semente)
+
+    def mu_estatico(self, lbc, lbt, massa_g):
+        media = (
+            self.mu_s_base
+            + self.ganho_lixa * (lbc + lbt)
+            + self.efeito_massa_por_kg * (massa_g / 1000.0)
+        )
+        return max(0.05, self.rng.gauss(media, self.desvio_mu))
+
+    def mu_dinamico(self, mu_s):
+        return max(0.01, self.rng.gauss(mu_s * self.razao_dinamica, self.desvio_mu / 2))
+
+
+class TribometroVirtual:
+    """Máquina de estados do firmware: comandos, mensagens e linhas de resultado.
+
+    As mensagens saem por ``emitir(linha)`` e as esperas por ``esperar(segundos)``,
+    que recebem tempo simulado; o dispositivo em pty decide se dorme ou não.
+    Com o comando 'b 1' o resultado sai por ``emitir_quadro(quadro, linha)``, em
+    binário (protocolo_binario), junto com a linha de texto equivalente; com
+    'tr 1' o quadro de traço do movimento sai antes dele, pelo mesmo caminho.
+    """
+
+    def __init__(self, modelo=None, dist_inicial_mm=300, percurso_mm=150, emitir=None, esperar=None,
+                 emitir_quadro=None):
+        self.modelo = modelo or ModeloAtrito()
+        self.rng = self.modelo.rng
+        self.dist_inicial_padrao_mm = dist_inicial_mm
+        self.percurso_mm = percurso_mm
+        self.emitir = emitir or (lambda linha: None)
+        self.esperar = esperar or (lambda segundos: None)
+        self.emitir_quadro = emitir_quadro or (lambda quadro, linha: self.emitir(linha))
+        self.millis = 0
+        self.ensaios = 0
+        self.resetar()
+
+    def resetar(self):
+        self.massa_g = 0.0
+        self.lbc = 1
+        self.lbt = 1
+        self.dist_inicial_mm = -1
+        self.dist_final_mm = -1
+        self.dist0_mm = 0
+        self.d_alvo_mm = 0.0
+        self.pitch_zero_deg = self.rng.gauss(0.0, 0.3)
+        self.filtro_alpha = 0.90
+        self.cabecalho_impresso = False
+        self.resultado_binario = False
+        self.traco_ativo = False
+        self.estado = "IDLE"
+        self.estado_retomada = None
+
+    def _avancar(self, segundos):
+        self.millis += int(segundos * 1000)
+        self.esperar(segundos)
+
+    def _ler_sonar_mm(self, alvo_mm):
+        return int(round(self.rng.gauss(alvo_mm, 1.0)))
+
+    def boot(self):
+        self.emitir("Tribometro pronto.")
+        self.imprimir_config()
+
+    def imprimir_config(self):
+        massa = formatar_float(self.massa_g, 1) if self.massa_g > 0.0 else "[INDEFINIDA]"
+        linha = (
+            f"Massa: {massa} | LBC={self.lbc} | LBT={self.lbt}"
+            f" | IP={self.dist_inicial_mm} | FP={self.dist_final_mm}"
+        )
+        if self.dist_inicial_mm >= 0 and self.dist_final_mm >= 0:
+            linha += f" | Dist Alvo={formatar_float(self.d_alvo_mm, 0)}"
+        self.emitir(linha)
+
+    def _atualizar_alvo(self):
+        delta = abs(self.dist_final_mm - self.dist_inicial_mm)
+        alvo = delta - int(TARGET_OFFSET_MM) if delta > int(TARGET_OFFSET_MM) else 1
+        self.d_alvo_mm = float(alvo)
+        self.emitir(f"Distância alvo (mm): {formatar_float(self.d_alvo_mm, 0)}")
+
+    def processar_comando(self, comando):
+        """Mesma ordem de testes do handleCommand do firmware: os comandos de várias letras
+        vêm antes dos de uma letra ('scan' não inicia ensaio) e o que não casa com nada é ignorado."""
+        cmd = comando.strip()
+        if not cmd:
+            return
+        c = cmd[0]
+        if c == "h":
+            self.emitir("")
+            self.emitir("Comandos: h r z s x p u <ms> j <ms> ip fp scan who | m <g> lbc <val> lbt <val> | b <0|1> tr <0|1>")
+        elif c == "r":
+            self.imprimir_config()
+        elif cmd.startswith("scan"):
+            self.emitir("I2C scan:")
+            self.emitir(f"  0x{MPU_ADDR:02X}")
+        elif cmd.startswith("who"):
+            self.emitir(f"MPU WHO_AM_I: 0x{MPU_ADDR:02X}")
+        elif cmd.startswith("ip"):
+            self.dist_inicial_mm = self._ler_sonar_mm(self.dist_inicial_padrao_mm)
+            self.dist0_mm = self.dist_inicial_mm
+            self.emitir(f"Posição Inicial (IP) definida: {self.dist_inicial_mm}")
+            if self.dist_final_mm >= 0:
+                self._atualizar_alvo()
+        elif cmd.startswith("fp"):
+            self.dist_final_mm = self._ler_sonar_mm(self.dist_inicial_padrao_mm - self.percurso_mm)
+            if self.dist_inicial_mm >= 0:
+                self.dist0_mm = self.dist_inicial_mm
+            self.emitir(f"Posição Final (FP) definida: {self.dist_final_mm}")
+            if self.dist_inicial_mm >= 0:
+                self._atualizar_alvo()
+        elif c == "m":
+            self.massa_g = _atof(cmd[1:])
+            self.emitir(f"OK massa: {formatar_float(self.massa_g)}")
+        elif c == "d":
+            self.d_alvo_mm = _atof(cmd[1:])
+            self.emitir("OK dist.")
+        elif cmd.startswith("lbc"):
+            self.lbc = _atoi(cmd[3:])
+            self.emitir(f"OK LBC: {self.lbc}")
+        elif cmd.startswith("lbt"):
+            self.lbt = _atoi(cmd[3:])
+            self.emitir(f"OK LBT: {self.lbt}")
+        elif cmd.startswith("tr"):
+            self.traco_ativo = _atoi(cmd[2:]) != 0
+            self.emitir(f"OK traco: {1 if self.traco_ativo else 0}")
+        elif c == "t":
+            self.lbt = _atoi(cmd[1:])
+        elif c == "b":
+            self.resultado_binario = _atoi(cmd[1:]) != 0
+            self.emitir(f"OK binario: {1 if self.resultado_binario else 0}")
+        elif c == "z":
+            self.estado = "LEVELING"
+            self.filtro_alpha = 0.80
+            self.emitir("Iniciando nivelamento...")
+            self._avancar(DURACAO_NIVELAMENTO_S)
+            self._verificar_abortado()
+            self.pitch_zero_deg = self.rng.gauss(0.0, 0.01)
+            self.estado = "IDLE"
+            self.emitir(f"Nivelado. Referência Zero: {formatar_float(self.pitch_zero_deg, 3)}")
+        elif c == "s":
+            if self.estado not in ("IDLE", "DONE"):
+                return
+            if self.massa_g <= 0.0:
+                self.emitir("ERRO: Massa não definida (use 'm <g>').")
+                return
+            if self.dist_inicial_mm < 0 or self.dist_final_mm < 0:
+                self.emitir("Defina IP e FP antes de iniciar.")
+                return
+            self.executar_ensaio()
+        elif c == "x":
+            self.estado = "IDLE"
+            self.filtro_alpha = 0.85
+            self.emitir("IDLE.")
+        elif c == "p":
+            self.alternar_pausa()
+        elif c in ("u", "j"):
+            # Motor manual (u sobe, j desce): bloqueia pelo tempo pedido e não responde nada.
+            ms = _atoi(cmd[1:])
+            if ms <= 0:
+                ms = MOTOR_MANUAL_PADRAO_MS
+            self._avancar(min(ms, MOTOR_MANUAL_MAX_MS) / 1000.0)
+
+    def alternar_pausa(self):
+        """'p' pausa o ensaio em andamento ou retoma o pausado; parado, não faz nada."""
+        if self.estado == "PAUSED":
+            self.estado = self.estado_retomada
+            self.emitir("RETOMADO.")
+        elif self.estado not in ("IDLE", "DONE"):
+            self.estado_retomada = self.estado
+            self.estado = "PAUSED"
+            self.emitir("PAUSADO.")
+
+    def abortar(self):
+        """Chamado fora da thread do ensaio quando chega 'x'."""
+        self.estado = "IDLE"
+
+    def _verificar_abortado(self):
+        if self.estado == "IDLE":
+            raise EnsaioAbortado()
+
+    def _gerar_traco(self, aceleracao, tempo_s, theta_deg):
+        """Amostras do movimento como o firmware as guarda; retorna (amostras, passo, a_est, n)."""
+        amostras = []
+        passo = 1
+        vistas = 0
+        soma_t2s = soma_t4 = 0.0
+        n = 0
+        ultimo_mm = 0
+        for k in range(1, int(tempo_s * 1000 / SENSOR_PERIOD_MS) + 1):
+            t_ms = k * SENSOR_PERIOD_MS
+            t = t_ms / 1000.0
+            s_mm = max(0, int(round(500.0 * aceleracao * t * t + self.rng.gauss(0.0, 1.0))))
+            if abs(s_mm - ultimo_mm) <= 2:
+                continue
+            ultimo_mm = s_mm
+            t32 = float32(t)
+            soma_t2s += t32 * t32 * (s_mm / 1000.0)
+            soma_t4 += t32 ** 4
+            n += 1
+            vistas += 1
+            if (vistas - 1) % passo:
+                continue
+            if len(amostras) == TRACE_MAX_AMOSTRAS:
+                amostras = amostras[::2]
+                passo *= 2
+            pitch_cdeg = int(round((theta_deg + self.rng.gauss(0.0, 0.05)) * 100))
+            amostras.append((t_ms, s_mm, pitch_cdeg))
+        a_est = 2.0 * soma_t2s / soma_t4 if soma_t4 > 1e-9 else 0.0
+        return amostras, passo, a_est, n
+
+    def executar_ensaio(self):
+        modelo = self.modelo
+        rng = self.rng
+        self.estado = "CALIBRATING"
+        self.filtro_alpha = 0.90
+        self.emitir("Calibrando...")
+        self._avancar(CALIB_AMOSTRAS * CALIB_PERIODO_MS / 1000.0)
+        self._verificar_abortado()
+        calib_pitch_std = abs(rng.gauss(0.08, 0.03))
+        calib_dist_std = abs(rng.gauss(2.0, 0.8))
+        self.emitir(
+            f"Calibracao: pitch_std={formatar_float(calib_pitch_std, 3)} deg, "
+            f"dist_std={formatar_float(calib_dist_std, 1)} mm (tentativa 1)"
+        )
+        self.dist0_mm = self._ler_sonar_mm(self.dist_inicial_mm)
+        self.estado = "RAMPING_TO_SLIP"
+        self.emitir("Iniciando rampa...")
+
+        mu_s_real = modelo.mu_estatico(self.lbc, self.lbt, self.massa_g)
+        theta_deg = math.degrees(math.atan(mu_s_real)) + rng.gauss(0.0, 0.05)
+        sem_movimento = theta_deg >= MAX_ANGLE_DEG - 0.1
+        if sem_movimento:
+            theta_deg = MAX_ANGLE_DEG - 0.1
+        self._avancar(theta_deg / TAXA_RAMPA_DEG_S)
+        self._verificar_abortado()
+
+        mpu_ok = rng.random() >= modelo.prob_falha_mpu
+        mpu_ok_escorregamento = mpu_ok and rng.random() >= modelo.prob_falha_mpu
+        sonar_ok = rng.random() >= modelo.prob_falha_sonar
+        theta_rad = math.radians(theta_deg)
+        mu_s = math.tan(theta_rad)
+        t_inicio = self.millis
+        traco = ([], 1, None, None)
+        ref_mm = self.dist_inicial_mm
+        m_kg = self.massa_g / 1000.0
+
+        if sem_movimento:
+            self.emitir("Ângulo máximo atingido (sem movimento).")
+            tempo_s = 0.0
+            s_mm = 0
+            amostras = 0
+            dist_agora = self._ler_sonar_mm(ref_mm)
+        else:
+            self.estado = "TRACKING_MOTION"
+            self.emitir("Movimento detectado.")
+            mu_d_real = min(modelo.mu_dinamico(mu_s_real), mu_s * 0.98)
+            aceleracao_real = G * (math.sin(theta_rad) - mu_d_real * math.cos(theta_rad))
+            s_mm = int(round(self.d_alvo_mm + abs(rng.gauss(0.0, 2.0))))
+            tempo_s = math.sqrt(2.0 * (s_mm / 1000.0) / aceleracao_real)
+            self._avancar(tempo_s)
+            self._verificar_abortado()
+            amostras = max(0, int(tempo_s * 1000 / SENSOR_PERIOD_MS) - 1)
+            if self.traco_ativo:
+                traco = self._gerar_traco(aceleracao_real, tempo_s, theta_deg)
+                amostras = traco[3]
+            dist_agora = ref_mm - s_mm
+            self.emitir("Fim de curso atingido." if sonar_ok else "Erro: Perda de sinal do Sonar.")
+        t_fim = t_inicio + int(tempo_s * 1000)
+
+        d_meas_m = s_mm / 1000.0 if sonar_ok else float("nan")
+        if not sonar_ok or amostras < 6:
+            a_est = float("nan")
+        elif traco[2] is not None:
+            a_est = traco[2]
+        else:
+            a_est = 2.0 * d_meas_m / (tempo_s * tempo_s) * (1.0 + rng.gauss(0.0, modelo.desvio_aceleracao))
+        if sonar_ok:
+            v_end = math.sqrt(max(0.0, 2.0 * a_est * d_meas_m)) if not math.isnan(a_est) else float("nan")
+            mu_d = (G * math.sin(theta_rad) - a_est) / (G * math.cos(theta_rad))
+            dh_m = d_meas_m * math.sin(theta_rad)
+            w_energia = 0.5 * m_kg * v_end * v_end - m_kg * G * dh_m
+            w_atrito = mu_d * m_kg * G * math.cos(theta_rad) * d_meas_m
+        else:
+            v_end = mu_d = dh_m = w_energia = w_atrito = float("nan")
+        if not mpu_ok or not mpu_ok_escorregamento:
+            mu_s = float("nan")
+        if not mpu_ok:
+            mu_d = float("nan")
+
+        if sonar_ok:
+            s_rel = max(0, s_mm - rng.randint(20, 30)) if s_mm else 0
+            s_ok = 1 if abs(int(self.d_alvo_mm) - s_mm) <= 20 else 0
+            dist_usada = dist_agora
+        else:
+            s_mm = 0
+            s_rel = 0
+            s_ok = 0
+            dist_usada = dist_agora
+        pitch_filtrado = self.pitch_zero_deg + theta_deg
+        # Mesma ordem e tipos das colunas do CSV (protocolo_binario.CAMPOS_RESULTADO).
+        valores = [
+            self.massa_g,
+            self.lbc,
+            self.lbt,
+            theta_deg,
+            dh_m,
+            mu_s,
+            mu_d,
+            a_est,
+            v_end,
+            tempo_s,
+            t_inicio,
+            t_fim,
+            amostras,
+            w_energia,
+            w_atrito,
+            1 if mpu_ok else 0,
+            1 if mpu_ok_escorregamento else 0,
+            1 if sonar_ok else 0,
+            0 if sonar_ok else rng.randint(500, 1500),
+            self.filtro_alpha,
+            pitch_filtrado + rng.gauss(0.0, 0.05),
+            pitch_filtrado,
+            self.pitch_zero_deg,
+            self._ler_sonar_mm(dist_usada) if sonar_ok else -1,
+            dist_usada,
+            self.dist0_mm,
+            ref_mm,
+            self.d_alvo_mm,
+            TARGET_OFFSET_MM,
+            s_mm,
+            s_rel,
+            dist_agora,
+            s_ok,
+            calib_pitch_std,
+            calib_dist_std,
+            CALIB_AMOSTRAS,
+            CALIB_AMOSTRAS,
+            rng.gauss(27.0, 0.5),
+        ]
+        valores = [float32(v) if isinstance(v, float) else v for v in valores]
+        if not self.cabecalho_impresso:
+            self.emitir(CABECALHO_CSV)
+            self.cabecalho_impresso = True
+        if self.traco_ativo:
+            amostras_traco, passo, _, _ = traco
+            self.emitir_quadro(protocolo_binario.montar_quadro_traco(t_inicio, passo, amostras_traco),
+                               f"[traço] {len(amostras_traco)} amostras")
+        linha = protocolo_binario.formatar_resultado(valores)
+        if self.resultado_binario:
+            self.emitir_quadro(protocolo_binario.montar_quadro_resultado(valores), linha)
+        else:
+            self.emitir(linha)
+        self.estado = "DONE"
+        self.ensaios += 1
+
+
+def _atoi(texto):
+    texto = texto.strip()
+    sinal = 1
+    if texto and texto[0] in "+-":
+        sinal = -1 if texto[0] == "-" else 1
+        texto = texto[1:]
+    digitos = ""
+    for ch in texto:
+        if not ch.isdigit():
+            break
+        digitos += ch
+    return sinal * int(digitos) if digitos else 0
+
+
+def _atof(texto):
+    texto = texto.strip()
+    for fim in range(len(texto), 0, -1):
+        try:
+            return float(texto[:fim])
+        except ValueError:
+            continue
+    return 0.0
+
+
+class DispositivoVirtual:
+    """Expõe um TribometroVirtual no lado escravo de um pty.
+
+    ``aceleracao`` divide as esperas simuladas (1 = tempo real, 0 = sem esperas).
+    ``limitar_baud`` limita a escrita à taxa de uma UART real a 115200 baud.
+    Quando o host reconfigura a porta (abertura pelo pyserial), o dispositivo
+    reinicia e reimprime o banner, como o Arduino faz ao receber o pulso de DTR.
+    """
+
+    def __init__(self, modelo=None, aceleracao=1.0, limitar_baud=False, **kwargs):
+        self.aceleracao = aceleracao
+        self.limitar_baud = limitar_baud
+        self.mestre, self.escravo = os.openpty()
+        tty.setraw(self.escravo)
+        self.caminho = os.ttyname(self.escravo)
+        self._atributos = termios.tcgetattr(self.escravo)
+        self._comandos = queue.Queue()
+        self._lock_escrita = threading.Lock()
+        self._parar = threading.Event()
+        self._abortar = threading.Event()
+        self._threads = []
+        self.linhas_emitidas = 0
+        self.bytes_emitidos = 0
+        self.ensaios_concluidos = 0
+        self.reinicios = 0
+        self.ao_emitir = None
+        self.tribometro = TribometroVirtual(modelo, emitir=self._emitir, esperar=self._esperar,
+                                            emitir_quadro=self._emitir_quadro, **kwargs)
+
+    def _emitir(self, linha):
+        self._escrever((linha + "\r\n").encode("utf-8"), linha)
+
+    def _emitir_quadro(self, quadro, linha):
+        self._escrever(quadro, linha)
+
+    def _escrever(self, dados, linha):
+        if self.ao_emitir is not None:
+            self.ao_emitir(linha, time.perf_counter())
+        with self._lock_escrita:
+            vista = memoryview(dados)
+            while vista and not self._parar.is_set():
+                try:
+                    escritos = os.write(self.mestre, vista)
+                except BlockingIOError:
+                    time.sleep(0.001)
+                    continue
+                except OSError:
+                    return
+                vista = vista[escritos:]
+            self.linhas_emitidas += 1
+            self.bytes_emitidos += len(dados)
+        if self.limitar_baud:
+            time.sleep(len(dados) * 10.0 / TAXA_BAUD)
+
+    def _esperar(self, segundos):
+        """Dorme o tempo simulado; enquanto o ensaio está pausado ('p') o relógio não corre."""
+        restante = segundos / self.aceleracao if self.aceleracao and self.aceleracao > 0 else 0.0
+        while restante > 0 or self.tribometro.estado == "PAUSED":
+            pausado = self.tribometro.estado == "PAUSED"
+            fatia = 0.05 if pausado else min(restante, 0.05)
+            inicio = time.monotonic()
+            if self._abortar.wait(fatia):
+                break
+            if not pausado:
+                restante -= time.monotonic() - inicio
+        if self._abortar.is_set():
+            self._abortar.clear()
+            self.tribometro.abortar()
+
+    def _ler_host(self):
+        pendente = bytearray()
+        while not self._parar.is_set():
+            atributos = termios.tcgetattr(self.escravo)
+            if atributos != self._atributos:
+                self._atributos = atributos
+                self._comandos.put(None)
+            try:
+                prontos, _, _ = select.select([self.mestre], [], [], 0.05)
+            except (OSError, ValueError):
+                break
+            if not prontos:
+                continue
+            try:
+                dados = os.read(self.mestre, 4096)
+            except OSError:
+                break
+            pendente += dados
+            while True:
+                fim = -1
+                for separador in (b"\n", b"\r"):
+                    posicao = pendente.find(separador)
+                    if posicao >= 0 and (fim < 0 or posicao < fim):
+                        fim = posicao
+                if fim < 0:
+                    break
+                comando = bytes(pendente[:fim]).decode("utf-8", errors="replace")
+                del pendente[:fim + 1]
+                if not comando.strip():
+                    continue
+                primeiro = comando.strip()[0]
+                if primeiro == "x":
+                    self._abortar.set()
+                elif primeiro == "p" and self.tribometro.estado not in ("IDLE", "DONE"):
+                    # Como no firmware, 'p' age no meio do ensaio, sem esperar a fila de comandos.
+                    self.tribometro.alternar_pausa()
+                    continue
+                self._comandos.put(comando)
+
+    def _executar_firmware(self):
+        self.tribometro.boot()
+        while not self._parar.is_set():
+            try:
+                comando = self._comandos.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if comando is None:
+                self._reiniciar()
+                continue
+            self._processar(comando)
+
+    def _reiniciar(self):
+        self.reinicios += 1
+        self.tribometro.resetar()
+        self._esperar(0.5)
+        self.tribometro.boot()
+
+    def _processar(self, comando):
+        self._abortar.clear()
+        ensaios_antes = self.tribometro.ensaios
+        try:
+            self.tribometro.processar_comando(comando)
+        except EnsaioAbortado:
+            self.tribometro.emitir("IDLE.")
+            return
+        self.ensaios_concluidos += self.tribometro.ensaios - ensaios_antes
+
+    def configurar_padrao(self, massa_g=250.0, lbc=2, lbt=2):
+        """Deixa o dispositivo pronto para 's' (massa, lixas, IP e FP)."""
+        for comando in (f"m {massa_g}", f"lbc {lbc}", f"lbt {lbt}", "ip", "fp"):
+            self._comandos.put(comando)
+
+    def enfileirar_ensaios(self, quantidade):
+        for _ in range(quantidade):
+            self._comandos.put("s")
+
+    def iniciar(self):
+        for alvo in (self._ler_host, self._executar_firmware):
+            thread = threading.Thread(target=alvo, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self.caminho
+
+    def aguardar_fila(self, timeout=None):
+        limite = None if timeout is None else time.monotonic() + timeout
+        while not self._comandos.empty() or self.tribometro.estado not in ("IDLE", "DONE"):
+            if limite is not None and time.monotonic() > limite:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def parar(self):
+        self._parar.set()
+        self._abortar.set()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        for fd in (self.mestre, self.escravo):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tribômetro virtual em pty.")
+    parser.add_argument("--aceleracao", type=float, default=1.0,
+                        help="Fator de aceleração do tempo (1 = real, 0 = sem esperas).")
+    parser.add_argument("--limitar-baud", action="store_true",
+                        help="Limita a saída à vazão de uma UART a 115200 baud.")
+    parser.add_argument("--ensaios-auto", type=int, default=0,
+                        help="Executa N ensaios seguidos assim que o host abrir a porta.")
+    parser.add_argument("--massa", type=float, default=250.0)
+    parser.add_argument("--lbc", type=int, default=2)
+    parser.add_argument("--lbt", type=int, default=2)
+    parser.add_argument("--mu-s-base", type=float, default=0.28)
+    parser.add_argument("--ganho-lixa", type=float, default=0.035)
+    parser.add_argument("--razao-dinamica", type=float, default=0.82)
+    parser.add_argument("--desvio-mu", type=float, default=0.015)
+    parser.add_argument("--prob-falha-mpu", type=float, default=0.02)
+    parser.add_argument("--prob-falha-sonar", type=float, default=0.02)
+    parser.add_argument("--semente", type=int, default=None)
+    args = parser.parse_args()
+
+    modelo = ModeloAtrito(
+        mu_s_base=args.mu_s_base,
+        ganho_lixa=args.ganho_lixa,
+        razao_dinamica=args.razao_dinamica,
+        desvio_mu=args.desvio_mu,
+        prob_falha_mpu=args.prob_falha_mpu,
+        prob_falha_sonar=args.prob_falha_sonar,
+        semente=args.semente,
+    )
+    dispositivo = DispositivoVirtual(modelo, aceleracao=args.aceleracao, limitar_baud=args.limitar_baud)
+    caminho = dispositivo.iniciar()
+    print(f"Tribômetro virtual em: {caminho}")
+    print("Ctrl+C para encerrar.")
+    sys.stdout.flush()
+    try:
+        if args.ensaios_auto > 0:
+            # Espera o host abrir a porta (o firmware reinicia) antes de disparar a série.
+            while dispositivo.reinicios == 0:
+                time.sleep(0.05)
+            dispositivo.configurar_padrao(args.massa, args.lbc, args.lbt)
+            inicio = time.perf_counter()
+            dispositivo.enfileirar_ensaios(args.ensaios_auto)
+            dispositivo.aguardar_fila()
+            duracao = time.perf_counter() - inicio
+            print(f"{dispositivo.ensaios_concluidos} ensaios em {duracao:.2f} s "
+                  f"({dispositivo.ensaios_concluidos / duracao * 60:.0f} ensaios/min).")
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        dispositivo.parar()
+
+
+if __name__ == "__main__":
+    main()
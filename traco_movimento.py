@@ -0,0 +1,292 @@
+"""Traço do movimento por ensaio e reajuste da aceleração no host.
+
+O firmware (comando 'tr 1') manda, antes de cada resultado, as amostras
+(t, s, pitch) que entraram no ajuste de ``a_est``. Aqui elas são gravadas num
+arquivo .traco por ensaio, junto com os dados do resultado, e reajustadas em
+precisão dupla com mínimos quadrados vetorizados sobre todos os traços de uma
+vez (as somas por ensaio saem de ``np.bincount``):
+
+    origem     s = a/2 t²             mesmo modelo do firmware
+    quadratico s = s0 + v0 t + a/2 t²  deslocamento e velocidade iniciais livres
+
+Para cada modelo saem a aceleração, mu_d recalculado com o ângulo do ensaio,
+o RMS dos resíduos e o R².
+
+Uso: python traco_movimento.py [--dir tracos_ensaio] [--saida reajuste_tracos.csv]
+"""
+import argparse
+import glob
+import math
+import os
+import struct
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+import protocolo_binario
+
+DIR_SCRIPT = os.path.dirname(os.path.abspath(__file__))
+DIR_TRACOS_PADRAO = os.path.join(DIR_SCRIPT, "tracos_ensaio")
+G = 9.80665
+# Arquivo .traco: assinatura, dados do resultado (float64) e carimbo do PC, seguidos do
+# payload do quadro de traço exatamente como veio do firmware (inteiros, 6 bytes por amostra).
+# Ler é um read() e um np.frombuffer, bem mais rápido que .npz/.npy com milhares de arquivos.
+ASSINATURA = b"TRC1"
+ESTRUTURA_ARQUIVO = struct.Struct("<4s6d19s")
+CAMPOS_ARQUIVO = (
+    ("angulo_deg", "angulo_deg"),
+    ("a_firmware", "aceleracao_mps2"),
+    ("mu_d_firmware", "mu_d"),
+    ("massa_g", "massa_g"),
+    ("LBC", "LBC"),
+    ("LBT", "LBT"),
+)
+# Igual a MIN_MOTION_SAMPLES do firmware.
+MIN_AMOSTRAS = 6
+# O leitor entrega os quadros antes das linhas do mesmo bloco lido (até 4 KB, ~30
+# ensaios com traço); o limite cobre um bloco inteiro com folga.
+MAX_PENDENTES = 64
+
+
+def nome_arquivo_traco(t_inicio_ms, timestamp=None):
+    try:
+        instante = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        instante = datetime.now()
+    return f"traco_{instante:%Y%m%d_%H%M%S}_{int(t_inicio_ms)}.traco"
+
+
+def _numero(valor):
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def gravar_traco(diretorio, t_inicio_ms, passo, amostras, registro=None):
+    """Grava o traço (amostras inteiras, como vieram do firmware) e os dados do resultado."""
+    registro = registro or {}
+    os.makedirs(diretorio, exist_ok=True)
+    timestamp = registro.get("Timestamp_PC") or ""
+    caminho = os.path.join(diretorio, nome_arquivo_traco(t_inicio_ms, timestamp))
+    amostras = np.asarray(amostras, dtype=protocolo_binario.dtype_amostra_traco())
+    cabecalho = ESTRUTURA_ARQUIVO.pack(
+        ASSINATURA,
+        *(_numero(registro.get(coluna)) for _, coluna in CAMPOS_ARQUIVO),
+        timestamp.encode("ascii", errors="replace")[:19],
+    )
+    payload = protocolo_binario.ESTRUTURA_TRACO.pack(int(t_inicio_ms), len(amostras), int(passo))
+    temporario = caminho + ".tmp"
+    with open(temporario, "wb") as arquivo:
+        arquivo.write(cabecalho + payload + amostras.tobytes())
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def carregar_traco(caminho):
+    """Retorna um dict com t_s, s_m e pitch_deg (float64) e os metadados gravados."""
+    with open(caminho, "rb") as arquivo:
+        dados = arquivo.read()
+    if dados[:4] != ASSINATURA:
+        raise ValueError(f"Arquivo de traço inválido: {caminho}")
+    valores = ESTRUTURA_ARQUIVO.unpack_from(dados)
+    traco = {nome: valor for (nome, _), valor in zip(CAMPOS_ARQUIVO, valores[1:-1])}
+    traco["timestamp"] = valores[-1].rstrip(b"\0").decode("ascii", errors="replace")
+    t_inicio_ms, passo, amostras = protocolo_binario.decodificar_traco(dados[ESTRUTURA_ARQUIVO.size:])
+    traco["t_inicio_ms"] = t_inicio_ms
+    traco["passo"] = passo
+    traco["arquivo"] = os.path.basename(caminho)
+    traco["t_s"] = amostras["t_ms"] / 1000.0
+    traco["s_m"] = amostras["s_mm"] / 1000.0
+    traco["pitch_deg"] = amostras["pitch_cdeg"] / 100.0
+    return traco
+
+
+class ColetorTracos:
+    """Guarda os traços recebidos até a linha de resultado do mesmo ensaio ser gravada.
+
+    O traço e o resultado são casados pelo ``t_inicio_ms``, então a ordem de
+    chegada não importa; traços sem resultado são descartados depois de
+    ``max_pendentes`` novos.
+    """
+
+    def __init__(self, diretorio=DIR_TRACOS_PADRAO, max_pendentes=MAX_PENDENTES):
+        self.diretorio = diretorio
+        self.max_pendentes = max_pendentes
+        self._pendentes = OrderedDict()
+
+    def receber_quadro(self, tipo, payload):
+        """Retorna (t_inicio_ms, amostras) de um quadro de traço, ou None para outros tipos."""
+        if tipo != protocolo_binario.TIPO_TRACO:
+            return None
+        t_inicio_ms, passo, amostras = protocolo_binario.decodificar_traco(payload)
+        self._pendentes[t_inicio_ms] = (passo, amostras.copy())
+        while len(self._pendentes) > self.max_pendentes:
+            self._pendentes.popitem(last=False)
+        return t_inicio_ms, len(amostras)
+
+    def associar_resultado(self, registro):
+        """Grava o traço pendente do ``registro`` (esquema_registro); retorna o caminho ou None."""
+        if not self._pendentes:
+            return None
+        t_inicio_ms = registro.t_inicio_ms
+        if t_inicio_ms is None:
+            return None
+        pendente = self._pendentes.pop(t_inicio_ms, None)
+        if pendente is None:
+            return None
+        passo, amostras = pendente
+        return gravar_traco(self.diretorio, t_inicio_ms, passo, amostras, registro)
+
+
+def _rms_mm(ss_residuo, n):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(n > 0, np.sqrt(ss_residuo / np.maximum(n, 1)) * 1000.0, np.nan)
+
+
+def _r2(ss_residuo, ss_total):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(ss_total > 0, 1.0 - ss_residuo / ss_total, np.nan)
+
+
+def ajustar_lote(t_s, s_m, quantidades):
+    """Ajusta os dois modelos para vários traços concatenados.
+
+    ``t_s`` e ``s_m`` trazem as amostras de todos os traços em sequência e
+    ``quantidades`` o número de amostras de cada um. Retorna um dict de arrays
+    (um valor por traço) e os resíduos de cada modelo, alinhados com ``t_s``.
+    """
+    t = np.asarray(t_s, dtype=np.float64)
+    s = np.asarray(s_m, dtype=np.float64)
+    n = np.asarray(quantidades, dtype=np.int64)
+    total = len(n)
+    grupos = np.repeat(np.arange(total), n)
+
+    def soma(valores):
+        return np.bincount(grupos, weights=valores, minlength=total)
+
+    t2 = t * t
+    momentos = [n.astype(np.float64), soma(t), soma(t2), soma(t2 * t), soma(t2 * t2)]
+    st = [soma(s), soma(t * s), soma(t2 * s)]
+
+    media_s = np.divide(st[0], n, out=np.zeros(total), where=n > 0)
+    ss_total = soma((s - media_s[grupos]) ** 2)
+
+    # Modelo do firmware: a = 2 * sum(t² s) / sum(t⁴).
+    with np.errstate(divide="ignore", invalid="ignore"):
+        a_origem = np.where((n >= MIN_AMOSTRAS) & (momentos[4] > 1e-9), 2.0 * st[2] / momentos[4], np.nan)
+    residuo_origem = s - 0.5 * a_origem[grupos] * t2
+    ss_origem = soma(residuo_origem ** 2)
+
+    # Quadrático completo: equações normais 3x3 resolvidas em lote.
+    coeficientes = np.full((total, 3), np.nan)
+    validos = n >= max(3, MIN_AMOSTRAS)
+    if validos.any():
+        m = [v[validos] for v in momentos]
+        matrizes = np.stack([
+            np.stack([m[0], m[1], m[2]], axis=-1),
+            np.stack([m[1], m[2], m[3]], axis=-1),
+            np.stack([m[2], m[3], m[4]], axis=-1),
+        ], axis=1)
+        lados = np.stack([v[validos] for v in st], axis=-1)
+        singulares = np.abs(np.linalg.det(matrizes)) < 1e-18
+        matrizes[singulares] = np.eye(3)
+        resolvidos = np.linalg.solve(matrizes, lados[..., None])[..., 0]
+        resolvidos[singulares] = np.nan
+        coeficientes[validos] = resolvidos
+    s0, v0, meia_a = coeficientes.T
+    residuo_quadratico = s - (s0[grupos] + v0[grupos] * t + meia_a[grupos] * t2)
+    ss_quadratico = soma(residuo_quadratico ** 2)
+
+    return {
+        "n": n,
+        "a_origem": a_origem,
+        "rms_origem_mm": _rms_mm(ss_origem, n),
+        "r2_origem": _r2(ss_origem, ss_total),
+        "a_quadratico": 2.0 * meia_a,
+        "v0_mps": v0,
+        "s0_mm": s0 * 1000.0,
+        "rms_quadratico_mm": _rms_mm(ss_quadratico, n),
+        "r2_quadratico": _r2(ss_quadratico, ss_total),
+        "residuos_origem_m": residuo_origem,
+        "residuos_quadratico_m": residuo_quadratico,
+    }
+
+
+def mu_dinamico(aceleracao, angulo_deg):
+    """mu_d = (g sen(θ) - a) / (g cos(θ)), como o firmware."""
+    theta = np.radians(np.asarray(angulo_deg, dtype=np.float64))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (G * np.sin(theta) - aceleracao) / (G * np.cos(theta))
+
+
+def ajustar_traco(traco):
+    """Reajuste de um único traço (dict de ``carregar_traco``), com os resíduos."""
+    r = ajustar_lote(traco["t_s"], traco["s_m"], [len(traco["t_s"])])
+    resultado = {chave: (valor if chave.startswith("residuos") else valor[0]) for chave, valor in r.items()}
+    resultado["mu_d_origem"] = float(mu_dinamico(resultado["a_origem"], traco["angulo_deg"]))
+    resultado["mu_d_quadratico"] = float(mu_dinamico(resultado["a_quadratico"], traco["angulo_deg"]))
+    return resultado
+
+
+def listar_tracos(diretorio=DIR_TRACOS_PADRAO):
+    return sorted(glob.glob(os.path.join(diretorio, "traco_*.traco")))
+
+
+def reajustar_tracos(caminhos):
+    """Carrega os traços e devolve um DataFrame com um reajuste por ensaio."""
+    import pandas as pd
+
+    tracos = [carregar_traco(c) for c in caminhos]
+    if not tracos:
+        return pd.DataFrame()
+    r = ajustar_lote(
+        np.concatenate([tr["t_s"] for tr in tracos]),
+        np.concatenate([tr["s_m"] for tr in tracos]),
+        [len(tr["t_s"]) for tr in tracos],
+    )
+    df = pd.DataFrame({
+        "arquivo": [tr["arquivo"] for tr in tracos],
+        "timestamp": [tr["timestamp"] for tr in tracos],
+        "t_inicio_ms": [int(tr["t_inicio_ms"]) for tr in tracos],
+        "passo": [int(tr["passo"]) for tr in tracos],
+        "massa_g": [float(tr["massa_g"]) for tr in tracos],
+        "LBC": [float(tr["LBC"]) for tr in tracos],
+        "LBT": [float(tr["LBT"]) for tr in tracos],
+        "angulo_deg": [float(tr["angulo_deg"]) for tr in tracos],
+        "a_firmware": [float(tr["a_firmware"]) for tr in tracos],
+        "mu_d_firmware": [float(tr["mu_d_firmware"]) for tr in tracos],
+    })
+    for chave, valores in r.items():
+        if not chave.startswith("residuos"):
+            df[chave] = valores
+    df["mu_d_origem"] = mu_dinamico(df["a_origem"].to_numpy(), df["angulo_deg"].to_numpy())
+    df["mu_d_quadratico"] = mu_dinamico(df["a_quadratico"].to_numpy(), df["angulo_deg"].to_numpy())
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reajusta a aceleração e mu_d a partir dos traços gravados.")
+    parser.add_argument("--dir", default=DIR_TRACOS_PADRAO, help="Pasta com os arquivos traco_*.traco.")
+    parser.add_argument("--saida", default=None, help="CSV de saída (padrão: reajuste_tracos.csv na pasta).")
+    args = parser.parse_args()
+    caminhos = listar_tracos(args.dir)
+    if not caminhos:
+        print(f"Nenhum traço em {args.dir}.")
+        return
+    df = reajustar_tracos(caminhos)
+    saida = args.saida or os.path.join(args.dir, "reajuste_tracos.csv")
+    df.to_csv(saida, sep=";", index=False)
+    diferenca = (df["a_origem"] - df["a_firmware"]).abs()
+    print(f"{len(df)} traços reajustados -> {saida}")
+    if diferenca.notna().any():
+        print(f"|a_origem - a_firmware| máx: {diferenca.max():.5f} m/s²")
+    print(f"RMS dos resíduos (mediana): origem {df['rms_origem_mm'].median():.2f} mm | "
+          f"quadrático {df['rms_quadratico_mm'].median():.2f} mm")
+    if not math.isnan(df["r2_quadratico"].median()):
+        print(f"R² (mediana): origem {df['r2_origem'].median():.4f} | quadrático {df['r2_quadratico'].median():.4f}")
+
+
+if __name__ == "__main__":
+    main()
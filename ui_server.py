@@ -1,42 +1,184 @@
+import atexit
+import json
+import logging
 import os
 import time
 import math
-import csv
+import re
 import threading
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
 import webbrowser
 
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, send_file
 import serial
 import serial.tools.list_ports
 
+import esquema_registro
+import indice_resultados
+import log_eventos
+from galeria_graficos import GaleriaGraficos
+import metricas
+import perfil_etapas
+import preaquecimento
+from buffer_log import BufferCircular
+from diario_resultados import DiarioResultados, politica_do_ambiente
+from fila_tarefas import FilaTarefas
+from leitor_serial import LeitorLinhasSerial
+from resumo_incremental import ResumoIncremental
+
 BAUD_RATE = 115200
 SCRIPT_DIR = Path(__file__).resolve().parent
 CSV_NOME = "resultados_tribometro.csv"
 CAMINHO_CSV_PADRAO = SCRIPT_DIR / CSV_NOME
-CAMINHO_LOG = SCRIPT_DIR / "interface_tribometro.log"
+DIR_COLUNAR = SCRIPT_DIR / "resultados_tribometro_colunar"
+DIR_TRACOS = SCRIPT_DIR / "tracos_ensaio"
+CAMINHO_RESUMO = SCRIPT_DIR / "resumo_incremental.json"
+CAMINHO_EVENTOS = SCRIPT_DIR / "eventos_ui.jsonl"
 DIR_GRAFICOS_ENSAIO = SCRIPT_DIR / "graficos_ensaio"
 DIR_SAIDA_ANALISE = SCRIPT_DIR / "saida_analise"
 DIR_GRAFICOS_ANALISE = DIR_SAIDA_ANALISE / "graficos"
 DIR_GRAFICOS_RESUMO = DIR_GRAFICOS_ANALISE / "resumo"
+DIR_MINIATURAS = SCRIPT_DIR / "graficos_miniaturas"
+# URLs com ?v=<versão> nunca mudam de conteúdo: o navegador guarda sem revalidar.
+MAX_AGE_VERSIONADO_S = 365 * 24 * 3600
 
 MAX_ALT_FILES = 5
+# Bancada que atende as rotas sem /devices/<id> e grava nos caminhos padrão.
+ID_PADRAO = "principal"
+# Começa com letra para não colidir com os alternativos resultados_tribometro_<n>.csv.
+PADRAO_ID_DISPOSITIVO = re.compile(r"^[A-Za-z][A-Za-z0-9_-]{0,31}$")
+CAPACIDADE_LOG = 1000
+# Nível no log de eventos em disco, pelo prefixo da linha do monitor.
+NIVEIS_PREFIXO = (("[ERRO", logging.ERROR), ("[AVISO", logging.WARNING))
+# Sem novidades, o /api/eventos manda um comentário neste intervalo para manter a conexão viva.
+INTERVALO_PING_SSE_S = 15
 
 app = Flask(__name__, static_folder="web", static_url_path="")
 
+# /api/metrics (Prometheus). Os histogramas são medidos no caminho quente; o
+# resto é lido só na coleta, dos contadores que o código já mantém.
+registro_metricas = metricas.RegistroMetricas()
+LATENCIA_INGESTAO = registro_metricas.histograma(
+    "tribo_ingestao_csv_segundos", "Da linha completa na serial até a gravação no CSV.",
+    metricas.LIMITES_LATENCIA_S, ("dispositivo",))
+TROCAS_ARQUIVO = registro_metricas.contador(
+    "tribo_trocas_arquivo_csv_total", "Trocas do CSV de destino para um arquivo alternativo.", ("dispositivo",))
+LATENCIA_REQUISICAO = registro_metricas.histograma(
+    "tribo_requisicao_segundos", "Tempo de resposta por rota da API.", metricas.LIMITES_LATENCIA_S,
+    ("rota", "metodo"))
+DURACAO_TAREFA = registro_metricas.histograma(
+    "tribo_tarefa_segundos", "Duração de executar_analise e gerar_grafico_ensaio.",
+    metricas.LIMITES_DURACAO_S, ("tarefa",))
+
 
 class GerenciadorSerial:
-    def __init__(self):
+    """Uma bancada: porta, thread de leitura, escrita, log e arquivos de saída próprios.
+
+    Sem caminhos explícitos usa os padrões do módulo (CAMINHO_CSV_PADRAO etc.).
+    """
+
+    def __init__(self, identificador=ID_PADRAO, caminho_csv=None, caminho_resumo=None, dir_colunar=None,
+                 dir_tracos=None, dir_saida_analise=None):
+        self.id = identificador
+        self.porta = None
+        self._caminho_csv = caminho_csv
+        self._dir_colunar = dir_colunar
+        self._dir_tracos = dir_tracos
+        self._dir_saida_analise = dir_saida_analise
         self.ser = None
+        self._trava_escrita = threading.Lock()
         self._stop = threading.Event()
         self._thread = None
-        self._buffer = bytearray()
-        self._lock = threading.Lock()
-        self._log = []
-        self._log_idx = 0
+        self._log = BufferCircular(CAPACIDADE_LOG)
+        self._leitor = None
+        self._trava_contagem = threading.Lock()
+        self._bytes_anteriores = 0
+        self._linhas_anteriores = 0
+        self._instante_linha = None
+        self._metrica_ingestao = LATENCIA_INGESTAO.filho(identificador)
+        self._metrica_trocas = TROCAS_ARQUIVO.filho(identificador)
+        self._versao_status = 0
         self._cabecalho_atual = None
         self._arquivo_ativo = None
+        self._diario = DiarioResultados(
+            self._montar_candidatos_saida,
+            politica=politica_do_ambiente(self._adicionar_log),
+            ao_bloqueio=self._avisar_bloqueio,
+            ao_truncar=self._avisar_linha_truncada,
+        )
+        self._armazem = self._criar_armazem_colunar()
+        self._resumo = ResumoIncremental(str(caminho_resumo or CAMINHO_RESUMO))
+        self._analisador = esquema_registro.AnalisadorLinhas()
+        # Criado no primeiro quadro de traço ('tr 1' no firmware); importa NumPy só então.
+        self._tracos = None
+
+    @property
+    def contagem_serial(self):
+        """(bytes, linhas) lidos da serial em todas as conexões desta bancada."""
+        with self._trava_contagem:
+            leitor = self._leitor
+            if leitor is None:
+                return self._bytes_anteriores, self._linhas_anteriores
+            return self._bytes_anteriores + leitor.bytes_lidos, self._linhas_anteriores + leitor.linhas_lidas
+
+    @property
+    def ocupacao_log(self):
+        return len(self._log)
+
+    @property
+    def caminho_csv(self):
+        return Path(self._caminho_csv) if self._caminho_csv else CAMINHO_CSV_PADRAO
+
+    @property
+    def dir_colunar(self):
+        return Path(self._dir_colunar) if self._dir_colunar else DIR_COLUNAR
+
+    @property
+    def dir_saida_analise(self):
+        return Path(self._dir_saida_analise) if self._dir_saida_analise else DIR_SAIDA_ANALISE
+
+    @property
+    def dir_graficos_analise(self):
+        return self.dir_saida_analise / "graficos" if self._dir_saida_analise else DIR_GRAFICOS_ANALISE
+
+    @property
+    def dir_graficos_resumo(self):
+        return self.dir_graficos_analise / "resumo" if self._dir_saida_analise else DIR_GRAFICOS_RESUMO
+
+    def caminho_dados_analise(self):
+        """Pasta colunar quando o armazém está ativo e tem todos os ensaios do CSV, senão o CSV.
+
+        Descarrega antes os ensaios que o armazém ainda guarda em memória: sem
+        isso a análise deixaria de fora justamente os mais recentes.
+        """
+        if self._armazem is None:
+            return str(self.caminho_csv)
+        try:
+            import armazenamento_colunar
+            self._armazem.descarregar()
+            if armazenamento_colunar.cobre_csv(str(self.dir_colunar), str(self.caminho_csv)):
+                return str(self.dir_colunar)
+        except Exception as e:
+            self._adicionar_log(f"[AVISO] Falha ao gravar parte colunar ({e}); a análise usará o CSV.")
+            return str(self.caminho_csv)
+        self._adicionar_log(f"[AVISO] {self.dir_colunar.name} não tem todos os ensaios do CSV; a análise usará "
+                            "o CSV (converta o histórico com 'python armazenamento_colunar.py converter').")
+        return str(self.caminho_csv)
+
+    def _criar_armazem_colunar(self):
+        if not os.environ.get("TRIBO_COLUNAR"):
+            return None
+        try:
+            import armazenamento_colunar
+            return armazenamento_colunar.criar_armazem_do_ambiente(
+                str(self.dir_colunar),
+                ao_erro=lambda e: self._adicionar_log(f"[ERRO] Falha ao gravar parte colunar: {e}"),
+            )
+        except (RuntimeError, ValueError) as e:
+            self._adicionar_log(f"[AVISO] Armazenamento colunar desativado: {e}")
+            return None
 
     def conectado(self):
         return self.ser is not None and self.ser.is_open
@@ -44,49 +186,82 @@ class GerenciadorSerial:
     def conectar(self, porta):
         if self.conectado():
             return False, "Já conectado."
+        self.porta = porta
         try:
             self.ser = serial.Serial(porta, BAUD_RATE, timeout=1)
             time.sleep(2)
         except Exception as e:
             self.ser = None
+            self.porta = None
             return False, f"Erro ao abrir porta: {e}"
         self._stop.clear()
         self._thread = threading.Thread(target=self._ler_serial, daemon=True)
         self._thread.start()
+        self._sinalizar_status()
         return True, "Conectado."
 
     def desconectar(self):
         self._stop.set()
         if self.ser and self.ser.is_open:
+            try:
+                # Acorda a thread de leitura que está bloqueada em read().
+                self.ser.cancel_read()
+            except Exception:
+                pass
             try:
                 self.ser.close()
             except Exception:
                 pass
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        self._thread = None
         self.ser = None
+        self.porta = None
+        self._sinalizar_status()
+        self._diario.fechar()
+        self._resumo.fechar()
+        if self._armazem is not None:
+            try:
+                self._armazem.fechar()
+            except Exception as e:
+                self._adicionar_log(f"[ERRO] Falha ao gravar parte colunar: {e}")
 
     def enviar(self, comando):
         if not self.conectado():
             return False, "Não conectado."
         try:
-            self.ser.write((comando + "\n").encode("utf-8"))
+            # Requisições simultâneas para a mesma bancada não intercalam bytes.
+            with self._trava_escrita:
+                self.ser.write((comando + "\n").encode("utf-8"))
             return True, "OK"
         except Exception as e:
             return False, f"Erro ao enviar: {e}"
 
     def _adicionar_log(self, linha):
-        with self._lock:
-            ts = datetime.now().strftime("%H:%M:%S")
-            self._log.append(f"[{ts}] {linha}")
-            if len(self._log) > 1000:
-                self._log = self._log[-800:]
-            self._log_idx += 1
+        ts = datetime.now().strftime("%H:%M:%S")
+        self._log.anexar(f"[{ts}] {linha}")
+        if log_persistente is not None:
+            nivel = next((n for prefixo, n in NIVEIS_PREFIXO if linha.startswith(prefixo)), logging.INFO)
+            log_persistente.registrar(linha, nivel, dispositivo=self.id)
+
+    def _sinalizar_status(self):
+        # Acorda os clientes de /api/eventos, que esperam no buffer do log.
+        self._versao_status += 1
+        self._log.notificar()
+
+    def aguardar_eventos(self, ultimo_seq, versao_status, timeout):
+        """Espera linha de log com sequência > ``ultimo_seq`` ou mudança de status.
+
+        Retorna (linhas, último seq, perdidas, versão do status); ``linhas`` vem
+        vazia no timeout.
+        """
+        self._log.aguardar(ultimo_seq, timeout, lambda: self._versao_status != versao_status)
+        linhas, seq, perdidas = self._log.ler_desde(ultimo_seq)
+        return linhas, seq, perdidas, self._versao_status
 
     def obter_log(self, desde=0):
-        with self._lock:
-            if desde < 0:
-                desde = 0
-            linhas = self._log[desde:]
-            return linhas, len(self._log)
+        """Linhas com sequência > ``desde``. Retorna (linhas, última sequência, perdidas)."""
+        return self._log.ler_desde(desde)
 
     def _decodificar(self, dados):
         try:
@@ -95,12 +270,13 @@ class GerenciadorSerial:
             return dados.decode("latin-1", errors="replace")
 
     def _montar_candidatos_saida(self):
-        base_padrao = str(CAMINHO_CSV_PADRAO.with_suffix(""))
-        ext_padrao = CAMINHO_CSV_PADRAO.suffix
+        caminho_csv = self.caminho_csv
+        base_padrao = str(caminho_csv.with_suffix(""))
+        ext_padrao = caminho_csv.suffix
         candidatos = []
         if self._arquivo_ativo:
             candidatos.append(self._arquivo_ativo)
-        candidatos.append(str(CAMINHO_CSV_PADRAO))
+        candidatos.append(str(caminho_csv))
         for i in range(1, MAX_ALT_FILES + 1):
             candidatos.append(f"{base_padrao}_{i}{ext_padrao}")
         vistos = set()
@@ -112,81 +288,211 @@ class GerenciadorSerial:
             unicos.append(caminho)
         return unicos
 
-    def _salvar_em_csv(self, linha_dados):
-        linha_dados = linha_dados.strip()
-        if not linha_dados:
+    def _salvar_em_csv(self, registro):
+        colunas = registro.colunas
+        eh_cabecalho = registro.eh_cabecalho
+        try:
+            arquivo_alvo = self._diario.gravar(colunas, eh_cabecalho)
+        except Exception as e:
+            self._adicionar_log(f"[ERRO] Falha ao salvar: {e}")
+            return
+        if arquivo_alvo is None:
             return
-        eh_cabecalho = "massa_g" in linha_dados and "LBC" in linha_dados
-        candidatos = self._montar_candidatos_saida()
-        for arquivo_alvo in candidatos:
+        if self._instante_linha is not None:
+            self._metrica_ingestao.observar(time.perf_counter() - self._instante_linha)
+        if str(arquivo_alvo) != (self._arquivo_ativo or str(self.caminho_csv)):
+            self._metrica_trocas.incrementar()
+        self._arquivo_ativo = arquivo_alvo
+        indice_resultados.notificar_gravacao(arquivo_alvo)
+        try:
+            self._resumo.sincronizar(arquivo_alvo)
+        except OSError as e:
+            self._adicionar_log(f"[ERRO] Falha ao atualizar resumo: {e}")
+        if self._armazem is not None:
             try:
-                arquivo_existe = os.path.isfile(arquivo_alvo)
-                arquivo_tem_dados = arquivo_existe and os.path.getsize(arquivo_alvo) > 0
-                with open(arquivo_alvo, "a", newline="", encoding="utf-8-sig") as arquivo:
-                    if eh_cabecalho and arquivo_tem_dados:
-                        self._arquivo_ativo = arquivo_alvo
-                        return
-                    escritor = csv.writer(arquivo, delimiter=";")
-                    colunas = linha_dados.split(";")
-                    if not eh_cabecalho:
-                        colunas.append(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                    else:
-                        colunas.append("Timestamp_PC")
-                    escritor.writerow(colunas)
-                self._arquivo_ativo = arquivo_alvo
-                return
-            except PermissionError as e:
-                self._adicionar_log(f"[AVISO] Arquivo bloqueado: {arquivo_alvo} ({e})")
-                continue
+                self._armazem.anexar(colunas, eh_cabecalho, arquivo_alvo)
             except Exception as e:
-                self._adicionar_log(f"[ERRO] Falha ao salvar: {e}")
-                return
+                self._adicionar_log(f"[ERRO] Falha ao gravar parte colunar: {e}")
+        if self._tracos is not None and not eh_cabecalho:
+            try:
+                self._tracos.associar_resultado(registro)
+            except OSError as e:
+                self._adicionar_log(f"[ERRO] Falha ao gravar traço: {e}")
+
+    def _receber_quadro(self, tipo, payload):
+        if self._tracos is None:
+            import traco_movimento
+            self._tracos = traco_movimento.ColetorTracos(str(self._dir_tracos or DIR_TRACOS))
+        try:
+            recebido = self._tracos.receber_quadro(tipo, payload)
+        except ValueError as e:
+            self._adicionar_log(f"[AVISO] Quadro de traço inválido: {e}")
+            return
+        if recebido is not None:
+            self._adicionar_log(f"[Arduino] Traço do movimento: {recebido[1]} amostra(s).")
+
+    def obter_resumo(self):
+        # Alcança linhas gravadas enquanto o servidor estava parado (só o trecho novo).
+        self._resumo.sincronizar(self._arquivo_ativo or str(self.caminho_csv))
+        return {
+            "grupos": self._resumo.resumo(),
+            "ensaios_validos": self._resumo.ensaios_validos,
+            "ensaios_descartados": self._resumo.ensaios_descartados,
+        }
+
+    def para_dict(self):
+        return {
+            "id": self.id,
+            "porta": self.porta,
+            "conectado": self.conectado(),
+            "csv": self._arquivo_ativo or str(self.caminho_csv),
+            "ultimo_log": self._log.ultimo_seq,
+        }
+
+    def _avisar_bloqueio(self, arquivo_alvo, erro):
+        self._adicionar_log(f"[AVISO] Arquivo bloqueado: {arquivo_alvo} ({erro})")
+
+    def _avisar_linha_truncada(self, arquivo_alvo, descartados):
+        self._adicionar_log(f"[AVISO] Última linha incompleta removida de {arquivo_alvo} ({descartados} bytes).")
 
     def _ler_serial(self):
+        leitor = LeitorLinhasSerial(self.ser, ao_quadro=self._receber_quadro)
+        with self._trava_contagem:
+            self._leitor = leitor
+        try:
+            self._ler_linhas(leitor)
+        finally:
+            with self._trava_contagem:
+                self._bytes_anteriores += leitor.bytes_lidos
+                self._linhas_anteriores += leitor.linhas_lidas
+                self._leitor = None
+
+    def _ler_linhas(self, leitor):
         while not self._stop.is_set():
             try:
-                if self.ser and self.ser.in_waiting > 0:
-                    byte_lido = self.ser.read()
-                    if byte_lido == b"\n":
-                        linha = self._decodificar(self._buffer).strip()
-                        if linha:
-                            self._adicionar_log(f"[Arduino] {linha}")
-                            if linha.count(";") > 5:
-                                self._salvar_em_csv(linha)
-                        self._buffer.clear()
-                    else:
-                        self._buffer.extend(byte_lido)
+                linhas = leitor.ler_linhas()
             except Exception as e:
-                self._adicionar_log(f"[ERRO Serial] {e}")
+                if not self._stop.is_set():
+                    self._adicionar_log(f"[ERRO Serial] {e}")
+                    self._sinalizar_status()
                 self._stop.set()
                 break
-            time.sleep(0.01)
+            if not linhas:
+                continue
+            # Linhas do mesmo bloco ficaram completas juntas.
+            self._instante_linha = time.perf_counter()
+            if preaquecedor is not None:
+                preaquecedor.marcar_atividade()
+            for dados in linhas:
+                linha = self._decodificar(dados).strip()
+                if linha:
+                    self._adicionar_log(f"[Arduino] {linha}")
+                    registro = self._analisador.analisar(linha)
+                    if registro is not None:
+                        self._salvar_em_csv(registro)
+
+
+class RegistroDispositivos:
+    """Bancadas conectadas ao mesmo servidor, por identificador.
+
+    Cada uma tem o seu GerenciadorSerial (thread de leitura, log, diário e
+    resumo próprios), então a gravação de uma nunca espera pela outra. A
+    bancada ID_PADRAO sempre existe e grava nos caminhos padrão; as demais
+    gravam em resultados_tribometro_<id>.csv e afins.
+    """
 
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._dispositivos = OrderedDict()
+        self._dispositivos[ID_PADRAO] = GerenciadorSerial(ID_PADRAO)
+
+    def obter(self, identificador):
+        with self._trava:
+            return self._dispositivos.get(identificador)
+
+    def listar(self):
+        with self._trava:
+            return list(self._dispositivos.values())
+
+    def _criar(self, identificador):
+        base = CAMINHO_CSV_PADRAO
+        return GerenciadorSerial(
+            identificador,
+            caminho_csv=base.with_name(f"{base.stem}_{identificador}{base.suffix}"),
+            caminho_resumo=CAMINHO_RESUMO.with_name(f"{CAMINHO_RESUMO.stem}_{identificador}{CAMINHO_RESUMO.suffix}"),
+            dir_colunar=DIR_COLUNAR.with_name(f"{DIR_COLUNAR.name}_{identificador}"),
+            dir_tracos=DIR_TRACOS / identificador,
+            # Pasta irmã, não subpasta: uma bancada chamada "graficos" não cai nos gráficos da principal.
+            dir_saida_analise=DIR_SAIDA_ANALISE.with_name(f"{DIR_SAIDA_ANALISE.name}_{identificador}"),
+        )
 
-gerenciador = GerenciadorSerial()
+    def _reservar(self, gerenciador, porta):
+        # Chamado com a trava: uma porta só pode estar em uma bancada.
+        if gerenciador.porta is not None:
+            return False, "Já conectado."
+        for outro in self._dispositivos.values():
+            if outro is not gerenciador and outro.porta == porta:
+                return False, f"Porta {porta} já está em uso pela bancada '{outro.id}'."
+        gerenciador.porta = porta
+        return True, ""
+
+    def conectar(self, identificador, porta):
+        with self._trava:
+            gerenciador = self._dispositivos.get(identificador)
+            if gerenciador is None:
+                return False, "Dispositivo não encontrado."
+            ok, msg = self._reservar(gerenciador, porta)
+        if not ok:
+            return False, msg
+        # Fora da trava: abrir a porta leva ~2 s (reset do Arduino). A porta fica reservada
+        # desde já e é liberada por conectar() se a abertura falhar.
+        return gerenciador.conectar(porta)
+
+    def adicionar(self, porta, identificador=None):
+        """Registra uma bancada e conecta. Retorna (ok, msg, gerenciador)."""
+        if identificador is None:
+            identificador = re.sub(r"[^A-Za-z0-9_-]", "", os.path.basename(porta))
+            if identificador and not identificador[0].isalpha():
+                identificador = "b" + identificador
+        if not identificador or not PADRAO_ID_DISPOSITIVO.match(identificador):
+            return False, "Identificador inválido (letras, números, '_' e '-', começando com letra).", None
+        with self._trava:
+            gerenciador = self._dispositivos.get(identificador)
+            if gerenciador is None:
+                gerenciador = self._criar(identificador)
+                self._dispositivos[identificador] = gerenciador
+        ok, msg = self.conectar(identificador, porta)
+        return ok, msg, gerenciador
+
+    def remover(self, identificador):
+        if identificador == ID_PADRAO:
+            return False, "A bancada principal não pode ser removida."
+        with self._trava:
+            gerenciador = self._dispositivos.pop(identificador, None)
+        if gerenciador is None:
+            return False, "Dispositivo não encontrado."
+        gerenciador.desconectar()
+        return True, "Removido."
+
+    def desconectar_todos(self):
+        for gerenciador in self.listar():
+            gerenciador.desconectar()
+
+
+# Iniciados em main(); importar o módulo (testes, benchmarks) não dispara o aquecimento
+# nem grava eventos em disco. Definidos antes do registro: a bancada padrão já pode
+# registrar avisos ao ser criada.
+preaquecedor = None
+log_persistente = None
+registro = RegistroDispositivos()
+gerenciador = registro.obter(ID_PADRAO)
 
 
 def _ler_resultado_do_fim(caminho, deslocamento):
-    cabecalho = None
-    linhas_dados = []
-    with open(caminho, "r", newline="", encoding="utf-8-sig") as arquivo:
-        leitor = csv.reader(arquivo, delimiter=";")
-        for linha in leitor:
-            if not linha:
-                continue
-            linha_minuscula = [c.strip().lower() for c in linha]
-            if "massa_g" in linha_minuscula and "lbc" in linha_minuscula:
-                cabecalho = [c.strip() for c in linha]
-                continue
-            if cabecalho is None:
-                continue
-            if len(linha) >= len(cabecalho) - 1:
-                linhas_dados.append([c.strip() for c in linha])
-    if cabecalho is None or not linhas_dados:
-        return None
-    if deslocamento < 0 or deslocamento >= len(linhas_dados):
+    encontrado = indice_resultados.ler_linha_do_fim(caminho, deslocamento)
+    if encontrado is None:
         return None
-    linha_escolhida = linhas_dados[-1 - deslocamento]
+    cabecalho, linha_escolhida = encontrado
     indice = {nome: i for i, nome in enumerate(cabecalho)}
 
     def obter(nome):
@@ -218,16 +524,20 @@ def _converter_float(valor):
     return numero
 
 
-def gerar_grafico_ensaio(deslocamento=0):
-    try:
-        import matplotlib.pyplot as plt
-    except Exception as e:
-        return False, f"Matplotlib indisponível: {e}"
+PONTOS_CURVA_TAN = 200
+
+
+def dados_grafico_ensaio(caminho_csv, deslocamento=0):
+    """Números do gráfico μ x tan(θ) de um ensaio: (True, dict) ou (False, mensagem).
 
-    if not CAMINHO_CSV_PADRAO.is_file():
-        return False, "CSV padrão não encontrado."
+    A curva tan(θ) é a reta y = x de 0 até tan(theta_max_deg), com
+    ``pontos`` segmentos; o navegador a desenha sozinho a partir daqui.
+    """
+    caminho_csv = Path(caminho_csv)
+    if not caminho_csv.is_file():
+        return False, "CSV não encontrado."
 
-    dados = _ler_resultado_do_fim(str(CAMINHO_CSV_PADRAO), deslocamento)
+    dados = _ler_resultado_do_fim(str(caminho_csv), deslocamento)
     if not dados:
         return False, f"Não existe ensaio para g {deslocamento}."
 
@@ -242,8 +552,50 @@ def gerar_grafico_ensaio(deslocamento=0):
     if mu_s is None and mu_d is None:
         return False, "mu_s e mu_d inválidos no ensaio."
 
-    theta_max = max(35.0, angulo_deg * 1.2)
-    angulos = [i * theta_max / 200.0 for i in range(201)]
+    theta_max_deg = max(35.0, angulo_deg * 1.2)
+    tan_theta_max = math.tan(math.radians(theta_max_deg))
+    limite_y = max(v for v in (tan_theta_max, mu_s, mu_d) if v is not None)
+    return True, {
+        "deslocamento": deslocamento,
+        "massa_g": massa_g,
+        "LBC": dados.get("LBC"),
+        "LBT": dados.get("LBT"),
+        "angulo_deg": angulo_deg,
+        "mu_s": mu_s,
+        "mu_d": mu_d,
+        "carimbo_tempo_pc": dados.get("carimbo_tempo_pc"),
+        "tan_theta": math.tan(math.radians(angulo_deg)),
+        "theta_max_deg": theta_max_deg,
+        "tan_theta_max": tan_theta_max,
+        "pontos": PONTOS_CURVA_TAN,
+        "x_max": tan_theta_max * 1.05,
+        "y_max": limite_y * 1.15,
+    }
+
+
+def gerar_grafico_ensaio(deslocamento=0, tarefa=None, g=None):
+    """Exporta o gráfico do ensaio da bancada ``g`` (padrão: a principal) em PNG (matplotlib);
+    a página desenha o mesmo gráfico sem ele."""
+    g = g or gerenciador
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except Exception as e:
+        return False, f"Matplotlib indisponível: {e}"
+
+    ok, dados = dados_grafico_ensaio(g.caminho_csv, deslocamento)
+    if not ok:
+        return False, dados
+    massa_g = dados["massa_g"]
+    angulo_deg = dados["angulo_deg"]
+    mu_s = dados["mu_s"]
+    mu_d = dados["mu_d"]
+
+    if tarefa is not None:
+        tarefa.atualizar("desenhando gráfico", 30)
+
+    angulos = [i * dados["theta_max_deg"] / dados["pontos"] for i in range(dados["pontos"] + 1)]
     tan_thetas = [math.tan(math.radians(a)) for a in angulos]
 
     plt.figure(figsize=(8, 4.6))
@@ -252,7 +604,7 @@ def gerar_grafico_ensaio(deslocamento=0):
         plt.axhline(mu_s, color="#c0392b", linewidth=2.2, label=f"μ_s = {mu_s:.3f}")
     if mu_d is not None:
         plt.axhline(mu_d, color="#e67e22", linewidth=2.2, label=f"μ_d = {mu_d:.3f}")
-    tan_theta_ensaio = math.tan(math.radians(angulo_deg))
+    tan_theta_ensaio = dados["tan_theta"]
     plt.axvline(tan_theta_ensaio, color="#555555", linestyle="--", linewidth=1)
     plt.text(
         tan_theta_ensaio * 1.02,
@@ -268,20 +620,16 @@ def gerar_grafico_ensaio(deslocamento=0):
     massa_str = f"{massa_g:.1f} g" if massa_g is not None else "?"
     titulo_extra = f"LBC={lbc_valor} | LBT={lbt_valor} | m={massa_str}"
     plt.title(f"Coeficientes vs tan(θ) do ensaio\n{titulo_extra}")
-    limites = [max(tan_thetas)]
-    if mu_s is not None:
-        limites.append(mu_s)
-    if mu_d is not None:
-        limites.append(mu_d)
-    limite_max = max(limites)
-    plt.xlim(0, max(tan_thetas) * 1.05)
-    plt.ylim(0, limite_max * 1.15)
+    plt.xlim(0, dados["x_max"])
+    plt.ylim(0, dados["y_max"])
     plt.legend(frameon=False)
 
     plt.tight_layout()
 
     DIR_GRAFICOS_ENSAIO.mkdir(parents=True, exist_ok=True)
     carimbo_tempo_pc = dados.get("carimbo_tempo_pc")
+    # Outras bancadas levam o id no nome para não sobrescrever o PNG da principal.
+    prefixo = "grafico_ensaio" if g.id == ID_PADRAO else f"grafico_ensaio_{g.id}"
     if carimbo_tempo_pc:
         carimbo_tempo_seguro = (
             carimbo_tempo_pc.replace(":", "-")
@@ -289,24 +637,63 @@ def gerar_grafico_ensaio(deslocamento=0):
             .replace("\\", "-")
             .replace(" ", "_")
         )
-        caminho_saida = DIR_GRAFICOS_ENSAIO / f"grafico_ensaio_{carimbo_tempo_seguro}.png"
+        caminho_saida = DIR_GRAFICOS_ENSAIO / f"{prefixo}_{carimbo_tempo_seguro}.png"
     else:
-        caminho_saida = DIR_GRAFICOS_ENSAIO / "grafico_ensaio_atual.png"
+        caminho_saida = DIR_GRAFICOS_ENSAIO / f"{prefixo}_atual.png"
 
-    plt.savefig(caminho_saida, dpi=200)
+    if tarefa is not None:
+        tarefa.atualizar("salvando gráfico", 80)
+    # Grava num temporário para o navegador nunca listar um PNG pela metade.
+    temporario = caminho_saida.with_suffix(".tmp.png")
+    plt.savefig(temporario, dpi=200)
     plt.close()
+    os.replace(temporario, caminho_saida)
     return True, str(caminho_saida)
 
 
-def executar_analise():
+def executar_analise(tarefa=None, perfil=False, perfil_etapa=None, g=None):
+    g = g or gerenciador
     try:
         import analise_de_ensaios
     except Exception as e:
         return False, f"Erro ao importar análise: {e}"
-    codigo = analise_de_ensaios.executar_analise(str(CAMINHO_CSV_PADRAO))
+    progresso = tarefa.atualizar if tarefa is not None else None
+    caminho_perfil = str(perfil_etapas.caminho_relatorio_padrao(g.dir_saida_analise / "perfil")) if perfil else None
+    codigo = analise_de_ensaios.executar_analise(g.caminho_dados_analise(), progresso=progresso,
+                                                 perfil=caminho_perfil, perfil_etapa=perfil_etapa,
+                                                 dir_saida=str(g.dir_saida_analise))
+    sufixo = f" Perfil em: {caminho_perfil}" if caminho_perfil else ""
     if codigo != 0:
-        return False, "Falha ao executar análise."
-    return True, "Análise concluída."
+        return False, "Falha ao executar análise." + sufixo
+    return True, "Análise concluída." + sufixo
+
+
+def _tarefa_grafico(tarefa, deslocamento=0, dispositivo=ID_PADRAO):
+    g = registro.obter(dispositivo)
+    if g is None:
+        return False, "Dispositivo não encontrado."
+    tarefa.atualizar("lendo ensaio", 0)
+    with DURACAO_TAREFA.filho("gerar_grafico_ensaio").medir():
+        return gerar_grafico_ensaio(deslocamento, tarefa, g)
+
+
+def _tarefa_analise(tarefa, perfil=False, perfil_etapa=None, dispositivo=ID_PADRAO):
+    # A bancada é resolvida na hora de rodar: é então que o armazém colunar dela é descarregado.
+    g = registro.obter(dispositivo)
+    if g is None:
+        return False, "Dispositivo não encontrado."
+    with DURACAO_TAREFA.filho("executar_analise").medir():
+        return executar_analise(tarefa, perfil, perfil_etapa, g)
+
+
+fila = FilaTarefas()
+fila.registrar("grafico", _tarefa_grafico)
+fila.registrar("analise", _tarefa_analise)
+
+
+def _responder_enfileirada(tarefa, nova, descricao):
+    msg = f"{descricao} enfileirada." if nova else f"{descricao} já estava na fila."
+    return jsonify({"ok": True, "msg": msg, "tarefa": tarefa.para_dict()}), 202
 
 
 @app.get("/")
@@ -320,52 +707,297 @@ def api_ports():
     return jsonify([p.device for p in portas])
 
 
-@app.get("/api/status")
-def api_status():
+def _com_dispositivo(disp_id, funcao):
+    g = registro.obter(disp_id)
+    if g is None:
+        return jsonify({"ok": False, "msg": "Dispositivo não encontrado."}), 404
+    return funcao(g)
+
+
+def _status(g):
     return jsonify({
-        "conectado": gerenciador.conectado(),
+        "conectado": g.conectado(),
     })
 
 
-@app.post("/api/connect")
-def api_connect():
+def _conectar(g):
     data = request.get_json(silent=True) or {}
     porta = data.get("porta")
     if not porta:
         return jsonify({"ok": False, "msg": "Porta não informada."}), 400
-    ok, msg = gerenciador.conectar(porta)
+    ok, msg = registro.conectar(g.id, porta)
     return jsonify({"ok": ok, "msg": msg})
 
 
-@app.post("/api/disconnect")
-def api_disconnect():
-    gerenciador.desconectar()
+def _desconectar(g):
+    g.desconectar()
     return jsonify({"ok": True})
 
 
-@app.post("/api/send")
-def api_send():
+def _enviar(g):
     data = request.get_json(silent=True) or {}
     comando = data.get("comando", "").strip()
     if not comando:
         return jsonify({"ok": False, "msg": "Comando vazio."}), 400
-    ok, msg = gerenciador.enviar(comando)
+    ok, msg = g.enviar(comando)
     return jsonify({"ok": ok, "msg": msg})
 
 
-@app.get("/api/log")
-def api_log():
+def _log(g):
     desde = request.args.get("desde", "0")
     try:
         desde = int(desde)
     except ValueError:
         desde = 0
-    linhas, proximo = gerenciador.obter_log(desde)
-    return jsonify({"linhas": linhas, "proximo": proximo})
+    linhas, proximo, perdidas = g.obter_log(desde)
+    return jsonify({"linhas": linhas, "proximo": proximo, "perdidas": perdidas})
 
 
-@app.post("/api/grafico")
-def api_grafico():
+def _historico(g):
+    """Página do log de eventos em disco da bancada: ?antes=<seq>&limite=<n>."""
+    try:
+        antes = int(request.args["antes"]) if request.args.get("antes") else None
+        limite = int(request.args.get("limite", log_eventos.LIMITE_PAGINA_PADRAO))
+    except ValueError:
+        return jsonify({"ok": False, "msg": "Parâmetros inválidos."}), 400
+    limite = max(1, min(limite, 1000))
+    eventos, cursor = log_eventos.ler_eventos(
+        str(CAMINHO_EVENTOS), limite, antes, lambda evento: evento.get("dispositivo") == g.id)
+    return jsonify({"ok": True, "eventos": eventos, "antes": cursor})
+
+
+def _evento_sse(dados, evento=None, seq=None):
+    partes = []
+    if evento:
+        partes.append(f"event: {evento}")
+    if seq is not None:
+        partes.append(f"id: {seq}")
+    partes.extend(f"data: {linha}" for linha in dados.split("\n"))
+    return "\n".join(partes) + "\n\n"
+
+
+def _eventos(g):
+    """Server-Sent Events: linhas do log (id = sequência da última linha) e evento 'status'.
+
+    Na reconexão o navegador manda Last-Event-ID e recebe só o que perdeu; sem
+    ele, ``?desde=<seq>`` faz o mesmo. Todos os clientes da bancada leem o mesmo buffer.
+    """
+    inicio = request.headers.get("Last-Event-ID") or request.args.get("desde", "0")
+    try:
+        ultimo_seq = max(0, int(inicio))
+    except ValueError:
+        ultimo_seq = 0
+
+    def gerar(ultimo_seq):
+        versao_status = None
+        conectado = None
+        yield "retry: 2000\n\n"
+        while True:
+            linhas, seq, perdidas, versao = g.aguardar_eventos(
+                ultimo_seq, versao_status, INTERVALO_PING_SSE_S)
+            enviou = False
+            if versao != versao_status:
+                versao_status = versao
+                if g.conectado() != conectado:
+                    conectado = g.conectado()
+                    yield _evento_sse(json.dumps({"conectado": conectado}), evento="status")
+                    enviou = True
+            if perdidas:
+                linhas = [f"[... {perdidas} linha(s) de log perdida(s) ...]"] + linhas
+            if linhas:
+                yield _evento_sse("\n".join(linhas), seq=seq)
+                enviou = True
+            if not enviou:
+                yield ": ping\n\n"
+            ultimo_seq = seq
+
+    return Response(gerar(ultimo_seq), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def _dados_grafico(g):
+    try:
+        deslocamento = int(request.args.get("deslocamento", "0"))
+    except ValueError:
+        return jsonify({"ok": False, "msg": "Deslocamento inválido."}), 400
+    if deslocamento < 0:
+        return jsonify({"ok": False, "msg": "Deslocamento deve ser >= 0."}), 400
+    ok, dados = dados_grafico_ensaio(g.caminho_csv, deslocamento)
+    if not ok:
+        return jsonify({"ok": False, "msg": dados}), 404
+    return jsonify({"ok": True, "grafico": dados})
+
+
+def _resumo(g):
+    try:
+        dados = g.obter_resumo()
+    except OSError as e:
+        return jsonify({"ok": False, "msg": f"Erro ao ler resumo: {e}"}), 500
+    dados["ok"] = True
+    return jsonify(dados)
+
+
+def _por_dispositivo(valor):
+    return lambda: [({"dispositivo": g.id}, valor(g)) for g in registro.listar()]
+
+
+registro_metricas.coletor("tribo_serial_bytes_total", "counter", "Bytes lidos da porta serial.",
+                          _por_dispositivo(lambda g: g.contagem_serial[0]))
+registro_metricas.coletor("tribo_serial_linhas_total", "counter", "Linhas completas lidas da porta serial.",
+                          _por_dispositivo(lambda g: g.contagem_serial[1]))
+registro_metricas.coletor("tribo_log_linhas", "gauge", "Linhas no buffer do monitor serial.",
+                          _por_dispositivo(lambda g: g.ocupacao_log))
+registro_metricas.coletor("tribo_log_capacidade", "gauge", "Capacidade do buffer do monitor serial.",
+                          lambda: [({}, CAPACIDADE_LOG)])
+registro_metricas.coletor("tribo_eventos_descartados_total", "counter",
+                          "Eventos descartados com a fila do log em disco cheia.",
+                          lambda: [({}, log_persistente.descartados)] if log_persistente is not None else [])
+
+
+@app.before_request
+def _marcar_inicio_requisicao():
+    request.environ["tribo.inicio"] = time.perf_counter()
+
+
+@app.after_request
+def _medir_requisicao(resposta):
+    # Cada acesso pelo proxy `request` custa ~1 us; resolve uma vez só.
+    atual = request._get_current_object()
+    inicio = atual.environ.get("tribo.inicio")
+    if inicio is not None:
+        # Pelo padrão da rota, não pelo caminho: /files/<nome> é uma série só.
+        rota = atual.url_rule.rule if atual.url_rule is not None else "(sem rota)"
+        LATENCIA_REQUISICAO.filho(rota, atual.method).observar(time.perf_counter() - inicio)
+    return resposta
+
+
+@app.get("/api/metrics")
+def api_metrics():
+    return Response(registro_metricas.exportar(), content_type=metricas.TIPO_CONTEUDO)
+
+
+# Rotas sem dispositivo: atendem a bancada principal, como antes do suporte a várias.
+@app.get("/api/status")
+def api_status():
+    return _status(gerenciador)
+
+
+@app.post("/api/connect")
+def api_connect():
+    return _conectar(gerenciador)
+
+
+@app.post("/api/disconnect")
+def api_disconnect():
+    return _desconectar(gerenciador)
+
+
+@app.post("/api/send")
+def api_send():
+    return _enviar(gerenciador)
+
+
+@app.get("/api/log")
+def api_log():
+    return _log(gerenciador)
+
+
+@app.get("/api/historico")
+def api_historico():
+    return _historico(gerenciador)
+
+
+@app.get("/api/eventos")
+def api_eventos():
+    return _eventos(gerenciador)
+
+
+@app.get("/api/resumo")
+def api_resumo():
+    return _resumo(gerenciador)
+
+
+@app.get("/api/devices")
+def api_devices():
+    return jsonify({"ok": True, "dispositivos": [g.para_dict() for g in registro.listar()]})
+
+
+@app.post("/api/devices")
+def api_adicionar_device():
+    data = request.get_json(silent=True) or {}
+    porta = data.get("porta")
+    if not porta:
+        return jsonify({"ok": False, "msg": "Porta não informada."}), 400
+    ok, msg, g = registro.adicionar(porta, data.get("id") or None)
+    if g is None:
+        return jsonify({"ok": False, "msg": msg}), 400
+    return jsonify({"ok": ok, "msg": msg, "dispositivo": g.para_dict()}), (201 if ok else 200)
+
+
+@app.delete("/api/devices/<disp_id>")
+def api_remover_device(disp_id):
+    if registro.obter(disp_id) is None:
+        return jsonify({"ok": False, "msg": "Dispositivo não encontrado."}), 404
+    ok, msg = registro.remover(disp_id)
+    return jsonify({"ok": ok, "msg": msg}), (200 if ok else 400)
+
+
+@app.get("/api/devices/<disp_id>")
+def api_device(disp_id):
+    return _com_dispositivo(disp_id, lambda g: jsonify({"ok": True, "dispositivo": g.para_dict()}))
+
+
+@app.get("/api/devices/<disp_id>/status")
+def api_device_status(disp_id):
+    return _com_dispositivo(disp_id, _status)
+
+
+@app.post("/api/devices/<disp_id>/connect")
+def api_device_connect(disp_id):
+    return _com_dispositivo(disp_id, _conectar)
+
+
+@app.post("/api/devices/<disp_id>/disconnect")
+def api_device_disconnect(disp_id):
+    return _com_dispositivo(disp_id, _desconectar)
+
+
+@app.post("/api/devices/<disp_id>/send")
+def api_device_send(disp_id):
+    return _com_dispositivo(disp_id, _enviar)
+
+
+@app.get("/api/devices/<disp_id>/log")
+def api_device_log(disp_id):
+    return _com_dispositivo(disp_id, _log)
+
+
+@app.get("/api/devices/<disp_id>/historico")
+def api_device_historico(disp_id):
+    return _com_dispositivo(disp_id, _historico)
+
+
+@app.get("/api/devices/<disp_id>/eventos")
+def api_device_eventos(disp_id):
+    return _com_dispositivo(disp_id, _eventos)
+
+
+@app.get("/api/devices/<disp_id>/resumo")
+def api_device_resumo(disp_id):
+    return _com_dispositivo(disp_id, _resumo)
+
+
+@app.get("/api/devices/<disp_id>/grafico")
+def api_device_grafico(disp_id):
+    return _com_dispositivo(disp_id, _dados_grafico)
+
+
+@app.get("/api/grafico")
+def api_grafico_dados():
+    return _dados_grafico(gerenciador)
+
+
+def _enfileirar_grafico(g):
     data = request.get_json(silent=True) or {}
     try:
         deslocamento = int(data.get("deslocamento", 0))
@@ -373,19 +1005,85 @@ def api_grafico():
         return jsonify({"ok": False, "msg": "Deslocamento inválido."}), 400
     if deslocamento < 0:
         return jsonify({"ok": False, "msg": "Deslocamento deve ser >= 0."}), 400
-    ok, msg = gerar_grafico_ensaio(deslocamento)
-    return jsonify({"ok": ok, "msg": msg})
+    tarefa, nova = fila.enfileirar("grafico", {"deslocamento": deslocamento, "dispositivo": g.id})
+    return _responder_enfileirada(tarefa, nova, "Geração do gráfico")
+
+
+@app.post("/api/devices/<disp_id>/grafico")
+def api_device_gerar_grafico(disp_id):
+    return _com_dispositivo(disp_id, _enfileirar_grafico)
+
+
+@app.post("/api/grafico")
+def api_grafico():
+    return _enfileirar_grafico(gerenciador)
+
+
+def _enfileirar_analise(g):
+    data = request.get_json(silent=True) or {}
+    perfil_etapa = data.get("perfil_etapa") or None
+    if perfil_etapa is not None and perfil_etapa not in perfil_etapas.ETAPAS_ANALISE:
+        return jsonify({"ok": False, "msg": f"Etapa de perfil inválida (use {', '.join(perfil_etapas.ETAPAS_ANALISE)})."}), 400
+    parametros = {"dispositivo": g.id}
+    if data.get("perfil") or perfil_etapa:
+        parametros.update(perfil=True, perfil_etapa=perfil_etapa)
+    tarefa, nova = fila.enfileirar("analise", parametros)
+    return _responder_enfileirada(tarefa, nova, "Análise")
+
+
+@app.post("/api/devices/<disp_id>/analise")
+def api_device_analise(disp_id):
+    return _com_dispositivo(disp_id, _enfileirar_analise)
 
 
 @app.post("/api/analise")
 def api_analise():
-    ok, msg = executar_analise()
+    return _enfileirar_analise(gerenciador)
+
+
+def _perfil_analise(g):
+    """Relatório de perfil mais recente da bancada (os nomes levam data e hora)."""
+    dir_perfil = g.dir_saida_analise / "perfil"
+    relatorios = sorted(dir_perfil.glob("perfil_*.json")) if dir_perfil.is_dir() else []
+    if not relatorios:
+        return jsonify({"ok": False, "msg": "Nenhum perfil gravado; rode a análise com perfil."}), 404
+    with open(relatorios[-1], encoding="utf-8") as arquivo:
+        relatorio = json.load(arquivo)
+    return jsonify({"ok": True, "arquivo": relatorios[-1].name, "perfil": relatorio})
+
+
+@app.get("/api/devices/<disp_id>/analise/perfil")
+def api_device_analise_perfil(disp_id):
+    return _com_dispositivo(disp_id, _perfil_analise)
+
+
+@app.get("/api/analise/perfil")
+def api_analise_perfil():
+    return _perfil_analise(gerenciador)
+
+
+@app.get("/api/tarefas")
+def api_tarefas():
+    return jsonify({"ok": True, "tarefas": [t.para_dict() for t in fila.listar()]})
+
+
+@app.get("/api/tarefas/<tarefa_id>")
+def api_tarefa(tarefa_id):
+    tarefa = fila.obter(tarefa_id)
+    if tarefa is None:
+        return jsonify({"ok": False, "msg": "Tarefa não encontrada."}), 404
+    return jsonify({"ok": True, "tarefa": tarefa.para_dict()})
+
+
+@app.post("/api/tarefas/<tarefa_id>/cancelar")
+def api_cancelar_tarefa(tarefa_id):
+    ok, msg = fila.cancelar(tarefa_id)
     return jsonify({"ok": ok, "msg": msg})
 
 @app.post("/api/shutdown")
 def api_shutdown():
     func = request.environ.get("werkzeug.server.shutdown")
-    gerenciador.desconectar()
+    registro.desconectar_todos()
     if func is not None:
         func()
         return jsonify({"ok": True, "msg": "Servidor encerrado."})
@@ -395,32 +1093,91 @@ def api_shutdown():
     return jsonify({"ok": True, "msg": "Servidor encerrando..."})
 
 
+galeria = GaleriaGraficos(DIR_MINIATURAS)
+
+
+def _bases_graficos(g=None):
+    g = g or gerenciador
+    return [DIR_GRAFICOS_ENSAIO, g.dir_graficos_analise, g.dir_graficos_resumo]
+
+
+def _listar_graficos(g):
+    versoes = {}
+    listas = {}
+    # Em ordem inversa: o nome repetido fica com a versão da pasta que /files serve.
+    for chave, base in reversed(list(zip(("graficos_ensaio", "graficos_analise", "graficos_resumo"),
+                                         _bases_graficos(g)))):
+        versoes_base = galeria.versoes(base)
+        listas[chave] = sorted(versoes_base)
+        versoes.update((nome, str(v)) for nome, v in versoes_base.items())
+    listas["versoes"] = versoes
+    return jsonify(listas)
+
+
+@app.get("/api/devices/<disp_id>/graficos")
+def api_device_graficos(disp_id):
+    return _com_dispositivo(disp_id, _listar_graficos)
+
+
 @app.get("/api/graficos")
 def api_graficos():
-    def listar(dir_path):
-        if not dir_path.exists():
-            return []
-        return sorted([p.name for p in dir_path.iterdir() if p.is_file() and p.suffix.lower() in (".png", ".jpg", ".jpeg")])
+    return _listar_graficos(gerenciador)
 
-    return jsonify({
-        "graficos_ensaio": listar(DIR_GRAFICOS_ENSAIO),
-        "graficos_analise": listar(DIR_GRAFICOS_ANALISE),
-        "graficos_resumo": listar(DIR_GRAFICOS_RESUMO),
-    })
+
+def _enviar_imagem(caminho, versao):
+    versionado = request.args.get("v") == str(versao)
+    resposta = send_file(caminho, conditional=True, etag=True,
+                         max_age=MAX_AGE_VERSIONADO_S if versionado else None)
+    if versionado:
+        resposta.cache_control.immutable = True
+    return resposta
+
+
+def _enviar_arquivo(g, subpath):
+    encontrado = galeria.resolver(subpath, _bases_graficos(g))
+    if encontrado is None:
+        return ("Não encontrado", 404)
+    return _enviar_imagem(*encontrado)
+
+
+@app.get("/api/devices/<disp_id>/files/<path:subpath>")
+def api_device_files(disp_id, subpath):
+    return _com_dispositivo(disp_id, lambda g: _enviar_arquivo(g, subpath))
 
 
 @app.get("/files/<path:subpath>")
 def api_files(subpath):
-    bases = [DIR_GRAFICOS_ENSAIO, DIR_GRAFICOS_ANALISE, DIR_GRAFICOS_RESUMO]
-    for base in bases:
-        candidato = (base / subpath).resolve()
-        if base in candidato.parents and candidato.is_file():
-            return send_from_directory(base, candidato.name)
-    return ("Não encontrado", 404)
+    return _enviar_arquivo(gerenciador, subpath)
+
+
+def _enviar_miniatura(g, subpath):
+    encontrado = galeria.resolver(subpath, _bases_graficos(g))
+    if encontrado is None:
+        return ("Não encontrado", 404)
+    caminho, versao = encontrado
+    try:
+        miniatura = galeria.miniatura(caminho, versao)
+    except (OSError, ImportError) as e:
+        return (f"Miniatura indisponível: {e}", 500)
+    return _enviar_imagem(miniatura, versao)
+
+
+@app.get("/api/devices/<disp_id>/miniaturas/<path:subpath>")
+def api_device_miniaturas(disp_id, subpath):
+    return _com_dispositivo(disp_id, lambda g: _enviar_miniatura(g, subpath))
+
+
+@app.get("/miniaturas/<path:subpath>")
+def api_miniaturas(subpath):
+    return _enviar_miniatura(gerenciador, subpath)
 
 
 def main():
+    global preaquecedor, log_persistente
     porta = int(os.environ.get("TRIBO_UI_PORT", "8088"))
+    preaquecedor = preaquecimento.iniciar_do_ambiente()
+    log_persistente = log_eventos.LogEventos(CAMINHO_EVENTOS)
+    atexit.register(log_persistente.fechar)
     url = f"http://127.0.0.1:{porta}"
     try:
         webbrowser.open(url)
@@ -1,14 +1,27 @@
 const statusEl = document.getElementById('status');
 const portaEl = document.getElementById('porta');
+const dispositivoEl = document.getElementById('dispositivo');
 const logEl = document.getElementById('log');
 const modoDev = document.getElementById('modo-dev');
 const devArea = document.getElementById('dev-area');
 const listaGraficos = document.getElementById('lista-graficos');
 const imagemGrande = document.getElementById('imagem-grande');
 const imgPlaceholder = document.getElementById('img-placeholder'); // Novo elemento
+const graficoCanvas = document.getElementById('grafico-canvas');
 
 let logIndex = 0;
 let abaAtual = 'ensaio';
+let resumoVersao = -1;
+let tarefaAtual = null;
+let assinaturaGaleria = '';
+let intervalosPolling = [];
+let dispositivoAtual = 'principal';
+let eventosAtual = null;
+
+// Rotas da bancada selecionada; "principal" é a mesma das rotas /api/... antigas.
+function api(caminho) {
+  return `/api/devices/${encodeURIComponent(dispositivoAtual)}${caminho}`;
+}
 
 function setStatus(msg, ok=true) {
   statusEl.textContent = msg;
@@ -40,15 +53,60 @@ async function carregarPortas() {
   }
 }
 
-async function statusConexao() {
+function aplicarStatus(data) {
+  setStatus(data.conectado ? 'Conectado' : 'Desconectado', data.conectado);
+
+  // Habilita/Desabilita botões baseado no status
+  document.getElementById('btn-conectar').disabled = data.conectado;
+  document.getElementById('btn-desconectar').disabled = !data.conectado;
+}
+
+async function carregarDispositivos(selecionar = dispositivoAtual) {
   try {
-    const res = await fetch('/api/status');
+    const res = await fetch('/api/devices');
     const data = await res.json();
-    setStatus(data.conectado ? 'Conectado' : 'Desconectado', data.conectado);
+    dispositivoEl.innerHTML = '';
+    data.dispositivos.forEach(d => {
+      const opt = document.createElement('option');
+      opt.value = d.id;
+      opt.textContent = d.porta ? `${d.id} (${d.porta})` : d.id;
+      dispositivoEl.appendChild(opt);
+    });
+    const nova = document.createElement('option');
+    nova.value = '';
+    nova.textContent = '+ nova bancada';
+    dispositivoEl.appendChild(nova);
+    dispositivoEl.value = selecionar;
+  } catch (e) {
+    console.error("Erro ao carregar bancadas:", e);
+  }
+}
+
+function trocarDispositivo() {
+  if (!dispositivoEl.value) {
+    // "Nova bancada": continua mostrando a atual até conectar a nova.
+    setStatus('Escolha a porta e clique em Conectar para adicionar a bancada', true);
+    document.getElementById('btn-conectar').disabled = false;
+    return;
+  }
+  dispositivoAtual = dispositivoEl.value;
+  logEl.textContent = '';
+  logIndex = 0;
+  if (!document.getElementById('historico-log').hidden) carregarHistorico(true);
+  resumoVersao = -1;
+  if (eventosAtual) {
+    eventosAtual.close();
+    iniciarEventos();
+  }
+  statusConexao();
+  atualizarResumo();
+  atualizarGraficos();
+}
 
-    // Habilita/Desabilita botões baseado no status
-    document.getElementById('btn-conectar').disabled = data.conectado;
-    document.getElementById('btn-desconectar').disabled = !data.conectado;
+async function statusConexao() {
+  try {
+    const res = await fetch(api('/status'));
+    aplicarStatus(await res.json());
   } catch (e) {
     setStatus('Erro de conexão', false);
   }
@@ -60,13 +118,20 @@ async function conectar() {
 
   setStatus('Conectando...', true);
   try {
-    const res = await fetch('/api/connect', {
+    const nova = !dispositivoEl.value;
+    const res = await fetch(nova ? '/api/devices' : api('/connect'), {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({ porta })
     });
     const data = await res.json();
     setStatus(data.msg, data.ok);
+    if (nova && data.dispositivo) {
+      await carregarDispositivos(data.dispositivo.id);
+      trocarDispositivo();
+    } else {
+      carregarDispositivos();
+    }
     statusConexao(); // Atualiza estado dos botões
   } catch (e) {
     setStatus('Falha ao conectar', false);
@@ -75,7 +140,7 @@ async function conectar() {
 
 async function desconectar() {
   try {
-    await fetch('/api/disconnect', { method: 'POST' });
+    await fetch(api('/disconnect'), { method: 'POST' });
     setStatus('Desconectado', false);
     statusConexao();
   } catch (e) {
@@ -85,7 +150,7 @@ async function desconectar() {
 
 async function enviar(comando) {
   try {
-    const res = await fetch('/api/send', {
+    const res = await fetch(api('/send'), {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({ comando })
@@ -99,32 +164,215 @@ async function enviar(comando) {
   }
 }
 
-async function gerarGrafico() {
-  const deslocamento = parseInt(document.getElementById('g-offset').value || '0', 10);
-  setStatus('Gerando gráficos...', true);
+const esperar = ms => new Promise(resolve => setTimeout(resolve, ms));
+
+function mostrarProgresso(tarefa) {
+  const el = document.getElementById('tarefa-progresso');
+  const cancelar = document.getElementById('btn-cancelar-tarefa');
+  const ativa = tarefa && (tarefa.estado === 'pendente' || tarefa.estado === 'executando');
+  cancelar?.classList.toggle('oculto', !ativa);
+  if (!el) return;
+  el.textContent = ativa
+    ? `${tarefa.tipo}: ${tarefa.etapa} — ${tarefa.percentual.toFixed(0)}% (${tarefa.decorrido_s.toFixed(1)} s)`
+    : '';
+}
+
+// Acompanha a tarefa na fila do servidor até terminar; a página segue responsiva.
+async function acompanharTarefa(tarefa) {
+  tarefaAtual = tarefa.id;
+  while (tarefa.estado === 'pendente' || tarefa.estado === 'executando') {
+    mostrarProgresso(tarefa);
+    await esperar(500);
+    const res = await fetch(`/api/tarefas/${tarefa.id}`);
+    const data = await res.json();
+    if (!data.ok) break;
+    tarefa = data.tarefa;
+  }
+  if (tarefaAtual === tarefa.id) tarefaAtual = null;
+  mostrarProgresso(null);
+  return tarefa;
+}
+
+async function enfileirar(url, corpo, rotulo) {
+  setStatus(`${rotulo}...`, true);
   try {
-    const res = await fetch('/api/grafico', {
+    const res = await fetch(url, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ deslocamento })
+      body: JSON.stringify(corpo || {})
     });
     const data = await res.json();
-    setStatus(data.msg, data.ok);
+    if (!data.ok) {
+      setStatus(data.msg, false);
+      return;
+    }
+    const tarefa = await acompanharTarefa(data.tarefa);
+    setStatus(tarefa.msg || tarefa.estado, tarefa.estado === 'concluida');
     await atualizarGraficos();
   } catch (e) {
-    setStatus('Erro ao gerar', false);
+    setStatus(`Erro: ${rotulo.toLowerCase()}`, false);
+  }
+}
+
+function lerDeslocamento() {
+  return parseInt(document.getElementById('g-offset').value || '0', 10);
+}
+
+// Gráfico μ x tan(θ) do ensaio desenhado no navegador, com os mesmos elementos do PNG.
+function desenharGraficoEnsaio(g) {
+  const larguraCss = graficoCanvas.clientWidth || 800;
+  const alturaCss = larguraCss * 4.6 / 8;
+  const escala = window.devicePixelRatio || 1;
+  graficoCanvas.width = Math.round(larguraCss * escala);
+  graficoCanvas.height = Math.round(alturaCss * escala);
+  const ctx = graficoCanvas.getContext('2d');
+  ctx.setTransform(escala, 0, 0, escala, 0, 0);
+  ctx.clearRect(0, 0, larguraCss, alturaCss);
+
+  const margem = { esq: 62, dir: 16, topo: 52, base: 46 };
+  const largura = larguraCss - margem.esq - margem.dir;
+  const altura = alturaCss - margem.topo - margem.base;
+  const px = x => margem.esq + x / g.x_max * largura;
+  const py = y => margem.topo + altura - y / g.y_max * altura;
+
+  // Eixos e marcações
+  ctx.strokeStyle = '#333';
+  ctx.lineWidth = 1;
+  ctx.strokeRect(margem.esq, margem.topo, largura, altura);
+  ctx.fillStyle = '#333';
+  ctx.font = '11px sans-serif';
+  const passoX = passoMarcacao(g.x_max);
+  ctx.textAlign = 'center';
+  ctx.textBaseline = 'top';
+  for (let x = 0; x <= g.x_max + 1e-9; x += passoX) {
+    ctx.fillText(x.toFixed(passoX < 0.1 ? 2 : 1), px(x), margem.topo + altura + 4);
+  }
+  const passoY = passoMarcacao(g.y_max);
+  ctx.textAlign = 'right';
+  ctx.textBaseline = 'middle';
+  for (let y = 0; y <= g.y_max + 1e-9; y += passoY) {
+    ctx.fillText(y.toFixed(passoY < 0.1 ? 2 : 1), margem.esq - 4, py(y));
+  }
+  ctx.textAlign = 'center';
+  ctx.textBaseline = 'bottom';
+  ctx.font = '12px sans-serif';
+  ctx.fillText('tan(θ) do plano inclinado (–)', margem.esq + largura / 2, alturaCss - 4);
+  ctx.save();
+  ctx.translate(14, margem.topo + altura / 2);
+  ctx.rotate(-Math.PI / 2);
+  ctx.textBaseline = 'top';
+  ctx.fillText('Coeficiente de atrito (–)', 0, -10);
+  ctx.restore();
+  ctx.font = '13px sans-serif';
+  ctx.fillText('Coeficientes vs tan(θ) do ensaio', margem.esq + largura / 2, 20);
+  ctx.fillText(`LBC=${g.LBC} | LBT=${g.LBT} | m=${g.massa_g.toFixed(1)} g`, margem.esq + largura / 2, 38);
+
+  ctx.save();
+  ctx.beginPath();
+  ctx.rect(margem.esq, margem.topo, largura, altura);
+  ctx.clip();
+  const legenda = [];
+  // tan(θ) contra ela mesma é uma reta; os pontos seguem θ uniforme como no PNG.
+  ctx.strokeStyle = '#2c3e50';
+  ctx.lineWidth = 2.5;
+  ctx.beginPath();
+  for (let i = 0; i <= g.pontos; i++) {
+    const t = Math.tan(g.theta_max_deg * i / g.pontos * Math.PI / 180);
+    if (i === 0) ctx.moveTo(px(t), py(t)); else ctx.lineTo(px(t), py(t));
+  }
+  ctx.stroke();
+  legenda.push(['#2c3e50', 'tan(θ)']);
+  [['mu_s', '#c0392b', 'μ_s'], ['mu_d', '#e67e22', 'μ_d']].forEach(([campo, cor, rotulo]) => {
+    if (g[campo] === null) return;
+    ctx.strokeStyle = cor;
+    ctx.lineWidth = 2.2;
+    ctx.beginPath();
+    ctx.moveTo(margem.esq, py(g[campo]));
+    ctx.lineTo(margem.esq + largura, py(g[campo]));
+    ctx.stroke();
+    legenda.push([cor, `${rotulo} = ${g[campo].toFixed(3)}`]);
+  });
+  ctx.strokeStyle = '#555555';
+  ctx.lineWidth = 1;
+  ctx.setLineDash([5, 4]);
+  ctx.beginPath();
+  ctx.moveTo(px(g.tan_theta), margem.topo);
+  ctx.lineTo(px(g.tan_theta), margem.topo + altura);
+  ctx.stroke();
+  ctx.setLineDash([]);
+  ctx.fillStyle = '#333';
+  ctx.font = '11px sans-serif';
+  ctx.textAlign = 'left';
+  ctx.textBaseline = 'alphabetic';
+  const yTexto = py(g.tan_theta_max * 0.05);
+  ctx.fillText(`θ=${g.angulo_deg.toFixed(2)}°`, px(g.tan_theta * 1.02), yTexto);
+  ctx.fillText(`tan(θ)=${g.tan_theta.toFixed(3)}`, px(g.tan_theta * 1.02), yTexto - 14);
+  ctx.restore();
+
+  ctx.font = '12px sans-serif';
+  ctx.textAlign = 'left';
+  ctx.textBaseline = 'middle';
+  legenda.forEach(([cor, texto], i) => {
+    const y = margem.topo + 14 + i * 18;
+    ctx.strokeStyle = cor;
+    ctx.lineWidth = 2.5;
+    ctx.beginPath();
+    ctx.moveTo(margem.esq + 10, y);
+    ctx.lineTo(margem.esq + 34, y);
+    ctx.stroke();
+    ctx.fillStyle = '#333';
+    ctx.fillText(texto, margem.esq + 40, y);
+  });
+}
+
+// Passo "redondo" (1, 2 ou 5 x 10^n) para umas 5 marcações no eixo.
+function passoMarcacao(maximo) {
+  const bruto = maximo / 5;
+  const potencia = Math.pow(10, Math.floor(Math.log10(bruto)));
+  const fator = [1, 2, 5, 10].find(f => f * potencia >= bruto);
+  return fator * potencia;
+}
+
+function mostrarCanvas() {
+  graficoCanvas.style.display = 'block';
+  imagemGrande.style.display = 'none';
+  if(imgPlaceholder) imgPlaceholder.style.display = 'none';
+}
+
+// Só os números vêm do servidor; o desenho é feito aqui, sem matplotlib nem PNG.
+async function gerarGrafico() {
+  const deslocamento = lerDeslocamento();
+  try {
+    const res = await fetch(api(`/grafico?deslocamento=${deslocamento}`));
+    const data = await res.json();
+    if (!data.ok) {
+      setStatus(data.msg, false);
+      return;
+    }
+    mostrarCanvas();
+    desenharGraficoEnsaio(data.grafico);
+    setStatus(`Gráfico do ensaio g ${deslocamento}`, true);
+  } catch (e) {
+    setStatus('Erro ao carregar gráfico', false);
   }
 }
 
-async function rodarAnalise() {
-  setStatus('Rodando análise...', true);
+function exportarGraficoPng() {
+  return enfileirar(api('/grafico'), { deslocamento: lerDeslocamento() }, 'Gerando PNG');
+}
+
+function rodarAnalise() {
+  return enfileirar(api('/analise'), null, 'Rodando análise');
+}
+
+async function cancelarTarefa() {
+  if (tarefaAtual === null) return;
   try {
-    const res = await fetch('/api/analise', { method: 'POST' });
+    const res = await fetch(`/api/tarefas/${tarefaAtual}/cancelar`, { method: 'POST' });
     const data = await res.json();
     setStatus(data.msg, data.ok);
-    await atualizarGraficos();
   } catch (e) {
-    setStatus('Erro na análise', false);
+    setStatus('Erro ao cancelar', false);
   }
 }
 
@@ -139,34 +387,161 @@ async function encerrarServidor() {
   }
 }
 
+function anexarLog(linhas) {
+  if (!linhas.length) return;
+  const nearBottom = logEl.scrollTop + logEl.clientHeight >= logEl.scrollHeight - 50;
+  logEl.textContent += linhas.join('\n') + '\n';
+  if (nearBottom) logEl.scrollTop = logEl.scrollHeight;
+}
+
 async function atualizarLog() {
   try {
-    const res = await fetch(`/api/log?desde=${logIndex}`);
+    const res = await fetch(api(`/log?desde=${logIndex}`));
     const data = await res.json();
-    if (data.linhas && data.linhas.length) {
-      const nearBottom = logEl.scrollTop + logEl.clientHeight >= logEl.scrollHeight - 50;
-      logEl.textContent += data.linhas.join('\n') + '\n';
-      if (nearBottom) logEl.scrollTop = logEl.scrollHeight;
-    }
+    if (data.perdidas) anexarLog([`[... ${data.perdidas} linha(s) de log perdida(s) ...]`]);
+    if (data.linhas) anexarLog(data.linhas);
     logIndex = data.proximo || logIndex;
   } catch (e) {
     // Silencia erros de log para não poluir console
   }
 }
 
-function criarItemGrafico(nome, base) {
+// Histórico do log em disco (/api/historico), paginado do mais novo para o mais antigo.
+let historicoAntes = null;
+
+async function carregarHistorico(reiniciar = false) {
+  const historicoEl = document.getElementById('historico');
+  const btnAnteriores = document.getElementById('btn-historico-anteriores');
+  if (reiniciar) {
+    historicoEl.textContent = '';
+    historicoAntes = null;
+  }
+  const antes = historicoAntes === null ? '' : `&antes=${historicoAntes}`;
+  try {
+    const res = await fetch(api(`/historico?limite=200${antes}`));
+    const data = await res.json();
+    if (!data.ok) {
+      setStatus(data.msg, false);
+      return;
+    }
+    const linhas = data.eventos.map(ev => `[${ev.ts.replace('T', ' ').slice(0, 19)}] ${ev.msg}`);
+    const altura = historicoEl.scrollHeight;
+    if (linhas.length) historicoEl.textContent = linhas.join('\n') + '\n' + historicoEl.textContent;
+    else if (!historicoEl.textContent) historicoEl.textContent = 'Nenhum evento gravado.\n';
+    // Mantém à vista o trecho que já estava sendo lido.
+    historicoEl.scrollTop = reiniciar ? historicoEl.scrollHeight : historicoEl.scrollHeight - altura;
+    historicoAntes = data.antes;
+    btnAnteriores.disabled = data.antes === null;
+  } catch (e) {
+    console.error(e);
+  }
+}
+
+function alternarHistorico() {
+  const painel = document.getElementById('historico-log');
+  painel.hidden = !painel.hidden;
+  if (!painel.hidden) carregarHistorico(true);
+}
+
+function iniciarPolling() {
+  if (intervalosPolling.length) return;
+  intervalosPolling = [setInterval(atualizarLog, 1000), setInterval(statusConexao, 2000)];
+}
+
+// Log e status chegam por Server-Sent Events; sem suporte, ou se o servidor
+// recusar o stream, volta ao polling de /api/log e /api/status.
+function iniciarEventos() {
+  if (!window.EventSource) {
+    iniciarPolling();
+    return;
+  }
+  const eventos = new EventSource(api('/eventos'));
+  eventosAtual = eventos;
+  // Reconexões após queda são automáticas e retomam pelo Last-Event-ID.
+  eventos.onmessage = ev => {
+    anexarLog(ev.data.split('\n'));
+    logIndex = parseInt(ev.lastEventId, 10) || logIndex;
+  };
+  eventos.addEventListener('status', ev => aplicarStatus(JSON.parse(ev.data)));
+  eventos.onerror = () => {
+    if (eventos.readyState !== EventSource.CLOSED) return;
+    // /api/log usa a mesma numeração: o polling continua de onde o stream parou.
+    iniciarPolling();
+  };
+}
+
+function formatarNumero(valor, casas = 4) {
+  return valor === null || valor === undefined ? '-' : Number(valor).toFixed(casas);
+}
+
+async function atualizarResumo() {
+  try {
+    const res = await fetch(api('/resumo'));
+    const data = await res.json();
+    if (!data.ok) return;
+    // Só redesenha quando chegou ensaio novo.
+    const versao = data.ensaios_validos + data.ensaios_descartados;
+    if (versao === resumoVersao) return;
+    resumoVersao = versao;
+
+    document.getElementById('resumo-contagem').textContent =
+      `${data.ensaios_validos} válidos | ${data.ensaios_descartados} descartados`;
+    const container = document.getElementById('resumo-parcial');
+    if (!data.grupos.length) {
+      container.innerHTML = '<div style="padding:10px; color:#666;">Nenhum ensaio válido até agora.</div>';
+      return;
+    }
+
+    const tabela = document.createElement('table');
+    tabela.className = 'tabela-resumo';
+    tabela.innerHTML = '<thead><tr><th>LBT</th><th>LBC</th><th>Massa (g)</th><th>mu_s</th><th>±</th><th>n</th>' +
+      '<th>mu_d</th><th>±</th><th>n</th><th>Tempo (s)</th><th>Delta W (J)</th></tr></thead>';
+    const corpo = document.createElement('tbody');
+    data.grupos.forEach(g => {
+      const linha = document.createElement('tr');
+      [
+        g.LBT, g.LBC, formatarNumero(g.massa_g, 1),
+        formatarNumero(g.mu_s_media), formatarNumero(g.mu_s_std), g.mu_s_count,
+        formatarNumero(g.mu_d_media), formatarNumero(g.mu_d_std), g.mu_d_count,
+        formatarNumero(g.tempo_media, 3), formatarNumero(g.comparacao_trabalho_delta_J),
+      ].forEach(valor => {
+        const celula = document.createElement('td');
+        celula.textContent = valor;
+        linha.appendChild(celula);
+      });
+      corpo.appendChild(linha);
+    });
+    tabela.appendChild(corpo);
+    container.innerHTML = '';
+    container.appendChild(tabela);
+  } catch (e) {
+    // Silencia erros do resumo, como no log
+  }
+}
+
+function criarItemGrafico(nome, versao) {
   // Alterado de 'button' para 'div' para evitar estilos de botão padrão (cinza/centralizado)
   const item = document.createElement('div');
   item.className = 'arquivo';
-  item.textContent = nome;
+  // Com ?v= a URL muda a cada versão do arquivo: o navegador reaproveita o que já baixou.
+  const sufixo = versao ? `?v=${versao}` : '';
+  const miniatura = document.createElement('img');
+  miniatura.className = 'miniatura';
+  miniatura.loading = 'lazy';
+  miniatura.alt = '';
+  miniatura.src = api(`/miniaturas/${encodeURIComponent(nome)}${sufixo}`);
+  const rotulo = document.createElement('span');
+  rotulo.textContent = nome;
+  item.append(miniatura, rotulo);
 
   item.addEventListener('click', () => {
-    // Atualiza a imagem
-    imagemGrande.src = `/files/${nome}`;
+    // Só agora baixa a imagem em tamanho real
+    imagemGrande.src = api(`/files/${encodeURIComponent(nome)}${sufixo}`);
     imagemGrande.alt = nome;
 
     // IMPORTANTE: Torna a imagem visível e esconde o placeholder
     imagemGrande.style.display = 'block';
+    graficoCanvas.style.display = 'none';
     if(imgPlaceholder) imgPlaceholder.style.display = 'none';
 
     // Feedback visual de seleção na lista
@@ -179,14 +554,20 @@ function criarItemGrafico(nome, base) {
 
 async function atualizarGraficos() {
   try {
-    const res = await fetch('/api/graficos');
+    const res = await fetch(api('/graficos'));
     const data = await res.json();
-    listaGraficos.innerHTML = '';
 
     let lista = [];
     if (abaAtual === 'ensaio') lista = data.graficos_ensaio || [];
     if (abaAtual === 'analise') lista = data.graficos_analise || [];
     if (abaAtual === 'resumo') lista = data.graficos_resumo || [];
+    const versoes = data.versoes || {};
+
+    // Nada mudou: mantém a lista (e a seleção) como está.
+    const assinatura = dispositivoAtual + '|' + abaAtual + '|' + lista.map(nome => `${nome}@${versoes[nome]}`).join('|');
+    if (assinatura === assinaturaGaleria) return;
+    assinaturaGaleria = assinatura;
+    listaGraficos.innerHTML = '';
 
     if (!lista.length) {
       listaGraficos.innerHTML = '<div style="padding:10px; color:#666;">Nenhum gráfico encontrado.</div>';
@@ -195,7 +576,7 @@ async function atualizarGraficos() {
 
     const grid = document.createElement('div');
     grid.className = 'lista';
-    lista.forEach(nome => grid.appendChild(criarItemGrafico(nome)));
+    lista.forEach(nome => grid.appendChild(criarItemGrafico(nome, versoes[nome])));
     listaGraficos.appendChild(grid);
   } catch (e) {
     console.error("Erro ao atualizar gráficos", e);
@@ -244,11 +625,16 @@ function registrarComandos() {
   });
 
   document.getElementById('btn-g')?.addEventListener('click', gerarGrafico);
+  document.getElementById('btn-g-png')?.addEventListener('click', exportarGraficoPng);
   document.getElementById('btn-analise')?.addEventListener('click', rodarAnalise);
+  document.getElementById('btn-cancelar-tarefa')?.addEventListener('click', cancelarTarefa);
   document.getElementById('btn-shutdown')?.addEventListener('click', encerrarServidor);
+  document.getElementById('btn-historico')?.addEventListener('click', alternarHistorico);
+  document.getElementById('btn-historico-anteriores')?.addEventListener('click', () => carregarHistorico());
 }
 
 function registrarConexao() {
+  dispositivoEl?.addEventListener('change', trocarDispositivo);
   document.getElementById('btn-atualizar')?.addEventListener('click', carregarPortas);
   document.getElementById('btn-conectar')?.addEventListener('click', conectar);
   document.getElementById('btn-desconectar')?.addEventListener('click', desconectar);
@@ -264,8 +650,10 @@ function registrarDev() {
 
 async function iniciar() {
   await carregarPortas();
+  await carregarDispositivos();
   await statusConexao();
   await atualizarGraficos();
+  await atualizarResumo();
   registrarComandos();
   registrarConexao();
   registrarAba();
@@ -273,8 +661,8 @@ async function iniciar() {
   document.getElementById('btn-atualizar-graficos')?.addEventListener('click', atualizarGraficos);
 
   // Loops de atualização
-  setInterval(atualizarLog, 1000);
-  setInterval(statusConexao, 2000);
+  iniciarEventos();
+  setInterval(atualizarResumo, 2000);
 }
 
 // Inicia a aplicação